@@ -0,0 +1,82 @@
+"""Catalog build benchmark: rows/sec and peak RSS of the columnar engine.
+
+Each size runs in its own interpreter so ru_maxrss reflects that size only.
+
+    python -m benchmarks.bench_catalog
+    python -m benchmarks.bench_catalog --rows 10000 1000000 --legacy
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import peak_rss_mb, run_child
+
+DEFAULT_ROWS = [10_000, 1_000_000, 10_000_000]
+
+
+def child(rows, engine):
+    from merch_store.catalog import synthetic
+
+    source = synthetic(rows)
+    supplier, retail, shipping, _, _ = source.money_columns()
+    day = source.day
+    category = source.category.decode()
+    name = source.name
+    channels = source.channels.decode()
+    del source
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if engine == 'columnar':
+        from merch_store.catalog import Catalog
+
+        Catalog.from_dollars(day, category, name, supplier, retail, shipping, channels)
+    else:
+        import pandas as pd
+
+        df = pd.DataFrame({
+            'Day': day.tolist(),
+            'Product_Category': category.tolist(),
+            'Product_Name': name.tolist(),
+            'Supplier_Cost': supplier.tolist(),
+            'Retail_Price': retail.tolist(),
+            'Shipping_Cost': shipping.tolist(),
+        })
+        df['Total_Cost'] = df['Supplier_Cost'] + df['Shipping_Cost']
+        df['Gross_Profit'] = df['Retail_Price'] - df['Total_Cost']
+        df['Profit_Margin_%'] = ((df['Gross_Profit'] / df['Retail_Price']) * 100).round(2)
+        df['Marketing_Channels'] = channels.tolist()
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'engine': engine,
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed,
+        'input_rss_mb': baseline,
+        'peak_rss_mb': peak_rss_mb(),
+    }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--legacy', action='store_true', help='also time the pandas dict-of-lists build')
+    parser.add_argument('--child', choices=['columnar', 'pandas'], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.rows[0], args.child)
+        return
+
+    engines = ['columnar'] + (['pandas'] if args.legacy else [])
+    print(f"{'engine':<10} {'rows':>12} {'rows/sec':>14} {'input RSS MB':>13} {'peak RSS MB':>12}")
+    for rows in args.rows:
+        for engine in engines:
+            r = run_child('benchmarks.bench_catalog', '--child', engine, '--rows', rows)
+            print(f"{r['engine']:<10} {r['rows']:>12,} {r['rows_per_sec']:>14,.0f} "
+                  f"{r['input_rss_mb']:>13.1f} {r['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Binary catalog: CSV->binary conversion and product-of-the-day lookup.
+
+The daily lookup is timed against pd.read_csv + filter. The round trip
+is checked column by column in tests/test_catalog_bin.py.
+
+    python -m benchmarks.bench_catalog_bin --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from merch_store.catalog import synthetic
+from merch_store.catalog_bin import CatalogFile, csv_to_bin
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'catalog.csv')
+        bin_path = os.path.join(tmp, 'catalog.bin')
+
+        synthetic(args.rows).to_csv(csv_path)
+        start = time.perf_counter()
+        csv_to_bin(csv_path, bin_path)
+        convert = time.perf_counter() - start
+        print(f"csv -> bin: {args.rows / convert:,.0f} rows/sec, "
+              f"{os.path.getsize(csv_path) / 2**20:.1f} MB -> {os.path.getsize(bin_path) / 2**20:.1f} MB")
+
+        import pandas as pd
+
+        day = args.rows // 2
+        start = time.perf_counter()
+        df = pd.read_csv(csv_path)
+        df[df['Day'] == day].iloc[0]
+        pandas_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with CatalogFile(bin_path) as cat:
+            cat.row(cat.find_day(day))
+        open_lookup_s = time.perf_counter() - start
+
+        days = np.random.default_rng(0).integers(1, args.rows + 1, args.lookups).tolist()
+        with CatalogFile(bin_path) as cat:
+            start = time.perf_counter()
+            for d in days:
+                cat.row(cat.find_day(d))
+            warm = (time.perf_counter() - start) / len(days)
+
+        print(f"pd.read_csv + filter: {pandas_s * 1e3:10.2f} ms")
+        print(f"mmap open + lookup:   {open_lookup_s * 1e3:10.2f} ms")
+        print(f"warm lookup:          {warm * 1e6:10.2f} us")
+
+
+if __name__ == '__main__':
+    main()
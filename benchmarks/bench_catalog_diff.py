@@ -0,0 +1,100 @@
+"""Catalog diff: fingerprint and diff time and memory with a small daily churn.
+
+That a sync pushes only the changed rows, to Square and to the products
+on Printful, is checked in tests/test_catalog_diff.py.
+
+    python -m benchmarks.bench_catalog_diff --rows 1000000 --churn 0.01
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.common import peak_rss_mb
+from merch_store.catalog import Catalog, Categorical, synthetic
+from merch_store.catalog_diff import SyncState, fingerprints
+
+
+def churn(catalog, fraction, seed=1):
+    """Reprice half of ``fraction`` of the rows, delete a quarter and add a quarter as new products."""
+    rng = np.random.default_rng(seed)
+    n = len(catalog)
+    k = max(4, int(n * fraction))
+    touched = rng.choice(n, k, replace=False)
+    updated, deleted = touched[:k // 2], touched[k // 2:k // 2 + k // 4]
+    retail = catalog.retail_cents.copy()
+    retail[updated] += 100
+    keep = np.setdiff1d(np.arange(n), deleted)
+    added = synthetic(k - len(updated) - len(deleted), seed=seed + 1)
+    added.day += n
+    added.name = np.array([f"New Product {d}" for d in added.day.tolist()], dtype=object)
+
+    def join(a, b):
+        return np.concatenate([a[keep], b])
+
+    current = Catalog(
+        join(catalog.day, added.day),
+        Categorical(join(catalog.category.codes, added.category.codes), catalog.category.labels),
+        join(catalog.name, added.name),
+        join(catalog.supplier_cents, added.supplier_cents),
+        join(retail, added.retail_cents),
+        join(catalog.shipping_cents, added.shipping_cents),
+        Categorical(join(catalog.channels.codes, added.channels.codes), catalog.channels.labels),
+    )
+    return current, len(updated), len(deleted), len(added)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--churn', type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    base = synthetic(args.rows)
+    current, updated, deleted, added = churn(base, args.churn)
+    with tempfile.TemporaryDirectory() as tmp:
+        state = SyncState.for_system('square', tmp)
+        state.commit(state.diff(base))
+        start = time.perf_counter()
+        state.save()
+        save = time.perf_counter() - start
+        size = os.path.getsize(state.path)
+
+        start = time.perf_counter()
+        state = SyncState.for_system('square', tmp)
+        load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fps = fingerprints(current)
+        hashed = time.perf_counter() - start
+        start = time.perf_counter()
+        diff = state.diff(current, fps)
+        diffed = time.perf_counter() - start
+
+        # Separate pass: tracemalloc slows the per-string hashing down a lot.
+        tracemalloc.start()
+        state.diff(current)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        start = time.perf_counter()
+        state.commit(diff)
+        committed = time.perf_counter() - start
+
+    print(f"rows: {len(current):,}  churn: {updated} updated, {deleted} deleted, {added} added")
+    print(f"diff: {diff!r}")
+    print(f"fingerprint:   {hashed * 1e3:10.1f} ms  ({len(current) / hashed / 1e6:.1f} M rows/s)")
+    print(f"diff:          {diffed * 1e3:10.1f} ms")
+    print(f"commit:        {committed * 1e3:10.1f} ms")
+    print(f"state save:    {save * 1e3:10.1f} ms  ({size / 2**20:.1f} MB)")
+    print(f"state load:    {load * 1e3:10.1f} ms")
+    print(f"traced peak:   {peak / 2**20:10.1f} MB  (fingerprint + diff)")
+    print(f"peak RSS:      {peak_rss_mb():10.1f} MB")
+    print(f"pushed:        {len(diff):,} of {len(current):,} rows "
+          f"({len(diff) / len(current):.2%}) instead of a full re-upload")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Catalog index: build, reopen, append and lookup latency vs the pandas scan.
+
+    python -m benchmarks.bench_catalog_index --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from merch_store.catalog import synthetic
+from merch_store.catalog_index import CatalogIndex
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--append-rows', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.csv')
+        synthetic(args.rows).to_csv(path)
+
+        start = time.perf_counter()
+        CatalogIndex.open(path)
+        print(f"build index:   {time.perf_counter() - start:10.3f} s")
+        start = time.perf_counter()
+        index = CatalogIndex.open(path)
+        print(f"reopen index:  {(time.perf_counter() - start) * 1e3:10.3f} ms")
+
+        extra = synthetic(args.append_rows, seed=1)
+        extra.day += args.rows
+        start = time.perf_counter()
+        index.append(extra)
+        print(f"append {args.append_rows:,} rows: {(time.perf_counter() - start) * 1e3:8.3f} ms")
+
+        import pandas as pd
+
+        df = pd.read_csv(path)
+        days = np.random.default_rng(0).integers(1, args.rows + 1, args.lookups).tolist()
+        it = iter(days * 2)
+        scan = timed(lambda: df[df['Day'] == next(it)].iloc[0], min(args.lookups, 50))
+        it = iter(days)
+        rows = timed(lambda: index.rows_for_day(next(it)), args.lookups)
+        it = iter(days)
+        fetch = timed(lambda: index.row_for_day(next(it)), args.lookups)
+        names = [f"Synthetic Product {d}" for d in days]
+        it = iter(names)
+        by_name = timed(lambda: index.row_for_name(next(it)), args.lookups)
+        by_category = timed(lambda: index.rows_for_category('Drinkware'), args.lookups)
+
+        print(f"pandas boolean scan:       {scan * 1e6:12.1f} us")
+        print(f"index Day -> row number:   {rows * 1e6:12.1f} us")
+        print(f"index Day -> parsed row:   {fetch * 1e6:12.1f} us")
+        print(f"index name -> parsed row:  {by_name * 1e6:12.1f} us")
+        print(f"index category postings:   {by_category * 1e6:12.1f} us")
+
+
+if __name__ == '__main__':
+    main()
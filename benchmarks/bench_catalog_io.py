@@ -0,0 +1,90 @@
+"""Streaming catalog I/O vs the pandas read_csv/to_csv path.
+
+Generates a synthetic catalog CSV of the requested size (5 GB by default)
+with the chunked writer, then times the daily "product of the day" lookup
+and a full write, each in a fresh interpreter so peak RSS is per-run.
+
+    python -m benchmarks.bench_catalog_io --size-gb 0.5 --path /tmp/catalog.csv
+"""
+import argparse
+import json
+import os
+import time
+
+from benchmarks.common import peak_rss_mb, run_child
+
+CHUNK_ROWS = 1_000_000
+
+
+def generate(path, size_bytes):
+    from merch_store.catalog import synthetic
+    from merch_store.catalog_io import CatalogWriter
+
+    with CatalogWriter(path) as writer:
+        seed = 0
+        while os.path.getsize(path) < size_bytes:
+            chunk = synthetic(CHUNK_ROWS, seed)
+            chunk.day += writer.rows_written
+            writer.write(chunk)
+            writer._file.flush()
+            seed += 1
+    return writer.rows_written
+
+
+def child(task, path, day):
+    start = time.perf_counter()
+    if task == 'lookup-pandas':
+        import pandas as pd
+
+        df = pd.read_csv(path)
+        df[df['Day'] == day].iloc[0]
+    elif task == 'lookup-stream':
+        from merch_store.catalog_io import find_first
+
+        find_first(path, Day=day)
+    elif task == 'write-pandas':
+        import pandas as pd
+
+        pd.read_csv(path).to_csv(path + '.out', index=False)
+    elif task == 'write-stream':
+        from merch_store.catalog_io import read_chunks, write_chunks
+
+        write_chunks(path + '.out', read_chunks(path))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'task': task, 'seconds': elapsed, 'peak_rss_mb': peak_rss_mb()}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-gb', type=float, default=5.0)
+    parser.add_argument('--path', default='bench_catalog.csv')
+    parser.add_argument('--day', type=int, default=17, help='Day looked up by the daily job')
+    parser.add_argument('--skip-write', action='store_true')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.path, args.day)
+        return
+
+    size = int(args.size_gb * (1 << 30))
+    if not os.path.exists(args.path) or os.path.getsize(args.path) < size:
+        start = time.perf_counter()
+        rows = generate(args.path, size)
+        print(f"generated {rows:,} rows in {time.perf_counter() - start:.1f}s")
+    print(f"catalog: {os.path.getsize(args.path) / (1 << 30):.2f} GB")
+
+    tasks = ['lookup-pandas', 'lookup-stream']
+    if not args.skip_write:
+        tasks += ['write-pandas', 'write-stream']
+    print(f"{'task':<15} {'seconds':>10} {'peak RSS MB':>12}")
+    for task in tasks:
+        r = run_child('benchmarks.bench_catalog_io', '--child', task,
+                      '--path', args.path, '--day', args.day)
+        print(f"{r['task']:<15} {r['seconds']:>10.3f} {r['peak_rss_mb']:>12.1f}")
+    if os.path.exists(args.path + '.out'):
+        os.remove(args.path + '.out')
+
+
+if __name__ == '__main__':
+    main()
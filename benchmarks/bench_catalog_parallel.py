@@ -0,0 +1,47 @@
+"""Parallel catalog build scaling across worker counts vs the serial build.
+
+That every partitioning gives exactly the serial metrics and top-K, even
+with heavy ties in Gross_Profit, is checked in tests/test_catalog_parallel.py.
+
+    python -m benchmarks.bench_catalog_parallel --rows 5000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import time
+
+from merch_store.catalog import Catalog, synthetic
+from merch_store.catalog_parallel import PARTITIONS, build_parallel
+
+
+def inputs_of(catalog):
+    """Same rows, metrics not yet computed."""
+    return Catalog(catalog.day, catalog.category, catalog.name, catalog.supplier_cents,
+                   catalog.retail_cents, catalog.shipping_cents, catalog.channels, compute=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--partition', choices=PARTITIONS, default='hash')
+    parser.add_argument('--top', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    catalog = synthetic(args.rows)
+    inputs = inputs_of(catalog)
+    start = time.perf_counter()
+    inputs.compute_metrics()
+    inputs.top_k(args.top)
+    serial = time.perf_counter() - start
+
+    print(f"rows: {args.rows:,}  cpus: {os.cpu_count()}  partition: {args.partition}")
+    print(f"serial:        {serial:8.3f} s")
+    for workers in args.workers:
+        start = time.perf_counter()
+        build_parallel(inputs_of(catalog), workers, args.top, partition=args.partition)
+        elapsed = time.perf_counter() - start
+        print(f"{workers} worker(s):   {elapsed:8.3f} s  ({serial / elapsed:4.2f}x serial)")
+
+
+if __name__ == '__main__':
+    main()
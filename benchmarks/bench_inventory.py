@@ -0,0 +1,79 @@
+"""API2Cart inventory sync: SKU updates/sec and per-store lag vs serial GETs.
+
+A skewed stream of repeated stock changes, then one change to each of
+many distinct SKUs, is pushed to three stores on a local FakeAPI2Cart as
+batch jobs. Last write wins, unknown SKUs and broken jobs are checked in
+tests/test_inventory.py.
+
+    python -m benchmarks.bench_inventory --updates 100000 --skus 20000
+"""
+import argparse
+import asyncio
+import http.client
+import time
+from urllib.parse import urlencode, urlsplit
+
+from testbed.fakes import FakeAPI2Cart
+from testbed.workloads import STORES, changes, push
+
+
+def legacy_sync(url, stream):
+    """The guide's client: one GET per SKU per store, all parameters in the query string."""
+    parts = urlsplit(url)
+    for sku, quantity in stream:
+        for store_key in STORES.values():
+            conn = http.client.HTTPConnection(parts.hostname, parts.port)
+            conn.request('GET', f"{parts.path}/product.update.json?" + urlencode(
+                {'api_key': 'test', 'store_key': store_key, 'product_id': sku, 'quantity': quantity}))
+            conn.getresponse().read()
+            conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=100_000)
+    parser.add_argument('--skus', type=int, default=20_000)
+    parser.add_argument('--latency', type=float, default=0.03)
+    parser.add_argument('--batch', type=int, default=100)
+    parser.add_argument('--inflight', type=int, default=4)
+    parser.add_argument('--window', type=float, default=0.05)
+    parser.add_argument('--legacy-updates', type=int, default=100)
+    parser.add_argument('--poll', type=float, default=0.01, help='first batch.job.result poll delay (s)')
+    args = parser.parse_args(argv)
+
+    stream = changes(args.updates, args.skus)
+    fake = FakeAPI2Cart(latency=args.latency).start_in_thread()
+    try:
+        start = time.perf_counter()
+        legacy_sync(fake.url, stream[:args.legacy_updates])
+        legacy = args.legacy_updates / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        reports = asyncio.run(push(fake.url, stream, batch_size=args.batch, max_inflight=args.inflight,
+                                   window=args.window, rates={}, poll=args.poll))
+        elapsed = time.perf_counter() - start
+        writes = sum(fake.writes.values())
+
+        # Every change to a different SKU: nothing to coalesce.
+        distinct_stream = [(f"SKU-{i:06d}", i % 500) for i in range(args.skus)]
+        start = time.perf_counter()
+        asyncio.run(push(fake.url, distinct_stream, batch_size=args.batch, max_inflight=args.inflight,
+                         window=args.window, rates={}, poll=args.poll))
+        distinct = time.perf_counter() - start
+    finally:
+        fake.stop_thread()
+
+    print(f"changes: {args.updates:,} to {args.skus:,} SKUs x {len(STORES)} stores, "
+          f"server latency {args.latency * 1e3:.0f} ms")
+    print(f"legacy serial GETs:     {legacy:10,.1f} SKU updates/s (each pushed to every store)")
+    print(f"batched, skewed:        {args.updates / elapsed:10,.1f} SKU updates/s  "
+          f"({writes:,} remote writes, {elapsed:.2f} s)")
+    print(f"batched, all distinct:  {args.skus / distinct:10,.1f} SKU updates/s  "
+          f"({args.skus:,} SKUs, {distinct:.2f} s)")
+    for report in reports.values():
+        print(f"  {report.name:7s} batches {report.batches:6,}  sent {report.sent:8,}  coalesced "
+              f"{report.coalesced:8,}  lag p50 {report.lag(50) * 1e3:7.1f} ms  p99 {report.lag(99) * 1e3:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Job queue throughput with N workers.
+
+That the queue survives killed workers, dead-letters jobs whose last
+lease runs out and renews the leases of long jobs is checked in
+tests/test_jobs.py.
+
+    python -m benchmarks.bench_jobs --jobs 5000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from merch_store.jobs import JobQueue, WorkerPool
+
+
+def noop(payload):
+    pass
+
+
+def throughput(tmp, jobs, workers):
+    path = os.path.join(tmp, f'throughput-{workers}.sqlite3')
+    queue = JobQueue(path)
+    queue.enqueue_many([('noop', {'n': n}, 'bench') for n in range(jobs)])
+    queue.close()
+    start = time.perf_counter()
+    WorkerPool(path, {'noop': 'benchmarks.bench_jobs:noop'}, workers, poll=0.05).run_until_idle()
+    return jobs / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            print(f"{workers:>2} workers: {throughput(tmp, args.jobs, workers):10,.0f} jobs/sec")
+
+
+if __name__ == '__main__':
+    main()
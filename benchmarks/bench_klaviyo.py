@@ -0,0 +1,75 @@
+"""Klaviyo announcements: render throughput and digest vs per-product campaigns.
+
+That digests cover every product exactly once, escaped, that cached
+renders match uncached ones and that the single-product email matches the
+guide's f-string for plain names is checked in tests/test_klaviyo.py.
+
+    python -m benchmarks.bench_klaviyo --products 100000 --per-day 8
+"""
+import argparse
+import asyncio
+import time
+
+from merch_store.klaviyo import (DIGEST_PRODUCT, KlaviyoClient, RenderCache, digest_html, new_product_html,
+                                 plan_digests, send_product_digests)
+from testbed.fakes import FakeKlaviyo
+from testbed.workloads import launches, legacy_html
+
+
+async def create_all(url, payloads, connections):
+    async with KlaviyoClient('k', url, max_connections=connections, rate=None) as client:
+        return await asyncio.gather(*(client.create_campaign(p) for p in payloads))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--per-day', type=int, default=8, help='products launching on the same day')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake Klaviyo latency, seconds')
+    parser.add_argument('--campaign-products', type=int, default=400)
+    args = parser.parse_args(argv)
+
+    products = launches(args.products, args.per_day)
+    timings = {}
+    start = time.perf_counter()
+    for p in products:
+        legacy_html(p)
+    timings['legacy f-string, per product'] = (time.perf_counter() - start, len(products))
+    start = time.perf_counter()
+    for p in products:
+        new_product_html(p)
+    timings['template, per product'] = (time.perf_counter() - start, len(products))
+
+    groups = list(plan_digests(products, max_products=args.per_day))
+    cache = RenderCache(maxsize=len(products) + len(groups))
+    for label in ('digest, cold cache', 'digest, warm cache'):
+        start = time.perf_counter()
+        for group in groups:
+            digest_html(group, cache)
+        timings[label] = (time.perf_counter() - start, len(groups))
+    block = DIGEST_PRODUCT.render({**products[0], 'url': ''})
+
+    subset = products[:args.campaign_products]
+    fake = FakeKlaviyo(latency=args.latency).start_in_thread()
+    try:
+        start = time.perf_counter()
+        asyncio.run(create_all(fake.url, [{'html': legacy_html(p)} for p in subset], 1))
+        per_product = time.perf_counter() - start
+        start = time.perf_counter()
+        send_product_digests(subset, api_key='k', base_url=fake.url, rate=None, max_connections=4,
+                             max_products=args.per_day)
+        digests = time.perf_counter() - start
+    finally:
+        fake.stop_thread()
+
+    print(f"products: {args.products:,}, {args.per_day} launching per day; block {len(block)} bytes")
+    for label, (seconds, emails) in timings.items():
+        print(f"{label:30s} {emails / seconds:12,.0f} emails/s  "
+              f"{(args.per_day if 'digest' in label else 1) * emails / seconds:12,.0f} products/s")
+    print(f"cache: {cache.hits:,} hits, {cache.misses:,} misses")
+    print(f"{len(subset)} launches at {args.latency * 1e3:.0f} ms/request: {len(subset)} campaigns one at a time "
+          f"{per_product:.2f} s; {-(-len(subset) // args.per_day)} digests {digests:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
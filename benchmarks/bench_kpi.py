@@ -0,0 +1,91 @@
+"""KPI cube: update latency under steady order inflow vs a full recompute.
+
+Orders stream into the cube in small batches while the summary is
+queried, products are edited one at a time, and then a catalog sync
+and a pandas recompute are timed. The rollups are checked against a
+pandas recompute in tests/test_kpi.py.
+
+    python -m benchmarks.bench_kpi --products 10000 --rate 5000 --seconds 60
+"""
+import argparse
+import time
+
+import numpy as np
+
+from merch_store.catalog import synthetic
+from merch_store.catalog_diff import fingerprints
+from merch_store.kpi import KPICube
+from merch_store.ledger import synthetic_orders
+from testbed.workloads import START_SECONDS
+
+
+def percentiles(samples):
+    return np.percentile(np.array(samples) * 1e6, [50, 99])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=10_000)
+    parser.add_argument('--rate', type=int, default=5000, help='orders per second of simulated inflow')
+    parser.add_argument('--seconds', type=int, default=60)
+    parser.add_argument('--tick', type=float, default=0.01, help='seconds between order batches')
+    args = parser.parse_args(argv)
+
+    catalog = synthetic(args.products)
+    fingerprints(catalog)  # the first call imports pandas; keep that out of the timings
+    cube = KPICube()
+    start = time.perf_counter()
+    cube.sync_catalog(catalog)
+    load = time.perf_counter() - start
+
+    per_batch = max(1, int(args.rate * args.tick))
+    batches = int(args.seconds / args.tick)
+    stream = synthetic_orders(per_batch * batches, catalog, START_SECONDS, START_SECONDS + args.seconds * 30 * 86400)
+    updates, queries = [], []
+    for i in range(batches):
+        s = slice(i * per_batch, (i + 1) * per_batch)
+        begin = time.perf_counter()
+        cube.add_orders(stream['ts'][s], stream['product'][s], stream['revenue_cents'][s], stream['cost_cents'][s],
+                        stream['quantity'][s])
+        updates.append(time.perf_counter() - begin)
+        if i % 100 == 0:
+            begin = time.perf_counter()
+            cube.summary()
+            queries.append(time.perf_counter() - begin)
+
+    edits = []
+    for i in range(200):
+        row = [i * 37 % len(catalog)]
+        catalog.retail_cents[row] += 100
+        catalog.compute_metrics()
+        begin = time.perf_counter()
+        cube.upsert_products(catalog, row)
+        edits.append(time.perf_counter() - begin)
+    start = time.perf_counter()
+    cube.sync_catalog(catalog)
+    sync = time.perf_counter() - start
+
+    import pandas as pd
+
+    frame = pd.DataFrame({name: stream[name] for name in ('ts', 'product', 'revenue_cents', 'cost_cents', 'quantity')})
+    start = time.perf_counter()
+    frame.assign(day=frame.ts // 86400).groupby(['day', 'product'])[['revenue_cents', 'cost_cents', 'quantity']].sum()
+    products = catalog.to_frame()
+    products['Profit_Margin_%'].mean(), products['Gross_Profit'].mean(), products.nlargest(5, 'Gross_Profit')
+    recompute = time.perf_counter() - start
+
+    summary = cube.summary()
+    print(f"catalog {args.products:,} products; {per_batch * batches:,} orders at {args.rate:,}/s "
+          f"in batches of {per_batch} every {args.tick * 1e3:.0f} ms; {cube.order_cells.n:,} order cells")
+    print(f"initial catalog load:        {load * 1e3:9.1f} ms")
+    print("order batch update:          p50 {:7.1f} us  p99 {:7.1f} us".format(*percentiles(updates)))
+    print("one-product edit:            p50 {:7.1f} us  p99 {:7.1f} us".format(*percentiles(edits)))
+    print("summary query:               p50 {:7.1f} us  p99 {:7.1f} us".format(*percentiles(queries)))
+    print(f"catalog sync (200 changed):  {sync * 1e3:9.1f} ms")
+    print(f"full recompute (pandas):     {recompute * 1e3:9.1f} ms")
+    print(f"summary: {summary['avg_margin_pct']:.2f}% avg margin, ${summary['avg_gross_profit']:.2f} per item, "
+          f"{summary['orders']:,} orders, ${summary['revenue']:,.2f} revenue")
+
+
+if __name__ == '__main__':
+    main()
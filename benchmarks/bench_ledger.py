@@ -0,0 +1,99 @@
+"""Order ledger: ingest rate and aggregate query latency vs a full scan.
+
+Orders are appended in large batches, then the ledger is reopened
+read-only and queried by day, week and month. Results are checked
+against a pandas groupby in tests/test_ledger.py.
+
+    python -m benchmarks.bench_ledger --orders 50000000 --days 730
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from merch_store.catalog import synthetic
+from merch_store.ledger import SECONDS_PER_DAY, OrderLedger, synthetic_orders
+from testbed.workloads import START_SECONDS
+
+
+def full_scan_monthly(ledger):
+    """Monthly revenue per category by reading every order."""
+    revenue = {}
+    for columns in ledger.chunks():
+        month = (columns['ts'] // SECONDS_PER_DAY).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        key = month * 64 + columns['category']
+        groups, inverse = np.unique(key, return_inverse=True)
+        sums = np.bincount(inverse, columns['revenue_cents'])
+        for group, total in zip(groups.tolist(), sums.tolist()):
+            revenue[group] = revenue.get(group, 0) + int(total)
+    return revenue
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=50_000_000)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--segment-rows', type=int, default=1 << 20)
+    parser.add_argument('--batch', type=int, default=1 << 20, help='orders per append call')
+    args = parser.parse_args(argv)
+
+    catalog = synthetic(5000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'orders.ledger')
+        stop = START_SECONDS + args.days * SECONDS_PER_DAY
+        span = (stop - START_SECONDS) / args.orders
+        appending = 0.0
+        with OrderLedger(path, segment_rows=args.segment_rows) as ledger:
+            for i, first in enumerate(range(0, args.orders, args.batch)):
+                n = min(args.batch, args.orders - first)
+                batch = synthetic_orders(n, catalog, START_SECONDS + int(first * span),
+                                         START_SECONDS + int((first + n) * span), seed=i)
+                begin = time.perf_counter()
+                ledger.append(**batch)
+                appending += time.perf_counter() - begin
+            begin = time.perf_counter()
+            ledger.flush()
+            appending += time.perf_counter() - begin
+        size = os.path.getsize(path)
+
+        opening, ledger = timed(lambda: OrderLedger(path, readonly=True), repeat=1)
+        with ledger:
+            timings = [(label, *timed(lambda: ledger.aggregate(*q))) for label, q in [
+                ('daily by category, all', ('day',)),
+                ('weekly by category, Q2', ('week', '2026-04-01', '2026-07-01')),
+                ('monthly by category', ('month',)),
+                ('monthly, one category', ('month', None, None, 'Apparel', False)),
+                ('totals (KPIs)', (None, None, None, None, False)),
+                ('unaligned range, monthly',
+                 ('month', START_SECONDS + 100_003, START_SECONDS + 200 * SECONDS_PER_DAY + 7)),
+            ]]
+            scanning, scanned = timed(lambda: full_scan_monthly(ledger), repeat=1)
+            monthly = ledger.aggregate('month')
+            if sum(scanned.values()) != round(sum(r['revenue'] for r in monthly) * 100) or len(scanned) != len(monthly):
+                parser.exit(1, 'full scan and footers disagree on monthly revenue\n')
+            kpis = ledger.totals()
+
+    print(f"orders: {args.orders:,} over {args.days} days, {len(ledger.segments)} segments "
+          f"of {args.segment_rows:,}; {size / 2**20:,.0f} MB")
+    print(f"ingest: {args.orders / appending:,.0f} orders/s ({appending:.1f} s, {size / appending / 2**20:.0f} MB/s); "
+          f"open: {opening * 1e3:.1f} ms")
+    for label, seconds, rows in timings:
+        print(f"{label:28s} {seconds * 1e3:8.2f} ms  {len(rows):6,} rows")
+    print(f"{'full scan, monthly':28s} {scanning * 1e3:8.2f} ms")
+    print(f"KPIs: {kpis['orders']:,} orders, ${kpis['revenue']:,.2f} revenue, {kpis['margin_pct']}% margin, "
+          f"${kpis['profit_per_unit']} profit per item")
+
+
+if __name__ == '__main__':
+    main()
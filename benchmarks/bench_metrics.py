@@ -0,0 +1,154 @@
+"""Instrumentation overhead: cost per instrumented HTTP attempt and stage.
+
+The hot path is timed in a tight loop (the cost of the metric updates
+for one attempt, and of the stage wrapper around a no-op) and end to end
+as local round trips with the pool's metrics swapped for a no-op. The
+run fails when the per-attempt cost exceeds ``--budget-us``.
+
+The series themselves, and the exposition text, are checked in
+tests/test_metrics.py.
+
+    python -m benchmarks.bench_metrics --calls 200000
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from merch_store import metrics
+from merch_store.http import ConnectionPool, HTTPServer
+
+
+class NullMetrics:
+    """Stands in for ClientMetrics to time requests without instrumentation."""
+
+    def __init__(self):
+        self.in_flight = metrics.GaugeValue()
+
+    def observe(self, method, status, seconds, attempt):
+        pass
+
+
+async def ok(method, path, query, headers, body):
+    return 200, {'ok': True}
+
+
+def per_call(fn, calls):
+    """Microseconds per call of ``fn(n)`` (which loops n times) beyond an empty loop."""
+    def empty(n):
+        for _ in range(n):
+            pass
+
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        fn(calls)
+        middle = time.perf_counter()
+        empty(calls)
+        best = min(best, (middle - start) - (time.perf_counter() - middle))
+    return best / calls * 1e6
+
+
+def hot_path(calls):
+    client = metrics.client_metrics('bench-hot')
+    statuses = [200] * 19 + [503]
+
+    def attempt(n):
+        observe = client.observe
+        for i in range(n):
+            gauge = client.in_flight
+            gauge.value += 1
+            observe('POST', statuses[i % 20], 0.0123, i % 20 == 19)
+            gauge.value -= 1
+
+    def bare_list(n):
+        for i in range(n):
+            statuses[i % 20]
+            i % 20 == 19
+
+    return per_call(attempt, calls) - per_call(bare_list, calls)
+
+
+def stage_cost(calls):
+    async def noop():
+        return None
+
+    timed_noop = metrics.stage('bench.noop')(noop)
+
+    def plain(x):
+        return x
+
+    timed_plain = metrics.stage('bench.plain')(plain)
+
+    async def drive(func, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            await func()
+        return time.perf_counter() - start
+
+    rounds = [(asyncio.run(drive(noop, calls)), asyncio.run(drive(timed_noop, calls))) for _ in range(3)]
+    async_us = min(b - a for a, b in rounds) / calls * 1e6
+
+    def call(func):
+        def loop(n):
+            for _ in range(n):
+                func(1)
+        return loop
+    sync_us = per_call(call(timed_plain), calls) - per_call(call(plain), calls)
+    return async_us, sync_us
+
+
+async def round_trips(url, requests, rounds):
+    """Seconds per request in each round, with real and with no-op metrics, interleaved."""
+    timings = {'metrics': [], 'none': []}
+    async with ConnectionPool(url, name='bench-rt', max_connections=1) as pool:
+        real = pool.metrics
+        await pool.get('/ok')
+        order = [('metrics', real), ('none', NullMetrics())]
+        for _ in range(rounds):
+            order.reverse()  # alternate which goes first, so warm-up and drift cancel out
+            for label, hooks in order:
+                pool.metrics = hooks
+                start = time.perf_counter()
+                for _ in range(requests):
+                    await pool.get('/ok')
+                timings[label].append((time.perf_counter() - start) / requests)
+    return {label: np.array(values) for label, values in timings.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200_000)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--budget-us', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    http = HTTPServer(ok).start_in_thread()
+    try:
+        trips = asyncio.run(round_trips(http.url, args.requests, 10))
+    finally:
+        http.stop_thread()
+
+    attempt_us = hot_path(args.calls)
+    async_us, sync_us = stage_cost(args.calls)
+    start = time.perf_counter()
+    for _ in range(100):
+        metrics.render()
+    render_ms = (time.perf_counter() - start) * 10
+    lines = len(metrics.render().splitlines())
+
+    print(f"per HTTP attempt (latency, status, retry, in-flight):  {attempt_us:6.2f} us")
+    print(f"per stage, coroutine wrapper:                          {async_us:6.2f} us")
+    print(f"per stage, function wrapper:                           {sync_us:6.2f} us")
+    diffs = (trips['metrics'] - trips['none']) * 1e6
+    print(f"local round trip, median of rounds: with metrics {np.median(trips['metrics']) * 1e6:6.1f} us, "
+          f"without {np.median(trips['none']) * 1e6:6.1f} us; paired difference {np.median(diffs):+.1f} us "
+          f"(rounds range {diffs.min():+.1f} to {diffs.max():+.1f} us)")
+    print(f"render {len(metrics.REGISTRY.metrics)} families, {lines} lines: {render_ms:.2f} ms per scrape")
+    if attempt_us > args.budget_us:
+        parser.exit(1, f"{attempt_us:.2f} us per attempt is over the {args.budget_us} us budget\n")
+
+
+if __name__ == '__main__':
+    main()
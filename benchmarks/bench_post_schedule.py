@@ -0,0 +1,82 @@
+"""Calendar packing: a year of posts for a catalog under per-platform quotas.
+
+``ScanCalendar`` is the linear-scan first-fit reference. That placements
+match it, stay within every platform's daily cap and spacing, never come
+before the time asked for, and reuse released slots is checked in
+tests/test_post_schedule.py.
+
+    python -m benchmarks.bench_post_schedule --products 10000 --campaign-days 7
+"""
+import argparse
+import time
+from collections import Counter
+from datetime import timedelta
+
+from merch_store.post_schedule import PostCalendar, schedule_posts
+from merch_store.social import DAILY_POSTS
+from testbed.workloads import START, ScanCalendar, catalog_over, platform_quotas, posted_at
+
+
+def pile_up(catalog, campaign):
+    """Most posts the fixed-time schedule puts in one platform's single slot."""
+    launches = Counter(catalog.day.tolist())
+    starts = sorted(launches)
+    busiest = 0
+    for day in starts:
+        busiest = max(busiest, sum(launches.get(day - d, 0) for d in range(campaign)))
+    return busiest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=10_000)
+    parser.add_argument('--days', type=int, default=365, help='launches are spread over this many days')
+    parser.add_argument('--campaign-days', type=int, default=7, help='days each product is posted')
+    parser.add_argument('--per-day', type=int, default=200, help='posts per platform per day')
+    parser.add_argument('--min-gap', type=int, default=4, help='minutes between posts on a platform')
+    parser.add_argument('--scan-products', type=int, default=1000, help='products for the linear-scan baseline')
+    args = parser.parse_args(argv)
+
+    quotas = platform_quotas(args.per_day, args.min_gap)
+    catalog = catalog_over(args.products, args.days)
+    calendar = PostCalendar(quotas, START)
+    start = time.perf_counter()
+    rows = schedule_posts(DAILY_POSTS, catalog, calendar, args.campaign_days)
+    elapsed = time.perf_counter() - start
+    last = max(posted_at(DAILY_POSTS, row)[1] for row in rows)
+
+    # Slot bookkeeping alone, without rendering the post rows.
+    requests = [(slot.cells['platform'].text,
+                 START + timedelta(days=int(day) - 1 + d, minutes=9 * 60))
+                for day in catalog.day.tolist() for d in range(args.campaign_days) for slot in DAILY_POSTS.slots]
+    calendar = PostCalendar(quotas, START)
+    start = time.perf_counter()
+    for platform, earliest in requests:
+        calendar.place(platform, earliest)
+    tree = time.perf_counter() - start
+
+    scan_requests = requests[:args.scan_products * args.campaign_days * len(DAILY_POSTS.slots)]
+    results = {}
+    for name, cls in (('segment tree', PostCalendar), ('linear scan', ScanCalendar)):
+        # Everyone asks for day one: the packed worst case for scanning.
+        calendar = cls(quotas, START)
+        start = time.perf_counter()
+        for platform, _ in scan_requests:
+            calendar.place(platform, START)
+        results[name] = time.perf_counter() - start
+
+    print(f"products: {args.products:,} over {args.days} days, {args.campaign_days}-day campaigns, "
+          f"{args.per_day}/day per platform, {args.min_gap} min apart")
+    print(f"posts scheduled:    {len(rows):12,}  (last post {last:%Y-%m-%d %H:%M})")
+    print(f"schedule + render:  {elapsed:12.2f} s  {len(rows) / elapsed:12,.0f} posts/s")
+    print(f"placement only:     {tree:12.2f} s  {len(requests) / tree:12,.0f} posts/s")
+    print(f"fixed-time pile-up: {pile_up(catalog, args.campaign_days):12,} posts in one platform slot "
+          f"(calendar: 1)")
+    n = len(scan_requests)
+    print(f"all asking day one ({n:,} posts):")
+    for name, seconds in results.items():
+        print(f"  {name:14s} {seconds:8.3f} s  {n / seconds:12,.0f} posts/s")
+
+
+if __name__ == '__main__':
+    main()
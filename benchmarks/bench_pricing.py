@@ -0,0 +1,57 @@
+"""Batch repricing throughput vs the scalar ``optimize_pricing`` loop.
+
+``market`` pins some rows to the rule boundaries (conversion exactly 1%
+and 5%, price exactly 1.2x the competitor average); tests/test_pricing.py
+checks the batch engine against the scalar reference on those inputs.
+
+    python -m benchmarks.bench_pricing --rows 1000000
+"""
+import argparse
+import time
+
+from merch_store.catalog import synthetic
+from merch_store.pricing import DEFAULT_RULES, optimize_pricing, reprice_catalog
+from testbed.workloads import market
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--scalar-rows', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    catalog = synthetic(args.rows)
+    views, sales, competitors, offsets = market(catalog)
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        DEFAULT_RULES.reprice(catalog.retail_cents, views, sales, competitors, offsets, catalog.total_cents)
+        best = min(best, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    repriced = reprice_catalog(catalog, views, sales, competitors, offsets)
+    with_metrics = time.perf_counter() - start
+
+    m = min(args.scalar_rows, len(catalog))
+    prices = (catalog.retail_cents[:m] / 100).tolist()
+    totals = (catalog.total_cents[:m] / 100).tolist()
+    views_l, sales_l = views[:m].tolist(), sales[:m].tolist()
+    comp = [competitors[offsets[i]:offsets[i + 1]].tolist() for i in range(m)]
+    start = time.perf_counter()
+    for i in range(m):
+        optimize_pricing(prices[i], {'views': views_l[i], 'sales': sales_l[i]}, comp[i],
+                         DEFAULT_RULES, totals[i])
+    scalar = (time.perf_counter() - start) / m * len(catalog)
+
+    print(f"rows: {len(catalog):,}  competitor prices: {len(competitors):,}")
+    print(f"batch reprice:        {best * 1e3:10.1f} ms  ({len(catalog) / best / 1e6:.1f} M SKUs/s)")
+    print(f"reprice_catalog:      {with_metrics * 1e3:10.1f} ms  (incl. copy and metrics)")
+    print(f"scalar loop (est.):   {scalar * 1e3:10.1f} ms  (from {m:,} calls)")
+    print(f"speedup:              {scalar / best:10.1f}x")
+    print(f"repriced products:    {int((repriced.retail_cents != catalog.retail_cents).sum()):,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Printful bulk pipeline: variants/sec and request tail latency.
+
+Runs against a local FakePrintful with simulated latency and compares the
+pipeline with the legacy pattern of one blocking create call per variant.
+What the pipeline creates, resumes and reports is checked in
+tests/test_printful.py.
+
+    python -m benchmarks.bench_printful --products 200 --latency 0.03
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from merch_store.catalog import synthetic
+from merch_store.printful import PrintfulPipeline
+from testbed.fakes import FakePrintful
+
+
+def legacy_create(url, products, variant_id=71000):
+    parts = urlsplit(url)
+    for product in products:
+        conn = http.client.HTTPConnection(parts.hostname, parts.port)
+        conn.request('POST', '/store/products', body=json.dumps({
+            "sync_product": {"name": product['Product_Name'], "thumbnail": "https://example.invalid/d.png"},
+            "sync_variants": [{"retail_price": str(product['Retail_Price']), "variant_id": variant_id,
+                               "files": [{"url": "https://example.invalid/d.png", "type": "front"}]}],
+        }), headers={'Authorization': 'Bearer test', 'Content-Type': 'application/json'})
+        conn.getresponse().read()
+        conn.close()
+
+
+async def run_pipeline(url, products, rate, connections):
+    latencies = []
+    rates = {'catalog': rate, 'create_product': rate, 'create_variant': rate}
+    async with PrintfulPipeline('test', url, rates=rates, max_connections=connections,
+                                on_response=lambda m, p, s, secs, a: latencies.append(secs)) as pipeline:
+        report = await pipeline.sync(products)
+    return report, latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--legacy-variants', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.03)
+    parser.add_argument('--rate', type=float, default=1000.0, help='client requests/sec per endpoint')
+    parser.add_argument('--connections', type=int, default=16)
+    args = parser.parse_args(argv)
+
+    products = synthetic(args.products).to_frame().to_dict('records')
+    fake = FakePrintful(latency=args.latency).start_in_thread()
+    try:
+        start = time.perf_counter()
+        legacy_create(fake.url, products[:args.legacy_variants])
+        legacy = args.legacy_variants / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        report, latencies = asyncio.run(run_pipeline(fake.url, products, args.rate, args.connections))
+        elapsed = time.perf_counter() - start
+    finally:
+        fake.stop_thread()
+
+    p50, p95, p99, top = np.percentile(latencies, [50, 95, 99, 100]) * 1e3
+    print(report)
+    print(f"legacy one call per variant: {legacy:10,.1f} variants/sec")
+    print(f"bulk pipeline:               {report.variants_created / elapsed:10,.1f} variants/sec")
+    print(f"request latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}  max {top:.1f}")
+
+
+if __name__ == '__main__':
+    main()
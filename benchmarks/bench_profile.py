@@ -0,0 +1,78 @@
+"""Profile mode: the cost of stage markers and of ``--profile`` on the catalog build.
+
+Timed: a stage marker with no profile active, one stage with a profile
+(with and without tracemalloc), and the catalog build plain, profiled,
+profiled without tracemalloc and profiled with sampling. That the stage
+breakdown adds up to the run is checked in tests/test_profiling.py.
+
+    python -m benchmarks.bench_profile --runs 3
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from merch_store import profiling
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_seconds(cwd, *args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, 'script.py'), *args], cwd=cwd,
+                   env=dict(os.environ, PYTHONPATH=ROOT), check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def marker_cost(calls):
+    """Microseconds per ``with profiling.stage(...)``: inactive, active, active with tracemalloc."""
+    def loop(n):
+        stage = profiling.stage
+        start = time.perf_counter()
+        for _ in range(n):
+            with stage('x'):
+                pass
+        return time.perf_counter() - start
+
+    def empty(n):
+        start = time.perf_counter()
+        for _ in range(n):
+            pass
+        return time.perf_counter() - start
+
+    costs = [min(loop(calls) - empty(calls) for _ in range(3)) / calls * 1e6]
+    for trace in (False, True):
+        profiler = profiling.ACTIVE = profiling.Profiler(trace_memory=trace).start()
+        try:
+            costs.append(min(loop(calls // 10) - empty(calls // 10) for _ in range(3)) / (calls // 10) * 1e6)
+        finally:
+            profiler.stop()
+            profiling.ACTIVE = None
+    return costs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--calls', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, extra in (('plain', []), ('--profile', ['--profile', 'p']),
+                             ('--profile --profile-no-tracemalloc', ['--profile', 'p', '--profile-no-tracemalloc']),
+                             ('--profile --profile-sample', ['--profile', 'p', '--profile-sample'])):
+            timings[label] = min(build_seconds(tmp, *extra) for _ in range(args.runs))
+
+    inactive, active, traced = marker_cost(args.calls)
+    print(f"stage marker, no profile:           {inactive:6.2f} us")
+    print(f"stage marker, profiling:            {active:6.2f} us")
+    print(f"stage marker, profiling+tracemalloc: {traced:5.2f} us")
+    for label, seconds in timings.items():
+        print(f"script.py {label:36s} {seconds * 1e3:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
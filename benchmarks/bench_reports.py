@@ -0,0 +1,102 @@
+"""Guide rendering: streamed, section-cached documents vs one string per document.
+
+Times rendering and writing ``--documents`` documents both ways, the
+peak memory per document, and reruns through a manifest with nothing
+and with the timeline changed. That both ways write the same bytes, and
+that the default render matches the checked-in documents, is checked in
+tests/test_reports.py.
+
+    python -m benchmarks.bench_reports --documents 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from merch_store.reports import GUIDES, Guide, ReportPipeline, ReportTemplate, SectionCache, guide_values
+from testbed.workloads import documents, streamed
+
+
+def legacy(whole, out, docs):
+    """The scripts' old approach: the whole document as one string, then one write."""
+    for name, guide, values in docs:
+        text = whole[guide.name].render(values)
+        with open(os.path.join(out, name), 'w') as f:
+            f.write(text)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def peak(fn):
+    """Largest traced allocation while ``fn`` runs (timing is done separately: tracing slows it)."""
+    tracemalloc.start()
+    fn()
+    most = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return most
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    guides = [Guide.load(name) for name in GUIDES]
+    whole = {guide.name: ReportTemplate(''.join(s.template.text for s in guide.sections)) for guide in guides}
+    base = guide_values()
+    docs = documents(guides, base, args.documents)
+
+    def render_whole():
+        for _, guide, values in docs:
+            whole[guide.name].render(values).encode('utf-8')
+
+    def render_sections(pipeline):
+        for _, guide, values in docs:
+            for _ in pipeline.chunks(guide, values):
+                pass
+
+    cache = SectionCache()
+    render_old = timed(render_whole)
+    render_new = timed(lambda: render_sections(ReportPipeline(cache)))
+
+    # Writing is dominated by the page cache; alternate the two and keep the best of each.
+    old = new = float('inf')
+    for _ in range(2):
+        with tempfile.TemporaryDirectory() as tmp:
+            old = min(old, timed(lambda: legacy(whole, tmp, docs)))
+            size = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp))
+        with tempfile.TemporaryDirectory() as tmp:
+            new = min(new, timed(lambda: streamed(ReportPipeline(), tmp, docs)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_peak = peak(lambda: legacy(whole, tmp, docs[:len(guides)]))
+        manifest = os.path.join(tmp, 'manifest.json')
+        with ReportPipeline(manifest=manifest) as pipeline:
+            streamed(pipeline, tmp, docs)
+        new_peak = peak(lambda: streamed(ReportPipeline(SectionCache(1)), tmp, docs[:len(guides)]))
+        rerun_pipeline = ReportPipeline(manifest=manifest)
+        rerun = timed(lambda: streamed(rerun_pipeline, tmp, docs))
+        edited = [(name, guide, dict(values, setup_hours='40-60')) for name, guide, values in docs]
+        edit_pipeline = ReportPipeline(manifest=manifest)
+        edit = timed(lambda: streamed(edit_pipeline, tmp, edited))
+
+    print(f"{len(docs):,} documents ({len(docs) // len(guides):,} variants x {len(guides)} guides), "
+          f"{size / 2**20:,.0f} MB; {cache.misses:,} sections rendered, {cache.hits:,} reused from the cache")
+    print(f"{'':28s}{'render':>10s}{'to disk':>10s}{'docs/s':>10s}{'peak/doc':>10s}")
+    print(f"{'one string per document':28s}{render_old:9.2f}s{old:9.2f}s{len(docs) / old:10,.0f}"
+          f"{old_peak / 2**10:8,.0f}KB")
+    print(f"{'streamed sections, cached':28s}{render_new:9.2f}s{new:9.2f}s{len(docs) / new:10,.0f}"
+          f"{new_peak / 2**10:8,.0f}KB")
+    print("(streamed documents go to a temporary file renamed into place, so none is ever left half-written)")
+    print(f"rerun, nothing changed:   {rerun:7.2f} s  {rerun_pipeline.skipped:,} skipped")
+    print(f"rerun, timeline edited:   {edit:7.2f} s  {edit_pipeline.written:,} rewritten, "
+          f"{edit_pipeline.skipped:,} skipped")
+
+
+if __name__ == '__main__':
+    main()
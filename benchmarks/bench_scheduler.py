@@ -0,0 +1,135 @@
+"""Scheduler daemon vs cron-spawned runs: per-job latency and CPU time.
+
+Each timed run is one catalog-sync job after a single row of the catalog
+has changed (the file is rewritten and renamed into place, as the
+catalog tools do). The daemon is one long-lived process triggered with
+``POST /jobs/catalog-sync``; its CPU time comes from /proc. The cron run
+is a fresh ``python -m merch_store daemon --once catalog-sync`` whose CPU
+time comes from the children's rusage.
+
+Cron expressions, jitter, the daemon's endpoints and the daily upload
+run through its warm clients are checked in tests/test_scheduler.py.
+
+    python -m benchmarks.bench_scheduler --rows 10000 --runs 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from merch_store.catalog import synthetic
+from merch_store.catalog_bin import write_catalog
+from merch_store.http import NO_RETRY, ConnectionPool, HTTPError
+from testbed.fakes import FakePrintful, FakeSquare
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def daemon_cpu(pid):
+    """utime + stime of a running process, in seconds."""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def start_daemon(cmd, env, log):
+    """Start the daemon with its output in ``log``; returns the process and its health port."""
+    with open(log, 'w') as out:
+        process = subprocess.Popen(cmd, env=env, stdout=out)
+    while process.poll() is None:
+        with open(log, encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('⏰'):
+                    return process, line.split(' on ', 1)[1].split(':', 2)[2].split(':')[0]
+        time.sleep(0.05)
+    raise RuntimeError(f'daemon exited with {process.returncode}')
+
+
+async def trigger(url, name):
+    """POST /jobs/<name> until it is accepted (an hourly run may be in progress)."""
+    async with ConnectionPool(url, retry=NO_RETRY, timeout=600) as client:
+        while True:
+            try:
+                return (await client.post(f'/jobs/{name}')).json()
+            except HTTPError as exc:
+                if exc.response.status != 409:
+                    raise
+                await asyncio.sleep(0.1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    square = FakeSquare().start_in_thread()
+    printful = FakePrintful().start_in_thread()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'catalog.bin')
+            catalog = synthetic(args.rows, seed=3)
+            write_catalog(catalog, path)
+            env = dict(os.environ, PYTHONPATH=ROOT, PYTHONUNBUFFERED='1', SQUARE_API_BASE=square.url,
+                       SQUARE_ACCESS_TOKEN='sq', PRINTFUL_API_BASE=printful.url,
+                       PRINTFUL_CHECKPOINT=os.path.join(tmp, 'printful.ckpt'), DAILY_CRON='0 0 1 1 *')
+            base = [sys.executable, '-m', 'merch_store', 'daemon', '--catalog', path,
+                    '--jobs-db', os.path.join(tmp, 'jobs.sqlite3')]
+            os.makedirs(os.path.join(tmp, 'cron'))
+            once = base + ['--state-dir', os.path.join(tmp, 'cron'), '--once', 'catalog-sync']
+            subprocess.run(once, env=env, check=True, stdout=subprocess.DEVNULL)  # the first, full sync
+            os.makedirs(os.path.join(tmp, 'daemon'))
+            process, port = start_daemon(base + ['--state-dir', os.path.join(tmp, 'daemon'), '--health-port', '0'],
+                                         env, os.path.join(tmp, 'daemon.log'))
+            url = f'http://127.0.0.1:{port}'
+            try:
+                if not asyncio.run(trigger(url, 'catalog-sync'))['last_ok']:
+                    parser.exit(1, "the daemon's first catalog-sync failed\n")
+                rng = random.Random(0)
+                daemon, cron = [], []
+                for _ in range(args.runs):
+                    catalog.retail_cents[rng.randrange(len(catalog))] += 1
+                    write_catalog(catalog, path)
+                    requests = square.requests
+
+                    cpu, start = daemon_cpu(process.pid), time.perf_counter()
+                    stats = asyncio.run(trigger(url, 'catalog-sync'))
+                    daemon.append((time.perf_counter() - start, daemon_cpu(process.pid) - cpu))
+                    if not stats['last_ok'] or square.requests != requests + 1:
+                        parser.exit(1, f"daemon catalog-sync did not send the changed row: {stats}\n")
+
+                    cpu, start = children_cpu(), time.perf_counter()
+                    subprocess.run(once, env=env, check=True, stdout=subprocess.DEVNULL)
+                    cron.append((time.perf_counter() - start, children_cpu() - cpu))
+                    if square.requests != requests + 2:
+                        parser.exit(1, "cron catalog-sync did not send the changed row\n")
+            finally:
+                process.terminate()
+                code = process.wait(30)
+    finally:
+        for service in (square, printful):
+            service.stop_thread()
+
+    if code:
+        parser.exit(1, f"the daemon exited with {code}\n")
+    print(f"catalog-sync of one changed row in {args.rows:,} rows, {args.runs} runs each:")
+    print(f"{'':28s}{'wall p50':>10s}{'wall max':>10s}{'CPU/run':>10s}")
+    for label, runs in (('daemon, POST /jobs', daemon), ('cron, fresh process', cron)):
+        wall, cpu = np.array(runs).T * 1e3
+        print(f"{label:28s}{np.median(wall):8.1f}ms{wall.max():8.1f}ms{cpu.mean():8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Slug lookup throughput: catalog index, mmap binary search and memoized URLs.
+
+That slugs are canonical, unique even for colliding names, the same for
+chunked binary writes and resolve back to their rows is checked in
+tests/test_slugs.py.
+
+    python -m benchmarks.bench_slugs --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from merch_store.catalog import synthetic
+from merch_store.catalog_bin import CatalogBinWriter, CatalogFile
+from merch_store.slugs import slug_for_name, slugify
+from merch_store.social import PRODUCT_BASE_URL, product_url
+
+def rate(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=200_000)
+    parser.add_argument('--hot', type=int, default=1000, help='distinct products in the hot set')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = synthetic(args.rows)
+        start = time.perf_counter()
+        slugs = catalog.assign_slugs().tolist()
+        assign = time.perf_counter() - start
+        start = time.perf_counter()
+        index = catalog.slug_index()
+        build = time.perf_counter() - start
+        path = os.path.join(tmp, 'catalog.bin')
+        with CatalogBinWriter(path, len(catalog)) as writer:
+            writer.write(catalog)
+
+        rng = np.random.default_rng(0)
+        uniform = [slugs[i] for i in rng.integers(0, len(slugs), args.lookups).tolist()]
+        hot = [slugs[i] for i in rng.integers(0, args.hot, args.lookups).tolist()]
+        names = catalog.name.tolist()
+        hot_products = [{'Product_Name': names[i]} for i in rng.integers(0, args.hot, args.lookups).tolist()]
+
+        with CatalogFile(path) as f:
+            cold = rate(f._find_slug, uniform)
+            f.find_slug.cache_clear()
+            cached = rate(f.find_slug, hot)
+        in_memory = rate(index.row, uniform)
+        slug_for_name.cache_clear()
+        memo_url = rate(product_url, hot_products)
+        legacy_url = rate(lambda p: f"https://youandinotai.square.site/product/"
+                                    f"{p['Product_Name'].lower().replace(' ', '-')}", hot_products)
+        uncached = rate(lambda p: f"{PRODUCT_BASE_URL}/{slugify(p['Product_Name'])}", hot_products)
+
+    print(f"rows: {args.rows:,}  lookups: {args.lookups:,}  hot set: {args.hot:,}")
+    print(f"assign slugs:             {assign:8.2f} s")
+    print(f"build slug index:         {build:8.2f} s")
+    print(f"SlugIndex.row:            {in_memory:12,.0f} lookups/s")
+    print(f"mmap binary search:       {cold:12,.0f} lookups/s")
+    print(f"mmap + LRU (hot set):     {cached:12,.0f} lookups/s")
+    print(f"product_url, LRU:         {memo_url:12,.0f} urls/s")
+    print(f"slugify, no cache:        {uncached:12,.0f} urls/s")
+    print(f"legacy inline replace:    {legacy_url:12,.0f} urls/s  (broken for punctuation)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Social post generation: one streaming pass vs the guide's per-product functions.
+
+That the output matches csv.writer over the same rows and, for the daily
+format, the guide's pandas ``schedule_social_media_posts`` run product by
+product and day by day is checked in tests/test_social.py.
+
+    python -m benchmarks.bench_social --products 100000 --days 20
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from benchmarks.common import peak_rss_mb, run_child
+from merch_store.catalog import synthetic
+from merch_store.social import DAILY_POSTS
+from testbed.workloads import START, legacy_schedule_social_media_posts
+
+
+def child(products, days, chunk):
+    catalog = synthetic(products)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'posts.csv')
+        start = time.perf_counter()
+        n = DAILY_POSTS.write_csv(catalog, path, START, days, chunk)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+    return {'posts': n, 'seconds': elapsed, 'bytes': size, 'peak_rss_mb': peak_rss_mb()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=20)
+    parser.add_argument('--chunk', type=int, default=10_000)
+    parser.add_argument('--legacy-calls', type=int, default=500)
+    parser.add_argument('--child', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.child:
+        import json
+
+        print(json.dumps(child(args.products, args.days, args.chunk)))
+        return
+
+    result = run_child('benchmarks.bench_social', '--child', '--products', args.products,
+                       '--days', args.days, '--chunk', args.chunk)
+
+    catalog = synthetic(args.legacy_calls)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        for i, product in enumerate(catalog.records()):
+            legacy_schedule_social_media_posts(product, START + timedelta(days=i), tmp)
+        legacy = (time.perf_counter() - start) / (args.legacy_calls * 5)
+
+    rate = result['posts'] / result['seconds']
+    print(f"posts: {result['posts']:,} ({args.products:,} products x {args.days} days x 5 slots), "
+          f"{result['bytes'] / 2**30:.2f} GB CSV")
+    print(f"streaming engine: {result['seconds']:8.2f} s  {rate:12,.0f} posts/s  "
+          f"peak RSS {result['peak_rss_mb']:.0f} MB")
+    print(f"legacy per call:  {legacy * result['posts']:8.2f} s  {1 / legacy:12,.0f} posts/s  (est. from "
+          f"{args.legacy_calls} calls)")
+    print(f"speedup:          {rate * legacy:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
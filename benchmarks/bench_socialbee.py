@@ -0,0 +1,87 @@
+"""SocialBee publishing: posts/sec and p99 latency against a local stand-in.
+
+That every post and image is delivered exactly once through server errors
+and reruns is checked in tests/test_socialbee.py.
+
+    python -m benchmarks.bench_socialbee --products 2000 --latency 0.02
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from merch_store.catalog import synthetic
+from merch_store.social import DAILY_POSTS
+from merch_store.socialbee import SocialBeePublisher, post_from_row
+from testbed.fakes import FakeSocialBee
+
+START = datetime(2026, 1, 1)
+
+
+def daily_posts(products, days=1, seed=0):
+    return [post_from_row(row) for row in DAILY_POSTS.rows(synthetic(products, seed=seed), START, days)]
+
+
+def legacy_post(url, posts):
+    """The guide's client: one blocking request per post, image passed inline."""
+    parts = urlsplit(url)
+    for post in posts:
+        conn = http.client.HTTPConnection(parts.hostname, parts.port)
+        conn.request('POST', f"{parts.path}/posts", body=json.dumps({
+            "workspace_id": "test", "text": post['text'], "media_urls": [post['image_url']],
+            "platforms": post['platforms'], "post_at": "next_available",
+        }), headers={'Authorization': 'Bearer test', 'Content-Type': 'application/json'})
+        conn.getresponse().read()
+        conn.close()
+
+
+async def publish(url, posts, delivery=None, connections=8, concurrency=64, retry=None):
+    async with SocialBeePublisher('test', 'test', url, max_connections=connections, concurrency=concurrency,
+                                  delivery=delivery, retry=retry) as publisher:
+        return await publisher.publish(posts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--legacy-posts', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    posts = daily_posts(args.products)
+    fake = FakeSocialBee(latency=args.latency).start_in_thread()
+    try:
+        start = time.perf_counter()
+        legacy_post(fake.url, posts[:args.legacy_posts])
+        legacy = args.legacy_posts / (time.perf_counter() - start)
+        legacy_transfers = sum(fake.media_transfers.values()) / args.legacy_posts
+
+        fake.media_transfers.clear()
+        start = time.perf_counter()
+        report = asyncio.run(publish(fake.url, posts, connections=args.connections,
+                                     concurrency=args.concurrency))
+        elapsed = time.perf_counter() - start
+        transfers = sum(fake.media_transfers.values()) / len(posts)
+    finally:
+        fake.stop_thread()
+
+    if not report.ok:
+        parser.exit(1, f"publishing failed: {report}\n")
+    p50, p99, top = np.percentile(report.latencies, [50, 99, 100]) * 1e3
+    print(report)
+    print(f"posts: {len(posts):,}  server latency {args.latency * 1e3:.0f} ms  connections {args.connections}")
+    print(f"legacy one blocking call per post: {legacy:10,.1f} posts/s  {legacy_transfers:.2f} image transfers/post")
+    print(f"async publisher:                   {report.posted / elapsed:10,.1f} posts/s  "
+          f"{transfers:.2f} image transfers/post")
+    print(f"post latency ms: p50 {p50:.1f}  p99 {p99:.1f}  max {top:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Square catalog upload throughput: async batch client vs one POST per item.
+
+Both paths talk to a local FakeSquare with simulated network latency. The
+legacy path opens a fresh connection per product, as ``requests.post``
+without a session does. What the upload leaves on the server is checked
+in tests/test_square.py.
+
+    python -m benchmarks.bench_square --items 5000 --latency 0.05
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import time
+from urllib.parse import urlsplit
+
+from merch_store.catalog import synthetic
+from merch_store.square import SquareCatalogClient, idempotency_key, item_object
+from testbed.fakes import FakeSquare
+
+
+def legacy_upload(url, products):
+    parts = urlsplit(url)
+    for product in products:
+        obj = item_object(product)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port)
+        conn.request('POST', parts.path + '/catalog/object',
+                     body=json.dumps({"idempotency_key": idempotency_key(obj), "object": obj}),
+                     headers={'Authorization': 'Bearer test', 'Content-Type': 'application/json'})
+        conn.getresponse().read()
+        conn.close()
+
+
+async def async_upload(url, products, per_request, connections):
+    async with SquareCatalogClient('test', url, max_connections=connections,
+                                   objects_per_request=per_request) as square:
+        await square.upsert_products(products)
+        return square.pool.connections_opened
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--legacy-items', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated server latency (s)')
+    parser.add_argument('--per-request', type=int, default=500)
+    parser.add_argument('--connections', type=int, default=8)
+    parser.add_argument('--rate-limit', type=float, default=None, help='fake server requests/sec')
+    args = parser.parse_args(argv)
+
+    products = list(synthetic(args.items).to_frame().to_dict('records'))
+    fake = FakeSquare(latency=args.latency, rate_limit=args.rate_limit).start_in_thread()
+    try:
+        n = min(args.legacy_items, args.items)
+        start = time.perf_counter()
+        legacy_upload(fake.url, products[:n])
+        legacy = n / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        opened = asyncio.run(async_upload(fake.url, products, args.per_request, args.connections))
+        batched = len(products) / (time.perf_counter() - start)
+    finally:
+        fake.stop_thread()
+
+    print(f"legacy one-POST-per-item: {legacy:12,.1f} items/sec")
+    print(f"async batch upsert:       {batched:12,.1f} items/sec "
+          f"({opened} connections, {fake.throttled} throttled responses)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Daily run startup: import time and cold wall time to the first API call.
+
+Each timed run is a fresh ``python -m merch_store daily`` process with
+its own jobs database. The time is taken from spawning the process to
+the fake Square receiving the product. The floor rows show what the
+interpreter and the asyncio HTTP stack cost on this machine before any
+of our code runs.
+
+The stdlib row reader, product selection, the imports the entry point
+avoids and whole runs against the fake services are checked in
+tests/test_startup.py.
+
+    python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from merch_store.catalog_bin import csv_to_bin
+from merch_store.daily import CATALOG_CSV
+from testbed.fakes import FakeKlaviyo, FakePrintful, FakeSquare
+from testbed.workloads import ROOT, command, daily_run, environment
+
+
+class TimedSquare(FakeSquare):
+    """FakeSquare that notes when the first request arrives."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.first = None
+        self.arrived = threading.Event()
+
+    async def _dispatch(self, *args):
+        if self.first is None:
+            self.first = time.monotonic()
+            self.arrived.set()
+        return await super()._dispatch(*args)
+
+
+def first_call(tmp, env, square, name, workers):
+    """Seconds from spawning a daily run to Square receiving its product; the run is then stopped."""
+    cmd, env = command(tmp, env, name, workers)
+    square.first = None
+    square.arrived.clear()
+    start = time.monotonic()
+    # A session of its own, so the kill below takes its worker processes with it
+    process = subprocess.Popen(cmd, cwd=tmp, env=env, stdout=subprocess.DEVNULL, start_new_session=True)
+    while not square.arrived.wait(0.05) and process.poll() is None:
+        pass
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(process.pid, signal.SIGKILL)
+    process.wait()
+    if square.first is None:
+        raise RuntimeError(f'{name}: exited with {process.returncode} before calling Square')
+    return square.first - start
+
+
+def import_profile(module):
+    """Self and cumulative import times (us) from ``python -X importtime``, slowest first."""
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=ROOT,
+                         check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in err.splitlines()[1:]:
+        self_us, cumulative, name = line.split('|')
+        rows.append((int(self_us.split(':')[1]), int(cumulative), name.strip()))
+    return sorted(rows, reverse=True), max(cumulative for _, cumulative, _ in rows)
+
+
+def floor(code, runs):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.monotonic()
+        subprocess.run([sys.executable, '-c', code], check=True)
+        best = min(best, time.monotonic() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    square = TimedSquare().start_in_thread()
+    printful = FakePrintful().start_in_thread()
+    klaviyo = FakeKlaviyo().start_in_thread()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = shutil.copy(os.path.join(ROOT, CATALOG_CSV), tmp)
+            csv_to_bin(csv_path, os.path.splitext(csv_path)[0] + '.bin')
+            env = environment(tmp, square, printful, klaviyo)
+            whole = {workers: daily_run(tmp, env, f'whole-{workers}', workers)[0] for workers in (0, 2)}
+
+            timings = {}
+            for workers in (0, 4):
+                runs = [first_call(tmp, env, square, f'run-{workers}-{run}', workers)
+                        for run in range(args.runs + 1)]
+                timings[workers] = np.array(runs[1:]) * 1e3  # the first run warms the disk cache
+    finally:
+        for service in (square, printful, klaviyo):
+            service.stop_thread()
+
+    profile, imported = import_profile('merch_store.daily')
+    print(f"import merch_store.daily: {imported / 1e3:.1f} ms cumulative; slowest modules (self time):")
+    for self_us, _, name in profile[:5]:
+        print(f"    {self_us / 1e3:6.1f} ms  {name}")
+    print(f"floor, python -c pass:           {floor('pass', args.runs) * 1e3:7.1f} ms")
+    print(f"floor, python -c 'import asyncio': {floor('import asyncio', args.runs) * 1e3:5.1f} ms")
+    print(f"for reference, import numpy:     {floor('import numpy', args.runs) * 1e3:7.1f} ms")
+    for workers, first in timings.items():
+        label = 'in-process jobs' if not workers else f'{workers} worker processes'
+        print(f"{label:22s} first API call p50 {np.median(first):6.1f} ms  min {first.min():6.1f} ms")
+    print(f"whole run (paced by Printful's 0.5/s variant limit): {whole[0]:.1f} s in-process, "
+          f"{whole[2]:.1f} s with 2 workers")
+
+
+if __name__ == '__main__':
+    main()
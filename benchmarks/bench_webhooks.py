@@ -0,0 +1,61 @@
+"""Webhook receiver load test: sustained events/sec and latency under bursts.
+
+Signed Square and Printful events are offered at a steady rate, then
+all at once; 503s from the bounded queue are retried. Exactly-once
+processing, retries and log compaction are checked in
+tests/test_webhooks.py.
+
+    python -m benchmarks.bench_webhooks --rate 1000 --seconds 5 --burst 5000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from testbed.workloads import deliver, events, signed, start_receiver
+
+
+def summary(label, latencies, statuses, elapsed):
+    p50, p99, top = np.percentile(latencies, [50, 99, 100]) * 1e3
+    print(f"{label:22s} {len(latencies) / elapsed:10,.0f} events/s  latency ms p50 {p50:7.2f}  "
+          f"p99 {p99:7.2f}  max {top:7.2f}  non-200: {len(statuses) - statuses.count(200)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rate', type=float, default=1000, help='sustained events/sec to offer')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--burst', type=int, default=5000)
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--queue-size', type=int, default=1000)
+    parser.add_argument('--fsync', action='store_true')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sustained = int(args.rate * args.seconds)
+        rx = start_receiver(os.path.join(tmp, 'load.log'), queue_size=args.queue_size, fsync=args.fsync,
+                            retry_after=0.01)
+        try:
+            requests = [signed(rx, *e) for e in events(sustained + args.burst)]
+            start = time.perf_counter()
+            latencies, statuses = asyncio.run(deliver(rx.url, requests[:sustained], args.connections, args.rate))
+            steady = (latencies, statuses, time.perf_counter() - start)
+            start = time.perf_counter()
+            latencies, statuses = asyncio.run(deliver(rx.url, requests[sustained:], args.connections))
+            burst = (latencies, statuses, time.perf_counter() - start)
+            log_bytes = os.path.getsize(rx.log_path)
+        finally:
+            rx.stop_thread()
+
+    print(f"offered {args.rate:,.0f} events/s for {args.seconds:g} s, then a burst of {args.burst:,}; "
+          f"{args.connections} connections, queue {args.queue_size}, fsync {'on' if args.fsync else 'off'}")
+    summary('sustained', *steady)
+    summary('burst', *burst)
+    print(f"processed {rx.stats['processed']:,}, shed {rx.stats['shed']:,} (retried), log {log_bytes / 2**20:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""Helpers shared by the benchmark scripts."""
+import json
+import resource
+import subprocess
+import sys
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB.
+
+    Reads VmHWM because ru_maxrss survives exec and so reports the
+    parent's high-water mark in freshly spawned children.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(module, *args):
+    """Run ``python -m module --child ...`` and return its JSON result."""
+    out = subprocess.run(
+        [sys.executable, '-m', module, *map(str, args)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.splitlines()[-1])
@@ -0,0 +1,272 @@
+"""Benchmark suite: the hot paths at 30, 10k and 1M rows, with a regression check.
+
+Every case runs against a synthetic catalog of each size:
+
+* ``build``: typed columns and the derived cost, profit and margin columns,
+  as script.py computes them;
+* ``csv_write`` and ``csv_read``: the streaming catalog CSV writer and reader;
+* ``lookup``: the daily run's product of the day from the binary catalog,
+  file open included, for a spread of dates;
+* ``pricing``: batch repricing with the margin floor;
+* ``social``: a day of posts for every product, written as CSV;
+* ``square``: batch upserts to a local FakeSquare (capped at ``--http-items``
+  products, since it measures the client, not the catalog size).
+
+A case's time is the best of ``--repeat`` rounds; each round calls it
+until ``--min-time`` has passed, so the 30-row cases are not lost in
+timer noise, and no more rounds start once ``--max-time`` is spent.
+What each case produces is checked in the tests (tests/test_suite.py,
+test_startup.py, test_pricing.py, test_social.py and test_square.py).
+
+Results are appended to a JSON history (``--results``), one entry per
+run with the commit and machine. Each case's time per unit is compared
+with its median over the last ``--window`` entries (of ``--baseline``
+when given) from the same host, Python and NumPy, and the run exits
+with status 1 when any case got slower by more than ``--threshold``.
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --sizes 30 10000 --cases build pricing --threshold 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from merch_store.catalog import Catalog, synthetic
+from merch_store.catalog_bin import write_catalog
+from merch_store.catalog_io import read_chunks
+from merch_store.daily import Rotation, get_next_product_from_catalog
+from merch_store.pricing import DEFAULT_RULES
+from merch_store.social import DAILY_POSTS
+from merch_store.square import SquareCatalogClient
+from testbed.fakes import FakeSquare
+from testbed.workloads import market
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = [30, 10_000, 1_000_000]
+RESULTS = 'benchmark_results.json'
+START = datetime(2026, 1, 1)
+LOOKUPS = 200
+# Runs are only compared with earlier runs that match on all of these
+SAME_ENVIRONMENT = ('node', 'machine', 'python', 'numpy')
+
+
+class Case:
+    """A prepared benchmark: ``run()`` does ``units`` of work; ``reset()`` runs untimed before each call."""
+
+    def __init__(self, units, unit, run, reset=None):
+        self.units = units
+        self.unit = unit
+        self.run = run
+        self.reset = reset
+
+
+def build(catalog, tmp, args):
+    supplier, retail, shipping, _, _ = catalog.money_columns()
+    columns = (catalog.day, catalog.category.decode(), catalog.name, supplier, retail, shipping,
+               catalog.channels.decode())
+    return Case(len(catalog), 'rows', lambda: Catalog.from_dollars(*columns))
+
+
+def csv_write(catalog, tmp, args):
+    path = os.path.join(tmp, 'write.csv')
+    return Case(len(catalog), 'rows', lambda: catalog.to_csv(path))
+
+
+def csv_read(catalog, tmp, args):
+    path = os.path.join(tmp, 'read.csv')
+    catalog.to_csv(path)
+
+    def run():
+        for _ in read_chunks(path):
+            pass
+    return Case(len(catalog), 'rows', run)
+
+
+def lookup(catalog, tmp, args):
+    csv_path = os.path.join(tmp, 'lookup.csv')
+    write_catalog(catalog, csv_path[:-4] + '.bin')
+    rotation = Rotation(start=START)
+    # Dates spread over the whole catalog, not just its first month
+    step = max(1, len(catalog) // LOOKUPS)
+    dates = [START + i * step * rotation.every for i in range(LOOKUPS)]
+
+    def run():
+        for now in dates:
+            get_next_product_from_catalog(csv_path, now, rotation)
+    return Case(len(dates), 'lookups', run)
+
+
+def pricing(catalog, tmp, args):
+    views, sales, competitors, offsets = market(catalog)
+    inputs = (catalog.retail_cents, views, sales, competitors, offsets, catalog.total_cents)
+    return Case(len(catalog), 'rows', lambda: DEFAULT_RULES.reprice(*inputs))
+
+
+def social(catalog, tmp, args):
+    path = os.path.join(tmp, 'posts.csv')
+    return Case(len(catalog), 'products', lambda: DAILY_POSTS.write_csv(catalog, path, START))
+
+
+def square(catalog, tmp, args):
+    products = list(catalog.take(np.arange(min(len(catalog), args.http_items))).records())
+    fake = args.fake_square
+
+    async def upload():
+        async with SquareCatalogClient('bench', fake.url) as client:
+            return await client.upsert_products(products)
+
+    def reset():
+        # A repeated upsert would be answered from the idempotency cache.
+        fake.objects.clear()
+        fake.replies.clear()
+
+    return Case(len(products), 'products', lambda: asyncio.run(upload()), reset)
+
+
+CASES = {'build': build, 'csv_write': csv_write, 'csv_read': csv_read, 'lookup': lookup,
+         'pricing': pricing, 'social': social, 'square': square}
+
+
+def measure(case, repeat, min_time, max_time):
+    """Best seconds per call over ``repeat`` rounds of at least ``min_time`` seconds each.
+
+    Rounds stop early once ``max_time`` has been spent, so the 1M-row cases
+    that take seconds per call are not run three times over.
+    """
+    best = float('inf')
+    calls = 0
+    total = 0.0
+    for _ in range(repeat):
+        if total >= max_time:
+            break
+        spent = 0.0
+        n = 0
+        while spent < min_time or not n:
+            if case.reset:
+                case.reset()
+            start = time.perf_counter()
+            case.run()
+            spent += time.perf_counter() - start
+            n += 1
+        best = min(best, spent / n)
+        calls += n
+        total += spent
+    return best, calls
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'time': datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+            'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+            'cpus': os.cpu_count(), 'node': platform.node()}
+
+
+def load_history(path):
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def comparable(runs, run):
+    """The runs in ``runs`` made on the same host with the same Python and NumPy as ``run``."""
+    return [r for r in runs if all(r.get(key) == run[key] for key in SAME_ENVIRONMENT)]
+
+
+def compare(results, runs):
+    """(case, rows, change) for every case timed in ``runs``.
+
+    The change is relative to the median time per unit over those runs,
+    so one unusually fast or slow earlier run does not decide the check.
+    """
+    before = {}
+    for run in runs:
+        for r in run['results']:
+            before.setdefault((r['case'], r['rows']), []).append(r['seconds'] / r['units'])
+    changes = []
+    for r in results:
+        old = before.get((r['case'], r['rows']))
+        if old:
+            changes.append((r['case'], r['rows'], r['seconds'] / r['units'] / float(np.median(old)) - 1))
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per round (default: %(default)s)')
+    parser.add_argument('--max-time', type=float, default=10.0,
+                        help='stop repeating a case after this many seconds (default: %(default)s)')
+    parser.add_argument('--http-items', type=int, default=2000)
+    parser.add_argument('--results', default=RESULTS, help='JSON history to append to (default: %(default)s)')
+    parser.add_argument('--no-save', action='store_true', help='compare without appending this run')
+    parser.add_argument('--baseline', help='compare with the runs in this file instead of --results')
+    parser.add_argument('--window', type=int, default=5,
+                        help='compare with the median of this many latest runs (default: %(default)s)')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='fail when a case is this much slower per unit (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    run = {**environment(), 'results': []}
+    args.fake_square = FakeSquare().start_in_thread() if 'square' in args.cases else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"{'case':10s}{'rows':>11s}{'units':>11s}{'per call':>13s}{'per unit':>12s}{'units/sec':>15s}"
+                  f"{'calls':>7s}")
+            for rows in args.sizes:
+                catalog = synthetic(rows, seed=rows)
+                for name in args.cases:
+                    case = CASES[name](catalog, tmp, args)
+                    seconds, calls = measure(case, args.repeat, args.min_time, args.max_time)
+                    run['results'].append({'case': name, 'rows': rows, 'units': case.units, 'unit': case.unit,
+                                           'seconds': seconds, 'per_sec': case.units / seconds})
+                    print(f"{name:10s}{rows:11,d}{case.units:11,d}{seconds * 1e3:11.3f}ms"
+                          f"{seconds / case.units * 1e6:10.3f}us{case.units / seconds:15,.0f}{calls:7d}")
+    finally:
+        if args.fake_square is not None:
+            args.fake_square.stop_thread()
+
+    history = load_history(args.results)
+    previous = load_history(args.baseline) if args.baseline else history
+    if not args.no_save:
+        save_history(args.results, history + [run])
+        print(f"appended to {args.results} ({len(history) + 1} runs)")
+    baseline = comparable(previous, run)[-args.window:]
+    if not baseline:
+        print(f"no earlier run on {run['node']} ({run['machine']}, Python {run['python']}, "
+              f"NumPy {run['numpy']}) to compare with")
+        return
+    changes = compare(run['results'], baseline)
+    regressions = [c for c in changes if c[2] > args.threshold]
+    commits = ', '.join(dict.fromkeys(r['commit'] or 'unknown' for r in baseline))
+    print(f"against the median of {len(baseline)} runs ({commits}) since {baseline[0]['time']}:")
+    for name, rows, change in changes:
+        flag = '  REGRESSION' if change > args.threshold else ''
+        print(f"    {name:10s}{rows:11,d}  {change:+7.1%}{flag}")
+    if regressions:
+        parser.exit(1, f"{len(regressions)} of {len(changes)} cases slower than the {args.threshold:.0%} threshold\n")
+
+
+if __name__ == '__main__':
+    main()
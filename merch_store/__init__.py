@@ -0,0 +1 @@
+"""Python automation for the YouAndINotAI anti-AI merch store."""
@@ -0,0 +1,29 @@
+"""Command-line entry point: ``python -m merch_store <command> [options]``.
+
+Each command is a ``'module:function'`` string imported only when it is
+run, so starting one command never pays for another's dependencies.
+"""
+import importlib
+import sys
+
+COMMANDS = {
+    'daily': ('merch_store.daily:main', "feature today's product and run its upload jobs"),
+    'reports': ('merch_store.reports:main', 'render the guides for one or more brands'),
+    'metrics': ('merch_store.catalog_parallel:main', 'catalog metrics and top products, in parallel'),
+    'daemon': ('merch_store.scheduler:main', 'run the jobs on their schedules in one long-lived process'),
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print('usage: python -m merch_store <command> [options]\n\ncommands:', file=sys.stderr)
+        for name, (_, help) in COMMANDS.items():
+            print(f'  {name:10s}{help}', file=sys.stderr)
+        return 2
+    module, _, name = COMMANDS[argv[0]][0].partition(':')
+    return getattr(importlib.import_module(module), name)(argv[1:])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
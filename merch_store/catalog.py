@@ -0,0 +1,259 @@
+"""Columnar catalog engine.
+
+Holds the merch catalog as typed, contiguous NumPy columns instead of the
+dict-of-lists DataFrame script.py used to hand-assemble. Money is stored as
+integer cents, Product_Category and Marketing_Channels are dictionary
+encoded, and every profit metric is derived in one vectorized pass.
+"""
+import numpy as np
+
+CSV_COLUMNS = [
+    'Day', 'Product_Category', 'Product_Name', 'Supplier_Cost', 'Retail_Price',
+    'Shipping_Cost', 'Total_Cost', 'Gross_Profit', 'Profit_Margin_%',
+    'Marketing_Channels',
+]
+
+CSV_CHUNK_ROWS = 65536
+
+
+class Categorical:
+    """Dictionary-encoded string column: int32 codes into a list of labels."""
+
+    __slots__ = ('codes', 'labels')
+
+    def __init__(self, codes, labels):
+        self.codes = np.ascontiguousarray(codes, dtype=np.int32)
+        self.labels = list(labels)
+
+    @classmethod
+    def encode(cls, values):
+        """Encode strings in first-seen order."""
+        lookup = {}
+        codes = np.fromiter(
+            (lookup.setdefault(v, len(lookup)) for v in values),
+            dtype=np.int32, count=len(values),
+        )
+        return cls(codes, lookup)
+
+    def decode(self, start=0, stop=None):
+        """Return the labels for a slice of rows as an object array."""
+        return np.asarray(self.labels, dtype=object)[self.codes[start:stop]]
+
+    def take(self, indices):
+        return Categorical(self.codes[indices], self.labels)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.labels[self.codes[i]]
+
+
+def to_cents(dollars):
+    """Convert dollar amounts to int64 cents, rounding half away from zero."""
+    return np.rint(np.asarray(dollars, dtype=np.float64) * 100).astype(np.int64)
+
+
+def derive_metrics(supplier_cents, retail_cents, shipping_cents):
+    """Total and profit in cents plus the legacy float64 margin percentage."""
+    total_cents = supplier_cents + shipping_cents
+    profit_cents = retail_cents - total_cents
+    retail = retail_cents / 100
+    profit = retail - (supplier_cents / 100 + shipping_cents / 100)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        margin_pct = np.round(profit / retail * 100, 2)
+    return total_cents, profit_cents, margin_pct
+
+
+def top_k_indices(values, k):
+    """Indices of the k largest values, largest first, ties in index order."""
+    n = len(values)
+    if k >= n:
+        return np.argsort(-values, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    threshold = np.partition(values, n - k)[n - k]
+    above = np.flatnonzero(values > threshold)
+    ties = np.flatnonzero(values == threshold)[:k - len(above)]
+    picked = np.concatenate([above, ties])
+    return picked[np.argsort(-values[picked], kind='stable')]
+
+
+class Catalog:
+    """Product catalog stored as typed columns.
+
+    ``total_cents`` and ``profit_cents`` are exact integer metrics.
+    ``margin_pct`` and the dollar columns returned by :meth:`money_columns`
+    follow the float64 arithmetic of the original pandas build, so the CSV
+    output stays byte-compatible with ``anti_ai_merch_store_30day_catalog.csv``.
+    """
+
+    def __init__(self, day, category, name, supplier_cents, retail_cents,
+                 shipping_cents, channels, compute=True, slug=None):
+        self.day = np.ascontiguousarray(day, dtype=np.int64)
+        self.category = category if isinstance(category, Categorical) else Categorical.encode(category)
+        self.name = np.asarray(name, dtype=object)
+        self.supplier_cents = np.ascontiguousarray(supplier_cents, dtype=np.int64)
+        self.retail_cents = np.ascontiguousarray(retail_cents, dtype=np.int64)
+        self.shipping_cents = np.ascontiguousarray(shipping_cents, dtype=np.int64)
+        self.channels = channels if isinstance(channels, Categorical) else Categorical.encode(channels)
+        self.slug = None if slug is None else np.asarray(slug, dtype=object)
+        if compute:
+            self.compute_metrics()
+
+    @classmethod
+    def from_dollars(cls, day, category, name, supplier_cost, retail_price,
+                     shipping_cost, channels):
+        return cls(day, category, name, to_cents(supplier_cost),
+                   to_cents(retail_price), to_cents(shipping_cost), channels)
+
+    @classmethod
+    def from_dict(cls, product_catalog, marketing_channels=None):
+        """Build from script.py's dict-of-lists layout."""
+        if marketing_channels is None:
+            marketing_channels = product_catalog['Marketing_Channels']
+        return cls.from_dollars(
+            product_catalog['Day'],
+            product_catalog['Product_Category'],
+            product_catalog['Product_Name'],
+            product_catalog['Supplier_Cost'],
+            product_catalog['Retail_Price'],
+            product_catalog['Shipping_Cost'],
+            marketing_channels,
+        )
+
+    def __len__(self):
+        return len(self.day)
+
+    def compute_metrics(self):
+        """Derive Total_Cost, Gross_Profit and Profit_Margin_% for every row."""
+        self.total_cents, self.profit_cents, self.margin_pct = derive_metrics(
+            self.supplier_cents, self.retail_cents, self.shipping_cents)
+
+    def money_columns(self, start=0, stop=None):
+        """Return supplier, retail, shipping, total and profit as float64 dollars.
+
+        Values are the ones the legacy float pipeline produced
+        (e.g. 63.989999999999995), not the rounded cents.
+        """
+        supplier = self.supplier_cents[start:stop] / 100
+        retail = self.retail_cents[start:stop] / 100
+        shipping = self.shipping_cents[start:stop] / 100
+        total = supplier + shipping
+        return supplier, retail, shipping, total, retail - total
+
+    def take(self, indices):
+        """Return a new catalog holding the selected rows."""
+        return Catalog(
+            self.day[indices], self.category.take(indices), self.name[indices],
+            self.supplier_cents[indices], self.retail_cents[indices],
+            self.shipping_cents[indices], self.channels.take(indices),
+            slug=None if self.slug is None else self.slug[indices],
+        )
+
+    def assign_slugs(self):
+        """Give every row its canonical unique URL slug (the ``slug`` column)."""
+        from merch_store.slugs import assign_slugs
+
+        self.slug = np.asarray(assign_slugs(self.name.tolist()), dtype=object)
+        return self.slug
+
+    def slug_index(self):
+        """Reverse slug -> row index; slugs are assigned first if needed."""
+        from merch_store.slugs import SlugIndex
+
+        return SlugIndex(self.assign_slugs() if self.slug is None else self.slug)
+
+    def rows(self, start=0, stop=None):
+        """Yield CSV rows (in CSV_COLUMNS order) for a slice of the catalog."""
+        supplier, retail, shipping, total, profit = self.money_columns(start, stop)
+        return zip(
+            self.day[start:stop].tolist(),
+            self.category.decode(start, stop).tolist(),
+            self.name[start:stop].tolist(),
+            supplier.tolist(), retail.tolist(), shipping.tolist(),
+            total.tolist(), profit.tolist(),
+            self.margin_pct[start:stop].tolist(),
+            self.channels.decode(start, stop).tolist(),
+        )
+
+    def records(self, start=0, stop=None):
+        """Yield rows as dicts keyed by CSV column, like ``df.to_dict('records')``.
+
+        Rows also carry ``Slug`` once slugs have been assigned.
+        """
+        if self.slug is None:
+            for row in self.rows(start, stop):
+                yield dict(zip(CSV_COLUMNS, row))
+            return
+        for row, slug in zip(self.rows(start, stop), self.slug[start:stop].tolist()):
+            record = dict(zip(CSV_COLUMNS, row))
+            record['Slug'] = slug
+            yield record
+
+    def to_csv(self, path, chunk_rows=CSV_CHUNK_ROWS):
+        """Write the catalog exactly as ``df.to_csv(path, index=False)`` did."""
+        from merch_store.catalog_io import write_chunks
+
+        write_chunks(path, [self], chunk_rows)
+
+    def to_frame(self):
+        """Return a pandas DataFrame with the legacy column layout."""
+        import pandas as pd
+
+        supplier, retail, shipping, total, profit = self.money_columns()
+        return pd.DataFrame({
+            'Day': self.day,
+            'Product_Category': self.category.decode(),
+            'Product_Name': self.name,
+            'Supplier_Cost': supplier,
+            'Retail_Price': retail,
+            'Shipping_Cost': shipping,
+            'Total_Cost': total,
+            'Gross_Profit': profit,
+            'Profit_Margin_%': self.margin_pct,
+            'Marketing_Channels': self.channels.decode(),
+        }, columns=CSV_COLUMNS)
+
+    def top_k(self, k, key='profit_cents'):
+        """Row indices of the k largest values, ties broken by row order.
+
+        Matches ``df.nlargest(k, ...)`` without sorting the whole column.
+        """
+        return top_k_indices(getattr(self, key), k)
+
+    def summary(self):
+        """Catalog-level averages printed by the build script."""
+        return {
+            'products': len(self),
+            'avg_margin_pct': float(self.margin_pct.mean()) if len(self) else 0.0,
+            'avg_gross_profit': float(self.profit_cents.mean() / 100) if len(self) else 0.0,
+        }
+
+
+SYNTHETIC_CATEGORIES = [
+    'Apparel', 'Accessories', 'Home_Decor', 'Tech_Accessories', 'Drinkware',
+    'Stationery',
+]
+
+SYNTHETIC_CHANNELS = [
+    'Instagram, Pinterest, TikTok',
+    'Instagram, Etsy, Pinterest',
+    'Pinterest, Instagram, Home Decor Blogs',
+    'Instagram, TikTok, Facebook',
+    'Instagram, Tech Communities, Reddit',
+    'Instagram, TikTok, Streetwear',
+]
+
+
+def synthetic(n, seed=0):
+    """Generate an n-row catalog with realistic price and cost ranges."""
+    rng = np.random.default_rng(seed)
+    supplier = rng.integers(300, 3000, n)
+    retail = supplier * 3 + rng.integers(0, 5000, n) // 100 * 100 + 99
+    shipping = rng.integers(4, 19, n) * 50
+    day = np.arange(1, n + 1, dtype=np.int64)
+    name = np.char.add('Synthetic Product ', day.astype(str)).astype(object)
+    category = Categorical(rng.integers(0, len(SYNTHETIC_CATEGORIES), n), SYNTHETIC_CATEGORIES)
+    channels = Categorical(rng.integers(0, len(SYNTHETIC_CHANNELS), n), SYNTHETIC_CHANNELS)
+    return Catalog(day, category, name, supplier, retail, shipping, channels)
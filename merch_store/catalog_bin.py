@@ -0,0 +1,362 @@
+"""Binary columnar catalog format, opened via mmap.
+
+Layout (all integers little-endian, every column 8-byte aligned)::
+
+    header   magic b'MRCHCAT1', u64 row count
+    columns  Day i8, Supplier/Retail/Shipping cents i8, Profit_Margin_% f8,
+             Product_Category i4 codes, Marketing_Channels i4 codes,
+             slug sort order u8, slug u8 offsets (rows + 1),
+             Product_Name u8 offsets (rows + 1), Product_Name utf-8 blob,
+             slug utf-8 blob
+    footer   JSON index (column offsets, dictionaries, Day layout)
+    trailer  u64 footer length, magic b'MRCHCAT1'
+
+Numeric columns are exposed as zero-copy NumPy views of the mapping, so
+opening a file costs a header and footer read, and fetching a row touches
+one page per column. Slugs are assigned while writing (see
+:mod:`merch_store.slugs`) and stored with a sorted order, so a slug is
+found by binary search over the mapping. Files written before slugs
+existed still open; they just have none.
+"""
+import functools
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from merch_store.catalog import CSV_CHUNK_ROWS, Catalog, Categorical
+from merch_store.catalog_io import count_rows, read_chunks, write_chunks
+from merch_store.catalog_row import HEADER, MAGIC, TRAILER
+from merch_store.slugs import SLUG_CACHE_SIZE, SlugAssigner
+
+FIXED_COLUMNS = [
+    ('day', '<i8'),
+    ('supplier_cents', '<i8'),
+    ('retail_cents', '<i8'),
+    ('shipping_cents', '<i8'),
+    ('margin_pct', '<f8'),
+    ('category', '<i4'),
+    ('channels', '<i4'),
+]
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _layout(n_rows):
+    """Offsets of every fixed-width column for an n-row file."""
+    offsets = {}
+    pos = HEADER.size
+    for name, dtype in FIXED_COLUMNS:
+        offsets[name] = pos
+        pos = _align(pos + n_rows * np.dtype(dtype).itemsize)
+    offsets['slug_order'] = pos
+    pos += n_rows * 8
+    offsets['slug_offsets'] = pos
+    pos += (n_rows + 1) * 8
+    offsets['name_offsets'] = pos
+    offsets['name_blob'] = pos + (n_rows + 1) * 8
+    return offsets
+
+
+class CatalogBinWriter:
+    """Write a catalog of known length chunk by chunk.
+
+    Dictionaries and slugs are merged across chunks, so chunks read
+    independently from CSV can be fed straight in. Slugs of every row are
+    kept in memory until the file is finished, to sort them.
+    """
+
+    def __init__(self, path, n_rows):
+        self.path = path
+        self.n_rows = n_rows
+        self.offsets = _layout(n_rows)
+        self.rows_written = 0
+        self.blob_size = 0
+        self.dictionaries = {'category': {}, 'channels': {}}
+        self.first_day = None
+        self.day_dense = True
+        self.day_sorted = True
+        self._last_day = None
+        self._file = None
+        self.slugs = SlugAssigner()
+        self._slug_bytes = []
+
+    def __enter__(self):
+        # Written beside the target and renamed into place, so readers that
+        # have the old file mapped (the scheduler daemon) never see it change.
+        self._file = open(self.path + '.tmp', 'wb')
+        self._file.write(HEADER.pack(MAGIC, self.n_rows))
+        self._file.write(struct.pack('<Q', 0))
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        finished = False
+        try:
+            if exc_type is None:
+                self._finish()
+                finished = True
+        finally:
+            self._file.close()
+            if finished:
+                os.replace(self.path + '.tmp', self.path)
+            else:
+                os.unlink(self.path + '.tmp')
+
+    def _remap(self, key, column):
+        lookup = self.dictionaries[key]
+        mapping = np.array([lookup.setdefault(v, len(lookup)) for v in column.labels], dtype=np.int32)
+        return mapping[column.codes] if len(mapping) else column.codes
+
+    def _put(self, name, values):
+        dtype = dict(FIXED_COLUMNS)[name]
+        self._file.seek(self.offsets[name] + self.rows_written * np.dtype(dtype).itemsize)
+        self._file.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+    def write(self, catalog):
+        n = len(catalog)
+        if self.rows_written + n > self.n_rows:
+            raise ValueError(f"{self.path}: more than {self.n_rows} rows written")
+        if n == 0:
+            return
+        day = catalog.day
+        if self.first_day is None:
+            self.first_day = int(day[0])
+        expected = np.arange(self.rows_written, self.rows_written + n) + self.first_day
+        self.day_dense = self.day_dense and bool(np.array_equal(day, expected))
+        self.day_sorted = self.day_sorted and bool(
+            np.all(day[1:] >= day[:-1]) and (self._last_day is None or day[0] >= self._last_day))
+        self._last_day = int(day[-1])
+
+        self._put('day', day)
+        self._put('supplier_cents', catalog.supplier_cents)
+        self._put('retail_cents', catalog.retail_cents)
+        self._put('shipping_cents', catalog.shipping_cents)
+        self._put('margin_pct', catalog.margin_pct)
+        self._put('category', self._remap('category', catalog.category))
+        self._put('channels', self._remap('channels', catalog.channels))
+
+        encoded = [s.encode('utf-8') for s in catalog.name.tolist()]
+        ends = np.cumsum([len(b) for b in encoded], dtype=np.int64) + self.blob_size
+        self._file.seek(self.offsets['name_offsets'] + (self.rows_written + 1) * 8)
+        self._file.write(ends.astype('<u8').tobytes())
+        self._file.seek(self.offsets['name_blob'] + self.blob_size)
+        self._file.write(b''.join(encoded))
+        self.blob_size = int(ends[-1])
+        self.rows_written += n
+
+        if catalog.slug is None:
+            slugs = self.slugs.assign(catalog.name.tolist())
+        else:
+            slugs = catalog.slug.tolist()
+            if len(set(slugs)) != len(slugs) or not self.slugs.used.isdisjoint(slugs):
+                raise ValueError(f"{self.path}: duplicate slugs")
+            self.slugs.used.update(slugs)
+        self._slug_bytes.extend(slug.encode('utf-8') for slug in slugs)
+
+    def _write_slugs(self, blob_start):
+        encoded = self._slug_bytes
+        ends = np.zeros(len(encoded) + 1, dtype='<u8')
+        np.cumsum([len(b) for b in encoded], out=ends[1:])
+        order = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype='<u8')
+        self._file.seek(self.offsets['slug_order'])
+        self._file.write(order.tobytes())
+        self._file.write(ends.tobytes())
+        self._file.seek(blob_start)
+        self._file.write(b''.join(encoded))
+        return int(ends[-1])
+
+    def _finish(self):
+        if self.rows_written != self.n_rows:
+            raise ValueError(f"{self.path}: expected {self.n_rows} rows, got {self.rows_written}")
+        self.offsets['slug_blob'] = self.offsets['name_blob'] + self.blob_size
+        slug_size = self._write_slugs(self.offsets['slug_blob'])
+        footer = json.dumps({
+            'rows': self.n_rows,
+            'offsets': self.offsets,
+            'columns': dict(FIXED_COLUMNS),
+            'name_blob_size': self.blob_size,
+            'dictionaries': {k: list(v) for k, v in self.dictionaries.items()},
+            'first_day': self.first_day,
+            'day_dense': self.day_dense,
+            'day_sorted': self.day_sorted,
+        }).encode('utf-8')
+        self._file.seek(self.offsets['slug_blob'] + slug_size)
+        self._file.write(footer)
+        self._file.write(TRAILER.pack(len(footer), MAGIC))
+
+
+def write_catalog(catalog, path):
+    """Write an in-memory Catalog to the binary format."""
+    with CatalogBinWriter(path, len(catalog)) as writer:
+        writer.write(catalog)
+
+
+def csv_to_bin(csv_path, bin_path, chunk_rows=CSV_CHUNK_ROWS):
+    """Convert a catalog CSV to the binary format with bounded memory."""
+    with CatalogBinWriter(bin_path, count_rows(csv_path)) as writer:
+        for chunk in read_chunks(csv_path, chunk_rows):
+            writer.write(chunk)
+    return writer.rows_written
+
+
+def bin_to_csv(bin_path, csv_path, chunk_rows=CSV_CHUNK_ROWS):
+    """Convert a binary catalog back to the legacy CSV layout."""
+    with CatalogFile(bin_path) as cat:
+        return write_chunks(csv_path, cat.chunks(chunk_rows), chunk_rows)
+
+
+class CatalogFile:
+    """Read-only, memory-mapped view of a binary catalog."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size + TRAILER.size:
+                raise ValueError(f"{path}: not a binary catalog")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_rows = HEADER.unpack_from(self._mm, 0)
+        footer_len, tail_magic = TRAILER.unpack_from(self._mm, size - TRAILER.size)
+        if magic != MAGIC or tail_magic != MAGIC:
+            raise ValueError(f"{path}: not a binary catalog")
+        start = size - TRAILER.size - footer_len
+        self.meta = json.loads(self._mm[start:start + footer_len])
+        self.rows = n_rows
+        offsets = self.meta['offsets']
+        for name, dtype in self.meta['columns'].items():
+            setattr(self, name, np.frombuffer(self._mm, dtype, n_rows, offsets[name]))
+        self.name_offsets = np.frombuffer(self._mm, '<u8', n_rows + 1, offsets['name_offsets'])
+        self._blob = offsets['name_blob']
+        self.category_labels = self.meta['dictionaries']['category']
+        self.channel_labels = self.meta['dictionaries']['channels']
+        self.has_slugs = 'slug_blob' in offsets
+        if self.has_slugs:
+            self.slug_order = np.frombuffer(self._mm, '<u8', n_rows, offsets['slug_order'])
+            self.slug_offsets = np.frombuffer(self._mm, '<u8', n_rows + 1, offsets['slug_offsets'])
+            self._slug_blob = offsets['slug_blob']
+        self.find_slug = functools.lru_cache(maxsize=SLUG_CACHE_SIZE)(self._find_slug)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.rows
+
+    def close(self):
+        for name in self.meta['columns']:
+            self.__dict__.pop(name, None)
+        for name in ('name_offsets', 'slug_order', 'slug_offsets'):
+            self.__dict__.pop(name, None)
+        self.find_slug.cache_clear()
+        self._mm.close()
+
+    def product_name(self, i):
+        start, stop = self.name_offsets[i], self.name_offsets[i + 1]
+        return self._mm[self._blob + int(start):self._blob + int(stop)].decode('utf-8')
+
+    def slug(self, i):
+        if not self.has_slugs:
+            return None
+        start, stop = self.slug_offsets[i], self.slug_offsets[i + 1]
+        return self._mm[self._slug_blob + int(start):self._slug_blob + int(stop)].decode('utf-8')
+
+    def _slug_bytes(self, i):
+        start, stop = int(self.slug_offsets[i]), int(self.slug_offsets[i + 1])
+        return self._mm[self._slug_blob + start:self._slug_blob + stop]
+
+    def _find_slug(self, slug):
+        """Row of a slug, or None: binary search over the sorted slug order."""
+        if not self.has_slugs:
+            return None
+        key = slug.encode('utf-8')
+        lo, hi = 0, self.rows
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._slug_bytes(int(self.slug_order[mid])) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.rows:
+            i = int(self.slug_order[lo])
+            if self._slug_bytes(i) == key:
+                return i
+        return None
+
+    def row(self, i):
+        """Return row i as a dict keyed by the CSV column names."""
+        supplier = int(self.supplier_cents[i]) / 100
+        retail = int(self.retail_cents[i]) / 100
+        shipping = int(self.shipping_cents[i]) / 100
+        total = supplier + shipping
+        row = {
+            'Day': int(self.day[i]),
+            'Product_Category': self.category_labels[self.category[i]],
+            'Product_Name': self.product_name(i),
+            'Supplier_Cost': supplier,
+            'Retail_Price': retail,
+            'Shipping_Cost': shipping,
+            'Total_Cost': total,
+            'Gross_Profit': retail - total,
+            'Profit_Margin_%': float(self.margin_pct[i]),
+            'Marketing_Channels': self.channel_labels[self.channels[i]],
+        }
+        if self.has_slugs:
+            row['Slug'] = self.slug(i)
+        return row
+
+    def find_day(self, day):
+        """Index of the first row with this Day, or None.
+
+        O(1) for the usual dense 1..n layout, binary search when Day is
+        sorted, and a vectorized scan otherwise.
+        """
+        if not self.rows:
+            return None
+        if self.meta['day_dense']:
+            i = day - self.meta['first_day']
+            return i if 0 <= i < self.rows else None
+        if self.meta['day_sorted']:
+            i = int(np.searchsorted(self.day, day))
+            return i if i < self.rows and self.day[i] == day else None
+        hits = np.flatnonzero(self.day == day)
+        return int(hits[0]) if len(hits) else None
+
+    def days(self):
+        """Distinct Day values in ascending order."""
+        if self.meta['day_dense']:
+            return np.arange(self.meta['first_day'], self.meta['first_day'] + self.rows)
+        return np.unique(self.day)
+
+    def _strings(self, offsets, blob_start, start, stop):
+        offsets = offsets[start:stop + 1].astype(np.int64)
+        blob = self._mm[blob_start + int(offsets[0]):blob_start + int(offsets[-1])]
+        rel = offsets - offsets[0]
+        return [blob[a:b].decode('utf-8') for a, b in zip(rel[:-1].tolist(), rel[1:].tolist())]
+
+    def slice(self, start, stop, compute=True):
+        """Copy rows [start, stop) out of the mapping as a Catalog."""
+        stop = min(stop, self.rows)
+        names = self._strings(self.name_offsets, self._blob, start, stop)
+        slugs = self._strings(self.slug_offsets, self._slug_blob, start, stop) if self.has_slugs else None
+        return Catalog(
+            self.day[start:stop].copy(),
+            Categorical(self.category[start:stop].copy(), self.category_labels),
+            names,
+            self.supplier_cents[start:stop].copy(),
+            self.retail_cents[start:stop].copy(),
+            self.shipping_cents[start:stop].copy(),
+            Categorical(self.channels[start:stop].copy(), self.channel_labels),
+            compute=compute,
+            slug=slugs,
+        )
+
+    def chunks(self, chunk_rows=CSV_CHUNK_ROWS):
+        for start in range(0, self.rows, chunk_rows):
+            yield self.slice(start, start + chunk_rows)
@@ -0,0 +1,157 @@
+"""Content-hash change detection between the catalog and what was last synced.
+
+Every row gets a 64-bit fingerprint of the fields downstream systems care
+about (name, price, cost, category, marketing channels). A SyncState per
+downstream system remembers the fingerprint and remote object ids of each
+product it last accepted; diffing the current catalog against it yields
+only the rows to create, update or delete.
+"""
+import os
+
+import numpy as np
+
+STATE_SUFFIX = '.sync.npz'
+FNV_PRIME = np.uint64(0x100000001B3)
+
+
+def _hash_strings(values):
+    from pandas.util import hash_array
+
+    return hash_array(np.asarray(values, dtype=object), categorize=False)
+
+
+def _hash_ints(values):
+    from pandas.util import hash_array
+
+    return hash_array(np.asarray(values, dtype=np.int64))
+
+
+def fingerprints(catalog):
+    """uint64 fingerprint per row; equal rows hash equal across runs."""
+    category = _hash_strings(catalog.category.labels)[catalog.category.codes]
+    channels = _hash_strings(catalog.channels.labels)[catalog.channels.codes]
+    parts = [
+        _hash_strings(catalog.name),
+        _hash_ints(catalog.retail_cents),
+        _hash_ints(catalog.supplier_cents + catalog.shipping_cents),
+        category,
+        channels,
+    ]
+    h = np.zeros(len(catalog), dtype=np.uint64)
+    for part in parts:
+        h *= FNV_PRIME
+        h ^= part
+    return h
+
+
+class CatalogDiff:
+    """Rows to push: ``creates``/``updates`` are catalog row indices, ``deletes`` are keys."""
+
+    def __init__(self, creates, updates, deletes, keys, fingerprints):
+        self.creates = creates
+        self.updates = updates
+        self.deletes = deletes
+        self.keys = keys
+        self.fingerprints = fingerprints
+
+    def __len__(self):
+        return len(self.creates) + len(self.updates) + len(self.deletes)
+
+    def __repr__(self):
+        return (f"CatalogDiff(creates={len(self.creates)}, updates={len(self.updates)}, "
+                f"deletes={len(self.deletes)})")
+
+
+class SyncState:
+    """Last-synced fingerprints and remote ids for one downstream system.
+
+    Arrays are kept sorted by key (the catalog Day) so diffs are vectorized
+    merges rather than per-row dict lookups.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.keys = np.empty(0, dtype=np.int64)
+        self.fingerprints = np.empty(0, dtype=np.uint64)
+        self.remote_ids = np.empty(0, dtype='S1')
+        if path and os.path.exists(path):
+            with np.load(path, allow_pickle=False) as data:
+                self.keys = data['keys']
+                self.fingerprints = data['fingerprints']
+                self.remote_ids = data['remote_ids']
+
+    @classmethod
+    def for_system(cls, system, state_dir='.'):
+        return cls(os.path.join(state_dir, system + STATE_SUFFIX))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def diff(self, catalog, fps=None):
+        """Compare a catalog with this state."""
+        if fps is None:
+            fps = fingerprints(catalog)
+        keys = catalog.day
+        ordered = keys if (keys[1:] > keys[:-1]).all() else np.sort(keys)
+        if (ordered[1:] == ordered[:-1]).any():
+            raise ValueError('catalog keys (Day) must be unique to diff')
+        pos, known = self._lookup(keys)
+        creates = np.flatnonzero(~known)
+        changed = known.copy()
+        changed[known] = self.fingerprints[pos[known]] != fps[known]
+        updates = np.flatnonzero(changed)
+        present = np.zeros(len(self.keys), dtype=bool)
+        present[pos[known]] = True
+        deletes = self.keys[~present]
+        return CatalogDiff(creates, updates, deletes, keys, fps)
+
+    def _lookup(self, keys):
+        """Positions of ``keys`` in the state and whether each is present."""
+        pos = np.searchsorted(self.keys, keys)
+        if not len(self.keys):
+            return pos, np.zeros(len(keys), dtype=bool)
+        return pos, self.keys[np.minimum(pos, len(self.keys) - 1)] == keys
+
+    def remote_id(self, key):
+        """Remote object id recorded for a key, or None."""
+        i = np.searchsorted(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.remote_ids[i].decode('utf-8') or None
+        return None
+
+    def commit(self, diff, rows=None, remote_ids=None, deleted=None):
+        """Record rows the downstream system accepted.
+
+        ``rows`` defaults to every create and update in ``diff``;
+        ``remote_ids`` maps key -> remote object id for newly created rows;
+        ``deleted`` defaults to every key in ``diff.deletes``.
+        """
+        if rows is None:
+            rows = np.concatenate([diff.creates, diff.updates])
+        if deleted is None:
+            deleted = diff.deletes
+        keys = diff.keys[rows]
+        pos, known = self._lookup(keys)
+        ids = np.where(known, self.remote_ids[np.minimum(pos, len(self.keys) - 1)] if len(self.keys) else b'', b'')
+        if remote_ids:
+            ids = ids.tolist()
+            index = {k: i for i, k in enumerate(keys.tolist())}
+            for key, remote_id in remote_ids.items():
+                ids[index[key]] = remote_id.encode('utf-8')
+            ids = np.array(ids, dtype=bytes)
+
+        drop = np.zeros(len(self.keys), dtype=bool)
+        drop[pos[known]] = True
+        gone_pos, gone = self._lookup(np.asarray(deleted, dtype=np.int64))
+        drop[gone_pos[gone]] = True
+        merged_keys = np.concatenate([self.keys[~drop], keys])
+        order = np.argsort(merged_keys, kind='stable')
+        self.keys = merged_keys[order]
+        self.fingerprints = np.concatenate([self.fingerprints[~drop], diff.fingerprints[rows]])[order]
+        self.remote_ids = np.concatenate([self.remote_ids[~drop], ids])[order]
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, keys=self.keys, fingerprints=self.fingerprints, remote_ids=self.remote_ids)
+        os.replace(tmp, self.path)
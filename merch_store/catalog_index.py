@@ -0,0 +1,292 @@
+"""Persistent Day / product / category index for catalog CSVs.
+
+The index lives next to the catalog (``<catalog>.idx`` plus an append-only
+``<catalog>.idx.log`` journal) and maps
+
+* Day -> rows (sorted keys, binary search),
+* product name -> rows (sorted 64-bit hashes, binary search),
+* Product_Category -> rows (posting lists),
+
+each row to its byte offset in the CSV, so a lookup is a search plus one
+seek. When rows are appended to the catalog only the new tail is parsed
+and journaled; the base file is rewritten once the journal grows past
+``COMPACT_RATIO`` of it.
+"""
+import csv
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from merch_store.catalog_io import READ_BUFFER, iter_records, read_record, write_chunks
+
+INDEX_SUFFIX = '.idx'
+JOURNAL_SUFFIX = '.idx.log'
+INDEX_VERSION = 1
+COMPACT_RATIO = 0.25
+CHECK_BYTES = 64
+PARSE_BATCH = 65536
+
+
+def product_id(day):
+    """Square object id the daily upload uses for a catalog Day."""
+    return f"product-{day}"
+
+
+def name_hash(name):
+    return int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _tail_check(path, size):
+    """Bytes just before ``size``, used to detect rewrites of indexed data."""
+    with open(path, 'rb') as f:
+        f.seek(max(0, size - CHECK_BYTES))
+        return f.read(min(size, CHECK_BYTES)).hex()
+
+
+def _parse_tail(path, start):
+    """Parse records from byte ``start`` to EOF into index columns."""
+    offsets, days, hashes, categories = [], [], [], []
+    with open(path, 'rb', buffering=READ_BUFFER) as f:
+        f.seek(start)
+        if start == 0:
+            start += len(f.readline())
+        pos = start
+        batch = []
+        for line in iter_records(f):
+            offsets.append(pos)
+            pos += len(line)
+            batch.append(line.decode('utf-8'))
+            if len(batch) >= PARSE_BATCH:
+                _parse_batch(batch, days, hashes, categories)
+                batch = []
+        _parse_batch(batch, days, hashes, categories)
+        end = pos
+    return offsets, days, hashes, categories, end
+
+
+def _parse_batch(lines, days, hashes, categories):
+    for fields in csv.reader(lines):
+        days.append(int(fields[0]))
+        categories.append(fields[1])
+        hashes.append(name_hash(fields[2]))
+
+
+class CatalogIndex:
+    """Index over one catalog CSV; use :meth:`open` rather than the constructor."""
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.covered = 0
+        self.check = ''
+        self.offsets = np.empty(0, dtype=np.int64)
+        self.day_keys = np.empty(0, dtype=np.int64)
+        self.day_rows = np.empty(0, dtype=np.int64)
+        self.hash_keys = np.empty(0, dtype=np.uint64)
+        self.hash_rows = np.empty(0, dtype=np.int64)
+        self.category_labels = []
+        self.category_codes = np.empty(0, dtype=np.int32)
+        self._postings = None
+        self.journal_rows = 0
+
+    @classmethod
+    def open(cls, path):
+        """Load the persisted index, catching up on appended rows.
+
+        The index is rebuilt from scratch if it is missing, from another
+        format version, or the catalog was rewritten rather than appended.
+        """
+        index = cls(path)
+        size = os.path.getsize(path)
+        if not index._load() or index.covered > size or (
+                index.covered and _tail_check(path, index.covered) != index.check):
+            index = cls(path)
+            index._rebuild()
+        elif index.covered < size:
+            index.refresh()
+        return index
+
+    def __len__(self):
+        return len(self.offsets)
+
+    # -- persistence -------------------------------------------------------
+
+    def _load(self):
+        try:
+            with np.load(self.index_path, allow_pickle=False) as data:
+                meta = json.loads(str(data['meta']))
+                if meta.get('version') != INDEX_VERSION:
+                    return False
+                self.offsets = data['offsets']
+                self.day_keys = data['day_keys']
+                self.day_rows = data['day_rows']
+                self.hash_keys = data['hash_keys']
+                self.hash_rows = data['hash_rows']
+                self.category_codes = data['category_codes']
+        except (OSError, KeyError, ValueError):
+            return False
+        self.category_labels = meta['category_labels']
+        self.covered = meta['covered']
+        self.check = meta['check']
+        if os.path.exists(self.journal_path):
+            good = 0
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('torn line')
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn final write; the catalog tail is re-parsed
+                    good += len(line)
+                    self._merge(entry['offsets'], entry['days'], entry['hashes'], entry['categories'])
+                    self.journal_rows += len(entry['offsets'])
+                    self.covered = entry['covered']
+                    self.check = entry['check']
+            if good < os.path.getsize(self.journal_path):
+                # cut it off, so the next entry starts on a line of its own
+                os.truncate(self.journal_path, good)
+        return True
+
+    def save(self):
+        """Write the full index and truncate the journal."""
+        meta = {
+            'version': INDEX_VERSION,
+            'covered': self.covered,
+            'check': self.check,
+            'category_labels': self.category_labels,
+        }
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(
+                f, meta=np.array(json.dumps(meta)), offsets=self.offsets,
+                day_keys=self.day_keys, day_rows=self.day_rows,
+                hash_keys=self.hash_keys, hash_rows=self.hash_rows,
+                category_codes=self.category_codes,
+            )
+        os.replace(tmp, self.index_path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_rows = 0
+
+    def _rebuild(self):
+        self.refresh(journal=False)
+        self.save()
+
+    # -- incremental updates ----------------------------------------------
+
+    def refresh(self, journal=True):
+        """Index rows appended to the catalog since the last refresh."""
+        offsets, days, hashes, categories, end = _parse_tail(self.path, self.covered)
+        if end == self.covered:
+            return 0
+        self._merge(offsets, days, hashes, categories)
+        self.covered = end
+        self.check = _tail_check(self.path, end)
+        if not journal:
+            return len(offsets)
+        self.journal_rows += len(offsets)
+        if self.journal_rows > COMPACT_RATIO * len(self):
+            self.save()
+        else:
+            with open(self.journal_path, 'a') as f:
+                f.write(json.dumps({
+                    'offsets': offsets, 'days': days, 'hashes': hashes,
+                    'categories': categories, 'covered': end, 'check': self.check,
+                }) + '\n')
+        return len(offsets)
+
+    def append(self, catalog):
+        """Append a Catalog's rows to the CSV and index just those rows."""
+        self.refresh()
+        write_chunks(self.path, [catalog], append=True)
+        return self.refresh()
+
+    def _merge(self, offsets, days, hashes, categories):
+        start = len(self.offsets)
+        rows = np.arange(start, start + len(offsets), dtype=np.int64)
+        self.offsets = np.concatenate([self.offsets, np.asarray(offsets, dtype=np.int64)])
+        self.day_keys, self.day_rows = self._insert(
+            self.day_keys, self.day_rows, np.asarray(days, dtype=np.int64), rows)
+        self.hash_keys, self.hash_rows = self._insert(
+            self.hash_keys, self.hash_rows, np.asarray(hashes, dtype=np.uint64), rows)
+        lookup = {label: code for code, label in enumerate(self.category_labels)}
+        codes = [lookup.setdefault(c, len(lookup)) for c in categories]
+        self.category_labels = list(lookup)
+        self.category_codes = np.concatenate([self.category_codes, np.asarray(codes, dtype=np.int32)])
+        self._postings = None
+
+    @staticmethod
+    def _insert(keys, rows, new_keys, new_rows):
+        """Merge new (key, row) pairs into sorted arrays; equal keys keep row order."""
+        if len(keys) and len(new_keys) * 8 < len(keys):
+            order = np.argsort(new_keys, kind='stable')
+            new_keys, new_rows = new_keys[order], new_rows[order]
+            at = np.searchsorted(keys, new_keys, side='right')
+            return np.insert(keys, at, new_keys), np.insert(rows, at, new_rows)
+        keys = np.concatenate([keys, new_keys])
+        rows = np.concatenate([rows, new_rows])
+        order = np.lexsort((rows, keys))
+        return keys[order], rows[order]
+
+    # -- lookups -----------------------------------------------------------
+
+    @staticmethod
+    def _range(keys, rows, key):
+        lo = np.searchsorted(keys, key, side='left')
+        hi = np.searchsorted(keys, key, side='right')
+        return rows[lo:hi]
+
+    def rows_for_day(self, day):
+        return self._range(self.day_keys, self.day_rows, day)
+
+    def rows_for_name(self, name):
+        """Candidate rows for a product name (hash matches; verify the name)."""
+        return self._range(self.hash_keys, self.hash_rows, np.uint64(name_hash(name)))
+
+    def rows_for_category(self, category):
+        if category not in self.category_labels:
+            return np.empty(0, dtype=np.int64)
+        if self._postings is None:
+            order = np.argsort(self.category_codes, kind='stable')
+            bounds = np.searchsorted(self.category_codes[order], np.arange(len(self.category_labels) + 1))
+            self._postings = order, bounds
+        order, bounds = self._postings
+        code = self.category_labels.index(category)
+        return order[bounds[code]:bounds[code + 1]]
+
+    def days(self):
+        """Distinct Day values in ascending order."""
+        if not len(self.day_keys):
+            return self.day_keys
+        keep = np.empty(len(self.day_keys), dtype=bool)
+        keep[0] = True
+        np.not_equal(self.day_keys[1:], self.day_keys[:-1], out=keep[1:])
+        return self.day_keys[keep]
+
+    def read_rows(self, rows):
+        """Fetch rows from the CSV by seeking to their offsets."""
+        with open(self.path, 'rb') as f:
+            return [read_record(f, int(self.offsets[i])) for i in rows]
+
+    def row_for_day(self, day):
+        """First row with this Day as a dict, or None."""
+        rows = self.rows_for_day(day)
+        return self.read_rows(rows[:1])[0] if len(rows) else None
+
+    def row_for_product_id(self, pid):
+        """Row for a ``product-<Day>`` id, or None."""
+        prefix, _, day = pid.lstrip('#').rpartition('-')
+        if prefix != 'product' or not day.isdigit():
+            return None
+        return self.row_for_day(int(day))
+
+    def row_for_name(self, name):
+        """Row with exactly this Product_Name, or None."""
+        for row in self.read_rows(self.rows_for_name(name)):
+            if row['Product_Name'] == name:
+                return row
+        return None
@@ -0,0 +1,177 @@
+"""Streaming catalog CSV I/O.
+
+Writes catalogs in fixed-size chunks and reads them back lazily, so neither
+the nightly build nor the daily job ever holds the whole file in memory.
+``scan`` pushes simple equality predicates down to the raw bytes: rows are
+only decoded and parsed when their encoded field value appears in the line.
+"""
+import csv
+import io
+import os
+from itertools import islice
+
+from merch_store.catalog import CSV_CHUNK_ROWS, CSV_COLUMNS, Catalog
+
+INT_COLUMNS = {'Day'}
+FLOAT_COLUMNS = {
+    'Supplier_Cost', 'Retail_Price', 'Shipping_Cost', 'Total_Cost',
+    'Gross_Profit', 'Profit_Margin_%',
+}
+
+READ_BUFFER = 1 << 20
+
+
+def convert(column, text):
+    """Parse one CSV field into its catalog type."""
+    if column in INT_COLUMNS:
+        return int(text)
+    if column in FLOAT_COLUMNS:
+        return float(text)
+    return text
+
+
+def encode_field(value):
+    """Encode a value exactly as the catalog CSV writer would."""
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator='').writerow([value])
+    return buf.getvalue().encode('utf-8')
+
+
+class CatalogWriter:
+    """Append catalog chunks to a CSV file with bounded memory.
+
+    Usage::
+
+        with CatalogWriter(path) as writer:
+            for chunk in supplier_feed:
+                writer.write(chunk)
+    """
+
+    def __init__(self, path, chunk_rows=CSV_CHUNK_ROWS, append=False):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.append = append
+        self.rows_written = 0
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        resume = self.append and os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        self._file = open(self.path, 'a' if resume else 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file, lineterminator='\n')
+        if not resume:
+            self._writer.writerow(CSV_COLUMNS)
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+    def write(self, catalog):
+        for start in range(0, len(catalog), self.chunk_rows):
+            self._writer.writerows(catalog.rows(start, start + self.chunk_rows))
+        self.rows_written += len(catalog)
+
+
+def write_chunks(path, chunks, chunk_rows=CSV_CHUNK_ROWS, append=False):
+    """Write an iterable of Catalog chunks to one CSV file.
+
+    With ``append=True`` rows are added after the existing ones and the
+    header is only written if the file is new.
+    """
+    with CatalogWriter(path, chunk_rows, append) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return writer.rows_written
+
+
+def read_chunks(path, chunk_rows=CSV_CHUNK_ROWS):
+    """Yield the catalog as a sequence of Catalog objects of chunk_rows rows."""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        if header != CSV_COLUMNS:
+            raise ValueError(f"{path}: unexpected catalog header {header!r}")
+        while True:
+            rows = list(islice(reader, chunk_rows))
+            if not rows:
+                return
+            cols = list(zip(*rows))
+            yield Catalog.from_dollars(
+                [int(v) for v in cols[0]], cols[1], cols[2],
+                [float(v) for v in cols[3]],
+                [float(v) for v in cols[4]],
+                [float(v) for v in cols[5]],
+                cols[9],
+            )
+
+
+def iter_records(f):
+    """Yield raw CSV records, re-joining quoted fields that span lines."""
+    pending = b''
+    for line in f:
+        if pending:
+            line = pending + line
+        if line.count(b'"') % 2:
+            pending = line
+            continue
+        pending = b''
+        yield line
+
+
+def parse_record(line):
+    """Parse one raw CSV record into a row dict."""
+    fields = next(csv.reader([line.decode('utf-8')]))
+    return {c: convert(c, v) for c, v in zip(CSV_COLUMNS, fields)}
+
+
+def read_record(f, offset):
+    """Read and parse the record starting at byte ``offset`` of a binary file."""
+    f.seek(offset)
+    line = f.readline()
+    while line.count(b'"') % 2:
+        line += f.readline()
+    return parse_record(line)
+
+
+def count_rows(path):
+    """Count catalog rows without parsing them."""
+    with open(path, 'rb', buffering=READ_BUFFER) as f:
+        next(f, None)
+        return sum(1 for _ in iter_records(f))
+
+
+def scan(path, where=None, limit=None):
+    """Lazily yield rows (as dicts) matching ``where`` column equalities.
+
+    Non-matching rows are rejected on raw bytes without decoding or CSV
+    parsing; scanning stops as soon as ``limit`` rows have matched.
+    """
+    where = where or {}
+    for column in where:
+        if column not in CSV_COLUMNS:
+            raise KeyError(column)
+    first = CSV_COLUMNS[0]
+    prefix = encode_field(where[first]) + b',' if first in where else b''
+    needles = [encode_field(v) for c, v in where.items() if c != first]
+
+    matched = 0
+    with open(path, 'rb', buffering=READ_BUFFER) as f:
+        header = next(f, b'').decode('utf-8').rstrip('\r\n').split(',')
+        if header != CSV_COLUMNS:
+            raise ValueError(f"{path}: unexpected catalog header {header!r}")
+        for line in iter_records(f):
+            if not line.startswith(prefix):
+                continue
+            if any(n not in line for n in needles):
+                continue
+            row = parse_record(line)
+            if all(row[c] == v for c, v in where.items()):
+                yield row
+                matched += 1
+                if limit is not None and matched >= limit:
+                    return
+
+
+def find_first(path, **where):
+    """Return the first row matching the equalities, or None."""
+    return next(scan(path, where, limit=1), None)
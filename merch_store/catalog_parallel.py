@@ -0,0 +1,159 @@
+"""Multi-process catalog build: profit metrics and top-K across CPU cores.
+
+The cost columns are copied once into a shared-memory block that worker
+processes map directly. Each worker fills Total_Cost, Gross_Profit and
+Profit_Margin_% for its partition in place and returns its local top-K
+rows; the parent merges those candidates into the exact global top-K
+(largest first, ties in row order, like ``df.nlargest``). Output is
+identical to the serial :meth:`Catalog.compute_metrics` / :meth:`Catalog.top_k`.
+
+    python -m merch_store.catalog_parallel anti_ai_merch_store_30day_catalog.bin --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from merch_store.catalog import derive_metrics, top_k_indices
+
+PARTITIONS = ('range', 'hash', 'category')
+RANK_KEYS = ('supplier_cents', 'retail_cents', 'shipping_cents', 'total_cents', 'profit_cents', 'margin_pct')
+
+# name, dtype; inputs are written by the parent, outputs by the workers
+COLUMNS = [
+    ('supplier_cents', np.int64), ('retail_cents', np.int64), ('shipping_cents', np.int64),
+    ('total_cents', np.int64), ('profit_cents', np.int64), ('margin_pct', np.float64),
+    ('rows', np.int64),
+]
+
+_shared = {}
+
+
+def _views(buf, n_rows):
+    views, offset = {}, 0
+    for name, dtype in COLUMNS:
+        views[name] = np.ndarray(n_rows, dtype, buf, offset)
+        offset += n_rows * np.dtype(dtype).itemsize
+    return views
+
+
+def _attach(name, n_rows):
+    """Pool initializer: map the parent's block once per worker."""
+    # Workers share the parent's resource tracker, so the parent's unlink
+    # is the only cleanup needed.
+    shm = shared_memory.SharedMemory(name)
+    _shared['shm'] = shm
+    _shared['columns'] = _views(shm.buf, n_rows)
+
+
+def _partition(task):
+    """Compute metrics for one partition; return its top-K row numbers."""
+    start, stop, k, key = task
+    cols = _shared['columns']
+    rows = cols['rows'][start:stop]
+    contiguous = len(rows) and rows[-1] - rows[0] == len(rows) - 1
+    pick = slice(int(rows[0]), int(rows[-1]) + 1) if contiguous else rows
+    total, profit, margin = derive_metrics(
+        cols['supplier_cents'][pick], cols['retail_cents'][pick], cols['shipping_cents'][pick])
+    cols['total_cents'][pick] = total
+    cols['profit_cents'][pick] = profit
+    cols['margin_pct'][pick] = margin
+    local = {'total_cents': total, 'profit_cents': profit, 'margin_pct': margin}.get(key)
+    if local is None:
+        local = cols[key][pick]
+    return rows[top_k_indices(local, k)].copy()
+
+
+def plan(catalog, partitions, how='hash'):
+    """Row order grouped by partition and the partition boundaries in it.
+
+    ``range`` cuts the catalog into contiguous blocks, ``hash`` spreads rows
+    by a hash of Day, ``category`` gives each Product_Category its own
+    partition. Rows keep their catalog order inside a partition.
+    """
+    n = len(catalog)
+    if how == 'range':
+        return np.arange(n, dtype=np.int64), np.linspace(0, n, partitions + 1).astype(np.int64)
+    if how == 'hash':
+        h = catalog.day.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        part = ((h >> np.uint64(32)) % np.uint64(partitions)).astype(np.int64)
+    elif how == 'category':
+        part = catalog.category.codes.astype(np.int64)
+        partitions = len(catalog.category.labels)
+    else:
+        raise ValueError(f"unknown partitioning {how!r}; expected one of {PARTITIONS}")
+    order = np.argsort(part, kind='stable')
+    bounds = np.zeros(partitions + 1, dtype=np.int64)
+    np.cumsum(np.bincount(part, minlength=partitions), out=bounds[1:])
+    return order.astype(np.int64), bounds
+
+
+def merge_top_k(candidates, values, k):
+    """Exact global top-K from per-partition top-K row numbers."""
+    rows = np.sort(np.concatenate(candidates)) if candidates else np.empty(0, dtype=np.int64)
+    return rows[top_k_indices(values[rows], k)]
+
+
+def build_parallel(catalog, workers=None, k=5, key='profit_cents', partition='hash', partitions=None):
+    """Fill the catalog's metrics using ``workers`` processes.
+
+    Returns ``(catalog, top)`` where ``top`` are the row indices of the k
+    largest ``key`` values. The catalog's own arrays are replaced with the
+    computed columns, so it need not have had metrics computed.
+    """
+    if key not in RANK_KEYS:
+        raise ValueError(f"cannot rank by {key!r}; expected one of {RANK_KEYS}")
+    workers = workers or os.cpu_count() or 1
+    n = len(catalog)
+    order, bounds = plan(catalog, partitions or workers, partition)
+    size = sum(n * np.dtype(dtype).itemsize for _, dtype in COLUMNS)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        cols = _views(shm.buf, n)
+        for name in ('supplier_cents', 'retail_cents', 'shipping_cents'):
+            cols[name][:] = getattr(catalog, name)
+        cols['rows'][:] = order
+        tasks = [(int(a), int(b), k, key) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        with multiprocessing.Pool(workers, _attach, (shm.name, n)) as pool:
+            candidates = pool.map(_partition, tasks)
+        catalog.total_cents = cols['total_cents'].copy()
+        catalog.profit_cents = cols['profit_cents'].copy()
+        catalog.margin_pct = cols['margin_pct'].copy()
+        del cols
+    finally:
+        shm.close()
+        shm.unlink()
+    return catalog, merge_top_k(candidates, getattr(catalog, key), k)
+
+
+def load_inputs(path):
+    """Read a binary catalog's columns without computing its metrics."""
+    from merch_store.catalog_bin import CatalogFile
+
+    with CatalogFile(path) as f:
+        return f.slice(0, len(f), compute=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compute catalog metrics and top products in parallel.')
+    parser.add_argument('path', help='binary catalog (see catalog_bin.csv_to_bin)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--partition', choices=PARTITIONS, default='hash')
+    parser.add_argument('--top', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    catalog, top = build_parallel(load_inputs(args.path), args.workers, args.top, partition=args.partition)
+    summary = catalog.summary()
+    print(f"Total Products: {summary['products']}")
+    print(f"Average Profit Margin: {summary['avg_margin_pct']:.2f}%")
+    print(f"Average Gross Profit per Item: ${summary['avg_gross_profit']:.2f}")
+    print("\nHighest Profit Items:")
+    for i in top.tolist():
+        print(f"{catalog.day[i]:>8}  {catalog.name[i]}  ${catalog.profit_cents[i] / 100:.2f}  "
+              f"{catalog.margin_pct[i]:.2f}%")
+
+
+if __name__ == '__main__':
+    main()
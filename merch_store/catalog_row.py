@@ -0,0 +1,113 @@
+"""One-row lookups in the binary catalog using only the standard library.
+
+:class:`~merch_store.catalog_bin.CatalogFile` exposes every column as a
+NumPy view, which suits scans but makes a single lookup pay for importing
+NumPy. The daily run needs one product, so it reads the header, the JSON
+footer and one value per column from the same mapping with ``struct``.
+Only the dense Day layout (Day n in row n - first Day) is handled here;
+other files need a search over Day and go through ``CatalogFile``.
+"""
+import json
+import mmap
+import os
+import struct
+
+MAGIC = b'MRCHCAT1'
+HEADER = struct.Struct('<8sQ')
+TRAILER = struct.Struct('<Q8s')
+
+# footer dtype -> struct format
+FORMATS = {'<i8': '<q', '<u8': '<Q', '<f8': '<d', '<i4': '<i'}
+OFFSET = struct.Struct('<Q')
+
+
+def current_bin(csv_path):
+    """The binary catalog next to ``csv_path`` if it is at least as new as the CSV, else None.
+
+    The binary copy is written from the CSV; once the CSV is appended to or
+    rewritten it is newer than the copy, and the copy is stale.
+    """
+    bin_path = os.path.splitext(csv_path)[0] + '.bin'
+    try:
+        written = os.stat(bin_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    try:
+        return bin_path if written >= os.stat(csv_path).st_mtime_ns else None
+    except FileNotFoundError:
+        return bin_path
+
+
+class CatalogRows:
+    """Read-only mapping of a binary catalog that decodes rows one at a time."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size + TRAILER.size:
+                raise ValueError(f"{path}: not a binary catalog")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.rows = HEADER.unpack_from(self._mm, 0)
+        footer_len, tail_magic = TRAILER.unpack_from(self._mm, size - TRAILER.size)
+        if magic != MAGIC or tail_magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path}: not a binary catalog")
+        start = size - TRAILER.size - footer_len
+        self.meta = json.loads(self._mm[start:start + footer_len])
+        self.offsets = self.meta['offsets']
+        self.columns = {name: struct.Struct(FORMATS[dtype]) for name, dtype in self.meta['columns'].items()}
+        self.day_dense = self.meta['day_dense']
+        self.category_labels = self.meta['dictionaries']['category']
+        self.channel_labels = self.meta['dictionaries']['channels']
+        self.has_slugs = 'slug_blob' in self.offsets
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.rows
+
+    def close(self):
+        self._mm.close()
+
+    def value(self, name, i):
+        column = self.columns[name]
+        return column.unpack_from(self._mm, self.offsets[name] + i * column.size)[0]
+
+    def _string(self, offsets, blob, i):
+        pos = self.offsets[offsets] + i * OFFSET.size
+        start, stop = OFFSET.unpack_from(self._mm, pos)[0], OFFSET.unpack_from(self._mm, pos + OFFSET.size)[0]
+        blob = self.offsets[blob]
+        return self._mm[blob + start:blob + stop].decode('utf-8')
+
+    def row_at(self, position):
+        """Row of the ``position``-th Day in ascending order; None unless Day is dense."""
+        if not self.day_dense or not 0 <= position < self.rows:
+            return None
+        return self.row(position)
+
+    def row(self, i):
+        """Row i as a dict keyed by the CSV column names, as ``CatalogFile.row`` returns it."""
+        supplier = self.value('supplier_cents', i) / 100
+        retail = self.value('retail_cents', i) / 100
+        shipping = self.value('shipping_cents', i) / 100
+        total = supplier + shipping
+        row = {
+            'Day': self.value('day', i),
+            'Product_Category': self.category_labels[self.value('category', i)],
+            'Product_Name': self._string('name_offsets', 'name_blob', i),
+            'Supplier_Cost': supplier,
+            'Retail_Price': retail,
+            'Shipping_Cost': shipping,
+            'Total_Cost': total,
+            'Gross_Profit': retail - total,
+            'Profit_Margin_%': self.value('margin_pct', i),
+            'Marketing_Channels': self.channel_labels[self.value('channels', i)],
+        }
+        if self.has_slugs:
+            row['Slug'] = self._string('slug_offsets', 'slug_blob', i)
+        return row
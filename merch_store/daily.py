@@ -0,0 +1,188 @@
+"""Daily product upload automation.
+
+Run from cron as ``python -m merch_store.daily``. Startup is kept short:
+today's product comes from the binary catalog without NumPy (see
+:mod:`merch_store.catalog_row`), the catalog, index and worker-pool
+modules are only imported on the paths that need them, and by default the
+day's jobs run in this process rather than in worker processes.
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+
+from merch_store.catalog_row import CatalogRows, current_bin
+
+CATALOG_CSV = 'anti_ai_merch_store_30day_catalog.csv'
+JOBS_DB = os.environ.get('AUTOMATION_JOBS_DB', 'automation_jobs.sqlite3')
+PRINTFUL_CHECKPOINT = os.environ.get('PRINTFUL_CHECKPOINT', 'printful_sync.ckpt')
+# Worker processes for the day's jobs; 0 runs them in the calling process
+DAILY_WORKERS = int(os.environ.get('AUTOMATION_WORKERS', '0'))
+
+# kind, integration, handler; each runs as its own job with its own retries
+DAILY_JOBS = [
+    ('square.create_product', 'square', 'merch_store.daily:upload_to_square'),
+    ('printful.sync_product', 'printful', 'merch_store.daily:sync_to_printful'),
+    ('social.schedule_posts', 'social', 'merch_store.daily:schedule_social'),
+    ('klaviyo.announce', 'klaviyo', 'merch_store.daily:announce_by_email'),
+]
+
+# Concurrently running jobs allowed per integration
+INTEGRATION_LIMITS = {'square': 2, 'printful': 1, 'social': 2, 'klaviyo': 1}
+
+
+class Rotation:
+    """Which catalog Day to feature at a given time.
+
+    Without ``start`` this is the original day-of-month cycle
+    (``now.day % length``); with ``start`` the catalog is walked in Day
+    order, one Day per ``every`` period, wrapping after the last one.
+    Either way it works for any catalog length, not just 30 rows.
+    """
+
+    def __init__(self, start=None, every=timedelta(days=1)):
+        self.start = start
+        self.every = every
+
+    def position(self, now, length):
+        if self.start is None:
+            return now.day % length
+        return (now - self.start) // self.every % length
+
+
+def featured_row(catalog, now, rotation):
+    """The row to feature at ``now`` from an open CatalogFile."""
+    days = catalog.days()
+    if not len(days):
+        raise LookupError(f"{catalog.path}: catalog is empty")
+    current_day = int(days[rotation.position(now, len(days))])
+    return catalog.row(catalog.find_day(current_day))
+
+
+def get_next_product_from_catalog(path=CATALOG_CSV, now=None, rotation=None):
+    """Get next product to upload based on day.
+
+    Uses the binary catalog next to the CSV when present and not older
+    than the CSV (an O(1) mmap lookup), otherwise the persistent CSV index
+    (a binary search and one seek), which catches up on appended rows.
+    """
+    now = now or datetime.now()
+    rotation = rotation or Rotation()
+    bin_path = current_bin(path)
+    if bin_path is not None:
+        with CatalogRows(bin_path) as rows:
+            if not len(rows):
+                raise LookupError(f"{bin_path}: catalog is empty")
+            row = rows.row_at(rotation.position(now, len(rows)))
+        if row is not None:
+            return row
+        from merch_store.catalog_bin import CatalogFile
+
+        with CatalogFile(bin_path) as catalog:
+            return featured_row(catalog, now, rotation)
+
+    from merch_store.catalog_index import CatalogIndex
+
+    index = CatalogIndex.open(path)
+    days = index.days()
+    if not len(days):
+        raise LookupError(f"{path}: catalog is empty")
+    current_day = int(days[rotation.position(now, len(days))])
+    return index.row_for_day(current_day)
+
+
+def upload_to_square(product):
+    from merch_store.square import create_square_product
+
+    result = create_square_product(product)
+    print(f"✅ Product created in Square: {result}")
+
+
+def sync_to_printful(product):
+    from merch_store.printful import sync_catalog_to_printful
+
+    report = sync_catalog_to_printful([product], checkpoint=PRINTFUL_CHECKPOINT)
+    if not report.ok:
+        raise RuntimeError(f"Printful sync incomplete: {report.failures}")
+    print(f"👕 Printful sync: {report}")
+
+
+def schedule_social(product):
+    from merch_store.social import schedule_social_media_posts
+
+    posts = schedule_social_media_posts(product)
+    print(f"📱 {len(posts)} social media posts scheduled")
+
+
+def announce_by_email(product):
+    from merch_store.klaviyo import send_new_product_email
+
+    send_new_product_email(product)
+    print("📧 New product email sent")
+
+
+def enqueue_daily_jobs(queue, product, now):
+    """Queue today's jobs; re-running on the same day does not duplicate them."""
+    date = now.strftime('%Y-%m-%d')
+    for kind, integration, _ in DAILY_JOBS:
+        queue.enqueue(kind, product, integration=integration, key=f"{date}:{kind}")
+
+
+def main_daily_automation(now=None, workers=DAILY_WORKERS, jobs_db=JOBS_DB):
+    """Main function to run daily"""
+    from merch_store import profiling
+
+    with profiling.stage('import job queue'):
+        from merch_store.jobs import JobQueue, WorkerPool, work
+
+    print("🚀 Starting daily product automation...")
+    now = now or datetime.now()
+
+    # Get next product from catalog
+    with profiling.stage('select product'):
+        product = get_next_product_from_catalog(now=now)
+    print(f"📦 Product for today: {product['Product_Name']}")
+
+    with profiling.stage('open job queue'):
+        queue = JobQueue(jobs_db)
+    try:
+        with profiling.stage('enqueue'):
+            enqueue_daily_jobs(queue, product, now)
+        handlers = {kind: handler for kind, _, handler in DAILY_JOBS}
+        # Jobs run by worker processes show up as one stage; in-process ones get a stage each.
+        with profiling.stage('run jobs'):
+            if workers:
+                WorkerPool(jobs_db, handlers, workers, INTEGRATION_LIMITS).run_until_idle()
+            else:
+                work(jobs_db, handlers, f'{os.getpid()}-0', INTEGRATION_LIMITS)
+        with profiling.stage('job report'):
+            stats = queue.stats()
+            for job_id, kind, attempts, error in queue.dead_letters():
+                print(f"💀 {kind} (job {job_id}) dead-lettered after {attempts} attempts: {error.splitlines()[-1]}")
+    finally:
+        queue.close()
+
+    print(f"✨ Daily automation complete! {stats}")
+
+
+def main(argv=None):
+    from merch_store import profiling
+
+    parser = argparse.ArgumentParser(description="Feature today's product and run its upload jobs.")
+    parser.add_argument('--workers', type=int, default=DAILY_WORKERS,
+                        help='worker processes for the jobs (default: %(default)s, run them in this process)')
+    parser.add_argument('--jobs-db', default=JOBS_DB)
+    profiling.add_arguments(parser, 'profile_daily')
+    args = parser.parse_args(argv)
+    try:
+        with profiling.session_for(args):
+            main_daily_automation(workers=args.workers, jobs_db=args.jobs_db)
+    finally:
+        from merch_store import metrics
+
+        # WorkerPool.join has added the worker processes' metrics to this one's.
+        if metrics.METRICS_TEXTFILE:
+            metrics.write_textfile()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+"""Minimal asyncio HTTP/1.1 client and server.
+
+Only what the integrations need: JSON bodies, keep-alive connection pools,
+Content-Length and chunked responses, and retry with backoff. Kept in the
+standard library so the daily run does not pay for importing a full HTTP
+stack.
+"""
+import asyncio
+import json as jsonlib
+import random
+import ssl
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from merch_store.metrics import client_metrics
+
+USER_AGENT = 'youandinotai-automation/1.0'
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# Methods a retry may apply twice, unless the request carries an idempotency key
+UNSAFE_METHODS = ('POST', 'PATCH')
+
+REASONS = {
+    200: 'OK', 201: 'Created', 202: 'Accepted', 204: 'No Content',
+    400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found',
+    409: 'Conflict', 413: 'Payload Too Large', 429: 'Too Many Requests',
+    500: 'Internal Server Error', 503: 'Service Unavailable',
+}
+
+
+class HTTPError(Exception):
+    """Non-2xx response after retries were exhausted."""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status}: {response.body[:200]!r}")
+        self.response = response
+        self.status = response.status
+
+
+class BadMessage(ValueError):
+    """A malformed or oversized HTTP message; ``status`` is the reply a server sends."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Response:
+    __slots__ = ('status', 'headers', 'body')
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def json(self):
+        return jsonlib.loads(self.body) if self.body else None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    A Retry-After header is a lower bound, even above ``cap``: the wait is
+    Retry-After plus up to as much again (at most ``cap``) of jitter, so
+    that requests throttled together do not all come back together.
+    """
+
+    def __init__(self, attempts=8, base=0.25, cap=30.0, statuses=(429, 500, 502, 503, 504)):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self.statuses = set(statuses)
+
+    def delay(self, attempt, response=None):
+        wait = self.retry_after(response)
+        if wait is not None:
+            return wait + self.jitter(wait)
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(response):
+        """The reply's Retry-After in seconds, or None."""
+        value = response.headers.get('retry-after') if response is not None else None
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
+
+    def jitter(self, wait):
+        """Extra wait after ``wait``: up to as much again, at most ``cap``."""
+        return random.uniform(0, min(wait, self.cap))
+
+
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+class RateLimiter:
+    """Token bucket: ``rate`` requests per second with bursts of ``burst``."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self):
+        """Spend a token; return 0 on success or the seconds until one is free."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+async def _read_headers(reader):
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.LimitOverrunError:
+        raise BadMessage(400, 'header section too large') from None
+    if len(head) > MAX_HEADER_BYTES:
+        raise BadMessage(400, 'header section too large')
+    lines = head[:-4].decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if not sep or not name.strip():
+            raise BadMessage(400, f"malformed header line {line[:80]!r}")
+        headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+
+async def _read_line(reader):
+    try:
+        return await reader.readline()
+    except ValueError:  # longer than the stream limit
+        raise BadMessage(400, 'chunk line too long') from None
+
+
+async def _read_body(reader, headers, until_eof=False, limit=None):
+    """Read a message body; BadMessage(413) once it would exceed ``limit`` bytes."""
+    limit = float('inf') if limit is None else limit
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        parts = []
+        total = 0
+        while True:
+            try:
+                size = int((await _read_line(reader)).split(b';')[0], 16)
+            except ValueError:
+                raise BadMessage(400, 'malformed chunk size') from None
+            if size < 0:
+                raise BadMessage(400, 'malformed chunk size')
+            total += size
+            if total > limit:
+                raise BadMessage(413, f"body over {limit} bytes")
+            if size == 0:
+                while (await _read_line(reader)) not in (b'\r\n', b''):
+                    pass
+                return b''.join(parts)
+            parts.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    if 'content-length' in headers:
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            raise BadMessage(400, 'malformed Content-Length') from None
+        if length < 0:
+            raise BadMessage(400, 'malformed Content-Length')
+        if length > limit:
+            raise BadMessage(413, f"body over {limit} bytes")
+        return await reader.readexactly(length)
+    if not until_eof:
+        return b''
+    body = await reader.read(-1 if limit == float('inf') else limit + 1)
+    if len(body) > limit:
+        raise BadMessage(413, f"body over {limit} bytes")
+    return body
+
+
+class ConnectionPool:
+    """Keep-alive connections to one origin, shared by concurrent requests.
+
+    Every attempt is recorded in :mod:`merch_store.metrics` under
+    ``name`` (the host by default); ``on_response`` is an extra hook.
+    """
+
+    def __init__(self, base_url, max_connections=10, headers=None, timeout=30.0,
+                 retry=None, on_response=None, name=None):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.prefix = parts.path.rstrip('/')
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy()
+        self.on_response = on_response
+        self.metrics = client_metrics(name or self.host)
+        self._ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle = []
+        self._resume_at = 0.0
+        self.connections_opened = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+    async def _connect(self):
+        self.connections_opened += 1
+        return await asyncio.open_connection(self.host, self.port, ssl=self._ssl)
+
+    def _encode(self, method, path, params, body, headers):
+        target = self.prefix + path
+        if params:
+            target += '?' + urlencode(params)
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host}", f"User-Agent: {USER_AGENT}"]
+        merged = {**self.headers, **(headers or {})}
+        merged['Content-Length'] = str(len(body))
+        lines += [f"{k}: {v}" for k, v in merged.items()]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+    async def _exchange(self, conn, request, method):
+        reader, writer = conn
+        writer.write(request)
+        await writer.drain()
+        status_line, headers = await _read_headers(reader)
+        status = int(status_line.split(' ', 2)[1])
+        closing = headers.get('connection', '').lower() == 'close'
+        body = b''
+        if method != 'HEAD' and status not in (204, 304):
+            body = await _read_body(reader, headers, until_eof=closing)
+        return Response(status, headers, body), not closing
+
+    async def _send(self, request, method, idempotent):
+        async with self._slots:
+            start = time.perf_counter()
+            conn = None
+            while self._idle and conn is None:
+                conn = self._idle.pop()
+                if conn[0].at_eof():  # closed by the server while idle
+                    conn[1].close()
+                    conn = None
+            reused = conn is not None
+            conn = conn or await self._connect()
+            try:
+                response, keep = await self._exchange(conn, request, method)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                conn[1].close()
+                if not reused or not idempotent:
+                    raise
+                # The server dropped an idle keep-alive connection; retry fresh.
+                conn = await self._connect()
+                try:
+                    response, keep = await self._exchange(conn, request, method)
+                except BaseException:
+                    conn[1].close()
+                    raise
+            except BaseException:
+                conn[1].close()
+                raise
+            if keep:
+                self._idle.append(conn)
+            else:
+                conn[1].close()
+            return response, start
+
+    def _observe(self, method, path, status, start, attempt):
+        """Report one attempt; time spent queued for a connection is excluded."""
+        seconds = time.perf_counter() - start
+        self.metrics.observe(method, status, seconds, attempt)
+        if self.on_response:
+            self.on_response(method, path, status, seconds, attempt)
+
+    async def request(self, method, path, json=None, params=None, headers=None, retry=None, idempotent=None):
+        """Send a request, retrying per the pool's RetryPolicy; raise HTTPError on failure.
+
+        POST and PATCH count as idempotent only with an ``Idempotency-Key``
+        header or ``idempotent=True`` (say, for a key in the body). Others
+        are retried only when the server cannot have acted on them: the
+        connection was refused or the reply was a 429.
+        """
+        retry = retry or self.retry
+        if idempotent is None:
+            idempotent = method not in UNSAFE_METHODS or any(k.lower() == 'idempotency-key' for k in headers or ())
+        body = b''
+        if json is not None:
+            body = jsonlib.dumps(json, separators=(',', ':')).encode('utf-8')
+            headers = {'Content-Type': 'application/json', **(headers or {})}
+        request = self._encode(method, path, params, body, headers)
+        in_flight = self.metrics.in_flight
+        in_flight.value += 1
+        try:
+            for attempt in range(retry.attempts):
+                last = attempt + 1 == retry.attempts
+                pause = self._resume_at - time.monotonic()
+                if pause > 0:
+                    # Each waiter adds its own jitter, so they do not all come back at once.
+                    await asyncio.sleep(pause + retry.jitter(pause))
+                start = time.perf_counter()
+                try:
+                    response, start = await asyncio.wait_for(self._send(request, method, idempotent), self.timeout)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as exc:
+                    self._observe(method, path, None, start, attempt)
+                    if last or not (idempotent or isinstance(exc, ConnectionRefusedError)):
+                        raise
+                    await asyncio.sleep(retry.delay(attempt))
+                    continue
+                self._observe(method, path, response.status, start, attempt)
+                if (response.ok or response.status not in retry.statuses or last
+                        or not (idempotent or response.status == 429)):
+                    break
+                delay = retry.delay(attempt, response)
+                if response.status == 429:
+                    # Throttling applies to the whole origin: hold every request back for the
+                    # Retry-After (or the base delay), without this request's jitter.
+                    floor = retry.retry_after(response)
+                    self._resume_at = max(self._resume_at, time.monotonic() + (retry.base if floor is None else floor))
+                await asyncio.sleep(delay)
+        finally:
+            in_flight.value -= 1
+        if not response.ok:
+            raise HTTPError(response)
+        return response
+
+    async def get(self, path, **kwargs):
+        return await self.request('GET', path, **kwargs)
+
+    async def post(self, path, json=None, **kwargs):
+        return await self.request('POST', path, json=json, **kwargs)
+
+
+class HTTPServer:
+    """Small keep-alive HTTP/1.1 server dispatching to an async handler.
+
+    ``handler(method, path, query, headers, body)`` returns
+    ``(status, payload)`` or ``(status, payload, extra_headers)``; dict and
+    list payloads are sent as JSON. Requests that are malformed or whose
+    headers are too large get a 400, and bodies over ``max_body`` bytes a
+    413, before the handler sees them; the connection is then closed.
+    """
+
+    def __init__(self, handler, host='127.0.0.1', port=0, max_body=MAX_BODY_BYTES):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.max_body = max_body
+        self._server = None
+        self._thread = None
+        self._loop = None
+        self._writers = set()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        await asyncio.sleep(0)
+
+    def start_in_thread(self):
+        """Run the server on its own event loop in a daemon thread."""
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop_thread(self):
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _read_request(self, reader):
+        request_line, headers = await _read_headers(reader)
+        parts = request_line.split(' ')
+        if len(parts) != 3 or not parts[0].isalpha() or not parts[2].startswith('HTTP/1.'):
+            raise BadMessage(400, f"malformed request line {request_line[:80]!r}")
+        body = await _read_body(reader, headers, limit=self.max_body)
+        return parts[0], parts[1], headers, body
+
+    @staticmethod
+    async def _reply(writer, status, payload, extra):
+        if isinstance(payload, (dict, list)):
+            payload = jsonlib.dumps(payload).encode('utf-8')
+            extra = {'Content-Type': 'application/json', **extra}
+        elif isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}",
+                f"Content-Length: {len(payload)}"]
+        head += [f"{k}: {v}" for k, v in extra.items()]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload)
+        await writer.drain()
+
+    async def _serve(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    method, target, headers, body = await self._read_request(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except BadMessage as exc:
+                    await self._reply(writer, exc.status, {'error': str(exc)}, {'Connection': 'close'})
+                    return
+                path, _, query = target.partition('?')
+                result = await self.handler(method, path, query, headers, body)
+                await self._reply(writer, result[0], result[1], result[2] if len(result) > 2 else {})
+                if headers.get('connection', '').lower() == 'close':
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
@@ -0,0 +1,274 @@
+"""Multi-marketplace stock sync through API2Cart.
+
+Stock changes are queued per connected store (Etsy, eBay, Amazon, ...)
+and sent in batches, each store with its own connections, rate limiter
+and in-flight budget, so a slow or throttled marketplace does not hold up
+the others. Repeated changes to a SKU that has not been sent yet are
+coalesced, last write wins; a SKU is never in two requests to the same
+store at once, so batches finishing out of order cannot leave an older
+quantity behind. Each batch is an API2Cart batch job: ``product.update.batch``
+creates it and ``batch.job.result`` is polled until it has run. Per-store
+lag (queued to acknowledged) is reported for every SKU sent, and every
+SKU the job result does not confirm is reported as a failure.
+"""
+import asyncio
+import os
+import time
+
+from merch_store.http import ConnectionPool, HTTPError, RateLimiter
+from merch_store.metrics import stage
+
+API2CART_API_BASE = os.environ.get('API2CART_API_BASE', 'https://api.api2cart.com/v1.1')
+# A job applying product.update to many items of one store, and its outcome once run.
+BATCH_CREATE_PATH = '/product.update.batch.json'
+BATCH_RESULT_PATH = '/batch.job.result.json'
+BATCH_SIZE = 100
+# Job states batch.job.result reports before a job has run
+JOB_PENDING = ('queued', 'processing')
+
+# Requests per second allowed per connected store
+STORE_RATES = {'etsy': 5.0, 'ebay': 5.0, 'amazon': 2.0}
+
+
+def stores_from_env(spec=None):
+    """``API2CART_STORES='etsy=KEY1,ebay=KEY2'`` -> {'etsy': 'KEY1', 'ebay': 'KEY2'}."""
+    spec = os.environ.get('API2CART_STORES', '') if spec is None else spec
+    return dict(part.strip().split('=', 1) for part in spec.split(',') if part.strip())
+
+
+class BatchJobError(Exception):
+    """A batch job was refused, failed, did not run in time, or got a reply that makes no sense."""
+
+
+def job_result(response):
+    """The ``result`` of an API2Cart reply; BatchJobError for an error or a malformed reply."""
+    try:
+        body = response.json()
+        code = body.get('return_code', 0)
+        result = body['result']
+    except (ValueError, KeyError, AttributeError) as exc:
+        raise BatchJobError(f"malformed reply: {exc!r}") from None
+    if code != 0 or not isinstance(result, dict):
+        raise BatchJobError(body.get('return_message') or f"return_code {code}")
+    return result
+
+
+class StoreReport:
+    """What one store received during a sync."""
+
+    def __init__(self, name):
+        self.name = name
+        self.updates = 0  # changes queued for this store
+        self.sent = 0  # SKU quantities acknowledged
+        self.batches = 0
+        self.lags = []  # seconds from first unsent change to acknowledgement
+        self.failures = []  # (sku, error)
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    @property
+    def coalesced(self):
+        return self.updates - self.sent - len(self.failures)
+
+    def lag(self, q):
+        """``q``-th percentile lag in seconds."""
+        import numpy as np
+
+        return float(np.percentile(self.lags, q)) if self.lags else 0.0
+
+    def __repr__(self):
+        return (f"StoreReport({self.name!r}, updates={self.updates}, sent={self.sent}, batches={self.batches}, "
+                f"coalesced={self.coalesced}, failures={len(self.failures)}, "
+                f"lag_p50={self.lag(50) * 1e3:.1f}ms, lag_p99={self.lag(99) * 1e3:.1f}ms)")
+
+
+class StoreChannel:
+    """Pending stock changes for one store and the batches in flight."""
+
+    def __init__(self, name, store_key, pool, rate, batch_size, max_inflight):
+        self.name = name
+        self.store_key = store_key
+        self.pool = pool
+        self.limiter = RateLimiter(rate) if rate else None
+        self.batch_size = batch_size
+        self.max_inflight = max_inflight
+        self.pending = {}  # sku -> quantity, last write wins
+        self.since = {}  # sku -> monotonic time of its oldest unsent change
+        self.inflight = set()
+        self.wake = asyncio.Event()
+        self.report = StoreReport(name)
+
+    def put(self, sku, quantity, now):
+        self.pending[sku] = quantity
+        self.since.setdefault(sku, now)
+        self.report.updates += 1
+        self.wake.set()
+
+    def ready(self):
+        """Number of pending SKUs that are not already in flight."""
+        return len(self.pending) - sum(1 for sku in self.inflight if sku in self.pending)
+
+    def take(self):
+        batch = []
+        for sku in self.pending:
+            if sku not in self.inflight:
+                batch.append(sku)
+                if len(batch) == self.batch_size:
+                    break
+        items = [(sku, self.pending.pop(sku), self.since.pop(sku)) for sku in batch]
+        self.inflight.update(batch)
+        return items
+
+
+class InventorySync:
+    """Queue stock changes and push them to every store.
+
+    Usage::
+
+        async with InventorySync({'etsy': 'KEY1', 'ebay': 'KEY2'}) as sync:
+            for sku, quantity in changes:
+                sync.update(sku, quantity)
+        reports = sync.reports
+    """
+
+    def __init__(self, stores=None, api_key=None, base_url=API2CART_API_BASE, rates=None,
+                 batch_size=BATCH_SIZE, window=0.05, max_inflight=2, retry=None, on_response=None,
+                 poll=0.5, job_timeout=600.0):
+        stores = stores_from_env() if stores is None else stores
+        if not stores:
+            raise ValueError('no API2Cart stores to sync: pass stores or set API2CART_STORES')
+        rates = STORE_RATES if rates is None else rates
+        api_key = api_key or os.environ.get('API2CART_KEY', '')
+        # A pool per store: a 429 from one marketplace pauses only that store.
+        self.channels = {
+            name: StoreChannel(name, key, ConnectionPool(base_url, max_inflight, headers={
+                'x-api-key': api_key, 'x-store-key': key,
+            }, retry=retry, on_response=on_response, name=f'api2cart.{name}'),
+                rates.get(name), batch_size, max_inflight)
+            for name, key in stores.items()
+        }
+        self.window = window
+        self.poll = poll
+        self.job_timeout = job_timeout
+        self._closing = False
+        self._workers = []
+
+    @property
+    def reports(self):
+        return {name: channel.report for name, channel in self.channels.items()}
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.drain()
+        for channel in self.channels.values():
+            await channel.pool.close()
+
+    def start(self):
+        self._workers = [asyncio.ensure_future(self._worker(channel))
+                         for channel in self.channels.values() for _ in range(channel.max_inflight)]
+
+    def update(self, sku, quantity, stores=None):
+        """Queue a stock change for ``stores`` (default: every store)."""
+        now = time.monotonic()
+        for name in stores or self.channels:
+            self.channels[name].put(sku, quantity, now)
+
+    async def drain(self):
+        """Send everything queued, then stop the workers."""
+        self._closing = True
+        for channel in self.channels.values():
+            channel.wake.set()
+        await asyncio.gather(*self._workers)
+
+    async def _worker(self, channel):
+        while True:
+            await channel.wake.wait()
+            ready = channel.ready()
+            if not ready:
+                if self._closing and not channel.pending:
+                    return
+                channel.wake.clear()
+                continue
+            if ready < channel.batch_size and self.window and not self._closing:
+                # Hold a partial batch briefly so repeated changes to a SKU merge.
+                await asyncio.sleep(self.window)
+            items = channel.take()
+            if not items:
+                continue
+            if channel.limiter:
+                await channel.limiter.acquire()
+            try:
+                await self._send(channel, items)
+            finally:
+                channel.inflight.difference_update(sku for sku, _, _ in items)
+                channel.wake.set()
+
+    async def _job_items(self, channel, job_id):
+        """Poll batch.job.result until the job has run; returns its per-item results."""
+        deadline = time.monotonic() + self.job_timeout
+        delay = self.poll
+        while True:
+            await asyncio.sleep(delay)
+            if channel.limiter:
+                await channel.limiter.acquire()
+            result = job_result(await channel.pool.get(BATCH_RESULT_PATH, params={'id': job_id}))
+            status = result.get('status')
+            if status == 'completed':
+                items = result.get('items')
+                if not isinstance(items, list):
+                    raise BatchJobError(f"job {job_id} completed without items")
+                return items
+            if status not in JOB_PENDING:
+                raise BatchJobError(f"job {job_id} {status or 'has no status'}")
+            if time.monotonic() >= deadline:
+                raise BatchJobError(f"job {job_id} still {status} after {self.job_timeout:g} s")
+            delay = min(delay * 2, 10 * self.poll)
+
+    @stage('inventory.send_batch')
+    async def _send(self, channel, items):
+        report = channel.report
+        try:
+            # Setting a quantity twice leaves the same stock, so the job may be created again on retry.
+            response = await channel.pool.post(BATCH_CREATE_PATH, json={
+                "payload": [{"id": sku, "quantity": quantity} for sku, quantity, _ in items],
+            }, idempotent=True)
+            job_id = job_result(response).get('id')
+            if not job_id:
+                raise BatchJobError('no job id in reply')
+            results = await self._job_items(channel, job_id)
+        except (BatchJobError, HTTPError, OSError, asyncio.TimeoutError) as exc:
+            report.failures.extend((sku, str(exc)) for sku, _, _ in items)
+            return
+        now = time.monotonic()
+        report.batches += 1
+        by_sku = {str(r.get('id')): r for r in results if isinstance(r, dict)}
+        for sku, _, since in items:
+            result = by_sku.get(sku)
+            if result is None:
+                report.failures.append((sku, 'missing from the job result' if by_sku else
+                                        f'job {job_id}: the store reported no products'))
+            elif result.get('status') == 'ok':
+                report.sent += 1
+                report.lags.append(now - since)
+            else:
+                report.failures.append((sku, result.get('message', 'rejected')))
+
+
+def sync_inventory(changes, stores=None, **kwargs):
+    """Blocking wrapper: push (sku, quantity) changes to every store; returns the store reports."""
+    async def run():
+        async with InventorySync(stores, **kwargs) as sync:
+            for sku, quantity in changes:
+                sync.update(sku, quantity)
+        return sync.reports
+    return asyncio.run(run())
+
+
+def sync_inventory_across_platforms(product_sku, quantity, **kwargs):
+    """Sync inventory to Etsy, eBay, Amazon simultaneously"""
+    return sync_inventory([(product_sku, quantity)], **kwargs)
@@ -0,0 +1,302 @@
+"""Durable SQLite job queue and multi-process worker pool.
+
+Jobs survive crashes: a worker leases a job for ``lease`` seconds, and a
+job whose lease runs out (because its worker died) becomes claimable
+again. Attempts are counted at claim time, so a job that keeps killing
+its worker is dead-lettered once its last lease runs out. A worker renews
+the lease while the handler runs, so a job may take longer than
+``lease``; only a dead or hung worker lets it lapse. Failed jobs are
+retried with exponential backoff. Each integration can be capped at a
+number of concurrently running jobs.
+
+Handlers are given as ``'module:function'`` strings so worker processes
+can import them; each is called with the job payload and timed as the
+stage ``job.<kind>`` in :mod:`merch_store.metrics` (and as stage
+``<kind>`` of a ``--profile`` run, see :mod:`merch_store.profiling`).
+:class:`WorkerPool` adds its workers' metrics to the parent's when they
+exit.
+"""
+import contextlib
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+
+from merch_store import metrics, profiling
+from merch_store.http import RetryPolicy
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    integration TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_at REAL NOT NULL,
+    lease_until REAL,
+    worker TEXT,
+    last_error TEXT,
+    dedupe_key TEXT UNIQUE,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_runnable ON jobs (state, run_at);
+"""
+
+DEFAULT_BACKOFF = RetryPolicy(base=30.0, cap=3600.0)
+
+
+class JobQueue:
+    """Queue of jobs in one SQLite file, safe to share between processes."""
+
+    def __init__(self, path, lease=300.0, backoff=DEFAULT_BACKOFF):
+        self.path = path
+        self.lease = lease
+        self.backoff = backoff
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def enqueue(self, kind, payload, integration='default', max_attempts=5, delay=0.0, key=None):
+        """Add a job; with ``key`` an identical enqueue is ignored. Returns the id or None."""
+        now = time.time()
+        cur = self.db.execute(
+            'INSERT OR IGNORE INTO jobs (kind, integration, payload, max_attempts, run_at,'
+            ' dedupe_key, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (kind, integration, json.dumps(payload), max_attempts, now + delay, key, now, now))
+        return cur.lastrowid if cur.rowcount else None
+
+    def enqueue_many(self, jobs):
+        """Enqueue (kind, payload, integration) tuples in one transaction."""
+        now = time.time()
+        with self.db:
+            self.db.execute('BEGIN')
+            self.db.executemany(
+                'INSERT INTO jobs (kind, integration, payload, max_attempts, run_at, created, updated)'
+                ' VALUES (?, ?, ?, 5, ?, ?, ?)',
+                [(k, i, json.dumps(p), now, now, now) for k, p, i in jobs])
+
+    def claim(self, worker, limits=None):
+        """Lease the next runnable job as (id, kind, payload), or None.
+
+        Runnable means queued and due, or running with an expired lease
+        and attempts left; an expired job without attempts left is
+        dead-lettered instead. Integrations already at their limit in
+        ``limits`` are skipped.
+        """
+        now = time.time()
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            self.db.execute(
+                "UPDATE jobs SET state = 'dead', lease_until = NULL, updated = ?,"
+                " last_error = 'lease expired on the last attempt: the worker died or hung'"
+                " WHERE state = 'running' AND lease_until <= ? AND attempts >= max_attempts", (now, now))
+            busy = []
+            if limits:
+                running = self.db.execute(
+                    "SELECT integration, COUNT(*) FROM jobs WHERE state = 'running'"
+                    ' AND lease_until > ? GROUP BY integration', (now,)).fetchall()
+                busy = [i for i, n in running if n >= limits.get(i, float('inf'))]
+            exclude = f" AND integration NOT IN ({','.join('?' * len(busy))})" if busy else ''
+            row = self.db.execute(
+                "SELECT id, kind, payload FROM jobs WHERE ((state = 'queued' AND run_at <= ?)"
+                " OR (state = 'running' AND lease_until <= ?))" + exclude +
+                ' ORDER BY run_at, id LIMIT 1', (now, now, *busy)).fetchone()
+            if row is not None:
+                self.db.execute(
+                    "UPDATE jobs SET state = 'running', attempts = attempts + 1, lease_until = ?,"
+                    ' worker = ?, updated = ? WHERE id = ?',
+                    (now + self.lease, worker, now, row[0]))
+            self.db.execute('COMMIT')
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def complete(self, job_id, worker):
+        self.db.execute(
+            "UPDATE jobs SET state = 'done', lease_until = NULL, updated = ?"
+            " WHERE id = ? AND worker = ? AND state = 'running'", (time.time(), job_id, worker))
+
+    def fail(self, job_id, worker, error):
+        """Schedule a retry with backoff, or dead-letter once attempts run out."""
+        now = time.time()
+        row = self.db.execute('SELECT attempts, max_attempts FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return
+        attempts, max_attempts = row
+        if attempts >= max_attempts:
+            self.db.execute(
+                "UPDATE jobs SET state = 'dead', lease_until = NULL, last_error = ?, updated = ?"
+                " WHERE id = ? AND worker = ?", (error, now, job_id, worker))
+        else:
+            self.db.execute(
+                "UPDATE jobs SET state = 'queued', lease_until = NULL, last_error = ?, run_at = ?,"
+                ' updated = ? WHERE id = ? AND worker = ?',
+                (error, now + self.backoff.delay(attempts - 1), now, job_id, worker))
+
+    def extend(self, job_id, worker):
+        """Renew the lease of a long-running job; False once the job is no longer this worker's."""
+        now = time.time()
+        return self.db.execute(
+            "UPDATE jobs SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND state = 'running'",
+            (now + self.lease, now, job_id, worker)).rowcount > 0
+
+    @contextlib.contextmanager
+    def heartbeat(self, job_id, worker):
+        """Renew the job's lease every third of a lease from a thread while the block runs.
+
+        The thread has its own connection, as SQLite connections are not
+        shared between threads.
+        """
+        stop = threading.Event()
+
+        def beat():
+            queue = JobQueue(self.path, self.lease, self.backoff)
+            try:
+                while not stop.wait(self.lease / 3):
+                    queue.extend(job_id, worker)
+            finally:
+                queue.close()
+
+        thread = threading.Thread(target=beat, name=f'lease-{job_id}', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def next_due(self):
+        """Seconds until some job may become claimable, or None when all are settled.
+
+        Jobs running under a live lease count as due when the lease runs
+        out, so callers keep polling until their peers finish or die.
+        """
+        now = time.time()
+        row = self.db.execute(
+            "SELECT MIN(CASE state WHEN 'queued' THEN run_at ELSE lease_until END) FROM jobs"
+            " WHERE state IN ('queued', 'running')").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - now)
+
+    def stats(self):
+        return dict(self.db.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+
+    def dead_letters(self):
+        return self.db.execute(
+            "SELECT id, kind, attempts, last_error FROM jobs WHERE state = 'dead' ORDER BY id").fetchall()
+
+    def requeue_dead(self):
+        """Give dead-lettered jobs a fresh set of attempts."""
+        return self.db.execute(
+            "UPDATE jobs SET state = 'queued', attempts = 0, run_at = ?, updated = ?"
+            " WHERE state = 'dead'", (time.time(), time.time())).rowcount
+
+
+def resolve(spec):
+    module, _, name = spec.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def work(path, handlers, worker, limits=None, lease=300.0, poll=0.5, until_idle=True,
+         backoff=DEFAULT_BACKOFF):
+    """Worker loop: claim, run, complete or fail. Returns the number of jobs run."""
+    queue = JobQueue(path, lease, backoff)
+    funcs = {kind: metrics.stage(f'job.{kind}')(resolve(spec)) for kind, spec in handlers.items()}
+    processed = 0
+    try:
+        while True:
+            job = queue.claim(worker, limits)
+            if job is None:
+                wait = queue.next_due()
+                if wait is None and until_idle:
+                    return processed
+                # wait == 0 means a due job is held back by its integration limit
+                time.sleep(min(poll, wait) if wait else poll)
+                continue
+            job_id, kind, payload = job
+            try:
+                with queue.heartbeat(job_id, worker), profiling.stage(kind):
+                    funcs[kind](payload)
+            except Exception:
+                queue.fail(job_id, worker, traceback.format_exc(limit=5))
+            else:
+                queue.complete(job_id, worker)
+            processed += 1
+    finally:
+        queue.close()
+
+
+def _work_process(conn, *args):
+    """Process target: :func:`work`, then send this process's metrics to the parent over ``conn``."""
+    metrics.reset()  # a forked child starts with a copy of the parent's
+    try:
+        return work(*args)
+    finally:
+        with contextlib.suppress(OSError):  # the parent is gone
+            conn.send(metrics.snapshot())
+        conn.close()
+
+
+class WorkerPool:
+    """Run ``workers`` worker processes against one queue file."""
+
+    def __init__(self, path, handlers, workers=4, limits=None, lease=300.0, poll=0.5,
+                 backoff=DEFAULT_BACKOFF):
+        self.path = path
+        self.handlers = handlers
+        self.workers = workers
+        self.limits = limits
+        self.lease = lease
+        self.poll = poll
+        self.backoff = backoff
+        self.processes = []
+        self.pipes = []
+
+    def start(self, until_idle=True):
+        import multiprocessing
+
+        JobQueue(self.path).close()  # create the schema before workers race for it
+        for n in range(self.workers):
+            receive, send = multiprocessing.Pipe(duplex=False)
+            p = multiprocessing.Process(
+                target=_work_process, name=f'worker-{n}',
+                args=(send, self.path, self.handlers, f'{os.getpid()}-{n}', self.limits,
+                      self.lease, self.poll, until_idle, self.backoff))
+            p.start()
+            send.close()
+            self.processes.append(p)
+            self.pipes.append(receive)
+        return self
+
+    def join(self):
+        """Wait for the workers and merge their metrics; a killed worker's are lost."""
+        for p, conn in zip(self.processes, self.pipes):
+            # Read before joining: a worker blocks in send() until a large snapshot is read.
+            with contextlib.suppress(EOFError):
+                metrics.merge(conn.recv())
+            conn.close()
+            p.join()
+        self.processes = []
+        self.pipes = []
+
+    def terminate(self):
+        for p in self.processes:
+            p.kill()
+        self.join()
+
+    def run_until_idle(self):
+        """Start the workers and wait until no job is queued or running."""
+        self.start(until_idle=True)
+        self.join()
@@ -0,0 +1,197 @@
+"""Klaviyo new-product announcement emails.
+
+Products launching in the same send window (a week of launch days) go
+out as one digest campaign instead of one campaign each. Email HTML comes from :class:`HTMLTemplate` objects parsed
+once; each product's block is rendered through a :class:`RenderCache`
+keyed by the product's fingerprint (the values the template reads), so a
+product shown in several digests or resent later is rendered once.
+Campaigns are created through one pooled, rate-limited client.
+"""
+import asyncio
+import html
+import os
+from collections import OrderedDict
+from itertools import groupby
+from operator import itemgetter
+
+from merch_store.http import ConnectionPool, RateLimiter
+from merch_store.metrics import stage
+from merch_store.social import PostTemplate, product_url
+
+KLAVIYO_API_BASE = os.environ.get('KLAVIYO_API_BASE', 'https://a.klaviyo.com/api/v2')
+FROM_EMAIL = 'hello@youandinotai.com'
+FROM_NAME = 'YouAndINotAI'
+
+# Campaign creations per second (Klaviyo's campaign endpoints allow bursts of 10/s)
+CAMPAIGN_RATE = 5.0
+DIGEST_MAX_PRODUCTS = 12
+DIGEST_WINDOW_DAYS = 7  # one digest per week of launches
+RENDER_CACHE_SIZE = 100_000
+
+
+class HTMLTemplate(PostTemplate):
+    """A :class:`PostTemplate` whose values are HTML-escaped."""
+
+    def __init__(self, text):
+        super().__init__(text)
+        self.key_fields = tuple(sorted(self.fields))
+        self._values = itemgetter(*self.key_fields) if self.key_fields else lambda values: ()
+
+    def key(self, values):
+        """The values the template reads, in a fixed order: equal keys render equal HTML."""
+        return self._values(values)
+
+    def render(self, values):
+        out = []
+        for literal, field, spec in self.parts:
+            out.append(literal)
+            if field is not None:
+                out.append(html.escape(format(values[field], spec)))
+        return ''.join(out)
+
+
+NEW_PRODUCT_HTML = HTMLTemplate("""
+    <h1>{Product_Name}</h1>
+    <p>New arrival in our premium anti-AI collection.</p>
+    <p>Crafted by humans, for humans. Zero algorithms involved.</p>
+    <p><strong>${Retail_Price}</strong></p>
+    <a href="https://youandinotai.square.site">Shop Now</a>
+    """)
+
+DIGEST_HEADER = HTMLTemplate(
+    '<h1>New this week: {count} pieces, zero algorithms</h1>\n'
+    '<p>Crafted by humans, for humans. Every one of them.</p>\n')
+DIGEST_PRODUCT = HTMLTemplate(
+    '<div class="product">\n'
+    '  <h2>{Product_Name}</h2>\n'
+    '  <p>{Product_Category}</p>\n'
+    '  <p><strong>${Retail_Price:.2f}</strong></p>\n'
+    '  <a href="{url}">Shop Now</a>\n'
+    '</div>\n')
+DIGEST_FOOTER = HTMLTemplate('<a href="https://youandinotai.square.site">Shop the full collection</a>\n')
+
+
+class RenderCache:
+    """LRU of rendered HTML keyed by (template, product fingerprint)."""
+
+    def __init__(self, maxsize=RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, template, values):
+        key = (template.text, template.key(values))
+        text = self.entries.get(key)
+        if text is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return text
+        self.misses += 1
+        text = self.entries[key] = template.render(values)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return text
+
+
+def new_product_html(product_data):
+    return NEW_PRODUCT_HTML.render(product_data)
+
+
+def digest_subject(products):
+    if len(products) == 1:
+        return f"New Arrival: {products[0]['Product_Name']}"
+    return f"New Arrivals: {products[0]['Product_Name']} + {len(products) - 1} more"
+
+
+def digest_html(products, cache=None):
+    """One email listing every product; each product block comes from the cache."""
+    cache = cache or RenderCache()
+    parts = [cache.render(DIGEST_HEADER, {'count': len(products)})]
+    for product_data in products:
+        parts.append(cache.render(DIGEST_PRODUCT, {**product_data, 'url': product_url(product_data)}))
+    parts.append(cache.render(DIGEST_FOOTER, {}))
+    return ''.join(parts)
+
+
+def send_window(product, days=DIGEST_WINDOW_DAYS):
+    """The ``days``-long window, counted from Day 1, that a product's launch Day falls in."""
+    return (int(product['Day']) - 1) // days
+
+
+def plan_digests(products, key=send_window, max_products=DIGEST_MAX_PRODUCTS):
+    """Group consecutive products with the same ``key`` (send window) into digests of at most ``max_products``."""
+    for _, group in groupby(products, key):
+        group = list(group)
+        for start in range(0, len(group), max_products):
+            yield group[start:start + max_products]
+
+
+def campaign_payload(subject, body, list_id=None):
+    return {
+        "list_id": list_id or os.environ.get('KLAVIYO_LIST_ID', ''),
+        "template_id": os.environ.get('KLAVIYO_TEMPLATE_ID', ''),
+        "subject": subject,
+        "from_email": FROM_EMAIL,
+        "from_name": FROM_NAME,
+        "html": body,
+    }
+
+
+class KlaviyoClient:
+    """Pooled, rate-limited client for campaign creation."""
+
+    def __init__(self, api_key=None, base_url=KLAVIYO_API_BASE, max_connections=4, rate=CAMPAIGN_RATE,
+                 retry=None, on_response=None):
+        api_key = api_key or os.environ.get('KLAVIYO_API_KEY', '')
+        self.pool = ConnectionPool(base_url, max_connections, headers={
+            'Authorization': f'Klaviyo-API-Key {api_key}',
+        }, retry=retry, on_response=on_response, name='klaviyo')
+        self.limiter = RateLimiter(rate) if rate else None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.pool.close()
+
+    @stage('klaviyo.create_campaign')
+    async def create_campaign(self, payload):
+        if self.limiter:
+            await self.limiter.acquire()
+        return (await self.pool.post('/campaigns', json=payload)).json()
+
+    @stage('klaviyo.send_digests')
+    async def send_digests(self, products, list_id=None, cache=None, **plan):
+        """Create one campaign per digest of ``products``; returns the created campaigns."""
+        cache = cache or RenderCache()
+        payloads = [campaign_payload(digest_subject(group), digest_html(group, cache), list_id)
+                    for group in plan_digests(products, **plan)]
+        return await asyncio.gather(*(self.create_campaign(p) for p in payloads))
+
+
+def send_product_digests(products, list_id=None, cache=None, max_products=DIGEST_MAX_PRODUCTS, **kwargs):
+    """Blocking wrapper: announce a batch of launches as digest campaigns."""
+    async def run():
+        async with KlaviyoClient(**kwargs) as client:
+            return await client.send_digests(products, list_id, cache, max_products=max_products)
+    return asyncio.run(run())
+
+
+def new_product_campaign(product_data, list_id=None):
+    """Campaign announcing one new product."""
+    return campaign_payload(f"New Arrival: {product_data['Product_Name']}", new_product_html(product_data), list_id)
+
+
+def send_new_product_email(product_data, api_key=None, list_id=None, base_url=KLAVIYO_API_BASE):
+    """Send email to subscribers about new product"""
+    payload = new_product_campaign(product_data, list_id)
+
+    async def run():
+        async with KlaviyoClient(api_key, base_url, max_connections=1) as client:
+            return await client.create_campaign(payload)
+
+    return asyncio.run(run())
@@ -0,0 +1,501 @@
+"""Pre-aggregated KPI cube over the catalog and the order stream.
+
+Products and orders are rolled up per day x Product_Category x
+Marketing_Channels cell: counts, sums, min/max, and each cell's top-K
+products by gross profit. Changing a product or adding orders touches
+only the cells of the changed rows, so the build script and the executive
+summary read finished numbers instead of recomputing means.
+
+Product cells are keyed by catalog Day, order cells by the UTC date of
+the order. An order is filed under its product's category and channels
+as they were when it arrived; orders are append-only. Margins are summed
+in hundredths of a percent and money in cents, so rollups are exact and
+equal a full recompute.
+"""
+import os
+
+import numpy as np
+
+from merch_store.catalog_diff import SyncState
+from merch_store.ledger import SECONDS_PER_DAY, order_metrics
+
+KPI_CUBE = os.environ.get('KPI_CUBE', 'kpi_cube.npz')
+CATALOG_CSV = 'anti_ai_merch_store_30day_catalog.csv'
+TOP_K = 5
+UNKNOWN = '(unknown)'  # category and channels of orders for products not in the catalog
+
+I64_MAX = np.iinfo(np.int64).max
+I64_MIN = np.iinfo(np.int64).min
+
+# name: (dtype, value of an empty cell)
+PRODUCT_MEASURES = {
+    'products': (np.int64, 0),
+    'margin_bp': (np.int64, 0),  # Profit_Margin_% in hundredths
+    'profit_cents': (np.int64, 0),
+    'retail_cents': (np.int64, 0),
+    'margin_min': (np.int64, I64_MAX),
+    'margin_max': (np.int64, I64_MIN),
+    'profit_min': (np.int64, I64_MAX),
+    'profit_max': (np.int64, I64_MIN),
+}
+ORDER_MEASURES = {
+    'orders': (np.int64, 0),
+    'units': (np.int64, 0),
+    'revenue_cents': (np.int64, 0),
+    'cost_cents': (np.int64, 0),
+    'order_min': (np.int64, I64_MAX),  # revenue of the smallest order
+    'order_max': (np.int64, I64_MIN),
+}
+# Per product slot
+PRODUCT_COLUMNS = {
+    'key': np.int64, 'cell': np.int64, 'category': np.int32, 'channel': np.int32,
+    'margin_bp': np.int64, 'profit_cents': np.int64, 'retail_cents': np.int64,
+}
+DIMENSIONS = ('day', 'category', 'channel')
+
+
+def _grown(values, capacity, fill):
+    out = np.full((capacity,) + values.shape[1:], fill, dtype=values.dtype)
+    out[:len(values)] = values
+    return out
+
+
+class Cells:
+    """Growable (day, category, channel) cells, each a row of measure arrays."""
+
+    def __init__(self, measures, top=0):
+        self.measures = measures
+        self.n = 0
+        self.index = {}  # packed (day, category, channel) -> cell
+        self.coords = {'day': np.zeros(0, np.int64), 'category': np.zeros(0, np.int32),
+                       'channel': np.zeros(0, np.int32)}
+        self.values = {name: np.zeros(0, dtype) for name, (dtype, _) in measures.items()}
+        # Product slots of each cell's top-K by gross profit, -1 padded
+        self.top = np.zeros((0, top), np.int64) if top else None
+
+    def _reserve(self, n):
+        capacity = len(self.coords['day'])
+        if n <= capacity:
+            return
+        capacity = max(n, 2 * capacity, 64)
+        self.coords = {name: _grown(values, capacity, 0) for name, values in self.coords.items()}
+        self.values = {name: _grown(values, capacity, self.measures[name][1]) for name, values in self.values.items()}
+        if self.top is not None:
+            self.top = _grown(self.top, capacity, -1)
+
+    def ids(self, day, category, channel):
+        """Cell of every (day, category, channel), creating missing cells."""
+        packed = (np.asarray(day, np.int64) << 32) | (np.asarray(category, np.int64) << 16) | channel
+        keys, inverse = np.unique(packed, return_inverse=True)
+        cells = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys.tolist()):
+            cell = self.index.get(key)
+            if cell is None:
+                cell = self.index[key] = self.n
+                self._reserve(self.n + 1)
+                self.coords['day'][cell] = key >> 32
+                self.coords['category'][cell] = (key >> 16) & 0xFFFF
+                self.coords['channel'][cell] = key & 0xFFFF
+                self.n += 1
+            cells[i] = cell
+        return cells[inverse]
+
+    def select(self, days=None, category=None, channel=None):
+        """Mask of cells with ``days[0] <= day < days[1]`` and the given category/channel codes."""
+        keep = np.ones(self.n, dtype=bool)
+        day = self.coords['day'][:self.n]
+        if days is not None:
+            lo, hi = days
+            if lo is not None:
+                keep &= day >= lo
+            if hi is not None:
+                keep &= day < hi
+        if category is not None:
+            keep &= self.coords['category'][:self.n] == category
+        if channel is not None:
+            keep &= self.coords['channel'][:self.n] == channel
+        return keep
+
+    def state(self, prefix):
+        arrays = {f'{prefix}_{name}': values[:self.n] for name, values in self.coords.items()}
+        arrays.update({f'{prefix}_{name}': values[:self.n] for name, values in self.values.items()})
+        if self.top is not None:
+            arrays[f'{prefix}_top'] = self.top[:self.n]
+        return arrays
+
+    def restore(self, data, prefix):
+        self.n = len(data[f'{prefix}_day'])
+        self._reserve(self.n)
+        for name in self.coords:
+            self.coords[name][:self.n] = data[f'{prefix}_{name}']
+        for name in self.values:
+            self.values[name][:self.n] = data[f'{prefix}_{name}']
+        if self.top is not None:
+            self.top[:self.n] = data[f'{prefix}_top']
+        packed = (self.coords['day'][:self.n] << 32) | (self.coords['category'][:self.n].astype(np.int64) << 16) \
+            | self.coords['channel'][:self.n]
+        self.index = dict(zip(packed.tolist(), range(self.n)))
+
+
+class KPICube:
+    """Incrementally maintained KPIs; loaded from and saved to ``path`` (npz).
+
+    Usage::
+
+        cube = KPICube('kpi_cube.npz')
+        cube.sync_catalog(catalog)          # only changed rows touch the cube
+        ledger = OrderLedger('orders.ledger', on_append=cube.feed)
+        print(cube.summary()['avg_margin_pct'])
+        cube.save()
+    """
+
+    def __init__(self, path=None, k=TOP_K):
+        self.path = path
+        self.k = k
+        self.categories = {}  # label -> code
+        self.channels = {}
+        self.product_cells = Cells(PRODUCT_MEASURES, top=k)
+        self.order_cells = Cells(ORDER_MEASURES)
+        self.slots = {name: np.zeros(0, dtype) for name, dtype in PRODUCT_COLUMNS.items()}
+        self.by_key = {}  # product key (catalog Day) -> slot
+        self._free = []
+        self._resolver = None
+        self.state = SyncState()
+        if path and os.path.exists(path):
+            self._load(path)
+
+    # -- products -----------------------------------------------------------
+
+    def _codes(self, lookup, column, rows):
+        mapping = np.array([lookup.setdefault(label, len(lookup)) for label in column.labels], dtype=np.int32)
+        return mapping[column.codes[rows]]
+
+    def _alloc(self, n):
+        """``n`` free product slots, reusing released ones first."""
+        reused = self._free[max(len(self._free) - n, 0):] if n else []
+        del self._free[len(self._free) - len(reused):]
+        first = len(self.by_key) + len(self._free) + len(reused)
+        fresh = np.arange(first, first + n - len(reused), dtype=np.int64)
+        if len(fresh) and fresh[-1] >= len(self.slots['key']):
+            capacity = max(int(fresh[-1]) + 1, 2 * len(self.slots['key']), 64)
+            self.slots = {name: _grown(values, capacity, -1 if name == 'cell' else 0)
+                          for name, values in self.slots.items()}
+        return np.concatenate([np.asarray(reused, dtype=np.int64), fresh])
+
+    def _ranked(self, slots):
+        """Slots by gross profit, largest first, ties by key (catalog order)."""
+        slots = np.asarray(slots, dtype=np.int64)
+        return slots[np.lexsort((self.slots['key'][slots], -self.slots['profit_cents'][slots]))]
+
+    def _top(self, slots):
+        """The k best of ``slots``, ranked; only those tied with the k-th are sorted."""
+        if len(slots) > self.k:
+            profit = self.slots['profit_cents'][slots]
+            slots = slots[profit >= np.partition(profit, len(slots) - self.k)[len(slots) - self.k]]
+        return self._ranked(slots)[:self.k]
+
+    def _sums(self, slots, sign):
+        """Add (sign 1) or take away (sign -1) products' counts and sums in their cells."""
+        cells = self.slots['cell'][slots]
+        v = self.product_cells.values
+        np.add.at(v['products'], cells, sign)
+        for name in ('margin_bp', 'profit_cents', 'retail_cents'):
+            np.add.at(v[name], cells, sign * self.slots[name][slots])
+
+    def _release(self, slots):
+        """Take products out of their cells; returns the cells they were in."""
+        cells = self.slots['cell'][slots]
+        self._sums(slots, -1)
+        self.slots['cell'][slots] = -1
+        self._free.extend(slots.tolist())
+        return cells
+
+    def _recompute(self, cells):
+        """Min/max and top-K of ``cells`` from the products now in them."""
+        cells = np.unique(cells)
+        if not len(cells):
+            return
+        s, v, top = self.slots, self.product_cells.values, self.product_cells.top
+        touched = np.zeros(self.product_cells.n, dtype=bool)
+        touched[cells] = True
+        live = np.flatnonzero(s['cell'] >= 0)
+        members = live[touched[s['cell'][live]]]
+        owner = s['cell'][members]
+        for name, column in (('margin', 'margin_bp'), ('profit', 'profit_cents')):
+            v[f'{name}_min'][cells] = I64_MAX
+            v[f'{name}_max'][cells] = I64_MIN
+            np.minimum.at(v[f'{name}_min'], owner, s[column][members])
+            np.maximum.at(v[f'{name}_max'], owner, s[column][members])
+        # Each cell's members by gross profit, largest first, ties by key; the first k go in its top-K.
+        order = np.lexsort((s['key'][members], -s['profit_cents'][members], owner))
+        ranked, owner = members[order], owner[order]
+        rank = np.arange(len(owner)) - np.searchsorted(owner, owner)
+        best = rank < self.k
+        top[cells] = -1
+        top[owner[best], rank[best]] = ranked[best]
+
+    def upsert_products(self, catalog, rows=None):
+        """Add or replace catalog rows (every row by default), keyed by Day."""
+        rows = np.arange(len(catalog)) if rows is None else np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        keys = catalog.day[rows]
+        if len(np.unique(keys)) < len(keys):
+            raise ValueError('duplicate catalog Day in the rows to upsert')
+        category = self._codes(self.categories, catalog.category, rows)
+        channel = self._codes(self.channels, catalog.channels, rows)
+        cells = self.product_cells.ids(keys, category, channel)
+        old = np.fromiter((self.by_key.pop(key, -1) for key in keys.tolist()), dtype=np.int64, count=len(keys))
+        emptied = self._release(old[old >= 0])
+        slots = self._alloc(len(rows))
+        self.by_key.update(zip(keys.tolist(), slots.tolist()))
+        margin = np.rint(np.nan_to_num(catalog.margin_pct[rows]) * 100).astype(np.int64)
+        for name, values in (('key', keys), ('cell', cells), ('category', category), ('channel', channel),
+                             ('margin_bp', margin), ('profit_cents', catalog.profit_cents[rows]),
+                             ('retail_cents', catalog.retail_cents[rows])):
+            self.slots[name][slots] = values
+        self._sums(slots, 1)
+        self._recompute(np.concatenate([emptied, cells]))
+        self._resolver = None
+
+    def remove_products(self, keys):
+        """Drop products by key (catalog Day); unknown keys are ignored."""
+        keys = np.asarray(keys, dtype=np.int64).tolist()
+        slots = np.fromiter((self.by_key.pop(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+        self._recompute(self._release(slots[slots >= 0]))
+        self._resolver = None
+
+    def sync_catalog(self, catalog):
+        """Bring the product cells in line with ``catalog``, touching only changed rows.
+
+        Returns the :class:`~merch_store.catalog_diff.CatalogDiff` applied.
+        """
+        diff = self.state.diff(catalog)
+        self.remove_products(diff.deletes)
+        self.upsert_products(catalog, np.concatenate([diff.creates, diff.updates]))
+        self.state.commit(diff)
+        return diff
+
+    def load_chunks(self, chunks):
+        """Add every product of a catalog read in chunks, e.g. from :func:`~merch_store.catalog_io.read_chunks`.
+
+        Products already in the cube are replaced; none are removed, as a
+        chunk holds only part of the catalog.
+        """
+        for chunk in chunks:
+            diff = self.state.diff(chunk)
+            self.upsert_products(chunk, np.concatenate([diff.creates, diff.updates]))
+            self.state.commit(diff, deleted=())
+
+    # -- orders -------------------------------------------------------------
+
+    def _resolve(self, product):
+        """Product slot of each order's product key, -1 when not in the catalog."""
+        if self._resolver is None:
+            keys = np.fromiter(self.by_key, dtype=np.int64, count=len(self.by_key))
+            slots = np.fromiter(self.by_key.values(), dtype=np.int64, count=len(self.by_key))
+            order = np.argsort(keys)
+            self._resolver = keys[order], slots[order]
+        keys, slots = self._resolver
+        pos = np.minimum(np.searchsorted(keys, product), max(len(keys) - 1, 0))
+        if not len(keys):
+            return np.full(len(product), -1, dtype=np.int64)
+        return np.where(keys[pos] == product, slots[pos], -1)
+
+    def add_orders(self, ts, product, revenue_cents, cost_cents, quantity=None):
+        """Roll a batch of orders (epoch seconds, product key, cents) into their cells."""
+        product = np.asarray(product, dtype=np.int64)
+        if not len(product):
+            return
+        slot = self._resolve(product)
+        known = slot >= 0
+        category = np.full(len(product), 0, dtype=np.int32)
+        channel = np.full(len(product), 0, dtype=np.int32)
+        category[known] = self.slots['category'][slot[known]]
+        channel[known] = self.slots['channel'][slot[known]]
+        if not known.all():
+            category[~known] = self.categories.setdefault(UNKNOWN, len(self.categories))
+            channel[~known] = self.channels.setdefault(UNKNOWN, len(self.channels))
+        cells = self.order_cells.ids(np.asarray(ts, dtype=np.int64) // SECONDS_PER_DAY, category, channel)
+        revenue = np.asarray(revenue_cents, dtype=np.int64)
+        v = self.order_cells.values
+        np.add.at(v['orders'], cells, 1)
+        np.add.at(v['units'], cells, 1 if quantity is None else np.asarray(quantity, dtype=np.int64))
+        np.add.at(v['revenue_cents'], cells, revenue)
+        np.add.at(v['cost_cents'], cells, np.asarray(cost_cents, dtype=np.int64))
+        np.minimum.at(v['order_min'], cells, revenue)
+        np.maximum.at(v['order_max'], cells, revenue)
+
+    def feed(self, columns):
+        """Add orders given as an :class:`~merch_store.ledger.OrderLedger` column batch."""
+        self.add_orders(columns['ts'], columns['product'], columns['revenue_cents'], columns['cost_cents'],
+                        columns['quantity'])
+
+    def load_ledger(self, ledger):
+        """Roll every order already in a ledger into the cube."""
+        for columns in ledger.chunks():
+            self.feed(columns)
+
+    # -- queries ------------------------------------------------------------
+
+    def _groups(self, cells, by, days, category, channel):
+        """Selected cells and their group number for grouping dimensions ``by``."""
+        for dim in by:
+            if dim not in DIMENSIONS:
+                raise ValueError(f"cannot group by {dim!r}; expected some of {DIMENSIONS}")
+        codes = [None if label is None else lookup.get(label, -1)
+                 for label, lookup in ((category, self.categories), (channel, self.channels))]
+        selected = np.flatnonzero(cells.select(days, *codes))
+        if not by:
+            return selected, np.zeros(len(selected), dtype=np.int64), [{}] if len(selected) else []
+        coords = np.stack([cells.coords[dim][selected].astype(np.int64) for dim in by], axis=1)
+        keys, inverse = np.unique(coords, axis=0, return_inverse=True)
+        labels = {'category': list(self.categories), 'channel': list(self.channels)}
+        names = {'day': 'Day', 'category': 'Product_Category', 'channel': 'Marketing_Channels'}
+        groups = [{names[dim]: (int(v) if dim == 'day' else labels[dim][v]) for dim, v in zip(by, key.tolist())}
+                  for key in keys]
+        return selected, inverse.reshape(-1), groups
+
+    @staticmethod
+    def _reduce(values, selected, group, n, ufunc, fill):
+        if n == 1:
+            return [int(ufunc.reduce(values[selected]))]
+        out = np.full(n, fill, dtype=np.int64)
+        ufunc.at(out, group, values[selected])
+        return out.tolist()
+
+    def product_kpis(self, by=(), days=None, category=None, channel=None):
+        """Catalog KPIs per group of product cells (one row for ``by=()``).
+
+        ``days`` is a ``(first, stop)`` range of catalog Days; ``category``
+        and ``channel`` filter by label.
+        """
+        cells = self.product_cells
+        selected, group, groups = self._groups(cells, by, days, category, channel)
+        n = len(groups)
+        v = cells.values
+        sums = {name: self._reduce(v[name], selected, group, n, np.add, 0)
+                for name in ('products', 'margin_bp', 'profit_cents')}
+        lows = {name: self._reduce(v[name], selected, group, n, np.minimum, I64_MAX)
+                for name in ('margin_min', 'profit_min')}
+        highs = {name: self._reduce(v[name], selected, group, n, np.maximum, I64_MIN)
+                 for name in ('margin_max', 'profit_max')}
+        candidates = cells.top[selected]
+        rows = []
+        for g, row in enumerate(groups):
+            products = sums['products'][g]
+            if not products:
+                continue
+            top = candidates[group == g].ravel()
+            row.update({
+                'products': products,
+                'avg_margin_pct': sums['margin_bp'][g] / products / 100,
+                'min_margin_pct': lows['margin_min'][g] / 100,
+                'max_margin_pct': highs['margin_max'][g] / 100,
+                'avg_gross_profit': sums['profit_cents'][g] / products / 100,
+                'min_gross_profit': lows['profit_min'][g] / 100,
+                'max_gross_profit': highs['profit_max'][g] / 100,
+                'top': self.slots['key'][self._top(top[top >= 0])].tolist(),
+            })
+            rows.append(row)
+        return rows
+
+    def order_kpis(self, by=(), days=None, category=None, channel=None):
+        """Order KPIs per group of order cells; ``days`` is a range of UTC epoch days."""
+        cells = self.order_cells
+        selected, group, groups = self._groups(cells, by, days, category, channel)
+        n = len(groups)
+        v = cells.values
+        sums = {name: self._reduce(v[name], selected, group, n, np.add, 0)
+                for name in ('orders', 'units', 'revenue_cents', 'cost_cents')}
+        low = self._reduce(v['order_min'], selected, group, n, np.minimum, I64_MAX)
+        high = self._reduce(v['order_max'], selected, group, n, np.maximum, I64_MIN)
+        rows = []
+        for g, row in enumerate(groups):
+            if not sums['orders'][g]:
+                continue
+            row.update(order_metrics(sums['orders'][g], sums['units'][g], sums['revenue_cents'][g],
+                                     sums['cost_cents'][g]))
+            row['smallest_order'] = low[g] / 100
+            row['largest_order'] = high[g] / 100
+            rows.append(row)
+        return rows
+
+    def summary(self):
+        """Catalog averages (as :meth:`Catalog.summary`), margin range, top products and order totals.
+
+        Raises LookupError when the cube holds no products.
+        """
+        products = self.product_kpis()
+        if not products:
+            raise LookupError(f"{self.path or 'KPI cube'}: no products to summarize")
+        kpis = products[0]
+        orders = self.order_kpis()
+        kpis.update(orders[0] if orders else order_metrics(0, 0, 0, 0))
+        return kpis
+
+    # -- persistence --------------------------------------------------------
+
+    def save(self, path=None):
+        path = path or self.path
+        live = np.flatnonzero(self.slots['cell'] >= 0)
+        arrays = {f'slot_{name}': values[live] for name, values in self.slots.items()}
+        arrays.update(self.product_cells.state('product'))
+        arrays.update(self.order_cells.state('order'))
+        # Product cells' top-K hold slot numbers; saved slots are renumbered densely.
+        renumber = np.full(len(self.slots['key']) + 1, -1, dtype=np.int64)
+        renumber[live] = np.arange(len(live))
+        arrays['product_top'] = renumber[arrays['product_top']]
+        arrays['categories'] = np.array(list(self.categories), dtype=str)
+        arrays['channels'] = np.array(list(self.channels), dtype=str)
+        arrays['k'] = np.array(self.k)
+        arrays['state_keys'] = self.state.keys
+        arrays['state_fingerprints'] = self.state.fingerprints
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    def _load(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            self.k = int(data['k'])
+            self.product_cells = Cells(PRODUCT_MEASURES, top=self.k)
+            self.product_cells.restore(data, 'product')
+            self.order_cells.restore(data, 'order')
+            self.slots = {name: data[f'slot_{name}'].astype(dtype) for name, dtype in PRODUCT_COLUMNS.items()}
+            self.categories = {label: code for code, label in enumerate(data['categories'].tolist())}
+            self.channels = {label: code for code, label in enumerate(data['channels'].tolist())}
+            self.state.keys = data['state_keys']
+            self.state.fingerprints = data['state_fingerprints']
+        self.state.remote_ids = np.full(len(self.state.keys), b'', dtype='S1')
+        self.by_key = dict(zip(self.slots['key'].tolist(), range(len(self.slots['key']))))
+
+
+def catalog_chunks(csv_path=CATALOG_CSV):
+    """The catalog in chunks, from the binary copy next to the CSV when it is not stale."""
+    from merch_store.catalog_row import current_bin
+
+    bin_path = current_bin(csv_path)
+    if bin_path is not None:
+        from merch_store.catalog_bin import CatalogFile
+
+        with CatalogFile(bin_path) as catalog:
+            yield from catalog.chunks()
+    else:
+        from merch_store.catalog_io import read_chunks
+
+        yield from read_chunks(csv_path)
+
+
+def catalog_kpis(path=KPI_CUBE, catalog_path=CATALOG_CSV):
+    """Summary KPIs from the saved cube, built from the catalog when there is none yet.
+
+    Raises LookupError when the catalog has no products.
+    """
+    cube = KPICube(path)
+    if not cube.by_key:
+        cube.load_chunks(catalog_chunks(catalog_path))
+        if not cube.by_key:
+            raise LookupError(f"{catalog_path}: catalog is empty, no KPIs to report")
+        cube.save()
+    return cube.summary()
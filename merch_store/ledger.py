@@ -0,0 +1,499 @@
+"""Embedded order ledger: append-only segments with aggregate footers.
+
+Orders are appended in segments of typed columns. Each segment ends in a
+footer holding min/max/sum of every column and a rollup of orders, units,
+revenue and cost per (UTC day, Product_Category), so daily, weekly and
+monthly revenue, gross profit and margin come from the footers alone.
+A time range that does not fall on day boundaries reads only the
+segments straddling its ends.
+
+Layout (all integers little-endian, every column 8-byte aligned)::
+
+    header   magic b'MRCHLDG1', u64 format version
+    segment  magic b'MRCHSEG1', u64 rows, u64 footer length,
+             ts i8 (epoch seconds), product i8, revenue_cents i8,
+             cost_cents i8, category i4 codes, quantity i4,
+             footer JSON (stats, rollup, category dictionary)
+    segment  ...
+
+Nothing is ever rewritten. One process at a time may open a ledger for
+writing; it holds an exclusive lock on the file until it closes it. A
+segment torn by a crash is detected when the writer opens the ledger and
+cut off, so the ledger resumes after the last complete segment. Readers
+(``readonly=True``) take no lock and stop before a torn or half-written
+segment, so they can open a ledger while it is being appended to.
+"""
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from merch_store.catalog import Categorical
+
+MAGIC = b'MRCHLDG1'
+SEGMENT_MAGIC = b'MRCHSEG1'
+HEADER = struct.Struct('<8sQ')
+SEGMENT = struct.Struct('<8sQQ')
+VERSION = 1
+
+SEGMENT_ROWS = 1 << 20
+SECONDS_PER_DAY = 86400
+
+COLUMNS = [
+    ('ts', '<i8'),
+    ('product', '<i8'),
+    ('revenue_cents', '<i8'),
+    ('cost_cents', '<i8'),
+    ('category', '<i4'),
+    ('quantity', '<i4'),
+]
+ROLLUP_FIELDS = ['day', 'category', 'orders', 'units', 'revenue_cents', 'cost_cents']
+PERIODS = (None, 'day', 'week', 'month')
+
+
+class LedgerLocked(Exception):
+    """Another process has the ledger open for writing."""
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _column_offsets(rows):
+    """Offsets of every column relative to the end of the segment header, and the total size."""
+    offsets = {}
+    pos = 0
+    for name, dtype in COLUMNS:
+        offsets[name] = pos
+        pos = _align(pos + rows * np.dtype(dtype).itemsize)
+    return offsets, pos
+
+
+def _seconds(value):
+    """Epoch seconds from an int, a datetime64/date/datetime, or an ISO date string."""
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    return int(np.datetime64(value, 's').astype(np.int64))
+
+
+def rollup(day, category, quantity, revenue_cents, cost_cents):
+    """Orders, units, revenue and cost summed per (day, category) pair."""
+    if not len(day):
+        return {name: np.zeros(0, dtype=np.int64) for name in ROLLUP_FIELDS}
+    lo = int(day.min())
+    n_categories = int(category.max()) + 1
+    key = (day - lo) * n_categories + category
+    size = int(key.max()) + 1
+    if size <= 4 * len(key) + 1024:
+        counts = np.bincount(key, minlength=size)
+        present = np.flatnonzero(counts)
+        orders = counts[present]
+
+        def total(weights):
+            return np.bincount(key, weights, size)[present]
+    else:
+        # Days far apart (stray timestamps): sort instead of a huge dense table.
+        present, inverse, orders = np.unique(key, return_inverse=True, return_counts=True)
+
+        def total(weights):
+            return np.bincount(inverse, weights, len(present))
+
+    return {
+        'day': present // n_categories + lo,
+        'category': present % n_categories,
+        'orders': orders.astype(np.int64),
+        # float64 sums of integer cents are exact below 2**53 (about $90 trillion).
+        'units': total(quantity).astype(np.int64),
+        'revenue_cents': total(revenue_cents).astype(np.int64),
+        'cost_cents': total(cost_cents).astype(np.int64),
+    }
+
+
+def period_start(day, period):
+    """First day (days since the epoch) of the day, Monday-based week or month holding ``day``."""
+    if period == 'day':
+        return day
+    if period == 'week':
+        return day - (day + 3) % 7  # 1970-01-01 was a Thursday
+    if period == 'month':
+        return day.astype('datetime64[D]').astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    raise ValueError(f"period must be one of {PERIODS}, not {period!r}")
+
+
+def _period_labels(starts, period):
+    if period is None:
+        return ['all'] * len(starts)
+    dates = np.asarray(starts, dtype='datetime64[D]')
+    if period == 'month':
+        dates = dates.astype('datetime64[M]')
+    return np.datetime_as_string(dates).tolist()
+
+
+class Segment:
+    """One sealed segment: where its columns are and what its footer says."""
+
+    __slots__ = ('offset', 'rows', 'stats', 'rollup')
+
+    def __init__(self, offset, rows, footer):
+        self.offset = offset  # first byte of the columns
+        self.rows = rows
+        self.stats = footer['stats']
+        self.rollup = {name: np.asarray(footer['rollup'][name], dtype=np.int64) for name in ROLLUP_FIELDS}
+
+    @property
+    def ts_min(self):
+        return self.stats['ts'][0]
+
+    @property
+    def ts_max(self):
+        return self.stats['ts'][1]
+
+
+class OrderLedger:
+    """Append orders to a ledger file and aggregate them by period and category.
+
+    Usage::
+
+        with OrderLedger('orders.ledger') as ledger:
+            ledger.append(ts, categories, revenue_cents, cost_cents, quantity=quantity)
+            monthly = ledger.aggregate('month', start='2026-01-01', stop='2027-01-01')
+
+    Appended orders are buffered until a full segment is written;
+    :meth:`flush` (and closing) seals a partial one. Buffered orders are
+    included in every query. ``on_append(columns)`` is called with every
+    appended batch, e.g. to keep a :class:`~merch_store.kpi.KPICube` current.
+
+    With ``readonly=True`` the ledger is only queried: it sees the segments
+    complete when it was opened and cannot be appended to. Otherwise
+    :class:`LedgerLocked` is raised if another process is writing to it.
+    """
+
+    def __init__(self, path, segment_rows=SEGMENT_ROWS, fsync=False, on_append=None, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self.on_append = on_append
+        self.segment_rows = segment_rows
+        self.fsync = fsync
+        self.segments = []
+        self.categories = {}  # label -> code, in first-seen order
+        self._pending = []
+        self._pending_rows = 0
+        self._pending_table = None
+        self._table = None
+        self._mm = None
+        if readonly:
+            self._file = open(path, 'rb')
+        else:
+            self._file = open(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+            self._lock()
+        try:
+            if os.fstat(self._file.fileno()).st_size:
+                self._load()
+            elif not readonly:
+                self._file.write(HEADER.pack(MAGIC, VERSION))
+                self._file.flush()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def _lock(self):
+        """Take the single-writer lock, held until the file is closed."""
+        import fcntl
+
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._file.close()
+            raise LedgerLocked(f"{self.path}: already open for writing by another process") from None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return sum(s.rows for s in self.segments) + self._pending_rows
+
+    def _load(self):
+        f = self._file
+        size = os.fstat(f.fileno()).st_size
+        magic, version = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path}: not an order ledger")
+        pos = HEADER.size
+        while pos + SEGMENT.size <= size:
+            f.seek(pos)
+            magic, rows, footer_len = SEGMENT.unpack(f.read(SEGMENT.size))
+            columns_size = _column_offsets(rows)[1]
+            end = pos + SEGMENT.size + columns_size + footer_len
+            if magic != SEGMENT_MAGIC or end > size:
+                break
+            f.seek(pos + SEGMENT.size + columns_size)
+            try:
+                footer = json.loads(f.read(footer_len))
+            except ValueError:
+                break
+            self.segments.append(Segment(pos + SEGMENT.size, rows, footer))
+            self.categories = {label: code for code, label in enumerate(footer['categories'])}
+            pos = end
+        if pos < size and not self.readonly:
+            # Torn by a crash mid-append: resume after the last whole segment. Only the
+            # writer gets here, under the lock, so the bytes are not another writer's segment.
+            f.truncate(pos)
+
+    def _remap(self, category, n):
+        if not isinstance(category, Categorical):
+            category = Categorical.encode(list(category))
+        if len(category) != n:
+            raise ValueError(f"{self.path}: {len(category)} categories for {n} orders")
+        mapping = np.array([self.categories.setdefault(v, len(self.categories)) for v in category.labels],
+                           dtype=np.int32)
+        return mapping[category.codes] if len(mapping) else category.codes
+
+    def append(self, ts, category, revenue_cents, cost_cents, quantity=None, product=None):
+        """Append orders given as columns.
+
+        ``ts`` is epoch seconds (or datetime64), ``category`` labels or a
+        Categorical, money in integer cents for the whole order line;
+        ``quantity`` defaults to 1 and ``product`` to 0.
+        """
+        if self.readonly:
+            raise ValueError(f"{self.path}: opened read-only")
+        ts = np.asarray(ts)
+        if ts.dtype.kind == 'M':
+            ts = ts.astype('datetime64[s]').astype(np.int64)
+        n = len(ts)
+        columns = {
+            'ts': ts,
+            'product': np.zeros(n, dtype=np.int64) if product is None else product,
+            'revenue_cents': revenue_cents,
+            'cost_cents': cost_cents,
+            'category': self._remap(category, n),
+            'quantity': np.ones(n, dtype=np.int32) if quantity is None else quantity,
+        }
+        columns = {name: np.ascontiguousarray(columns[name], dtype=dtype) for name, dtype in COLUMNS}
+        for name, values in columns.items():
+            if len(values) != n:
+                raise ValueError(f"{self.path}: {name} has {len(values)} values for {n} orders")
+        if not n:
+            return
+        if self.on_append is not None:
+            self.on_append(columns)
+        self._pending.append(columns)
+        self._pending_rows += n
+        self._pending_table = None
+        while self._pending_rows >= self.segment_rows:
+            self._seal(self.segment_rows)
+
+    def flush(self):
+        """Seal buffered orders into a (possibly short) segment."""
+        if self._pending_rows:
+            self._seal(self._pending_rows)
+
+    def close(self):
+        self.flush()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def _take_pending(self, rows):
+        merged = {name: np.concatenate([chunk[name] for chunk in self._pending]) for name, _ in COLUMNS}
+        rest = {name: values[rows:] for name, values in merged.items()}
+        self._pending = [rest] if len(rest['ts']) else []
+        self._pending_rows -= rows
+        self._pending_table = None
+        return {name: values[:rows] for name, values in merged.items()}
+
+    def _seal(self, rows):
+        columns = self._take_pending(rows)
+        table = rollup(columns['ts'] // SECONDS_PER_DAY, columns['category'], columns['quantity'],
+                       columns['revenue_cents'], columns['cost_cents'])
+        stats = {name: [int(v.min()), int(v.max()), int(v.sum())] for name, v in columns.items()}
+        footer = json.dumps({
+            'rows': rows,
+            'stats': stats,
+            'rollup': {name: table[name].tolist() for name in ROLLUP_FIELDS},
+            'categories': list(self.categories),
+        }, separators=(',', ':')).encode('utf-8')
+        footer += b' ' * (_align(len(footer)) - len(footer))
+        offsets, columns_size = _column_offsets(rows)
+
+        f = self._file
+        pos = f.seek(0, os.SEEK_END)
+        f.write(SEGMENT.pack(SEGMENT_MAGIC, rows, len(footer)))
+        for name, _ in COLUMNS:
+            data = columns[name].tobytes()
+            f.write(data + b'\0' * (_align(len(data)) - len(data)))
+        f.write(footer)
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+        self.segments.append(Segment(pos + SEGMENT.size, rows, {'stats': stats, 'rollup': table}))
+        self._table = None
+
+    def _columns(self, segment):
+        """Zero-copy views of a segment's columns."""
+        end = segment.offset + _column_offsets(segment.rows)[1]
+        if self._mm is None or len(self._mm) < end:
+            # Views into an older, shorter mapping keep it alive until they go.
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        offsets = _column_offsets(segment.rows)[0]
+        return {name: np.frombuffer(self._mm, dtype, segment.rows, segment.offset + offsets[name])
+                for name, dtype in COLUMNS}
+
+    def chunks(self):
+        """Yield every segment's columns (then the buffered orders) as dicts of arrays."""
+        for segment in self.segments:
+            yield self._columns(segment)
+        for chunk in self._pending:
+            yield chunk
+
+    def _footer_table(self):
+        """Every segment's rollup concatenated, with the segment number of each row."""
+        if self._table is None:
+            parts = [s.rollup for s in self.segments]
+            self._table = {name: np.concatenate([p[name] for p in parts] or [np.zeros(0, np.int64)])
+                           for name in ROLLUP_FIELDS}
+            self._table['segment'] = np.repeat(np.arange(len(parts)), [len(p['day']) for p in parts])
+        return self._table
+
+    def _pending_rollup(self):
+        if self._pending_table is None:
+            self._pending_table = _scan_rollup(self._pending, None, None)
+        return self._pending_table
+
+    def _select(self, lo, hi):
+        """Rollup rows covering exactly the orders with lo <= ts < hi."""
+        table = self._footer_table()
+        aligned = all(bound is None or bound % SECONDS_PER_DAY == 0 for bound in (lo, hi))
+        if aligned:
+            keep = np.ones(len(table['day']), dtype=bool)
+            if lo is not None:
+                keep &= table['day'] >= lo // SECONDS_PER_DAY
+            if hi is not None:
+                keep &= table['day'] < hi // SECONDS_PER_DAY
+            parts = [{name: table[name][keep] for name in ROLLUP_FIELDS}]
+            parts.append(_filter_days(self._pending_rollup(), lo, hi) if self._pending_rows else None)
+            return _concat([p for p in parts if p is not None])
+
+        lo = -2**63 if lo is None else lo
+        hi = 2**63 - 1 if hi is None else hi
+        ts_min = np.array([s.ts_min for s in self.segments], dtype=np.int64)
+        ts_max = np.array([s.ts_max for s in self.segments], dtype=np.int64)
+        inside = (ts_min >= lo) & (ts_max < hi)
+        straddling = ~inside & (ts_max >= lo) & (ts_min < hi)
+        keep = inside[table['segment']] if len(self.segments) else np.zeros(0, dtype=bool)
+        parts = [{name: table[name][keep] for name in ROLLUP_FIELDS}]
+        parts.append(_scan_rollup((self._columns(self.segments[i]) for i in np.flatnonzero(straddling)), lo, hi))
+        parts.append(_scan_rollup(self._pending, lo, hi))
+        return _concat(parts)
+
+    def aggregate(self, period='day', start=None, stop=None, category=None, by_category=True):
+        """Orders, units, revenue, gross profit and margin per period.
+
+        ``period`` is 'day', 'week' (Monday-based), 'month' or None for a
+        single total; days are UTC. ``start`` (inclusive) and ``stop``
+        (exclusive) are epoch seconds, datetime64 or ISO strings. Ranges on
+        day boundaries are answered from the segment footers; otherwise
+        only segments straddling ``start`` or ``stop`` are read. Returns a
+        list of dicts ordered by period, then category.
+        """
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {PERIODS}, not {period!r}")
+        table = self._select(_seconds(start), _seconds(stop))
+        if category is not None:
+            code = self.categories.get(category, -1)
+            table = {name: values[table['category'] == code] for name, values in table.items()}
+        starts = np.zeros(len(table['day']), dtype=np.int64) if period is None else period_start(table['day'], period)
+        n_categories = max(len(self.categories), 1)
+        key = starts * n_categories + (table['category'] if by_category else 0)
+        groups, inverse = np.unique(key, return_inverse=True)
+        sums = {}
+        for name in ('orders', 'units', 'revenue_cents', 'cost_cents'):
+            sums[name] = np.zeros(len(groups), dtype=np.int64)
+            np.add.at(sums[name], inverse, table[name])
+
+        labels = list(self.categories)
+        periods = _period_labels(groups // n_categories, period)
+        rows = []
+        for i, (orders, units, revenue, cost) in enumerate(zip(
+                sums['orders'].tolist(), sums['units'].tolist(),
+                sums['revenue_cents'].tolist(), sums['cost_cents'].tolist())):
+            row = {'period': periods[i]}
+            if by_category:
+                row['Product_Category'] = labels[int(groups[i] % n_categories)]
+            row.update(order_metrics(orders, units, revenue, cost))
+            rows.append(row)
+        return rows
+
+    def totals(self, start=None, stop=None, category=None):
+        """One row of KPIs for a time range (all orders by default)."""
+        rows = self.aggregate(None, start, stop, category, by_category=False)
+        return rows[0] if rows else {'period': 'all', **order_metrics(0, 0, 0, 0)}
+
+
+def order_metrics(orders, units, revenue_cents, cost_cents):
+    """Order KPIs in dollars from summed counts and cents."""
+    profit = revenue_cents - cost_cents
+    return {
+        'orders': orders,
+        'units': units,
+        'revenue': revenue_cents / 100,
+        'gross_profit': profit / 100,
+        'margin_pct': round(profit / revenue_cents * 100, 2) if revenue_cents else 0.0,
+        'profit_per_unit': round(profit / units / 100, 2) if units else 0.0,
+    }
+
+
+def _scan_rollup(chunks, lo, hi):
+    """Roll up raw order columns, keeping lo <= ts < hi."""
+    parts = []
+    for columns in chunks:
+        ts = columns['ts']
+        if lo is not None or hi is not None:
+            mask = np.ones(len(ts), dtype=bool)
+            if lo is not None:
+                mask &= ts >= lo
+            if hi is not None:
+                mask &= ts < hi
+            columns = {name: values[mask] for name, values in columns.items()}
+        parts.append(rollup(columns['ts'] // SECONDS_PER_DAY, columns['category'], columns['quantity'],
+                            columns['revenue_cents'], columns['cost_cents']))
+    return _concat(parts)
+
+
+def _filter_days(table, lo, hi):
+    keep = np.ones(len(table['day']), dtype=bool)
+    if lo is not None:
+        keep &= table['day'] >= lo // SECONDS_PER_DAY
+    if hi is not None:
+        keep &= table['day'] < hi // SECONDS_PER_DAY
+    return {name: values[keep] for name, values in table.items()}
+
+
+def _concat(parts):
+    return {name: np.concatenate([p[name] for p in parts] or [np.zeros(0, np.int64)]).astype(np.int64)
+            for name in ROLLUP_FIELDS}
+
+
+def synthetic_orders(n, catalog, start, stop, seed=0):
+    """n orders of catalog products between epoch seconds start and stop, in time order.
+
+    Best sellers are skewed; most orders are for one unit.
+    """
+    rng = np.random.default_rng(seed)
+    product = np.minimum(rng.zipf(1.2, n), len(catalog)) - 1
+    quantity = np.minimum(rng.geometric(0.7, n), 5).astype(np.int32)
+    unit_cost = catalog.supplier_cents + catalog.shipping_cents
+    return {
+        'ts': np.sort(rng.integers(start, stop, n)),
+        'category': catalog.category.take(product),
+        'revenue_cents': catalog.retail_cents[product] * quantity,
+        'cost_cents': unit_cost[product] * quantity,
+        'quantity': quantity,
+        'product': catalog.day[product],
+    }
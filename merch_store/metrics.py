@@ -0,0 +1,319 @@
+"""Process-wide counters, gauges and histograms in the Prometheus text format.
+
+Every :class:`~merch_store.http.ConnectionPool` reports each attempt
+here: latency by integration and method, responses by status code
+(``error`` when no response arrived), retries and requests in flight.
+Integration calls and queued jobs are timed as stages with
+:func:`stage`, which also counts their outcomes and how many are
+running. The hot path is a dict lookup and a few additions, with no
+locks: updates are only made from the event loop's thread.
+
+The scheduler daemon serves :func:`render` at ``GET /metrics``; a
+one-shot run writes it to ``METRICS_TEXTFILE`` when that is set, for the
+node exporter's textfile collector. Job worker processes hand their
+series back to the parent with :func:`snapshot` and :func:`merge`, so
+one file covers every job of the run.
+"""
+import functools
+import inspect
+import os
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METRICS_TEXTFILE = os.environ.get('METRICS_TEXTFILE', '')
+# Seconds; integration calls sit in the first half, whole stages and jobs in the second
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class CounterValue:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class GaugeValue(CounterValue):
+    __slots__ = ()
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class HistogramValue:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        # le is inclusive: bisect_left puts a value equal to a bound in that bound's bucket
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Metric:
+    """A metric family; ``child(*label_values)`` is the series to update."""
+
+    kind = None
+
+    def __init__(self, name, help, label_names=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.children = {}
+
+    def child(self, *values):
+        series = self.children.get(values)
+        if series is None:
+            series = self.children[values] = self._new()
+        return series
+
+    def samples(self):
+        """(suffix, labels, value) for every sample of the family."""
+        for values, series in sorted(self.children.items()):
+            yield '', _labels(self.label_names, values), series.value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        lines += [f'{self.name}{suffix}{labels} {_number(value)}' for suffix, labels, value in self.samples()]
+        return '\n'.join(lines) + '\n'
+
+
+class Counter(Metric):
+    kind = 'counter'
+    _new = CounterValue
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+    _new = GaugeValue
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, label_names=(), buckets=BUCKETS):
+        super().__init__(name, help, label_names)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new(self):
+        return HistogramValue(self.bounds)
+
+    def samples(self):
+        for values, series in sorted(self.children.items()):
+            total = 0
+            for bound, count in zip(self.bounds + (float('inf'),), series.counts):
+                total += count
+                yield '_bucket', _labels(self.label_names, values, f'le="{_number(bound)}"'), total
+            labels = _labels(self.label_names, values)
+            yield '_sum', labels, series.sum
+            yield '_count', labels, total
+
+
+class Registry:
+    """Metric families plus collectors called at render time for values kept elsewhere."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collect):
+        """``collect()`` returns freshly filled Metric objects on every render."""
+        self.collectors.append(collect)
+
+    def remove_collector(self, collect):
+        self.collectors.remove(collect)
+
+    def render(self):
+        families = list(self.metrics.values())
+        for collect in self.collectors:
+            families.extend(collect())
+        return ''.join(metric.render() for metric in families)
+
+
+REGISTRY = Registry()
+
+HTTP_SECONDS = REGISTRY.register(Histogram(
+    'merch_http_request_duration_seconds', 'Outbound HTTP attempts, from sending to the full response.',
+    ('integration', 'method')))
+HTTP_RESPONSES = REGISTRY.register(Counter(
+    'merch_http_responses_total', 'Outbound HTTP attempts by response status; error means no response.',
+    ('integration', 'status')))
+HTTP_RETRIES = REGISTRY.register(Counter(
+    'merch_http_retries_total', 'Outbound HTTP attempts that repeated an earlier one.', ('integration',)))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    'merch_http_requests_in_flight', 'Outbound HTTP requests started and not yet finished, retries included.',
+    ('integration',)))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'merch_stage_duration_seconds', 'Integration calls and jobs, start to finish.', ('stage',)))
+STAGE_OUTCOMES = REGISTRY.register(Counter(
+    'merch_stage_total', 'Finished stages by outcome: ok or the exception raised.', ('stage', 'outcome')))
+STAGE_IN_FLIGHT = REGISTRY.register(Gauge(
+    'merch_stage_in_flight', 'Stages currently running.', ('stage',)))
+
+
+class ClientMetrics:
+    """The HTTP series of one integration, with the per-method and per-status series cached."""
+
+    def __init__(self, integration):
+        self.integration = integration
+        self.in_flight = HTTP_IN_FLIGHT.child(integration)
+        self.retries = HTTP_RETRIES.child(integration)
+        self._seconds = {}
+        self._responses = {}
+
+    def observe(self, method, status, seconds, attempt):
+        series = self._seconds.get(method)
+        if series is None:
+            series = self._seconds[method] = HTTP_SECONDS.child(self.integration, method)
+        series.observe(seconds)
+        counter = self._responses.get(status)
+        if counter is None:
+            counter = self._responses[status] = HTTP_RESPONSES.child(
+                self.integration, 'error' if status is None else str(status))
+        counter.value += 1
+        if attempt:
+            self.retries.value += 1
+
+
+_clients = {}
+
+
+def client_metrics(integration):
+    """Shared ClientMetrics for ``integration``."""
+    metrics = _clients.get(integration)
+    if metrics is None:
+        metrics = _clients[integration] = ClientMetrics(integration)
+    return metrics
+
+
+def stage(name):
+    """Decorator timing a function or coroutine function as stage ``name``."""
+    seconds = STAGE_SECONDS.child(name)
+    in_flight = STAGE_IN_FLIGHT.child(name)
+    ok = STAGE_OUTCOMES.child(name, 'ok')
+
+    def failed(exc):
+        STAGE_OUTCOMES.child(name, type(exc).__name__).value += 1
+
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed(*args, **kwargs):
+                in_flight.value += 1
+                start = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as exc:
+                    failed(exc)
+                    raise
+                finally:
+                    seconds.observe(time.perf_counter() - start)
+                    in_flight.value -= 1
+                ok.value += 1
+                return result
+        else:
+            @functools.wraps(func)
+            def timed(*args, **kwargs):
+                in_flight.value += 1
+                start = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as exc:
+                    failed(exc)
+                    raise
+                finally:
+                    seconds.observe(time.perf_counter() - start)
+                    in_flight.value -= 1
+                ok.value += 1
+                return result
+        return timed
+    return decorate
+
+
+def render(registry=REGISTRY):
+    return registry.render()
+
+
+def snapshot(registry=REGISTRY):
+    """Every registered series as JSON-ready lists: {name: [[label values, value], ...]}."""
+    out = {}
+    for name, metric in registry.metrics.items():
+        out[name] = [[list(values), {'counts': series.counts, 'sum': series.sum}
+                      if isinstance(series, HistogramValue) else series.value]
+                     for values, series in metric.children.items()]
+    return out
+
+
+def merge(values, registry=REGISTRY):
+    """Add a :func:`snapshot` taken in another process to this one's series.
+
+    Gauges are added too: the ones registered here count work in flight,
+    which is zero in a process that has finished.
+    """
+    for name, children in values.items():
+        metric = registry.metrics.get(name)
+        if metric is None:
+            continue
+        for labels, value in children:
+            series = metric.child(*labels)
+            if isinstance(series, HistogramValue):
+                series.counts = [a + b for a, b in zip(series.counts, value['counts'])]
+                series.sum += value['sum']
+            else:
+                series.value += value
+
+
+def reset(registry=REGISTRY):
+    """Zero every series in place.
+
+    The objects are kept rather than replaced, because clients and stages
+    hold on to their series; a forked worker process starts from this.
+    """
+    for metric in registry.metrics.values():
+        for series in metric.children.values():
+            if isinstance(series, HistogramValue):
+                series.counts = [0] * len(series.counts)
+                series.sum = 0.0
+            else:
+                series.value = 0
+
+
+def write_textfile(path=METRICS_TEXTFILE, registry=REGISTRY):
+    """Write the current metrics to ``path`` (replaced atomically), as the textfile collector reads them."""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
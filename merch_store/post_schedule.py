@@ -0,0 +1,242 @@
+"""Calendar packing for social posts under per-platform quotas.
+
+Each platform (or Hootsuite profile group) posts at most ``per_day`` times
+a day, spread evenly across its posting window and never closer together
+than ``min_gap`` minutes. Those posting times form an endless grid of
+slots per platform; :class:`PostCalendar` gives each post the first free
+slot at or after the time it asks for. Free slots are kept in a segment
+tree (:class:`FreeSlots`), so placing, releasing and querying a post stays
+O(log n) as the calendar grows to hundreds of thousands of posts.
+"""
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from merch_store.social import csv_cell
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_time(text):
+    """'18:30' -> minutes after midnight."""
+    hours, minutes = text.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+class PlatformQuota:
+    """Posting limits for one platform: a daily cap, spacing and a window."""
+
+    def __init__(self, platform, per_day, min_gap=60, opens='09:00', closes='21:00'):
+        self.platform = platform
+        self.per_day = per_day
+        self.min_gap = min_gap
+        self.opens = parse_time(opens)
+        self.closes = parse_time(closes)
+        if per_day < 1:
+            raise ValueError(f"{platform}: per_day must be at least 1")
+        self.times = self._spread()
+
+    def _spread(self):
+        span = self.closes - self.opens
+        if self.per_day == 1:
+            times = [self.opens]
+        else:
+            times = [self.opens + round(k * span / (self.per_day - 1)) for k in range(self.per_day)]
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        gaps.append(MINUTES_PER_DAY - times[-1] + times[0])
+        if span < 0 or min(gaps) < self.min_gap:
+            raise ValueError(f"{self.platform}: {self.per_day} posts between {self.opens // 60:02d}:"
+                             f"{self.opens % 60:02d} and {self.closes // 60:02d}:{self.closes % 60:02d} "
+                             f"cannot be {self.min_gap} minutes apart")
+        return times
+
+    def __repr__(self):
+        return f"PlatformQuota({self.platform!r}, per_day={self.per_day}, min_gap={self.min_gap})"
+
+
+DEFAULT_QUOTAS = [
+    PlatformQuota('Instagram', 3, min_gap=180),
+    PlatformQuota('Facebook', 2, min_gap=240),
+    PlatformQuota('TikTok', 3, min_gap=180),
+    PlatformQuota('Pinterest', 5, min_gap=120),
+    PlatformQuota('Twitter', 8, min_gap=60),
+    # Hootsuite posts one message to all three profiles at once
+    PlatformQuota('Instagram,Facebook,Pinterest', 2, min_gap=240, closes='18:00'),
+]
+
+
+class FreeSlots:
+    """Segment tree of free-slot counts over slot indices 0, 1, 2, ...
+
+    The index space doubles whenever a post lands past its end, so the
+    calendar has no fixed horizon.
+    """
+
+    def __init__(self, capacity=1024):
+        size = 1
+        while size < capacity:
+            size *= 2
+        self.size = size
+        self.tree = self._build([1] * size)
+
+    @staticmethod
+    def _build(leaves):
+        size = len(leaves)
+        tree = [0] * size + leaves
+        for node in range(size - 1, 0, -1):
+            tree[node] = tree[2 * node] + tree[2 * node + 1]
+        return tree
+
+    def _grow(self):
+        self.tree = self._build(self.tree[self.size:] + [1] * self.size)
+        self.size *= 2
+
+    def is_free(self, i):
+        return i >= self.size or bool(self.tree[self.size + i])
+
+    def first_free(self, i):
+        """Smallest free index >= ``i``."""
+        while i >= self.size:
+            self._grow()
+        tree = self.tree
+        node = i + self.size
+        if not tree[node]:
+            # Climb until a right sibling has room, then descend to its leftmost free leaf.
+            while True:
+                if not node & 1 and tree[node + 1]:
+                    node += 1
+                    break
+                node >>= 1
+                if node == 1:
+                    first = self.size
+                    self._grow()
+                    return first
+            while node < self.size:
+                node *= 2
+                if not tree[node]:
+                    node += 1
+        return node - self.size
+
+    def _add(self, i, delta):
+        node = i + self.size
+        tree = self.tree
+        while node:
+            tree[node] += delta
+            node >>= 1
+
+    def take(self, i):
+        while i >= self.size:
+            self._grow()
+        if not self.tree[self.size + i]:
+            raise ValueError(f"slot {i} is already taken")
+        self._add(i, -1)
+
+    def release(self, i):
+        if self.is_free(i):
+            raise ValueError(f"slot {i} is not taken")
+        self._add(i, 1)
+
+    def taken(self):
+        return self.size - self.tree[1]
+
+
+class PostCalendar:
+    """Per-platform slot calendars starting on ``start``'s date."""
+
+    def __init__(self, quotas=DEFAULT_QUOTAS, start=None):
+        self.quotas = {quota.platform: quota for quota in quotas}
+        start = start or datetime.now()
+        self.start = datetime(start.year, start.month, start.day)
+        self.slots = {platform: FreeSlots(quota.per_day * 64) for platform, quota in self.quotas.items()}
+
+    def _quota(self, platform):
+        try:
+            return self.quotas[platform]
+        except KeyError:
+            raise KeyError(f"no posting quota for {platform!r}") from None
+
+    def slot_index(self, platform, when):
+        """Index of the first slot of ``platform`` at or after ``when``."""
+        quota = self._quota(platform)
+        if when < self.start:
+            return 0
+        offset = when - self.start
+        minute = offset.seconds // 60 + (offset.seconds % 60 > 0 or offset.microseconds > 0)
+        return offset.days * quota.per_day + bisect_left(quota.times, minute)
+
+    def slot_time(self, platform, index):
+        quota = self._quota(platform)
+        day, k = divmod(index, quota.per_day)
+        return self.start + timedelta(days=day, minutes=quota.times[k])
+
+    def place(self, platform, earliest):
+        """Book the first free slot at or after ``earliest``; returns its datetime."""
+        slots = self.slots[platform]
+        index = slots.first_free(self.slot_index(platform, earliest))
+        slots.take(index)
+        return self.slot_time(platform, index)
+
+    def release(self, platform, when):
+        """Free a booked slot, e.g. when a post is cancelled."""
+        index = self.slot_index(platform, when)
+        if self.slot_time(platform, index) != when:
+            raise ValueError(f"{when} is not a {platform} posting time")
+        self.slots[platform].release(index)
+
+    def booked(self, platform=None):
+        if platform is not None:
+            return self.slots[platform].taken()
+        return sum(slots.taken() for slots in self.slots.values())
+
+
+def schedule_posts(fmt, products, calendar, days=1, start=None):
+    """Place every post of ``fmt`` for each product on ``calendar``.
+
+    A product's campaign starts on ``start``'s date, or else on its catalog
+    ``Day`` (day 1 is the calendar's start), and runs ``days`` days; each active slot asks for
+    its usual time that day and gets the first free one from there.
+    Products are placed in order, so earlier products get earlier slots.
+    Returns row dicts sorted by posting time.
+    """
+    _, time_column, platform_column = fmt.schedule_columns
+    if hasattr(products, 'records'):
+        products = products.records()
+    slots = [(slot, slot.cells[platform_column].text, parse_time(slot.cells[time_column].text),
+              [c for c in fmt.columns if c != time_column and slot.cells[c].uses_schedule])
+             for slot in fmt.slots]
+    dates, times = {}, {}
+    placed = []
+    for product_values in map(fmt.product_values, products):
+        if start is not None:
+            launch = datetime(start.year, start.month, start.day)
+        else:
+            launch = calendar.start + timedelta(days=int(product_values.get('Day', 1)) - 1)
+        # Cells that do not depend on the posting day are rendered once per product.
+        static = [{c: slot.cells[c].render(product_values) for c in fmt.columns if c not in dynamic}
+                  for slot, _, _, dynamic in slots]
+        for day_index in range(days):
+            day = launch + timedelta(days=day_index)
+            for (slot, platform, minute, dynamic), cells in zip(slots, static):
+                if not slot.active(day_index):
+                    continue
+                when = calendar.place(platform, day + timedelta(minutes=minute))
+                row = dict(cells)
+                if when.date() not in dates:
+                    dates[when.date()] = when.strftime('%Y-%m-%d')
+                if (when.hour, when.minute) not in times:
+                    times[when.hour, when.minute] = when.strftime('%H:%M')
+                row[time_column] = times[when.hour, when.minute]
+                if dynamic:
+                    values = {**product_values, 'date': dates[when.date()], 'day_number': day_index + 1}
+                    for c in dynamic:
+                        row[c] = slot.cells[c].render(values)
+                placed.append((when, len(placed), row))
+    placed.sort(key=lambda item: item[:2])
+    return [row for _, _, row in placed]
+
+
+def write_schedule(fmt, rows, path):
+    """Write scheduled rows in ``fmt``'s column layout; returns the row count."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        f.write(','.join(csv_cell(c) for c in fmt.columns) + '\n')
+        f.writelines(','.join(csv_cell(row[c]) for c in fmt.columns) + '\n' for row in rows)
+    return len(rows)
@@ -0,0 +1,136 @@
+"""Batch dynamic pricing.
+
+The weekly price review from the implementation guide, applied to the
+whole catalog at once: a conversion-rate rule table, the competitor
+premium floor (below 1.2x the competitor average, move to 1.3x) and a
+minimum margin over Total_Cost. :func:`optimize_pricing` is the scalar
+reference the batch engine is checked against.
+"""
+import operator
+
+import numpy as np
+
+OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+# (comparison, conversion rate, price multiplier); the first matching rule wins
+CONVERSION_RULES = [
+    ('<', 0.01, 0.95),  # Less than 1% conversion: reduce by 5%
+    ('>', 0.05, 1.10),  # Greater than 5% conversion: increase by 10%
+]
+
+
+class PricingRules:
+    """Rule table plus premium and margin settings.
+
+    ``min_margin`` is the lowest allowed (price - Total_Cost) / price;
+    ``None`` disables the floor, which is what the guide's function did.
+    """
+
+    def __init__(self, conversion=CONVERSION_RULES, premium_trigger=1.2, premium_target=1.3,
+                 min_margin=0.25):
+        for op, _, _ in conversion:
+            if op not in OPERATORS:
+                raise ValueError(f"unknown comparison {op!r} in pricing rule")
+        self.conversion = list(conversion)
+        self.premium_trigger = premium_trigger
+        self.premium_target = premium_target
+        self.min_margin = min_margin
+
+    def margin_floor_cents(self, total_cents):
+        """Lowest price in cents that keeps ``min_margin`` over Total_Cost."""
+        return np.ceil(np.asarray(total_cents) / (1 - self.min_margin)).astype(np.int64)
+
+    def reprice(self, price_cents, views, sales, competitor_prices, competitor_offsets,
+                total_cents=None):
+        """New prices in cents for every product in one pass.
+
+        Competitor prices are given flat, product i owning
+        ``competitor_prices[competitor_offsets[i]:competitor_offsets[i + 1]]``
+        (``len(competitor_offsets) == len(price_cents) + 1``). Products with no
+        views keep their price; products with no competitor prices skip the
+        premium rule. ``total_cents`` is required when ``min_margin`` is set.
+        """
+        price = np.asarray(price_cents, dtype=np.int64) / 100
+        views = np.asarray(views, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.asarray(sales, dtype=np.float64) / views
+        rate[views == 0] = np.nan
+
+        if self.conversion:
+            conditions = [OPERATORS[op](rate, threshold) for op, threshold, _ in self.conversion]
+            multiplier = np.select(conditions, [m for _, _, m in self.conversion], 1.0)
+            new = price * multiplier
+        else:
+            new = price.copy()
+
+        avg = competitor_mean(competitor_prices, competitor_offsets)
+        below = new < avg * self.premium_trigger
+        new[below] = avg[below] * self.premium_target
+
+        cents = np.round(new * 100).astype(np.int64)
+        if self.min_margin is not None:
+            if total_cents is None:
+                raise ValueError('total_cents is required for the margin floor')
+            np.maximum(cents, self.margin_floor_cents(total_cents), out=cents)
+        return cents
+
+
+LEGACY_RULES = PricingRules(min_margin=None)
+DEFAULT_RULES = PricingRules()
+
+
+def competitor_mean(prices, offsets):
+    """Average competitor price per product from flat prices and offsets; NaN when none.
+
+    Prices are summed left to right, one competitor position per pass, so
+    results are bit-identical to a plain loop over each product's prices.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    starts = offsets[:-1]
+    sums = np.zeros(len(counts))
+    for j in range(int(counts.max()) if len(counts) else 0):
+        has = np.flatnonzero(counts > j)
+        sums[has] += prices[starts[has] + j]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def reprice_catalog(catalog, views, sales, competitor_prices, competitor_offsets, rules=DEFAULT_RULES):
+    """Return a copy of the catalog with repriced Retail_Price (and metrics)."""
+    new = catalog.take(slice(None))
+    new.retail_cents = rules.reprice(catalog.retail_cents, views, sales, competitor_prices,
+                                     competitor_offsets, catalog.total_cents)
+    new.compute_metrics()
+    return new
+
+
+def optimize_pricing(current_price, sales_data, competitor_prices, rules=LEGACY_RULES, total_cost=None):
+    """Adjust pricing based on performance and competition (one product, in dollars).
+
+    The guide's function with ``current_price`` passed in; it is the
+    reference :meth:`PricingRules.reprice` is tested against.
+    """
+    new_price = current_price
+    if sales_data['views']:
+        conversion_rate = sales_data['sales'] / sales_data['views']
+        for op, threshold, multiplier in rules.conversion:
+            if OPERATORS[op](conversion_rate, threshold):
+                new_price = current_price * multiplier
+                break
+        else:
+            new_price = current_price * 1.0
+
+    if competitor_prices:
+        total = 0.0
+        for price in competitor_prices:  # not sum(): 3.12+ compensates float sums
+            total += price
+        avg_competitor_price = total / len(competitor_prices)
+        if new_price < avg_competitor_price * rules.premium_trigger:
+            new_price = avg_competitor_price * rules.premium_target
+
+    if rules.min_margin is not None:
+        floor = int(rules.margin_floor_cents(round(total_cost * 100))) / 100
+        new_price = max(new_price, floor)
+    return new_price
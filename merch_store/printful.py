@@ -0,0 +1,311 @@
+"""Bulk Printful sync-product pipeline.
+
+Each catalog row is expanded into its size/colour variant matrix from the
+Printful catalog, the sync product is created with its first variant, and
+the remaining variants are added concurrently. Requests share one pooled
+client with a rate limiter per endpoint. Progress is appended to a
+checkpoint file so an interrupted run resumes where it stopped, and
+failures are collected per variant instead of aborting the run.
+
+Catalog changes reach the products already on Printful through
+:meth:`PrintfulPipeline.sync_catalog`, diffed against the ``printful``
+:class:`~merch_store.catalog_diff.SyncState`.
+"""
+import asyncio
+import json
+import os
+
+from merch_store.http import ConnectionPool, HTTPError, RateLimiter
+from merch_store.metrics import stage
+
+PRINTFUL_API_BASE = os.environ.get('PRINTFUL_API_BASE', 'https://api.printful.com')
+DESIGN_BASE_URL = os.environ.get('DESIGN_BASE_URL', 'https://yourserver.com/designs')
+
+# Printful catalog product and offered sizes/colours per Product_Category.
+# Product ids are examples; point them at the blanks the store actually uses.
+CATEGORY_TEMPLATES = {
+    'Apparel': {
+        'product_id': 71,  # Bella+Canvas 3001 (T-shirt)
+        'sizes': ['XS', 'S', 'M', 'L', 'XL', '2XL', '3XL'],
+        'colors': ['Black', 'White', 'Navy', 'Athletic Heather', 'Forest'],
+        'placement': 'front',
+    },
+    'Accessories': {'product_id': 84, 'sizes': None, 'colors': None, 'placement': 'front'},
+    'Home_Decor': {'product_id': 1, 'sizes': None, 'colors': None, 'placement': 'default'},
+    'Tech_Accessories': {'product_id': 181, 'sizes': None, 'colors': ['Black'], 'placement': 'default'},
+    'Drinkware': {'product_id': 19, 'sizes': ['11 oz', '15 oz'], 'colors': ['White'], 'placement': 'default'},
+    'Stationery': {'product_id': 474, 'sizes': None, 'colors': None, 'placement': 'default'},
+}
+
+# Requests per second per endpoint (Printful allows 120 requests/minute overall)
+ENDPOINT_RATES = {'catalog': 1.0, 'create_product': 0.5, 'create_variant': 0.5, 'update_product': 0.5}
+
+
+def design_file_url(product_data):
+    return f"{DESIGN_BASE_URL}/product-{product_data['Day']}.png"
+
+
+class Checkpoint:
+    """Append-only progress log: which sync products and variants exist.
+
+    Each line is a JSON event; a torn final line from a crash is cut off
+    so the events of the next run start on a line of their own.
+    With ``path=None`` progress is only kept in memory.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.products = {}
+        self.variants = {}
+        if path and os.path.exists(path):
+            good = 0
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('torn line')
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        break
+                    good += len(line)
+            if good < os.path.getsize(path):
+                os.truncate(path, good)
+        self._file = open(path, 'a') if path else None
+
+    def _apply(self, event):
+        day = event['day']
+        if 'sync_product_id' in event:
+            self.products[day] = event['sync_product_id']
+        if 'variant_id' in event:
+            self.variants.setdefault(day, set()).add(event['variant_id'])
+
+    def record(self, **event):
+        self._apply(event)
+        if self._file:
+            self._file.write(json.dumps(event) + '\n')
+            self._file.flush()
+
+    def done(self, day):
+        return self.variants.get(day, set())
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+class SyncReport:
+    """Outcome of a pipeline run."""
+
+    def __init__(self):
+        self.products_created = 0
+        self.variants_created = 0
+        self.variants_skipped = 0
+        self.failures = []  # (day, variant_id or None, error)
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    def fail(self, day, variant_id, error):
+        self.failures.append((day, variant_id, str(error)))
+
+    def __repr__(self):
+        return (f"SyncReport(products_created={self.products_created}, "
+                f"variants_created={self.variants_created}, "
+                f"variants_skipped={self.variants_skipped}, failures={len(self.failures)})")
+
+
+class PrintfulPipeline:
+    """Push catalog rows and all their variants to Printful.
+
+    Usage::
+
+        async with PrintfulPipeline(checkpoint='printful.ckpt') as pipeline:
+            report = await pipeline.sync(rows)
+    """
+
+    def __init__(self, api_key=None, base_url=PRINTFUL_API_BASE, templates=None,
+                 max_connections=8, product_concurrency=16, rates=None,
+                 checkpoint=None, design_url=design_file_url, retry=None, on_response=None):
+        api_key = api_key or os.environ.get('PRINTFUL_API_KEY', '')
+        self.pool = ConnectionPool(base_url, max_connections, headers={
+            'Authorization': f'Bearer {api_key}',
+        }, retry=retry, on_response=on_response, name='printful')
+        self.templates = CATEGORY_TEMPLATES if templates is None else templates
+        self.limiters = {k: RateLimiter(v) for k, v in {**ENDPOINT_RATES, **(rates or {})}.items()}
+        self.checkpoint = checkpoint if isinstance(checkpoint, Checkpoint) else Checkpoint(checkpoint)
+        self.design_url = design_url
+        self._products = asyncio.Semaphore(product_concurrency)
+        self._catalog = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.pool.close()
+        self.checkpoint.close()
+
+    async def _call(self, endpoint, method, path, json=None):
+        await self.limiters[endpoint].acquire()
+        response = await self.pool.request(method, path, json=json)
+        return response.json()['result']
+
+    async def catalog_variants(self, product_id):
+        """Printful catalog variants for a blank, fetched once per run.
+
+        A failed fetch is not kept: the products waiting on it all see the
+        error, and the next one to need the blank fetches it again.
+        """
+        if product_id not in self._catalog:
+            future = self._catalog[product_id] = asyncio.ensure_future(
+                self._call('catalog', 'GET', f'/products/{product_id}'))
+
+            def evict_failed(done):
+                if (done.cancelled() or done.exception() is not None) and self._catalog.get(product_id) is done:
+                    del self._catalog[product_id]
+            future.add_done_callback(evict_failed)
+        return (await self._catalog[product_id])['variants']
+
+    async def expand(self, product_data):
+        """Sync variant payloads for every size/colour the template offers."""
+        template = self.templates.get(product_data['Product_Category'])
+        if template is None:
+            raise KeyError(f"no Printful template for category {product_data['Product_Category']!r}")
+        url = self.design_url(product_data)
+        variants = []
+        for v in await self.catalog_variants(template['product_id']):
+            if template['sizes'] and v.get('size') not in template['sizes']:
+                continue
+            if template['colors'] and v.get('color') not in template['colors']:
+                continue
+            variants.append({
+                "external_id": f"product-{product_data['Day']}-{v['id']}",
+                "retail_price": f"{product_data['Retail_Price']:.2f}",
+                "variant_id": v['id'],
+                "files": [{"url": url, "type": template['placement']}],
+            })
+        return variants
+
+    async def _add_variant(self, day, sync_id, variant, report):
+        try:
+            await self._call('create_variant', 'POST', f'/store/products/{sync_id}/variants', variant)
+        except (HTTPError, OSError, asyncio.TimeoutError) as exc:
+            report.fail(day, variant['variant_id'], exc)
+            return
+        self.checkpoint.record(day=day, variant_id=variant['variant_id'])
+        report.variants_created += 1
+
+    async def _sync_product(self, product_data, report):
+        day = product_data['Day']
+        async with self._products:
+            try:
+                variants = await self.expand(product_data)
+            except (KeyError, HTTPError, OSError, asyncio.TimeoutError) as exc:
+                report.fail(day, None, exc)
+                return
+            done = self.checkpoint.done(day)
+            pending = [v for v in variants if v['variant_id'] not in done]
+            report.variants_skipped += len(variants) - len(pending)
+            if not pending:
+                return
+            sync_id = self.checkpoint.products.get(day)
+            while sync_id is None and pending:
+                first = pending.pop(0)
+                try:
+                    result = await self._call('create_product', 'POST', '/store/products', {
+                        "sync_product": {
+                            "external_id": f"product-{day}",
+                            "name": product_data['Product_Name'],
+                            "thumbnail": self.design_url(product_data),
+                        },
+                        "sync_variants": [first],
+                    })
+                except HTTPError as exc:
+                    report.fail(day, first['variant_id'], exc)
+                    if exc.status >= 500 or exc.status == 429:
+                        for v in pending:
+                            report.fail(day, v['variant_id'], exc)
+                        return
+                    continue  # this variant was rejected; create with the next one
+                except (OSError, asyncio.TimeoutError) as exc:
+                    for v in [first] + pending:
+                        report.fail(day, v['variant_id'], exc)
+                    return
+                sync_id = result['id']
+                self.checkpoint.record(day=day, sync_product_id=sync_id, variant_id=first['variant_id'])
+                report.products_created += 1
+                report.variants_created += 1
+            await asyncio.gather(*(self._add_variant(day, sync_id, v, report) for v in pending))
+
+    @stage('printful.sync')
+    async def sync(self, products):
+        """Sync a catalog slice (iterable of row dicts); returns a SyncReport."""
+        report = SyncReport()
+        await asyncio.gather(*(self._sync_product(p, report) for p in products))
+        return report
+
+    async def _update_product(self, product_data, report):
+        """Rewrite the name, thumbnail and variant prices of an existing sync product."""
+        day = product_data['Day']
+        try:
+            done = self.checkpoint.done(day)
+            variants = [v for v in await self.expand(product_data) if v['variant_id'] in done]
+            await self._call('update_product', 'PUT', f'/store/products/{self.checkpoint.products[day]}', {
+                "sync_product": {"name": product_data['Product_Name'], "thumbnail": self.design_url(product_data)},
+                "sync_variants": variants,
+            })
+        except (KeyError, HTTPError, OSError, asyncio.TimeoutError) as exc:
+            report.fail(day, None, exc)
+            return False
+        return True
+
+    async def _delete_product(self, day, sync_id, report):
+        try:
+            await self._call('update_product', 'DELETE', f'/store/products/{sync_id}')
+        except HTTPError as exc:
+            if exc.status != 404:
+                report.fail(day, None, exc)
+                return False
+        except (OSError, asyncio.TimeoutError) as exc:
+            report.fail(day, None, exc)
+            return False
+        return True
+
+    @stage('printful.sync_catalog')
+    async def sync_catalog(self, catalog, state):
+        """Push catalog changes to the rows that already have a sync product.
+
+        Products reach Printful one at a time through :meth:`sync`, so only
+        rows with a sync product in the checkpoint are diffed against
+        ``state``: new and changed ones are rewritten in place, and sync
+        products whose row left the catalog are deleted. Rows whose request
+        failed stay out of ``state`` and are retried on the next sync.
+        Returns the CatalogDiff and a SyncReport.
+        """
+        import numpy as np
+
+        on_printful = np.isin(catalog.day, np.fromiter(self.checkpoint.products, dtype=np.int64))
+        rows = catalog.take(np.flatnonzero(on_printful))
+        diff = state.diff(rows)
+        report = SyncReport()
+        changed = np.concatenate([diff.creates, diff.updates])
+        updated = await asyncio.gather(*(self._update_product(p, report) for p in rows.take(changed).records()))
+        stale = diff.deletes.tolist()
+        deleted = await asyncio.gather(*(
+            self._delete_product(day, state.remote_id(day) or self.checkpoint.products[day], report) for day in stale))
+        pushed = changed[np.array(updated, dtype=bool)]
+        new = set(diff.keys[diff.creates].tolist()) & set(diff.keys[pushed].tolist())
+        state.commit(diff, rows=pushed, remote_ids={day: str(self.checkpoint.products[day]) for day in new},
+                     deleted=[day for day, ok in zip(stale, deleted) if ok])
+        return diff, report
+
+
+def sync_catalog_to_printful(products, **kwargs):
+    """Blocking wrapper: run the pipeline over a catalog slice."""
+    async def run():
+        async with PrintfulPipeline(**kwargs) as pipeline:
+            return await pipeline.sync(products)
+    return asyncio.run(run())
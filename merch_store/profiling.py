@@ -0,0 +1,279 @@
+"""Stage profiles for the catalog build and the daily run (``--profile``).
+
+A run is split into named stages, which nest. Each stage records wall
+and CPU time, the change in allocated memory blocks, and with
+tracemalloc on the net and peak traced bytes (tracemalloc slows
+allocation-heavy code several times over, so wall times are only
+comparable between runs with the same setting). A run's top-level stages
+plus an ``(unattributed)`` remainder add up to its total. HTTP time per
+integration comes from :mod:`merch_store.metrics`, so it shows how much
+of a stage was spent waiting on an API. An optional sampling thread
+records the main thread's stack every few milliseconds.
+
+Outputs, for a prefix ``P``:
+
+* ``P.json``: the summary, stage by stage;
+* ``P.folded``: stage self times in microseconds, one ``a;b;c value``
+  line per stage, the collapsed-stack format flamegraph.pl, inferno and
+  speedscope read;
+* ``P.samples.folded``: sampled stacks under their stage, with sampling on.
+
+Code marks stages with :func:`stage`, which does nothing unless a
+profile is being recorded.
+
+Nothing heavier than the standard library's basics is imported until a
+profile starts, so marking stages costs the daily run no startup time.
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+ACTIVE = None  # the Profiler recording this run, if any
+SAMPLE_INTERVAL = 0.005
+
+
+class StageStats:
+    __slots__ = ('calls', 'wall', 'cpu', 'blocks', 'net_bytes', 'peak_bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.blocks = 0
+        self.net_bytes = 0
+        self.peak_bytes = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _Frame:
+    __slots__ = ('wall', 'cpu', 'blocks', 'traced', 'peak')
+
+    def __init__(self, traced):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.blocks = sys.getallocatedblocks()
+        self.traced = traced
+        self.peak = traced
+
+
+class Profiler:
+    """Per-stage wall, CPU and allocation totals for one run, keyed by stage path."""
+
+    def __init__(self, trace_memory=True, sample_interval=None):
+        import threading
+        import tracemalloc
+
+        self._tracemalloc = tracemalloc
+        self._threading = threading
+        self.trace_memory = trace_memory
+        self.sample_interval = sample_interval
+        self.stages = {}
+        self.path = ()
+        self.samples = Counter()
+        self.total = StageStats()
+        self._frames = []
+        self.http = {}
+        self._http = {}
+        self._sampler = None
+        self._stop = threading.Event()
+        self._tracing = False
+
+    def _traced(self):
+        if not self.trace_memory:
+            return 0
+        current, peak = self._tracemalloc.get_traced_memory()
+        if self._frames:
+            # Carry the peak so far to the enclosing stage before resetting it for this one.
+            self._frames[-1].peak = max(self._frames[-1].peak, peak)
+        self._tracemalloc.reset_peak()
+        return current
+
+    def _enter(self):
+        frame = _Frame(self._traced())
+        self._frames.append(frame)
+        return frame
+
+    def _exit(self, stats):
+        frame = self._frames.pop()
+        stats.calls += 1
+        stats.wall += time.perf_counter() - frame.wall
+        stats.cpu += time.process_time() - frame.cpu
+        stats.blocks += sys.getallocatedblocks() - frame.blocks
+        if self.trace_memory:
+            current, peak = self._tracemalloc.get_traced_memory()
+            peak = max(frame.peak, peak)
+            stats.net_bytes += current - frame.traced
+            stats.peak_bytes = max(stats.peak_bytes, peak - frame.traced)
+            if self._frames:
+                self._frames[-1].peak = max(self._frames[-1].peak, peak)
+            self._tracemalloc.reset_peak()
+
+    def start(self):
+        if self.trace_memory and not self._tracemalloc.is_tracing():
+            self._tracemalloc.start()
+            self._tracing = True
+        self._http = _http_seconds()
+        self._enter()
+        if self.sample_interval:
+            self._sampler = self._threading.Thread(target=self._sample, args=(self._threading.get_ident(),),
+                                                   name='profile-sampler', daemon=True)
+            self._sampler.start()
+        return self
+
+    def stop(self):
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+        self._exit(self.total)
+        end = _http_seconds()
+        self.http = {name: seconds - self._http.get(name, 0.0) for name, seconds in end.items()
+                     if seconds > self._http.get(name, 0.0)}
+        if self._tracing:
+            self._tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        parent = self.path
+        self.path = parent + (name,)
+        stats = self.stages.get(self.path)
+        if stats is None:
+            stats = self.stages[self.path] = StageStats()
+        self._enter()
+        try:
+            yield stats
+        finally:
+            self._exit(stats)
+            self.path = parent
+
+    def _sample(self, thread_id):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                where = code.co_filename
+                if where.startswith(root):
+                    where = os.path.relpath(where, root)
+                stack.append(f"{code.co_name} ({where}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[';'.join(self.path + tuple(reversed(stack)))] += 1
+
+    def top_level(self):
+        return [(path[0], stats) for path, stats in self.stages.items() if len(path) == 1]
+
+    def unattributed(self):
+        return self.total.wall - sum(stats.wall for _, stats in self.top_level())
+
+    def summary(self):
+        return {
+            'total': self.total.as_dict(),
+            'unattributed_wall': self.unattributed(),
+            'stages': [{'path': list(path), **stats.as_dict()} for path, stats in self.stages.items()],
+            'http_seconds': self.http,
+            'samples': sum(self.samples.values()),
+        }
+
+    def folded(self):
+        """Self time of every stage, in microseconds, as collapsed stacks."""
+        lines = []
+        for path, stats in self.stages.items():
+            children = sum(s.wall for p, s in self.stages.items() if len(p) == len(path) + 1 and p[:-1] == path)
+            lines.append(f"{';'.join(path)} {max(0, round((stats.wall - children) * 1e6))}")
+        lines.append(f"(unattributed) {max(0, round(self.unattributed() * 1e6))}")
+        return '\n'.join(lines) + '\n'
+
+    def table(self):
+        total = self.total.wall or 1e-9
+        rows = [f"{'stage':40s}{'wall ms':>10s}{'%':>6s}{'cpu ms':>10s}{'blocks':>10s}"
+                f"{'net KB':>10s}{'peak KB':>10s}{'calls':>7s}"]
+        for path, stats in self.stages.items():
+            name = '  ' * (len(path) - 1) + path[-1]
+            rows.append(f"{name[:40]:40s}{stats.wall * 1e3:10.1f}{stats.wall / total * 100:6.1f}"
+                        f"{stats.cpu * 1e3:10.1f}{stats.blocks:10,d}{stats.net_bytes / 1024:10,.0f}"
+                        f"{stats.peak_bytes / 1024:10,.0f}{stats.calls:7d}")
+        rows.append(f"{'(unattributed)':40s}{self.unattributed() * 1e3:10.1f}{self.unattributed() / total * 100:6.1f}")
+        t = self.total
+        rows.append(f"{'total':40s}{t.wall * 1e3:10.1f}{100.0:6.1f}{t.cpu * 1e3:10.1f}{t.blocks:10,d}"
+                    f"{t.net_bytes / 1024:10,.0f}{t.peak_bytes / 1024:10,.0f}")
+        if self.http:
+            rows.append('HTTP time (inside the stages above): ' + ', '.join(
+                f"{name} {seconds * 1e3:.1f} ms" for name, seconds in sorted(self.http.items())))
+        return '\n'.join(rows)
+
+    def write(self, prefix):
+        """Write ``prefix``.json, .folded and, when sampling, .samples.folded; returns the paths."""
+        paths = [prefix + '.json', prefix + '.folded']
+        _write(paths[0], json.dumps(self.summary(), indent=1))
+        _write(paths[1], self.folded())
+        if self.samples:
+            paths.append(prefix + '.samples.folded')
+            _write(paths[2], ''.join(f"{stack} {n}\n" for stack, n in sorted(self.samples.items())))
+        return paths
+
+
+def _write(path, text):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _http_seconds():
+    """Seconds spent in HTTP attempts so far, by integration."""
+    metrics = sys.modules.get('merch_store.metrics')
+    if metrics is None:
+        return {}  # nothing has made a request yet
+    totals = {}
+    for (integration, _), series in metrics.HTTP_SECONDS.children.items():
+        totals[integration] = totals.get(integration, 0.0) + series.sum
+    return totals
+
+
+_INACTIVE = contextlib.nullcontext()
+
+
+def stage(name):
+    """Time the enclosed code as stage ``name`` of the active profile, if there is one."""
+    if ACTIVE is None:
+        return _INACTIVE
+    return ACTIVE.stage(name)
+
+
+@contextlib.contextmanager
+def session(prefix, sample_interval=None, trace_memory=True):
+    """Profile the enclosed run and write it to ``prefix``; does nothing when ``prefix`` is None."""
+    global ACTIVE
+    if prefix is None:
+        yield None
+        return
+    profiler = ACTIVE = Profiler(trace_memory, sample_interval).start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        ACTIVE = None
+        paths = profiler.write(prefix)
+        print(profiler.table(), file=sys.stderr)
+        print(f"profile written to {', '.join(paths)}", file=sys.stderr)
+
+
+def session_for(args):
+    """:func:`session` configured from the options :func:`add_arguments` adds."""
+    return session(args.profile, args.profile_sample / 1e3 if args.profile_sample else None,
+                   not args.profile_no_tracemalloc)
+
+
+def add_arguments(parser, default):
+    """The ``--profile`` options, shared by the entry points."""
+    parser.add_argument('--profile', nargs='?', const=default, metavar='PREFIX',
+                        help=f'record a stage profile to PREFIX.json and PREFIX.folded (default: {default})')
+    parser.add_argument('--profile-sample', type=float, nargs='?', const=SAMPLE_INTERVAL * 1e3, metavar='MS',
+                        help='also sample the stack every MS milliseconds into PREFIX.samples.folded')
+    parser.add_argument('--profile-no-tracemalloc', action='store_true',
+                        help='skip tracemalloc, which slows allocation-heavy stages, and report block counts only')
@@ -0,0 +1,245 @@
+"""Guide documents rendered from section templates and streamed to disk.
+
+The strategy, brand, technical and executive guides live in
+``merch_store/guides/`` as text with ``{{field}}`` / ``{{field:spec}}``
+bindings (catalog metrics, brand, costs, timelines); every other brace is
+literal, so the code samples need no escaping. A guide is split into
+sections at its ``## `` headings. A rendered section is cached under its
+content hash, the template plus the values it reads, so a section that
+does not depend on what differs between variants is rendered once for all
+of them. Documents are written section by section to a temporary file
+and renamed into place, and a manifest of document hashes lets a rerun
+skip documents whose content would not change.
+
+    python -m merch_store.reports --out reports --brand YouAndINotAI
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+from collections import OrderedDict
+
+from merch_store.social import PostTemplate
+
+GUIDES_DIR = os.path.join(os.path.dirname(__file__), 'guides')
+# guide -> file the scripts write it to
+GUIDES = {
+    'automation_strategy': 'anti_ai_automation_strategy.txt',
+    'brand_identity': 'youandinotai_brand_identity_guide.txt',
+    'technical_guide': 'technical_implementation_guide.txt',
+    'executive_summary': 'executive_summary_quick_start.txt',
+}
+SECTION_CACHE_SIZE = 100_000
+MANIFEST = '.reports.json'
+
+BRAND = {
+    'brand': 'YouAndINotAI',
+    'domain': 'youandinotai.com',
+    'store_domain': 'youandinotai.square.site',
+    'target_market': 'Tech-aware professionals, 25-45, high-income',
+    'monthly_costs': '$50-150',
+    'setup_hours': '37-55',
+    'setup_weeks': 4,
+}
+
+BINDING = re.compile(r'\{\{\s*(\w+)(?::([^}]*))?\s*\}\}')
+
+
+class ReportTemplate(PostTemplate):
+    """A :class:`PostTemplate` with ``{{field}}`` bindings and literal single braces."""
+
+    def __init__(self, text):
+        self.text = text
+        self.parts = []
+        self.fields = set()
+        pos = 0
+        for match in BINDING.finditer(text):
+            self.parts.append((text[pos:match.start()], match.group(1), match.group(2) or ''))
+            self.fields.add(match.group(1))
+            pos = match.end()
+        self.parts.append((text[pos:], None, None))
+
+
+class Section:
+    """One block of a guide; ``digest`` identifies its template text.
+
+    A section without bindings is encoded once, as ``static``.
+    """
+
+    def __init__(self, name, text):
+        self.name = name
+        self.template = ReportTemplate(text)
+        self.fields = tuple(sorted(self.template.fields))
+        self.digest = hashlib.sha1(text.encode('utf-8')).digest()
+        self.static = None if self.fields else text.encode('utf-8')
+
+    def key(self, values):
+        """Content key: the template and the values it reads."""
+        return self.digest, tuple(values[field] for field in self.fields)
+
+
+class Guide:
+    """A document as an ordered list of sections."""
+
+    def __init__(self, name, sections):
+        self.name = name
+        self.sections = list(sections)
+        self.fields = tuple(sorted(set().union(*(s.template.fields for s in self.sections))))
+        self.digest = hashlib.sha1(b''.join(s.digest for s in self.sections)).digest()
+
+    def key(self, values):
+        """Content hash of the rendered document: the template and the values it reads."""
+        bound = repr(tuple(values[field] for field in self.fields)).encode('utf-8')
+        return hashlib.sha1(self.digest + bound).hexdigest()
+
+    @classmethod
+    def from_text(cls, name, text):
+        """Split at every line starting with ``## ``; the text before the first is the title section."""
+        starts = [0] + [m.start() + 1 for m in re.finditer(r'\n## ', text)]
+        bounds = zip(starts, starts[1:] + [len(text)])
+        return cls(name, [Section(text[a:b].split('\n', 1)[0].lstrip('# ') or name, text[a:b]) for a, b in bounds])
+
+    @classmethod
+    def load(cls, name, guides_dir=GUIDES_DIR):
+        with open(os.path.join(guides_dir, name + '.txt'), encoding='utf-8') as f:
+            return cls.from_text(name, f.read())
+
+
+class SectionCache:
+    """LRU of rendered, UTF-8 encoded sections keyed by content hash."""
+
+    def __init__(self, maxsize=SECTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, section, values):
+        if section.static is not None:
+            return section.static
+        key = section.key(values)
+        data = self.entries.get(key)
+        if data is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return data
+        self.misses += 1
+        data = self.entries[key] = section.template.render(values).encode('utf-8')
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return data
+
+
+class ReportPipeline:
+    """Render guides into files, reusing cached sections and skipping unchanged documents.
+
+    ``manifest`` (a JSON file, saved by :meth:`close`) records the content
+    hash of every document written; without it every document is written.
+    """
+
+    def __init__(self, cache=None, manifest=None):
+        self.cache = cache or SectionCache()
+        self.manifest_path = manifest
+        self.manifest = {}
+        self.written = 0
+        self.skipped = 0
+        self.bytes_written = 0
+        if manifest and os.path.exists(manifest):
+            with open(manifest, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def chunks(self, guide, values):
+        """The rendered sections of ``guide``, as bytes."""
+        for section in guide.sections:
+            yield self.cache.render(section, values)
+
+    def write(self, guide, values, path):
+        """Write one document; returns False when the manifest shows it unchanged."""
+        missing = [field for field in guide.fields if field not in values]
+        if missing:
+            raise KeyError(f"{guide.name}: no value for {missing}")
+        digest = guide.key(values)
+        if self.manifest.get(path) == digest and os.path.exists(path):
+            self.skipped += 1
+            return False
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            for data in self.chunks(guide, values):
+                f.write(data)
+                self.bytes_written += len(data)
+        os.replace(tmp, path)
+        self.manifest[path] = digest
+        self.written += 1
+        return True
+
+    def close(self):
+        if self.manifest_path:
+            tmp = self.manifest_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, separators=(',', ':'))
+            os.replace(tmp, self.manifest_path)
+
+
+def guide_values(kpis=None, **overrides):
+    """Bindings for the guides: brand defaults, catalog KPIs and overrides."""
+    if kpis is None:
+        from merch_store.kpi import catalog_kpis
+
+        kpis = catalog_kpis()
+    values = {**BRAND, **kpis, **overrides}
+    values.setdefault('brand_caps', values['brand'].upper())
+    return values
+
+
+def write_guide(name, path=None, values=None):
+    """Render one guide to ``path`` (its usual file name by default)."""
+    values = guide_values() if values is None else values
+    with ReportPipeline() as pipeline:
+        pipeline.write(Guide.load(name), values, path or GUIDES[name])
+    return path or GUIDES[name]
+
+
+def variants(base, **dimensions):
+    """Every combination of ``dimensions`` (field -> list of values) applied over ``base``."""
+    names = list(dimensions)
+    for combo in itertools.product(*(dimensions[name] for name in names)):
+        values = {**base, **dict(zip(names, combo))}
+        if 'brand' in names and 'brand_caps' not in names:
+            values['brand_caps'] = values['brand'].upper()
+        yield values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the guides for one or more brands and markets.')
+    parser.add_argument('--out', default='.')
+    parser.add_argument('--brand', action='append', help='brand name (repeatable)')
+    parser.add_argument('--market', action='append', help='target market description (repeatable)')
+    parser.add_argument('--guide', action='append', choices=sorted(GUIDES))
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    guides = [Guide.load(name) for name in (args.guide or GUIDES)]
+    dimensions = {}
+    if args.brand:
+        dimensions['brand'] = args.brand
+    if args.market:
+        dimensions['target_market'] = args.market
+    with ReportPipeline(manifest=os.path.join(args.out, MANIFEST)) as pipeline:
+        for i, values in enumerate(variants(guide_values(), **dimensions)):
+            for guide in guides:
+                name = GUIDES[guide.name] if not dimensions else f"{i:05d}_{GUIDES[guide.name]}"
+                pipeline.write(guide, values, os.path.join(args.out, name))
+    print(f"📄 {pipeline.written} written, {pipeline.skipped} unchanged; "
+          f"sections rendered {pipeline.cache.misses}, reused {pipeline.cache.hits}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,569 @@
+"""Long-running scheduler: the daily upload and catalog sync without a cron spawn per run.
+
+A cron-launched run pays for a fresh interpreter, its imports, opening
+the catalog, loading sync state and new TLS connections before any work
+starts. The daemon keeps all of that warm in one asyncio process: the
+memory-mapped catalog (reopened only when the file is replaced), the
+Square sync state, the job queue and pooled Square, Printful and Klaviyo
+clients. Jobs run on cron expressions, each firing delayed by a random
+jitter so several stores do not hit an API in the same second. A job
+still running when it fires again is skipped rather than run twice.
+
+On the local port, ``GET /health`` reports liveness, ``GET /metrics`` the
+process's metrics in the Prometheus text format (integration calls and
+the jobs below), ``GET /jobs`` per-job counts and timings as JSON, and
+``POST /jobs/<name>`` runs a job now.
+
+    python -m merch_store daemon --health-port 8081
+    python -m merch_store daemon --once catalog-sync     # one run, as cron would
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import sys
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from merch_store.daily import CATALOG_CSV, INTEGRATION_LIMITS, JOBS_DB, PRINTFUL_CHECKPOINT, Rotation
+from merch_store import metrics
+from merch_store.http import HTTPServer
+
+CATALOG_BIN = os.path.splitext(CATALOG_CSV)[0] + '.bin'
+DAILY_CRON = os.environ.get('DAILY_CRON', '0 9 * * *')
+HEALTH_PORT = int(os.environ.get('DAEMON_HEALTH_PORT', '8081'))
+
+# field, lowest, highest; weekday 7 is Sunday as well as 0
+CRON_FIELDS = [('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7)]
+CRON_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+}
+CRON_HORIZON = timedelta(days=5 * 366)  # next_after gives up on schedules that never fire
+
+
+class CronExpression:
+    """A five-field cron expression: minute, hour, day of month, month, day of week.
+
+    Fields take ``*``, numbers, ``a-b`` ranges and ``/step``, separated by
+    commas, plus the ``@hourly`` style aliases. As in cron, when both day
+    fields are restricted a time matches if either does.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        fields = CRON_ALIASES.get(text.strip(), text).split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(f"{text!r}: expected {len(CRON_FIELDS)} fields, got {len(fields)}")
+        sets = {}
+        for field, (name, lo, hi) in zip(fields, CRON_FIELDS):
+            sets[name] = self._parse(field, name, lo, hi)
+        self.minutes = sets['minute']
+        self.hours = sets['hour']
+        self.days = sets['day']
+        self.months = sets['month']
+        self.weekdays = {d % 7 for d in sets['weekday']}
+        # as in Vixie cron, a field starting with * (even */2) leaves that day field unrestricted
+        self.any_day = fields[2].startswith('*')
+        self.any_weekday = fields[4].startswith('*')
+
+    def __repr__(self):
+        return f"CronExpression({self.text!r})"
+
+    @staticmethod
+    def _parse(field, name, lo, hi):
+        values = set()
+        for part in field.split(','):
+            span, _, step = part.partition('/')
+            try:
+                step = int(step) if step else 1
+                if span == '*':
+                    start, stop = lo, hi
+                elif '-' in span:
+                    start, stop = map(int, span.split('-', 1))
+                else:
+                    start = int(span)
+                    stop = hi if step > 1 else start
+            except ValueError:
+                raise ValueError(f"bad {name} field {field!r}") from None
+            if not lo <= start <= stop <= hi or step < 1:
+                raise ValueError(f"{name} field {field!r} outside {lo}-{hi}")
+            values.update(range(start, stop + 1, step))
+        return frozenset(values)
+
+    def _day_matches(self, dt):
+        in_month = dt.day in self.days
+        in_week = (dt.weekday() + 1) % 7 in self.weekdays  # cron counts from Sunday
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def matches(self, dt):
+        return (dt.minute in self.minutes and dt.hour in self.hours and dt.month in self.months
+                and self._day_matches(dt))
+
+    def next_after(self, dt):
+        """First matching minute strictly after ``dt``.
+
+        Non-matching months, days and hours are skipped whole, so this
+        takes a handful of steps rather than one per minute.
+        """
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + CRON_HORIZON
+        while t <= limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                later = [m for m in self.minutes if m > t.minute]
+                t = t.replace(minute=min(later)) if later else t.replace(minute=0) + timedelta(hours=1)
+            else:
+                return t
+        raise ValueError(f"{self.text!r} never fires")
+
+
+class Job:
+    """A scheduled coroutine ``func(context)`` and its run statistics.
+
+    CPU time is the process's, measured across the run, so jobs that
+    overlap each other share it.
+    """
+
+    def __init__(self, name, cron, func, jitter=0.0, timeout=None):
+        self.name = name
+        self.cron = cron if isinstance(cron, CronExpression) else CronExpression(cron)
+        self.func = func
+        self.jitter = jitter
+        self.timeout = timeout
+        self.task = None
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_error = None
+        self.last_ok = None
+        self.next_run = None
+        self.last_seconds = 0.0
+        self.total_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    @property
+    def running(self):
+        return self.task is not None and not self.task.done()
+
+    def delay(self, now, last=None):
+        """(cron time, seconds to wait) for the next firing after ``now`` and after ``last``."""
+        fire = self.cron.next_after(max(now, last) if last else now)
+        return fire, (fire - now).total_seconds() + random.uniform(0, self.jitter)
+
+    def stats(self):
+        return {
+            'schedule': self.cron.text,
+            'running': self.running,
+            'runs': self.runs,
+            'failures': self.failures,
+            'skipped': self.skipped,
+            'last_ok': self.last_ok,
+            'last_seconds': self.last_seconds,
+            'total_seconds': self.total_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'next_run': self.next_run,
+            'last_error': self.last_error,
+        }
+
+
+class Scheduler:
+    """Run jobs on their schedules in one event loop and serve their health on ``port``."""
+
+    def __init__(self, context=None, host='127.0.0.1', port=HEALTH_PORT, clock=datetime.now):
+        self.context = context
+        self.clock = clock
+        self.jobs = {}
+        self.server = HTTPServer(self.handle, host, port)
+        self.started = None
+        self._serving = False
+        self._loops = []
+
+    @property
+    def url(self):
+        return self.server.url
+
+    def add(self, name, cron, func, jitter=0.0, timeout=None):
+        self.jobs[name] = Job(name, cron, func, jitter, timeout)
+        return self.jobs[name]
+
+    async def start(self, serve=True):
+        self.started = time.time()
+        self._loops = [asyncio.ensure_future(self._loop(job)) for job in self.jobs.values()]
+        metrics.REGISTRY.add_collector(self.collect)
+        if serve:
+            await self.server.start()
+            self._serving = True
+        return self
+
+    async def stop(self):
+        """Stop scheduling, let running jobs finish, then close the context."""
+        for task in self._loops:
+            task.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        metrics.REGISTRY.remove_collector(self.collect)
+        await asyncio.gather(*(job.task for job in self.jobs.values() if job.running), return_exceptions=True)
+        if self._serving:
+            await self.server.stop()
+            self._serving = False
+        if self.context is not None:
+            await self.context.close()
+
+    async def serve_forever(self):
+        """Run until SIGTERM or SIGINT."""
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stopping.set)
+        await self.start()
+        print(f"⏰ Scheduler on {self.url}: " + ', '.join(
+            f"{name} ({job.cron.text})" for name, job in self.jobs.items()))
+        try:
+            await stopping.wait()
+        finally:
+            await self.stop()
+
+    async def _loop(self, job):
+        last = None
+        while True:
+            now = self.clock()
+            last, seconds = job.delay(now, last)
+            job.next_run = time.time() + seconds
+            await asyncio.sleep(seconds)
+            if self.trigger(job) is None:
+                print(f"⏭️  {job.name}: still running, skipped this run", file=sys.stderr)
+
+    def trigger(self, job):
+        """Start ``job`` unless it is already running; returns its task, or None when skipped."""
+        if job.running:
+            job.skipped += 1
+            return None
+        job.task = asyncio.ensure_future(self._run(job))
+        return job.task
+
+    async def run(self, name):
+        """Run a job now and wait for it; False when it was already running."""
+        task = self.trigger(self.jobs[name])
+        if task is None:
+            return False
+        await task
+        return True
+
+    async def _run(self, job):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            await asyncio.wait_for(job.func(self.context), job.timeout)
+        except Exception:
+            job.failures += 1
+            job.last_ok = False
+            job.last_error = traceback.format_exc(limit=5)
+            print(f"⚠️  {job.name} failed: {job.last_error.splitlines()[-1]}", file=sys.stderr)
+        else:
+            job.last_ok = True
+        finally:
+            job.runs += 1
+            job.last_seconds = time.perf_counter() - wall
+            job.total_seconds += job.last_seconds
+            job.cpu_seconds += time.process_time() - cpu
+
+    def collect(self):
+        """Job statistics as metric families, for the registry to render."""
+        families = [
+            (metrics.Counter, 'merch_job_runs_total', 'Finished job runs.', 'runs'),
+            (metrics.Counter, 'merch_job_failures_total', 'Job runs that raised or timed out.', 'failures'),
+            (metrics.Counter, 'merch_job_skipped_total', 'Firings skipped because the job was running.', 'skipped'),
+            (metrics.Counter, 'merch_job_seconds_total', 'Wall time spent in job runs.', 'total_seconds'),
+            (metrics.Counter, 'merch_job_cpu_seconds_total', 'Process CPU time during job runs.', 'cpu_seconds'),
+            (metrics.Gauge, 'merch_job_running', '1 while the job is running.', 'running'),
+            (metrics.Gauge, 'merch_job_next_run_timestamp_seconds', 'When the job fires next.', 'next_run'),
+        ]
+        out = []
+        for kind, name, help, field in families:
+            family = kind(name, help, ('job',))
+            for job_name, job in self.jobs.items():
+                value = getattr(job, field)
+                if value is not None:
+                    family.child(job_name).value = int(value) if isinstance(value, bool) else value
+            out.append(family)
+        uptime = metrics.Gauge('merch_scheduler_uptime_seconds', 'Seconds since the scheduler started.')
+        uptime.child().value = time.time() - self.started
+        return out + [uptime]
+
+    async def handle(self, method, path, query, headers, body):
+        if method == 'GET' and path == '/health':
+            failing = sorted(name for name, job in self.jobs.items() if job.last_ok is False)
+            return 200, {'status': 'degraded' if failing else 'ok', 'failing': failing,
+                         'uptime': time.time() - self.started,
+                         'running': sorted(name for name, job in self.jobs.items() if job.running)}
+        if method == 'GET' and path == '/metrics':
+            return 200, metrics.render(), {'Content-Type': metrics.CONTENT_TYPE}
+        if method == 'GET' and path == '/jobs':
+            return 200, {'uptime': time.time() - self.started, 'cpu_seconds': time.process_time(),
+                         'jobs': {name: job.stats() for name, job in self.jobs.items()}}
+        if method == 'POST' and path.startswith('/jobs/'):
+            job = self.jobs.get(path[len('/jobs/'):])
+            if job is None:
+                return 404, {'error': 'no such job'}
+            task = self.trigger(job)
+            if task is None:
+                return 409, {'error': 'already running', **job.stats()}
+            if query == 'wait=0':
+                return 202, {'status': 'started'}
+            await task
+            return 200, job.stats()
+        return 404, {'error': 'not found'}
+
+
+class StoreContext:
+    """Warm state the jobs share: the open catalog, sync state, job queue and API clients.
+
+    ``square``, ``printful`` and ``klaviyo`` are extra keyword arguments
+    for the clients, which are created on first use.
+    """
+
+    def __init__(self, catalog_path=CATALOG_BIN, state_dir='.', jobs_db=JOBS_DB, out_dir='.', rotation=None,
+                 square=None, printful=None, klaviyo=None):
+        self.catalog_path = catalog_path
+        self.state_dir = state_dir
+        self.jobs_db = jobs_db
+        self.out_dir = out_dir
+        self.rotation = rotation or Rotation()
+        self.options = {'square': square or {}, 'printful': {'checkpoint': PRINTFUL_CHECKPOINT, **(printful or {})},
+                        'klaviyo': klaviyo or {}}
+        self.worker = f'{os.getpid()}-daemon'
+        self.reopened = 0
+        self._catalog = None
+        self._stamp = None
+        self._states = {}
+        self._queue = None
+        self._clients = {}
+
+    def catalog(self):
+        """The binary catalog, reopened only when the file has been replaced or changed."""
+        st = os.stat(self.catalog_path)
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stamp != self._stamp:
+            from merch_store.catalog_bin import CatalogFile
+
+            if self._catalog is not None:
+                self._catalog.close()
+            self._catalog = CatalogFile(self.catalog_path)
+            self._stamp = stamp
+            self.reopened += 1
+        return self._catalog
+
+    def sync_state(self, system='square'):
+        if system not in self._states:
+            from merch_store.catalog_diff import SyncState
+
+            self._states[system] = SyncState.for_system(system, self.state_dir)
+        return self._states[system]
+
+    def queue(self):
+        if self._queue is None:
+            from merch_store.jobs import JobQueue
+
+            self._queue = JobQueue(self.jobs_db)
+        return self._queue
+
+    def _client(self, name, factory):
+        if name not in self._clients:
+            self._clients[name] = factory(**self.options[name])
+        return self._clients[name]
+
+    @property
+    def square(self):
+        from merch_store.square import SquareCatalogClient
+
+        return self._client('square', SquareCatalogClient)
+
+    @property
+    def printful(self):
+        from merch_store.printful import PrintfulPipeline
+
+        return self._client('printful', PrintfulPipeline)
+
+    @property
+    def klaviyo(self):
+        from merch_store.klaviyo import KlaviyoClient
+
+        return self._client('klaviyo', KlaviyoClient)
+
+    async def close(self):
+        for client in self._clients.values():
+            await client.close()
+        self._clients = {}
+        if self._queue is not None:
+            self._queue.close()
+            self._queue = None
+        if self._catalog is not None:
+            self._catalog.close()
+            self._catalog = self._stamp = None
+
+
+async def _square_product(context, product):
+    result = await context.square.create_product(product)
+    print(f"✅ Product created in Square: {result}")
+
+
+async def _printful_product(context, product):
+    report = await context.printful.sync([product])
+    if not report.ok:
+        raise RuntimeError(f"Printful sync incomplete: {report.failures}")
+    print(f"👕 Printful sync: {report}")
+
+
+async def _social_posts(context, product):
+    from merch_store.social import schedule_social_media_posts
+
+    posts = schedule_social_media_posts(product, out_dir=context.out_dir)
+    print(f"📱 {len(posts)} social media posts scheduled")
+
+
+async def _klaviyo_announce(context, product):
+    from merch_store.klaviyo import new_product_campaign
+
+    await context.klaviyo.create_campaign(new_product_campaign(product))
+    print("📧 New product email sent")
+
+
+# The daily jobs' kinds, run on the warm clients instead of merch_store.daily's blocking handlers;
+# timed as the same job.<kind> stages as merch_store.jobs.work
+HANDLERS = {kind: metrics.stage(f'job.{kind}')(handler) for kind, handler in [
+    ('square.create_product', _square_product),
+    ('printful.sync_product', _printful_product),
+    ('social.schedule_posts', _social_posts),
+    ('klaviyo.announce', _klaviyo_announce),
+]}
+
+
+async def _renew_lease(queue, job_id, worker):
+    while True:
+        await asyncio.sleep(queue.lease / 3)
+        queue.extend(job_id, worker)
+
+
+async def _handle(context, queue, job_id, kind, payload):
+    heartbeat = asyncio.ensure_future(_renew_lease(queue, job_id, context.worker))
+    try:
+        handler = HANDLERS.get(kind)
+        if handler is None:
+            raise LookupError(f"no handler for job kind {kind!r}")
+        await handler(context, payload)
+    except Exception:
+        queue.fail(job_id, context.worker, traceback.format_exc(limit=5))
+    else:
+        queue.complete(job_id, context.worker)
+    finally:
+        heartbeat.cancel()
+
+
+async def drain_queue(context):
+    """Run every due queued job, within the per-integration limits; returns how many ran.
+
+    Each job's lease is renewed while its handler runs. Retries whose
+    backoff has not run out are left for a later run.
+    """
+    queue = context.queue()
+    running = set()
+    ran = 0
+    while True:
+        job = queue.claim(context.worker, INTEGRATION_LIMITS)
+        if job is not None:
+            running.add(asyncio.ensure_future(_handle(context, queue, *job)))
+            continue
+        if not running:
+            return ran
+        finished, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        ran += len(finished)
+
+
+async def daily_upload(context):
+    """Queue today's product jobs and run them."""
+    from merch_store.daily import enqueue_daily_jobs, featured_row
+
+    now = datetime.now()
+    product = featured_row(context.catalog(), now, context.rotation)
+    print(f"📦 Product for today: {product['Product_Name']}")
+    enqueue_daily_jobs(context.queue(), product, now)
+    await drain_queue(context)
+    print(f"✨ Daily automation complete! {context.queue().stats()}")
+
+
+async def catalog_sync(context):
+    """Push catalog rows that changed since the last sync to Square, and to the products on Printful."""
+    catalog = context.catalog()
+    rows = catalog.slice(0, len(catalog))
+    state = context.sync_state('square')
+    diff = await context.square.sync_catalog(rows, state)
+    if len(diff):
+        state.save()
+        print(f"🔄 Square catalog sync: {diff}")
+    state = context.sync_state('printful')
+    diff, report = await context.printful.sync_catalog(rows, state)
+    if len(diff):
+        state.save()
+        print(f"🔄 Printful catalog sync: {diff}")
+    if not report.ok:
+        raise RuntimeError(f"Printful catalog sync failed for {len(report.failures)} products: {report.failures[:3]}")
+
+
+# name, cron, jitter seconds, timeout seconds, job
+JOBS = [
+    ('daily-upload', DAILY_CRON, 300.0, 3600.0, daily_upload),
+    ('catalog-sync', '@hourly', 120.0, 1800.0, catalog_sync),
+    ('retry-queue', '* * * * *', 5.0, 600.0, drain_queue),
+]
+
+
+def default_scheduler(context, host='127.0.0.1', port=HEALTH_PORT):
+    scheduler = Scheduler(context, host, port)
+    for name, cron, jitter, timeout, func in JOBS:
+        scheduler.add(name, cron, func, jitter, timeout)
+    return scheduler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the store jobs on their schedules in one process.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--health-port', type=int, default=HEALTH_PORT)
+    parser.add_argument('--once', choices=[name for name, *_ in JOBS],
+                        help='run one job now and exit, as a cron entry would')
+    parser.add_argument('--catalog', default=CATALOG_BIN)
+    parser.add_argument('--jobs-db', default=JOBS_DB)
+    parser.add_argument('--state-dir', default='.')
+    args = parser.parse_args(argv)
+
+    context = StoreContext(args.catalog, args.state_dir, args.jobs_db)
+    scheduler = default_scheduler(context, args.host, args.health_port)
+
+    async def once():
+        try:
+            await scheduler.run(args.once)
+        finally:
+            await context.close()
+            if metrics.METRICS_TEXTFILE:
+                metrics.write_textfile()
+        return 0 if scheduler.jobs[args.once].last_ok else 1
+
+    if args.once:
+        return asyncio.run(once())
+    asyncio.run(scheduler.serve_forever())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
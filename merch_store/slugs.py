@@ -0,0 +1,75 @@
+"""Canonical, unique product slugs for store URLs.
+
+The old inline ``name.lower().replace(' ', '-')`` kept ``:``, ``"``,
+``(``, ``/`` and ``+`` in URLs. :func:`slugify` reduces a name to
+lowercase ASCII words joined by hyphens; :class:`SlugAssigner` makes slugs
+unique across a catalog by numbering repeats (``-2``, ``-3``, ...) in row
+order, so the same catalog always gets the same slugs.
+"""
+import functools
+import re
+import unicodedata
+
+SLUG_CACHE_SIZE = 65536
+
+_REPLACEMENTS = {'&': ' and ', '+': ' plus ', '@': ' at '}
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def slugify(name):
+    """'Canvas Wall Art: "Human Made" Statement' -> 'canvas-wall-art-human-made-statement'."""
+    for char, word in _REPLACEMENTS.items():
+        name = name.replace(char, word)
+    if not name.isascii():
+        name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return _NON_ALNUM.sub('-', name.lower()).strip('-') or 'product'
+
+
+@functools.lru_cache(maxsize=SLUG_CACHE_SIZE)
+def slug_for_name(name):
+    """Memoized :func:`slugify` for callers that only have a product name."""
+    return slugify(name)
+
+
+class SlugAssigner:
+    """Hand out unique slugs across one or more batches of names."""
+
+    def __init__(self):
+        self.used = set()
+        self._next = {}
+
+    def assign(self, names):
+        slugs = []
+        for name in names:
+            base = slugify(name)
+            slug = base
+            if slug in self.used:
+                n = self._next.get(base, 2)
+                while f"{base}-{n}" in self.used:
+                    n += 1
+                slug = f"{base}-{n}"
+                self._next[base] = n + 1
+            self.used.add(slug)
+            slugs.append(slug)
+        return slugs
+
+
+def assign_slugs(names):
+    """Unique slugs for a whole catalog's names, in row order."""
+    return SlugAssigner().assign(names)
+
+
+class SlugIndex:
+    """Reverse slug -> row lookup for an in-memory catalog."""
+
+    def __init__(self, slugs):
+        self.rows = {slug: i for i, slug in enumerate(slugs)}
+        if len(self.rows) != len(slugs):
+            raise ValueError('slugs are not unique')
+
+    def __len__(self):
+        return len(self.rows)
+
+    def row(self, slug):
+        """Row index for a slug, or None."""
+        return self.rows.get(slug)
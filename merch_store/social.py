@@ -0,0 +1,269 @@
+"""Social media post generation for new products.
+
+Captions are compiled once into :class:`PostTemplate` objects and laid out
+by a :class:`PostFormat` (output columns plus the posting slots of each
+day). A format renders any product x day x slot matrix in one streaming
+pass into a single CSV, so memory stays bounded however many posts are
+generated. The daily per-product file and the Hootsuite bulk upload are
+both formats.
+"""
+import os
+import string
+from datetime import datetime, timedelta
+from itertools import islice
+
+from merch_store.slugs import slug_for_name
+
+PRODUCT_BASE_URL = 'https://youandinotai.square.site/product'
+SOCIAL_CSV_COLUMNS = ['date', 'time', 'platform', 'content', 'product_url']
+HOOTSUITE_CSV_COLUMNS = ['Date', 'Time', 'Profile', 'Message', 'Link']
+
+# Fields a template can use besides the catalog columns (Product_Name, ...)
+SCHEDULE_FIELDS = {'date', 'day_number'}
+
+
+def product_url(product_data):
+    """Store URL from the row's catalog slug, or the canonical slug of its name."""
+    slug = product_data.get('Slug') or slug_for_name(product_data['Product_Name'])
+    return f"{PRODUCT_BASE_URL}/{slug}"
+
+
+def csv_cell(text):
+    """Quote a field the way csv.writer's minimal quoting does."""
+    if ',' in text or '"' in text or '\n' in text or '\r' in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+class PostTemplate:
+    """A caption with ``{field}`` / ``{field:spec}`` placeholders, parsed once."""
+
+    def __init__(self, text):
+        self.text = text
+        self.parts = []
+        self.fields = set()
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            if conversion:
+                raise ValueError(f"conversions are not supported in post templates: {text!r}")
+            self.parts.append((literal, field, spec))
+            if field is not None:
+                self.fields.add(field)
+
+    @property
+    def uses_schedule(self):
+        return bool(self.fields & SCHEDULE_FIELDS)
+
+    @property
+    def uses_product(self):
+        return bool(self.fields - SCHEDULE_FIELDS)
+
+    def render(self, values):
+        out = []
+        for literal, field, spec in self.parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(values[field], spec))
+        return ''.join(out)
+
+
+class Slot:
+    """One post per product on every ``every``-th day, starting at day ``offset``.
+
+    ``cells`` maps each output column to its template text.
+    """
+
+    def __init__(self, cells, every=1, offset=0):
+        self.cells = {column: PostTemplate(text) for column, text in cells.items()}
+        self.every = every
+        self.offset = offset
+
+    def active(self, day_index):
+        return day_index >= self.offset and (day_index - self.offset) % self.every == 0
+
+
+class PostFormat:
+    """Output columns and posting slots for a batch of social posts.
+
+    ``schedule_columns`` names the (date, time, platform) columns that a
+    :class:`~merch_store.post_schedule.PostCalendar` fills in.
+    """
+
+    def __init__(self, columns, slots, schedule_columns=('date', 'time', 'platform')):
+        self.columns = list(columns)
+        self.slots = list(slots)
+        self.schedule_columns = tuple(schedule_columns)
+        for slot in self.slots:
+            missing = set(self.columns) - set(slot.cells)
+            if missing:
+                raise ValueError(f"slot is missing columns {sorted(missing)}")
+
+    @staticmethod
+    def product_values(product_data):
+        return {**product_data, 'url': product_url(product_data)}
+
+    @staticmethod
+    def schedule_values(start, day_index):
+        return {'date': (start + timedelta(days=day_index)).strftime('%Y-%m-%d'), 'day_number': day_index + 1}
+
+    def rows(self, products, start, days=1, chunk_products=10_000):
+        """Yield every post as a dict, in the same order :meth:`write_csv` writes them."""
+        for chunk in self._chunks(products, chunk_products):
+            values = [self.product_values(p) for p in chunk]
+            for day_index in range(days):
+                day = self.schedule_values(start, day_index)
+                for product_values in values:
+                    merged = {**product_values, **day}
+                    for slot in self.slots:
+                        if slot.active(day_index):
+                            yield {c: slot.cells[c].render(merged) for c in self.columns}
+
+    def _compile(self, slot, product_values):
+        """Split one product's line in a slot around its day-dependent cells.
+
+        Cells that do not depend on the day are rendered, quoted and baked
+        into the static segments; the templates in between are rendered per
+        day. Returns ``(segments, dynamic)`` with one more segment than
+        dynamic templates.
+        """
+        segments, dynamic = [''], []
+        for i, column in enumerate(self.columns):
+            sep = ',' if i else ''
+            template = slot.cells[column]
+            if template.uses_schedule:
+                segments[-1] += sep
+                segments.append('')
+                dynamic.append(template)
+            else:
+                segments[-1] += sep + csv_cell(template.render(product_values))
+        segments[-1] += '\n'
+        return segments, dynamic
+
+    def _day_cell(self):
+        """The template, if every slot's only day-dependent cell is the same day-only one."""
+        shared = None
+        for slot in self.slots:
+            dynamic = [t for t in slot.cells.values() if t.uses_schedule]
+            if len(dynamic) != 1 or dynamic[0].uses_product:
+                return None
+            if shared is not None and dynamic[0].text != shared.text:
+                return None
+            shared = dynamic[0]
+        return shared
+
+    @staticmethod
+    def _splice(compiled, active):
+        """Pieces that ``day_text.join(pieces)`` turns into a whole day's lines for a chunk."""
+        pieces = ['']
+        for _, slot_lines in compiled:
+            for j in active:
+                segments = slot_lines[j][0]
+                pieces[-1] += segments[0]
+                pieces.append(segments[1])
+        return pieces
+
+    @staticmethod
+    def _chunks(products, size):
+        if hasattr(products, 'records'):
+            products = products.records()
+        products = iter(products)
+        while True:
+            chunk = list(islice(products, size))
+            if not chunk:
+                return
+            yield chunk
+
+    def write_csv(self, products, path, start, days=1, chunk_products=10_000):
+        """Write posts for every product x day x slot to one CSV; returns the row count.
+
+        ``products`` is a Catalog or an iterable of row dicts. Products are
+        rendered ``chunk_products`` at a time; within a chunk rows are
+        ordered by day, then product, then slot.
+        """
+        day_cell = self._day_cell()
+        written = 0
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            f.write(','.join(csv_cell(c) for c in self.columns) + '\n')
+            for chunk in self._chunks(products, chunk_products):
+                compiled = []
+                for product_data in chunk:
+                    values = self.product_values(product_data)
+                    compiled.append((values, [self._compile(slot, values) for slot in self.slots]))
+                spliced = {}
+                for day_index in range(days):
+                    day = self.schedule_values(start, day_index)
+                    active = tuple(j for j, slot in enumerate(self.slots) if slot.active(day_index))
+                    if day_cell is not None:
+                        # Only the day-only cell varies: one join writes the whole day.
+                        if active not in spliced:
+                            spliced[active] = self._splice(compiled, active)
+                        f.write(csv_cell(day_cell.render(day)).join(spliced[active]))
+                        written += len(chunk) * len(active)
+                        continue
+                    lines = []
+                    for values, slot_lines in compiled:
+                        merged = {**values, **day}
+                        for j in active:
+                            segments, dynamic = slot_lines[j]
+                            out = [segments[0]]
+                            for template, segment in zip(dynamic, segments[1:]):
+                                out.append(csv_cell(template.render(merged)))
+                                out.append(segment)
+                            lines.append(''.join(out))
+                    f.write(''.join(lines))
+                    written += len(lines)
+        return written
+
+DAILY_POSTS = PostFormat(SOCIAL_CSV_COLUMNS, [
+    Slot({'date': '{date}', 'time': time, 'platform': platform, 'content': content, 'product_url': '{url}'})
+    for time, platform, content in [
+        ('09:00', 'Instagram', "New arrival: {Product_Name}. Where craft meets conviction. 🚫🤖"),
+        ('12:00', 'Facebook', "Premium quality. Zero algorithms. Introducing: {Product_Name}"),
+        ('15:00', 'TikTok', "Thoughtfully made. Algorithmically free. Shop {Product_Name} now."),
+        ('18:00', 'Pinterest', "The human touch, refined. {Product_Name} - available now."),
+        ('21:00', 'Twitter', "Crafted by humans, for humans. {Product_Name} joins our collection."),
+    ]
+])
+
+HOOTSUITE_POSTS = PostFormat(HOOTSUITE_CSV_COLUMNS, [
+    Slot({
+        'Date': '{date}',
+        'Time': time,
+        'Profile': 'Instagram,Facebook,Pinterest',
+        'Message': "Day {day_number}: {Product_Name}. Premium quality, zero algorithms. Shop now! #AntiAI",
+        'Link': '{url}',
+    }, every=2, offset=offset)
+    for offset, time in ((0, '09:00'), (1, '18:00'))
+], schedule_columns=('Date', 'Time', 'Profile'))
+
+
+def _write_scheduled(fmt, product_data, calendar, now, path, days=1):
+    from merch_store.post_schedule import schedule_posts, write_schedule
+
+    rows = schedule_posts(fmt, [product_data], calendar, days, start=now)
+    write_schedule(fmt, rows, path)
+    return rows
+
+
+def schedule_social_media_posts(product_data, now=None, out_dir='.', calendar=None):
+    """Generate social media content for new product
+
+    With a ``PostCalendar`` the posts take its next free slots from ``now``'s
+    day on instead of the fixed 09:00-21:00 times.
+    """
+    now = now or datetime.now()
+    path = os.path.join(out_dir, f"social_posts_{now.strftime('%Y%m%d')}.csv")
+    if calendar is not None:
+        return [row['content'] for row in _write_scheduled(DAILY_POSTS, product_data, calendar, now, path)]
+    # Save to CSV for social media tool to import
+    DAILY_POSTS.write_csv([product_data], path, now)
+    return [row['content'] for row in DAILY_POSTS.rows([product_data], now)]
+
+
+def generate_hootsuite_csv(product_data, num_posts=7, now=None, path='hootsuite_bulk_upload.csv', calendar=None):
+    """Generate CSV for Hootsuite bulk upload"""
+    now = now or datetime.now()
+    if calendar is not None:
+        return _write_scheduled(HOOTSUITE_POSTS, product_data, calendar, now, path, days=num_posts)
+    HOOTSUITE_POSTS.write_csv([product_data], path, now, days=num_posts)
+    return list(HOOTSUITE_POSTS.rows([product_data], now, days=num_posts))
+
@@ -0,0 +1,227 @@
+"""SocialBee publishing: concurrent fan-out of scheduled posts.
+
+Posts share one pooled client and are sent concurrently. Each distinct
+image is uploaded once through ``/media`` and then referenced by id, so a
+product's five captions transfer its image once instead of five times.
+Every post carries an idempotency key derived from its content; delivered
+keys (and uploaded media ids) are appended to a delivery log, so rerunning
+a batch after a crash sends only what was not delivered.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from merch_store.http import ConnectionPool, HTTPError, RateLimiter
+from merch_store.metrics import stage
+from merch_store.slugs import slug_for_name
+
+SOCIALBEE_API_BASE = os.environ.get('SOCIALBEE_API_BASE', 'https://api.socialbee.io/v1')
+PRODUCT_IMAGE_BASE_URL = os.environ.get('PRODUCT_IMAGE_BASE_URL', 'https://youandinotai.com/products')
+
+
+def product_image_url(product_data):
+    slug = product_data.get('Slug') or slug_for_name(product_data['Product_Name'])
+    return f"{PRODUCT_IMAGE_BASE_URL}/{slug}.jpg"
+
+
+def make_post(content, image_url, platforms, post_at='next_available'):
+    return {"text": content, "image_url": image_url, "platforms": list(platforms), "post_at": post_at}
+
+
+def post_from_row(row):
+    """A post for one row of the daily social CSV (``social.DAILY_POSTS``)."""
+    slug = row['product_url'].rsplit('/', 1)[-1]
+    return make_post(row['content'], f"{PRODUCT_IMAGE_BASE_URL}/{slug}.jpg", [row['platform'].lower()],
+                     f"{row['date']}T{row['time']}:00")
+
+
+def post_key(post, workspace_id=''):
+    """Idempotency key: the same post to the same workspace always gets the same key."""
+    blob = json.dumps([workspace_id, post['text'], post.get('image_url'), post['platforms'], post['post_at']],
+                      separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+
+class DeliveryLog:
+    """Append-only delivery status: sent and failed posts, uploaded media.
+
+    Each line is a JSON event; a torn final line from a crash is cut off
+    so the events of the next run start on a line of their own.
+    With ``path=None`` status is only kept in memory.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.sent = {}
+        self.failed = {}
+        self.media = {}
+        if path and os.path.exists(path):
+            good = 0
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('torn line')
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        break
+                    good += len(line)
+            if good < os.path.getsize(path):
+                os.truncate(path, good)
+        self._file = open(path, 'a') if path else None
+
+    def _apply(self, event):
+        if 'media_url' in event:
+            self.media[event['media_url']] = event['media_id']
+        elif event['status'] == 'sent':
+            self.sent[event['key']] = event['post_id']
+            self.failed.pop(event['key'], None)
+        else:
+            self.failed[event['key']] = event['error']
+
+    def record(self, **event):
+        self._apply(event)
+        if self._file:
+            self._file.write(json.dumps(event) + '\n')
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+class PublishReport:
+    """Outcome of a publishing run."""
+
+    def __init__(self):
+        self.posted = 0
+        self.skipped = 0
+        self.media_uploaded = 0
+        self.latencies = []  # seconds per delivered post, media included
+        self.failures = []  # (key, error)
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    def fail(self, key, error):
+        self.failures.append((key, str(error)))
+
+    def __repr__(self):
+        return (f"PublishReport(posted={self.posted}, skipped={self.skipped}, "
+                f"media_uploaded={self.media_uploaded}, failures={len(self.failures)})")
+
+
+class SocialBeePublisher:
+    """Publish posts (``make_post`` dicts) to one SocialBee workspace.
+
+    Usage::
+
+        async with SocialBeePublisher(delivery='socialbee.log') as publisher:
+            report = await publisher.publish(posts)
+    """
+
+    def __init__(self, api_key=None, workspace_id=None, base_url=SOCIALBEE_API_BASE,
+                 max_connections=8, concurrency=64, rate=None, delivery=None, retry=None, on_response=None):
+        api_key = api_key or os.environ.get('SOCIALBEE_API_KEY', '')
+        self.workspace_id = workspace_id or os.environ.get('SOCIALBEE_WORKSPACE_ID', '')
+        self.pool = ConnectionPool(base_url, max_connections, headers={
+            'Authorization': f'Bearer {api_key}',
+        }, retry=retry, on_response=on_response, name='socialbee')
+        self.limiter = RateLimiter(rate) if rate else None
+        self.delivery = delivery if isinstance(delivery, DeliveryLog) else DeliveryLog(delivery)
+        self._posts = asyncio.Semaphore(concurrency)
+        self._uploads = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.pool.close()
+        self.delivery.close()
+
+    async def _call(self, path, payload, key):
+        if self.limiter:
+            await self.limiter.acquire()
+        response = await self.pool.post(path, json=payload, headers={'Idempotency-Key': key})
+        return response.json()
+
+    async def _upload(self, url, report):
+        result = await self._call('/media', {"workspace_id": self.workspace_id, "url": url},
+                                  hashlib.sha1(url.encode('utf-8')).hexdigest())
+        self.delivery.record(media_url=url, media_id=result['id'])
+        report.media_uploaded += 1
+        return result['id']
+
+    async def media_id(self, url, report):
+        """Media id for an image, uploading it once however many posts use it."""
+        if url in self.delivery.media:
+            return self.delivery.media[url]
+        upload = self._uploads.get(url)
+        if upload is None:
+            upload = self._uploads[url] = asyncio.ensure_future(self._upload(url, report))
+        try:
+            return await upload
+        except BaseException:
+            # Let a later post try the upload again.
+            if self._uploads.get(url) is upload:
+                del self._uploads[url]
+            raise
+
+    async def _publish(self, key, post, report):
+        if key in self.delivery.sent:
+            report.skipped += 1
+            return
+        async with self._posts:
+            start = time.perf_counter()
+            try:
+                media = [await self.media_id(post['image_url'], report)] if post.get('image_url') else []
+                result = await self._call('/posts', {
+                    "workspace_id": self.workspace_id,
+                    "text": post['text'],
+                    "media_ids": media,
+                    "platforms": post['platforms'],
+                    "post_at": post['post_at'],
+                }, key)
+            except (HTTPError, OSError, asyncio.TimeoutError) as exc:
+                self.delivery.record(key=key, status='failed', error=str(exc))
+                report.fail(key, exc)
+                return
+            self.delivery.record(key=key, status='sent', post_id=result['id'])
+            report.posted += 1
+            report.latencies.append(time.perf_counter() - start)
+
+    @stage('socialbee.publish')
+    async def publish(self, posts):
+        """Publish an iterable of posts; returns a PublishReport."""
+        report = PublishReport()
+        unique = {}
+        for post in posts:
+            key = post_key(post, self.workspace_id)
+            if key in unique:
+                report.skipped += 1
+            else:
+                unique[key] = post
+        await asyncio.gather(*(self._publish(key, post, report) for key, post in unique.items()))
+        return report
+
+
+def publish_posts(posts, **kwargs):
+    """Blocking wrapper: publish a batch of posts."""
+    async def run():
+        async with SocialBeePublisher(**kwargs) as publisher:
+            return await publisher.publish(posts)
+    return asyncio.run(run())
+
+
+def post_to_socialbee(content, image_url, platforms, post_at='next_available', **kwargs):
+    """Schedule post across multiple platforms"""
+    report = publish_posts([make_post(content, image_url, platforms, post_at)], **kwargs)
+    if report.failures:
+        raise RuntimeError(report.failures[0][1])
+    return report
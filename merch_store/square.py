@@ -0,0 +1,186 @@
+"""Async Square Catalog client.
+
+Products go out through ``/catalog/batch-upsert`` over a shared keep-alive
+pool with bounded concurrency. Idempotency keys are derived from the
+request content, so a retried or re-run upload replays instead of creating
+duplicates.
+"""
+import asyncio
+import hashlib
+import json
+import os
+
+from merch_store.http import ConnectionPool
+from merch_store.metrics import stage
+
+SQUARE_API_BASE = os.environ.get('SQUARE_API_BASE', 'https://connect.squareup.com/v2')
+SQUARE_VERSION = '2024-10-17'
+
+OBJECTS_PER_BATCH = 1000  # Square's limit per batch
+OBJECTS_PER_REQUEST = 1000
+OBJECTS_PER_DELETE = 200  # Square's limit for /catalog/batch-delete
+
+
+def price_cents(dollars):
+    return int(round(float(dollars) * 100))
+
+
+def item_object(product_data, remote_id=None):
+    """Catalog ITEM object for one catalog row (same shape as the single-object upload).
+
+    ``remote_id`` is the ``"<item id> <variation id>"`` pair recorded when the
+    product was created; with it the upsert updates the existing objects.
+    """
+    day = product_data['Day']
+    item_id, variation_id = remote_id.split(' ') if remote_id else (f"#product-{day}", f"#variation-{day}")
+    return {
+        "type": "ITEM",
+        "id": item_id,
+        "item_data": {
+            "name": product_data['Product_Name'],
+            "description": f"Premium anti-AI merchandise. {product_data['Product_Name']}. Crafted by humans, for humans. Part of our {product_data['Product_Category']} collection.",
+            "category_id": "#category-anti-ai",
+            "variations": [
+                {
+                    "type": "ITEM_VARIATION",
+                    "id": variation_id,
+                    "item_variation_data": {
+                        "name": "Regular",
+                        "pricing_type": "FIXED_PRICING",
+                        "price_money": {
+                            "amount": price_cents(product_data['Retail_Price']),
+                            "currency": "USD"
+                        }
+                    }
+                }
+            ]
+        }
+    }
+
+
+def idempotency_key(payload):
+    """Deterministic key: the same objects always produce the same key."""
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    return f"catalog-{digest.hexdigest()}"
+
+
+class SquareCatalogClient:
+    """Batch upserts to the Square Catalog API.
+
+    Use as an async context manager so pooled connections are closed::
+
+        async with SquareCatalogClient() as square:
+            ids = await square.upsert_products(rows)
+    """
+
+    def __init__(self, access_token=None, base_url=SQUARE_API_BASE, max_connections=8,
+                 concurrency=None, objects_per_request=OBJECTS_PER_REQUEST, retry=None,
+                 on_response=None):
+        access_token = access_token or os.environ.get('SQUARE_ACCESS_TOKEN', '')
+        self.pool = ConnectionPool(base_url, max_connections, headers={
+            'Square-Version': SQUARE_VERSION,
+            'Authorization': f'Bearer {access_token}',
+        }, retry=retry, on_response=on_response, name='square')
+        self.objects_per_request = objects_per_request
+        self._limit = asyncio.Semaphore(concurrency or max_connections)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.pool.close()
+
+    async def _upsert(self, objects):
+        batches = [{"objects": objects[i:i + OBJECTS_PER_BATCH]}
+                   for i in range(0, len(objects), OBJECTS_PER_BATCH)]
+        payload = {"batches": batches}
+        payload["idempotency_key"] = idempotency_key(batches)
+        async with self._limit:
+            response = await self.pool.post('/catalog/batch-upsert', json=payload, idempotent=True)
+        return response.json()
+
+    @stage('square.upsert_objects')
+    async def upsert_objects(self, objects):
+        """Upsert catalog objects; returns {client id: Square object id}."""
+        step = self.objects_per_request
+        results = await asyncio.gather(*(
+            self._upsert(objects[i:i + step]) for i in range(0, len(objects), step)))
+        mappings = {}
+        for result in results:
+            for m in result.get('id_mappings') or []:
+                mappings[m['client_object_id']] = m['object_id']
+        return mappings
+
+    async def upsert_products(self, products):
+        """Upsert catalog rows as ITEM objects; returns {client id: Square object id}."""
+        return await self.upsert_objects([item_object(p) for p in products])
+
+    @stage('square.delete_objects')
+    async def delete_objects(self, object_ids):
+        """Delete catalog objects (and their variations) by Square id."""
+        await asyncio.gather(*(
+            self._delete(object_ids[i:i + OBJECTS_PER_DELETE])
+            for i in range(0, len(object_ids), OBJECTS_PER_DELETE)))
+
+    async def _delete(self, object_ids):
+        async with self._limit:
+            # Deleting the same ids again changes nothing, so retries are safe.
+            await self.pool.post('/catalog/batch-delete', json={"object_ids": object_ids}, idempotent=True)
+
+    @stage('square.sync_catalog')
+    async def sync_catalog(self, catalog, state):
+        """Push only what changed since ``state`` was last committed.
+
+        Creates and updates go out as one batch upsert, deleted rows as
+        batch deletes; ``state`` is updated with the new Square ids. Returns
+        the applied CatalogDiff.
+        """
+        diff = state.diff(catalog)
+        rows = diff.creates.tolist() + diff.updates.tolist()
+        objects = [item_object(p, state.remote_id(p['Day'])) for p in catalog.take(rows).records()]
+        mappings = await self.upsert_objects(objects)
+        remote_ids = {}
+        for day in diff.keys[diff.creates].tolist():
+            remote_ids[day] = f"{mappings[f'#product-{day}']} {mappings[f'#variation-{day}']}"
+        stale = [state.remote_id(day) for day in diff.deletes.tolist()]
+        await self.delete_objects([r.split(' ')[0] for r in stale if r])
+        state.commit(diff, remote_ids=remote_ids)
+        return diff
+
+    @stage('square.create_product')
+    async def create_product(self, product_data):
+        """Single-object upsert via ``/catalog/object``, as the daily run uses."""
+        obj = item_object(product_data)
+        payload = {"idempotency_key": idempotency_key(obj), "object": obj}
+        async with self._limit:
+            response = await self.pool.post('/catalog/object', json=payload, idempotent=True)
+        return response.json()
+
+
+def upsert_products(products, **kwargs):
+    """Blocking wrapper around SquareCatalogClient.upsert_products."""
+    async def run():
+        async with SquareCatalogClient(**kwargs) as square:
+            return await square.upsert_products(products)
+    return asyncio.run(run())
+
+
+def sync_catalog(catalog, state, **kwargs):
+    """Blocking wrapper around SquareCatalogClient.sync_catalog; saves ``state``."""
+    async def run():
+        async with SquareCatalogClient(**kwargs) as square:
+            return await square.sync_catalog(catalog, state)
+    diff = asyncio.run(run())
+    state.save()
+    return diff
+
+
+def create_square_product(product_data, **kwargs):
+    """Create one product in the Square catalog (blocking)."""
+    async def run():
+        async with SquareCatalogClient(**kwargs) as square:
+            return await square.create_product(product_data)
+    return asyncio.run(run())
@@ -0,0 +1,358 @@
+"""Webhook receiver for Square and Printful order and fulfillment events.
+
+A request is acknowledged as soon as its signature checks out and the
+event is appended to a local log; processing happens behind a bounded
+queue. When the queue is full the receiver answers 503 with Retry-After
+instead of accepting more than it can process, and both services
+redeliver later. Events are deduplicated by event id, including across
+restarts: the log is replayed on start, and events received but not yet
+processed are queued again. An event whose processing fails is retried
+on the next delivery or the next start, whichever comes first.
+
+    python -m merch_store.webhooks --port 8080 --log webhook_events.log
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+
+from merch_store.http import HTTPServer
+
+WEBHOOK_LOG = os.environ.get('WEBHOOK_LOG', 'webhook_events.log')
+QUEUE_SIZE = 1000
+MAX_BODY = 1024 * 1024  # bytes; larger deliveries get 413 before their signature is checked
+# Seconds an event id is remembered, longer than either service keeps redelivering
+DEDUPE_TTL = float(os.environ.get('WEBHOOK_DEDUPE_TTL', 7 * 24 * 3600))
+COMPACT_AT = 10_000  # log records before the log is first rewritten
+RETRY_AFTER = 5  # seconds a sender is asked to wait when the queue is full
+
+
+def square_signature(key, notification_url, body):
+    """Square's x-square-hmacsha256-signature: base64 HMAC-SHA256 of the URL followed by the body."""
+    digest = hmac.new(key.encode('utf-8'), notification_url.encode('utf-8') + body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def printful_signature(secret, body):
+    """Printful's x-pf-webhook-signature: hex HMAC-SHA256 of the body."""
+    return hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+
+def square_event_id(payload, body):
+    return payload['event_id']
+
+
+def printful_event_id(payload, body):
+    """Printful sends no event id; hash the payload without its redelivery counter."""
+    stable = {k: v for k, v in payload.items() if k != 'retries'}
+    return hashlib.sha256(json.dumps(stable, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class Source:
+    """One webhook sender: its path, how it signs, and how its events are identified."""
+
+    def __init__(self, name, path, header, sign, event_id):
+        self.name = name
+        self.path = path
+        self.header = header
+        self.sign = sign  # body -> expected signature, or None when no secret is configured
+        self.event_id = event_id
+
+    def verify(self, headers, body):
+        expected = self.sign(body)
+        return bool(expected) and hmac.compare_digest(headers.get(self.header, ''), expected)
+
+
+def default_sources(square_key=None, square_url=None, printful_secret=None):
+    square_key = square_key or os.environ.get('SQUARE_WEBHOOK_SIGNATURE_KEY')
+    square_url = square_url or os.environ.get('SQUARE_WEBHOOK_URL', '')
+    printful_secret = printful_secret or os.environ.get('PRINTFUL_WEBHOOK_SECRET')
+    return [
+        Source('square', '/webhooks/square', 'x-square-hmacsha256-signature',
+               lambda body: square_key and square_signature(square_key, square_url, body), square_event_id),
+        Source('printful', '/webhooks/printful', 'x-pf-webhook-signature',
+               lambda body: printful_secret and printful_signature(printful_secret, body), printful_event_id),
+    ]
+
+
+class EventLog:
+    """Append-only JSON-lines log of received events and processed ids.
+
+    A torn final line from a crash is cut off on replay, so the next
+    record starts on a line of its own. Ids are kept for
+    ``ttl`` seconds after they were received. Once the log has doubled
+    since it was last rewritten, and holds at least ``compact_at`` records,
+    it is rewritten with only the events not yet processed and the ids
+    still within the TTL.
+    """
+
+    def __init__(self, path, fsync=False, ttl=DEDUPE_TTL, compact_at=COMPACT_AT):
+        self.path = path
+        self.fsync = fsync
+        self.ttl = ttl
+        self.compact_at = compact_at
+        self.seen = {}  # event id -> time received
+        self.unprocessed = {}  # event id -> event, in arrival order
+        self.failed = set()  # ids whose processing failed since they were last received
+        self.records = 0
+        self._compact_next = compact_at
+        if os.path.exists(path):
+            good = 0
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('torn line')
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    good += len(line)
+                    self.records += 1
+                    if 'done' in record:
+                        self.unprocessed.pop(record['done'], None)
+                    elif 'seen' in record:
+                        self.seen[record['seen']] = record['received']
+                    else:
+                        self.seen[record['id']] = record['received']
+                        self.unprocessed[record['id']] = record
+            if good < os.path.getsize(path):
+                os.truncate(path, good)
+        self._file = open(path, 'ab')
+        self._maybe_compact()
+
+    def __len__(self):
+        return len(self.seen)
+
+    def is_duplicate(self, event_id):
+        """True for an id received before, unless its processing failed and it may be retried."""
+        return event_id in self.seen and event_id not in self.failed
+
+    def pending(self):
+        """Events received but never processed, oldest first."""
+        return list(self.unprocessed.values())
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.records += 1
+
+    def append(self, event):
+        self.seen[event['id']] = event['received']
+        self.unprocessed[event['id']] = event
+        self.failed.discard(event['id'])
+        self._write(event)
+        self._maybe_compact()
+
+    def mark_done(self, event_id):
+        self.unprocessed.pop(event_id, None)
+        self._write({'done': event_id})
+
+    def mark_failed(self, event_id):
+        """Accept the next delivery of ``event_id`` again; it stays pending for the next start too."""
+        self.failed.add(event_id)
+
+    def _maybe_compact(self):
+        if self.records >= self._compact_next:
+            self.compact()
+
+    def compact(self, now=None):
+        """Forget ids older than the TTL and rewrite the log with only what is still needed."""
+        cutoff = (time.time() if now is None else now) - self.ttl
+        self.seen = {event_id: received for event_id, received in self.seen.items()
+                     if received >= cutoff or event_id in self.unprocessed}
+        self.failed &= self.seen.keys()
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            for event_id, received in self.seen.items():
+                record = self.unprocessed.get(event_id) or {'seen': event_id, 'received': received}
+                f.write(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp, self.path)
+        self._file = open(self.path, 'ab')
+        self.records = len(self.seen)
+        self._compact_next = max(self.compact_at, 2 * self.records)
+
+    def close(self):
+        self._file.close()
+
+
+class OrderTracker:
+    """Latest status and tracking numbers per order, from processed events."""
+
+    def __init__(self):
+        self.orders = {}
+
+    async def __call__(self, event):
+        payload = event['payload']
+        if event['source'] == 'square':
+            data = (payload.get('data') or {}).get('object') or {}
+            order = data.get('order_updated') or data.get('order') or {}
+            if order.get('order_id'):
+                self.orders.setdefault(order['order_id'], {})['status'] = order.get('state')
+        else:
+            data = payload.get('data') or {}
+            order = data.get('order') or {}
+            if order.get('external_id') or order.get('id'):
+                entry = self.orders.setdefault(str(order.get('external_id') or order['id']), {})
+                entry['status'] = order.get('status', payload.get('type'))
+                shipment = data.get('shipment') or {}
+                if shipment.get('tracking_number'):
+                    entry.setdefault('tracking', []).append(shipment['tracking_number'])
+
+
+class WebhookReceiver:
+    """Signature check, log, dedupe and a bounded processing queue.
+
+    ``processor(event)`` is awaited for each new event; events are dicts
+    with ``id``, ``source``, ``type``, ``received`` and ``payload``.
+    """
+
+    def __init__(self, log_path=WEBHOOK_LOG, processor=None, sources=None, queue_size=QUEUE_SIZE,
+                 workers=4, host='127.0.0.1', port=0, fsync=False, retry_after=RETRY_AFTER,
+                 max_body=MAX_BODY, ttl=DEDUPE_TTL):
+        self.log_path = log_path
+        self.retry_after = retry_after
+        self.fsync = fsync
+        self.ttl = ttl
+        self.processor = processor or OrderTracker()
+        self.sources = {source.path: source for source in (sources or default_sources())}
+        self.queue_size = queue_size
+        self.workers = workers
+        self.server = HTTPServer(self.handle, host, port, max_body=max_body)
+        self.stats = {'received': 0, 'duplicates': 0, 'rejected': 0, 'shed': 0, 'processed': 0, 'failed': 0}
+        self.log = None
+        self.queue = None
+        self._tasks = []
+        self._loop = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return self.server.url
+
+    async def start(self):
+        self.log = EventLog(self.log_path, self.fsync, self.ttl)
+        self.queue = asyncio.Queue(self.queue_size)
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+        backlog = self.log.pending()
+        if backlog:
+            self._tasks.append(asyncio.ensure_future(self._requeue(backlog)))
+        await self.server.start()
+        return self
+
+    async def stop(self):
+        """Stop accepting, finish everything queued, close the log."""
+        await self.server.stop()
+        await self.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.log.close()
+
+    def start_in_thread(self):
+        """Run the receiver on its own event loop in a daemon thread."""
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop_thread(self):
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _requeue(self, backlog):
+        for event in backlog:
+            await self.queue.put(event)
+
+    async def _work(self):
+        while True:
+            event = await self.queue.get()
+            try:
+                await self.processor(event)
+            except Exception as exc:
+                # Left pending in the log, so the next start retries it, and a redelivery is accepted.
+                self.log.mark_failed(event['id'])
+                self.stats['failed'] += 1
+                print(f"webhook {event['id']} ({event['type']}) failed: {exc!r}", file=sys.stderr)
+            else:
+                self.log.mark_done(event['id'])
+                self.stats['processed'] += 1
+            finally:
+                self.queue.task_done()
+
+    async def handle(self, method, path, query, headers, body):
+        source = self.sources.get(path)
+        if method == 'GET' and path == '/health':
+            return 200, {**self.stats, 'queued': self.queue.qsize(), 'ids': len(self.log)}
+        if source is None or method != 'POST':
+            return 404, {"error": "not found"}
+        if not source.verify(headers, body):
+            self.stats['rejected'] += 1
+            return 401, {"error": "invalid signature"}
+        try:
+            payload = json.loads(body)
+            event_id = f"{source.name}:{source.event_id(payload, body)}"
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.stats['rejected'] += 1
+            return 400, {"error": "invalid event"}
+        if self.log.is_duplicate(event_id):
+            self.stats['duplicates'] += 1
+            return 200, {"status": "duplicate"}
+        if self.queue.full():
+            self.stats['shed'] += 1
+            return 503, {"error": "busy"}, {'Retry-After': str(self.retry_after)}
+        event = {'id': event_id, 'source': source.name, 'type': payload.get('type'),
+                 'received': time.time(), 'payload': payload}
+        self.log.append(event)
+        self.queue.put_nowait(event)
+        self.stats['received'] += 1
+        return 200, {"status": "accepted"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Receive Square and Printful webhooks.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on; 0.0.0.0 for every interface')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--log', default=WEBHOOK_LOG)
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--fsync', action='store_true', help='fsync the log before acknowledging')
+    args = parser.parse_args(argv)
+
+    async def run():
+        receiver = WebhookReceiver(args.log, queue_size=args.queue_size, workers=args.workers,
+                                   host=args.host, port=args.port, fsync=args.fsync)
+        await receiver.start()
+        print(f"📬 Receiving webhooks on {receiver.url} (log: {args.log})")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await receiver.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
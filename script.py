@@ -1,5 +1,10 @@
 
-import pandas as pd
+import argparse
+
+from merch_store import profiling
+from merch_store.catalog import Catalog
+from merch_store.catalog_bin import write_catalog
+from merch_store.kpi import KPI_CUBE, KPICube
 
 # Create comprehensive product catalog with daily suggestions for anti-AI merch store
 # Focus on profitable, premium items with Apple-style minimalism
@@ -72,13 +77,6 @@ product_catalog = {
     ]
 }
 
-df = pd.DataFrame(product_catalog)
-
-# Calculate profit metrics
-df['Total_Cost'] = df['Supplier_Cost'] + df['Shipping_Cost']
-df['Gross_Profit'] = df['Retail_Price'] - df['Total_Cost']
-df['Profit_Margin_%'] = ((df['Gross_Profit'] / df['Retail_Price']) * 100).round(2)
-
 # Marketing channels for each product
 marketing_channels = [
     'Instagram, Pinterest, TikTok',
@@ -113,21 +111,60 @@ marketing_channels = [
     'Instagram, TikTok, Fitness Communities'
 ]
 
-df['Marketing_Channels'] = marketing_channels
 
-# Save to CSV
-df.to_csv('anti_ai_merch_store_30day_catalog.csv', index=False)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the catalog CSV, binary catalog and KPI cube.')
+    profiling.add_arguments(parser, 'profile_catalog_build')
+    args = parser.parse_args(argv)
+    with profiling.session_for(args):
+        build()
+
+
+def build():
+    stage = profiling.stage
+
+    # Typed columns; Total_Cost, Gross_Profit and Profit_Margin_% are derived in one pass
+    with stage('parse and derive margins'):
+        catalog = Catalog.from_dict(product_catalog, marketing_channels)
+
+    # Canonical unique URL slugs, computed once per build and stored in the binary catalog
+    with stage('slugs'):
+        catalog.assign_slugs()
+
+    # Save to CSV
+    with stage('write csv'):
+        catalog.to_csv('anti_ai_merch_store_30day_catalog.csv')
+
+    # Binary columnar copy for the daily automation's mmap lookups
+    with stage('write binary catalog'):
+        write_catalog(catalog, 'anti_ai_merch_store_30day_catalog.bin')
+
+    # KPI rollups: only rows that changed since the last build touch the cube
+    with stage('kpi cube'):
+        cube = KPICube(KPI_CUBE)
+        cube.sync_catalog(catalog)
+        cube.save()
+        kpis = cube.summary()
+
+    with stage('report'):
+        with stage('to pandas'):
+            df = catalog.to_frame()
+
+        print("30-Day Anti-AI Merch Store Product Catalog")
+        print("=" * 80)
+        print(f"\nTotal Products: {kpis['products']}")
+        print(f"Average Profit Margin: {kpis['avg_margin_pct']:.2f}%")
+        print(f"Average Gross Profit per Item: ${kpis['avg_gross_profit']:.2f}")
+        print(f"\nHighest Profit Items:")
+        print(df.nlargest(5, 'Gross_Profit')[['Day', 'Product_Name', 'Gross_Profit', 'Profit_Margin_%']])
+
+        print("\n" + "=" * 80)
+        print("\nFirst 10 Days Preview:")
+        print(df.head(10)[['Day', 'Product_Name', 'Retail_Price', 'Profit_Margin_%']].to_string(index=False))
 
-print("30-Day Anti-AI Merch Store Product Catalog")
-print("=" * 80)
-print(f"\nTotal Products: {len(df)}")
-print(f"Average Profit Margin: {df['Profit_Margin_%'].mean():.2f}%")
-print(f"Average Gross Profit per Item: ${df['Gross_Profit'].mean():.2f}")
-print(f"\nHighest Profit Items:")
-print(df.nlargest(5, 'Gross_Profit')[['Day', 'Product_Name', 'Gross_Profit', 'Profit_Margin_%']])
+        print(f"\n\nFull catalog saved to: anti_ai_merch_store_30day_catalog.csv")
+        print("Binary catalog saved to: anti_ai_merch_store_30day_catalog.bin")
 
-print("\n" + "=" * 80)
-print("\nFirst 10 Days Preview:")
-print(df.head(10)[['Day', 'Product_Name', 'Retail_Price', 'Profit_Margin_%']].to_string(index=False))
 
-print(f"\n\nFull catalog saved to: anti_ai_merch_store_30day_catalog.csv")
+if __name__ == '__main__':
+    main()
@@ -1,259 +1,23 @@
 
-# Create comprehensive automation and marketing strategy document
+from merch_store.reports import guide_values, write_guide
 
-automation_strategy = """
-ANTI-AI MERCH STORE AUTOMATION STRATEGY
-========================================
 
-## 1. DROPSHIPPING AUTOMATION SETUP
+def main():
+    # Create comprehensive automation and marketing strategy document (template: merch_store/guides/automation_strategy.txt)
+    kpis = guide_values()
+    write_guide('automation_strategy', values=kpis)
 
-### Integration Platform: Printful + Square
-- Printful integrates directly with Square Online (as confirmed in research)
-- Automatic order fulfillment: orders sync from Square → Printful → shipped
-- No manual intervention required for order processing
-- 2.9% + $0.30 transaction fee per order via Square
+    print("AUTOMATION STRATEGY DOCUMENT CREATED")
+    print("=" * 60)
+    print("\nKey Highlights:")
+    print(f"- {kpis['avg_margin_pct']:.2f}% average profit margin across all products")
+    print("- Fully automated daily product uploads via API")
+    print("- Social media marketing automated with SocialBee/Metricool")
+    print("- Printful + Square integration for hands-free fulfillment")
+    print("- Premium Apple-style positioning (quantity over IKEA)")
+    print("- Estimated $800-35,000+ net profit potential per month")
+    print("\nDocument saved to: anti_ai_automation_strategy.txt")
 
-### Daily Product Upload Automation
-METHOD 1: Square API + Scheduled Script
-- Use Square Catalog API to add products programmatically
-- Set up cron job (Linux/Mac) or Task Scheduler (Windows) to run daily
-- Script pulls next day's product from catalog CSV
-- Automatically creates product listing with: title, description, price, images
 
-METHOD 2: Printful API Integration
-- Use Printful API to create products and push to Square
-- Automated workflow: Design template → API call → Product created → Synced to store
-- Webhooks provide real-time order status updates
-
-### Recommended Tech Stack:
-- Python script with requests library (API calls)
-- Cron job for daily execution (0 9 * * * for 9 AM daily)
-- Printful API + Square API integration
-- Cloud hosting (AWS Lambda or Google Cloud Functions for serverless execution)
-
-## 2. INVENTORY & PRICING AUTOMATION
-
-### Real-Time Sync:
-- Printful automatically syncs stock levels (they produce on-demand)
-- Price monitoring: set automated rules to adjust prices based on:
-  * Competitor pricing (web scraping tools)
-  * Material cost changes from Printful
-  * Seasonal demand patterns
-
-### Automation Tools:
-- Wholesale2B or InventorySource for multi-supplier management
-- AutoDS for price optimization (if expanding to other suppliers)
-- API2Cart for multi-platform sync (if selling on multiple channels)
-
-## 3. MARKETING AUTOMATION
-
-### Social Media Auto-Posting:
-Tool Recommendations (Top 3):
-1. SOCIALBEE ($29/mo) - Best for recycling evergreen content
-   - Create content categories: New Products, Anti-AI Quotes, Customer Photos
-   - Auto-rotate posts from each category
-   - Post to Instagram, Facebook, TikTok, Pinterest simultaneously
-
-2. HOOTSUITE ($99/mo) - Best for comprehensive management
-   - AI content creation for post captions
-   - Social listening for anti-AI trending topics
-   - Bulk schedule entire month of posts
-
-3. METRICOOL ($18/mo) - Best value for small businesses
-   - Autolists feature: create post queues that auto-publish
-   - Instagram, Facebook, TikTok, Pinterest, Twitter support
-   - Analytics to track which posts drive most sales
-
-### Daily Marketing Workflow (Automated):
-Day 1-30: When new product added to store:
-1. Script generates 5 social media posts variations
-2. Posts scheduled across 7 days (morning/evening times)
-3. Content variations:
-   - Product showcase with lifestyle imagery
-   - Anti-AI messaging/quotes
-   - Behind-the-scenes "human-made" content
-   - Customer testimonials (when available)
-   - Educational content about AI concerns
-
-### Content Generation Tools:
-- ChatGPT API for caption generation (with anti-AI irony noted)
-- Canva Pro API for automated graphic creation
-- Later or Planoly for Instagram visual planning
-
-## 4. SALES CHANNEL EXPANSION
-
-### Multi-Platform Strategy:
-Week 1-2: Square Online (Primary)
-Week 3-4: Add Etsy (POD allowed with Printful partnership disclosed)
-Month 2: Add Amazon Merch on Demand
-Month 3: Add eBay dropshipping
-
-### Automation Benefits:
-- Printful syncs inventory across ALL platforms
-- Single dashboard to manage orders from multiple sources
-- Prevents overselling with real-time stock updates
-
-## 5. CUSTOMER SERVICE AUTOMATION
-
-### Chatbot Integration:
-- Tidio or Gorgias for Square Online
-- Pre-programmed responses for common questions:
-  * Shipping times (3-7 business days via Printful)
-  * Product materials and quality
-  * Anti-AI brand mission/values
-  * Size guides and returns
-
-### Email Automation (Klaviyo or Mailchimp):
-- Welcome series for new subscribers
-- Abandoned cart recovery (24hr, 48hr, 72hr emails)
-- Post-purchase follow-up and review requests
-- New product launch announcements
-
-## 6. PROFITABILITY OPTIMIZATION
-
-### Target Margins:
-- Aim for 65-80% profit margins (current catalog average: 72.75%)
-- Premium positioning justifies higher prices
-- Focus on perceived value: organic materials, quality printing, meaningful message
-
-### Cost Management:
-- Bulk order discounts from Printful (negotiate after first 100 orders)
-- Seasonal promotions to move inventory
-- Bundle deals to increase average order value
-
-### Pricing Strategy:
-- Competitor analysis: Etsy anti-AI merch priced $20-35 (basic quality)
-- Position 40-60% higher with premium materials and Apple-style branding
-- Emphasize: "Premium quality, human craftsmanship, sustainable materials"
-
-## 7. BRAND POSITIONING: PREMIUM ANTI-AI
-
-### Apple-Style Minimalism Applied:
-- Clean, uncluttered product photography (white backgrounds)
-- Minimal text on products (let symbol speak)
-- Premium materials ONLY: organic cotton, genuine leather, stainless steel
-- Packaging: minimalist boxes with embossed logo (upgrade available through Printful)
-
-### Brand Messaging:
-Tagline Options:
-- "Crafted by Humans, For Humans"
-- "Premium Quality. Zero Algorithms."
-- "The Anti-AI Movement, Refined."
-
-### Marketing Positioning:
-NOT: Cheap protest merchandise
-BUT: Luxury statement pieces for conscious consumers
-
-Think: Patagonia meets Supreme meets Anti-Establishment
-
-## 8. DAILY AUTOMATION CHECKLIST
-
-AUTOMATED (Set and Forget):
-✓ New product added to store (via API script)
-✓ Product images generated and uploaded
-✓ Social media posts scheduled and published
-✓ Orders synced from Square to Printful
-✓ Customer order confirmations sent
-✓ Tracking numbers updated automatically
-✓ Inventory levels synced
-✓ Abandoned cart emails sent
-
-WEEKLY MANUAL TASKS (15 mins):
-- Review analytics dashboard
-- Respond to customer DMs (chatbot can't handle)
-- Approve AI-generated social content (quality check)
-- Adjust pricing based on performance data
-
-MONTHLY MANUAL TASKS (1-2 hours):
-- Design new products for next month
-- Review profit margins and adjust pricing
-- Analyze top-performing products and create variations
-- Update marketing strategy based on data
-
-## 9. IMPLEMENTATION TIMELINE
-
-Week 1:
-- Set up Square Online store
-- Connect Printful integration
-- Upload first 7 products manually
-- Configure payment processing
-
-Week 2:
-- Set up daily product upload automation
-- Connect social media accounts to scheduling tool
-- Create 30 days of social content templates
-- Configure email automation
-
-Week 3:
-- Launch store with first 14 products
-- Begin social media auto-posting
-- Set up Google Analytics and Facebook Pixel
-- Start paid advertising (Facebook/Instagram)
-
-Week 4:
-- Monitor and optimize automation workflows
-- Add customer reviews/testimonials to site
-- Expand to Etsy marketplace
-- Scale advertising based on ROAS
-
-Month 2 onwards:
-- Fully automated daily product additions
-- Weekly performance reviews
-- Monthly strategy adjustments
-- Scale to additional platforms
-
-## 10. COST BREAKDOWN
-
-INITIAL SETUP COSTS:
-- Square Online: FREE (2.9% + $0.30 per transaction)
-- Printful: FREE (pay per order)
-- Domain name: $12/year
-- Canva Pro: $13/month
-- SocialBee or Metricool: $18-29/month
-- Klaviyo Email: FREE up to 250 contacts
-TOTAL MONTHLY: ~$50
-
-GROWTH PHASE COSTS:
-- Paid advertising: $500-1000/month (budget 20-30% of revenue)
-- Additional design tools: $50/month
-- Premium automation tools: $100/month
-TOTAL MONTHLY: ~$700-1200
-
-ROI CALCULATION:
-If selling 10 products/day at avg $50 profit = $1,500/month profit
-After costs ($700) = $800 net profit (first months)
-
-At 30 products/day = $45,000 gross profit/month
-After costs (scaled) = $35,000+ net profit
-
-## 11. LEGAL & COMPLIANCE
-
-⚠️ IMPORTANT CONSIDERATIONS:
-- Trademark: File "YouAndINotAI" trademark (protect brand)
-- Etsy requirements: Disclose Printful as production partner
-- Copyright: Ensure all designs are original
-- Privacy policy and terms of service required
-- Sales tax compliance (Square handles automatically)
-
-## 12. SCALING STRATEGY
-
-PHASE 1 (Months 1-3): Single platform, 30 core products
-PHASE 2 (Months 4-6): Multi-platform, 50+ products, influencer partnerships
-PHASE 3 (Months 7-12): International shipping, 100+ products, wholesale options
-PHASE 4 (Year 2+): Physical retail partnerships, premium collaborations, brand extensions
-"""
-
-# Save to file
-with open('anti_ai_automation_strategy.txt', 'w') as f:
-    f.write(automation_strategy)
-
-print("AUTOMATION STRATEGY DOCUMENT CREATED")
-print("=" * 60)
-print("\nKey Highlights:")
-print("- 72.75% average profit margin across all products")
-print("- Fully automated daily product uploads via API")
-print("- Social media marketing automated with SocialBee/Metricool")
-print("- Printful + Square integration for hands-free fulfillment")
-print("- Premium Apple-style positioning (quantity over IKEA)")
-print("- Estimated $800-35,000+ net profit potential per month")
-print("\nDocument saved to: anti_ai_automation_strategy.txt")
+if __name__ == '__main__':
+    main()
@@ -1,322 +1,24 @@
 
-# Create brand identity and design guidelines document
+from merch_store.reports import write_guide
 
-brand_identity = """
-YOUANDINOTAI BRAND IDENTITY GUIDE
-==================================
-Premium Anti-AI Merchandise Brand
 
-## BRAND POSITIONING
+def main():
+    # Create brand identity and design guidelines document (template: merch_store/guides/brand_identity.txt)
+    write_guide('brand_identity')
 
-Position: Luxury Anti-AI Movement
-Price Point: Premium (Apple) > Mass Market (IKEA)
-Target Audience: 
-- Age 25-45, college-educated professionals
-- Tech-aware skeptics and digital minimalists
-- Creative professionals (artists, writers, designers)
-- High-income consumers willing to pay for values-aligned products
+    print("BRAND IDENTITY GUIDE CREATED")
+    print("=" * 60)
+    print("\nBrand Positioning Summary:")
+    print("- Premium Anti-AI Movement (Apple-style luxury)")
+    print("- Target: Tech-aware professionals, ages 25-45")
+    print("- Logo: AI prohibition symbol (like no-smoking)")
+    print("- Colors: 80% monochrome + 20% earth tones/accents")
+    print("- Typography: SF Pro Display / Helvetica Neue (Apple-inspired)")
+    print("- Quality: GOTS organic cotton, genuine leather, premium materials")
+    print("- Price: 40-60% above mass market (justified by quality)")
+    print("- Messaging: Confident, intelligent, refined rebellion")
+    print("\nDocument saved to: youandinotai_brand_identity_guide.txt")
 
-## CORE BRAND VALUES
 
-1. HUMAN CRAFTSMANSHIP - Every product emphasizes human creation
-2. PREMIUM QUALITY - Materials and production rival luxury brands
-3. MINIMALIST DESIGN - Less is more; Apple-inspired aesthetics
-4. CONSCIOUS CONSUMPTION - Sustainable, ethical, meaningful purchases
-5. INTELLECTUAL REBELLION - Smart resistance, not angry protest
-
-## LOGO DESIGN CONCEPT
-
-Primary Symbol: AI with Prohibition Circle
-- Circle and diagonal line (like no-smoking sign)
-- Letters "AI" in center, crossed out
-- Minimalist, monochromatic design
-- Available in: Black on white, White on black, Embossed/debossed
-
-Logo Variations:
-1. Full lockup: Symbol + "YouAndINotAI" wordmark
-2. Icon only: Just the prohibition symbol (for small applications)
-3. Wordmark only: Clean sans-serif typography
-4. Badge version: Circular seal with text around perimeter
-
-Design Specifications:
-- Primary font: Helvetica Neue or San Francisco (Apple-style)
-- Weight: Light to Medium (avoid bold/heavy)
-- Spacing: Generous negative space
-- Proportions: Golden ratio (1.618) applied to elements
-
-## COLOR PALETTE
-
-PRIMARY COLORS (Apple-inspired neutrals):
-- Space Gray: #252526 (primary dark)
-- Cloud White: #F5F5F7 (primary light)
-- Pure Black: #000000 (premium applications)
-- Aluminum Silver: #E8E8E8 (accents)
-
-ACCENT COLORS (Use sparingly):
-- Warning Red: #FF3B30 (prohibition symbol only)
-- Earth Green: #2C5530 (sustainability messaging)
-- Bronze Gold: #B8926A (premium/luxury touches)
-
-COLOR USAGE RULES:
-- 80% grayscale (black/white/gray)
-- 15% earth tones (when needed)
-- 5% accent colors (prohibition red, etc.)
-
-## TYPOGRAPHY
-
-PRIMARY FONT: SF Pro Display (Apple) or Helvetica Neue
-- Headlines: Light/Regular weight, large size
-- Body: Regular weight, comfortable reading size
-- Minimalist spacing, generous line height
-
-SECONDARY FONT: Georgia or Baskerville (for editorial content)
-- Used only for blog posts, manifestos, storytelling
-
-RULES:
-- Never use more than 2 fonts
-- Never use decorative/script fonts
-- All-caps sparingly, only for emphasis
-- Sentence case preferred over title case
-
-## PRODUCT DESIGN PHILOSOPHY
-
-### Minimalist Aesthetic:
-- Single symbol/message per product (avoid clutter)
-- Monochromatic color schemes preferred
-- Small, subtle logo placement (not billboard-style)
-- Premium blank canvas (let product quality speak)
-
-### Quality Indicators:
-APPAREL:
-- Organic cotton (GOTS certified)
-- Heavyweight fabric (6-7 oz minimum)
-- Reinforced stitching
-- Tagless labels with printed branding
-
-ACCESSORIES:
-- Genuine leather (full-grain, vegetable-tanned)
-- Solid stainless steel (304 grade minimum)
-- Natural materials (avoid plastics)
-
-HOME DECOR:
-- Museum-quality printing
-- Sustainable wood frames
-- Archival-grade materials
-
-### Product Photography Style:
-- Clean white or light gray backgrounds
-- Minimal props (Apple product photography style)
-- Natural lighting, soft shadows
-- Focus on product details and texture
-- Lifestyle shots: minimalist, modern interiors
-
-## MESSAGING & COPYWRITING
-
-### Tone of Voice:
-- Confident but not aggressive
-- Intelligent but not pretentious  
-- Passionate but not preachy
-- Witty but not silly
-
-### Sample Product Descriptions:
-
-BAD (too aggressive):
-"FIGHT THE AI REVOLUTION! Wear this shirt and RESIST!"
-
-GOOD (premium, thoughtful):
-"A quiet statement for those who value human creativity. Crafted from organic cotton with precision embroidery, this piece speaks to a movement—without shouting."
-
-### Tagline Options:
-1. "Crafted by Humans, For Humans"
-2. "Premium Quality. Zero Algorithms."
-3. "The Human Touch, Refined."
-4. "Thoughtfully Made. Algorithmically Free."
-5. "Where Craft Meets Conviction"
-
-### Content Pillars (for social media/blog):
-1. Human Creativity Spotlight (artist features)
-2. Anti-AI Philosophy (thoughtful essays)
-3. Product Stories (materials, makers, process)
-4. Community Voices (customer testimonials)
-5. Sustainability & Ethics (supply chain transparency)
-
-## PACKAGING & PRESENTATION
-
-### Unboxing Experience (Premium Tier):
-- Minimal cardboard box (kraft or black)
-- Tissue paper wrapping (unbleached)
-- Brand seal sticker (embossed logo)
-- Thank you card (letterpress printed)
-- Care instructions card (how to wash, maintain)
-
-Text on packaging:
-"Crafted by human hands.
-Designed with intention.
-Made for you."
-
-### Shipping Labels:
-- Clean, minimal design
-- "Handle with care - Human made inside" messaging
-- Recyclable materials noted
-
-## RETAIL INTEGRATION (Date App Connection)
-
-### How Anti-AI Brand Supports Date App:
-The merchandise serves as physical artifacts of the anti-AI philosophy that underpins the YouAndINotAI dating app.
-
-CROSS-PROMOTION IDEAS:
-1. QR code on product tags → Download dating app
-2. App users get 15% discount code for merch store
-3. Merch buyers get premium app features for free
-4. Shared brand story: "Real connections, real products"
-
-CONSISTENT MESSAGING:
-Dating App: "Real people, real connections, no algorithms"
-Merch Store: "Real craftsmanship, real values, no algorithms"
-
-## COMPETITIVE DIFFERENTIATION
-
-VS. CHEAP ETSY ANTI-AI MERCH:
-Them: $19.99 basic tees, poor quality, amateur designs
-Us: $49.99 premium organic tees, luxury finishes, refined aesthetics
-
-VS. LUXURY FASHION BRANDS:
-Them: $300+ tees with just brand logo
-Us: $49-89 tees with meaningful message + premium quality
-
-UNIQUE SELLING PROPOSITION:
-"The only anti-AI brand that doesn't compromise on quality. 
-Premium materials, timeless design, and a message that matters."
-
-## VISUAL MERCHANDISING
-
-### Website Design (Square Online):
-LAYOUT:
-- Hero image: Minimalist product photo, single line of text
-- Product grid: Clean, generous whitespace between items
-- Product pages: Large images, minimal text, storytelling
-- About page: Brand manifesto, founder story, values
-
-NAVIGATION:
-- Simple menu: Shop, About, Manifesto, Contact
-- Sticky header with logo and cart icon
-- Footer: Social links, email signup, policies
-
-### Instagram Aesthetic:
-GRID STRATEGY (9-post pattern):
-Row 1: Product white background / Lifestyle shot / Detail close-up
-Row 2: Quote graphic / Product in use / Behind the scenes
-Row 3: Customer photo / Product white background / Brand message
-
-COLOR CONSISTENCY:
-- Maintain monochromatic feel
-- Occasional earth tone accents
-- Never garish or overly colorful
-
-## MANIFESTO (Brand Story)
-
-"In a world racing toward automation, we choose intention.
-
-Where algorithms curate, we create.
-Where AI generates, we craft.
-Where machines optimize, we humanize.
-
-This is not a rejection of technology.
-It's a celebration of what makes us human.
-
-Every product in our collection is made by human hands,
-designed by human minds, and created for human connection.
-
-We believe in the power of craft.
-The beauty of imperfection.
-The value of thought.
-
-This is the anti-AI movement—refined.
-
-Welcome to YouAndINotAI."
-
-## LAUNCH MARKETING STRATEGY
-
-### Pre-Launch (2 weeks before):
-- Teaser posts on social media
-- Email list building with manifesto download
-- Influencer seeding (send free products to aligned creators)
-- Press outreach to tech/design publications
-
-### Launch Week:
-- Limited edition first-run products
-- Founder story video (human-made, authentic)
-- Social media blitz with consistent messaging
-- Email campaign to list
-
-### Post-Launch (ongoing):
-- Weekly new product drops (build anticipation)
-- User-generated content campaigns
-- Collaborations with artists and designers
-- Editorial content (blog posts about anti-AI philosophy)
-
-## SOCIAL PROOF & CREDIBILITY
-
-### Trust Signals to Emphasize:
-- GOTS certified organic materials
-- Made in USA (or ethical factories)
-- Plastic-free packaging
-- 1% for the Planet member (environmental commitment)
-- B-Corp certified (if applicable)
-
-### Reviews & Testimonials Strategy:
-- Send follow-up email requesting review (automated)
-- Feature customer photos prominently
-- Share stories of why people bought (the meaning matters)
-
-## PRICING PSYCHOLOGY
-
-### Premium Positioning Tactics:
-- Never show "sale" prices on main products
-- Occasional limited releases at higher prices (creates scarcity)
-- Bundle deals to increase perceived value
-- Free shipping threshold ($75+) to increase cart size
-
-### Price Anchoring:
-- Show most expensive items first (makes others seem reasonable)
-- "Premium Collection" vs "Essential Collection" tiers
-- Limited edition items at 2x normal price (anchors perception)
-
-## SUSTAINABILITY MESSAGING
-
-### Avoid Greenwashing:
-- Be specific: "Organic cotton grown in Turkey, printed in California"
-- Show the process: Behind-the-scenes of production
-- Admit imperfections: "We're on a journey, not perfect yet"
-
-### Circular Economy:
-- Product take-back program (recycle old tees for discount)
-- Repair services for leather goods
-- Donate portion of profits to human-centered causes
-
----
-
-This brand identity guide should be referenced for ALL creative decisions.
-Consistency is key to building a premium, recognizable brand.
-
-Remember: We're not the cheapest. We're the best.
-Quality over quantity. Premium over populism.
-Apple, not IKEA.
-"""
-
-# Save brand identity document
-with open('youandinotai_brand_identity_guide.txt', 'w') as f:
-    f.write(brand_identity)
-
-print("BRAND IDENTITY GUIDE CREATED")
-print("=" * 60)
-print("\nBrand Positioning Summary:")
-print("- Premium Anti-AI Movement (Apple-style luxury)")
-print("- Target: Tech-aware professionals, ages 25-45")
-print("- Logo: AI prohibition symbol (like no-smoking)")
-print("- Colors: 80% monochrome + 20% earth tones/accents")
-print("- Typography: SF Pro Display / Helvetica Neue (Apple-inspired)")
-print("- Quality: GOTS organic cotton, genuine leather, premium materials")
-print("- Price: 40-60% above mass market (justified by quality)")
-print("- Messaging: Confident, intelligent, refined rebellion")
-print("\nDocument saved to: youandinotai_brand_identity_guide.txt")
+if __name__ == '__main__':
+    main()
@@ -1,523 +1,26 @@
 
-# Create technical implementation guide with API code examples
-
-technical_guide = """
-TECHNICAL IMPLEMENTATION GUIDE
-===============================
-YouAndINotAI Merch Store - Complete Automation Setup
-
-## PART 1: SQUARE + PRINTFUL INTEGRATION
-
-### Step 1: Account Setup
-1. Create Square Online account (squareup.com)
-2. Create Printful account (printful.com)
-3. Install Printful app from Square App Marketplace
-4. Authorize connection between accounts
-
-### Step 2: Printful Integration Test
-- Design first product in Printful
-- Push to Square Online store
-- Place test order to verify automated fulfillment
-- Confirm tracking number auto-sync
-
-## PART 2: DAILY PRODUCT UPLOAD AUTOMATION
-
-### Method 1: Python Script + Square API
-
-```python
-import requests
-import json
-from datetime import datetime
-import pandas as pd
-
-# Square API Configuration
-SQUARE_ACCESS_TOKEN = 'YOUR_ACCESS_TOKEN_HERE'
-SQUARE_LOCATION_ID = 'YOUR_LOCATION_ID'
-SQUARE_API_BASE = 'https://connect.squareup.com/v2'
-
-headers = {
-    'Square-Version': '2024-10-17',
-    'Authorization': f'Bearer {SQUARE_ACCESS_TOKEN}',
-    'Content-Type': 'application/json'
-}
-
-def get_next_product_from_catalog():
-    \"\"\"Read CSV and get next product to upload based on day\"\"\"
-    df = pd.read_csv('anti_ai_merch_store_30day_catalog.csv')
-    current_day = datetime.now().day % 30 + 1  # Cycle through 30 days
-    product = df[df['Day'] == current_day].iloc[0]
-    return product
-
-def create_square_product(product_data):
-    \"\"\"Create product in Square catalog via API\"\"\"
-    
-    product_payload = {
-        "idempotency_key": f"product-{datetime.now().timestamp()}",
-        "object": {
-            "type": "ITEM",
-            "id": f"#product-{product_data['Day']}",
-            "item_data": {
-                "name": product_data['Product_Name'],
-                "description": f"Premium anti-AI merchandise. {product_data['Product_Name']}. Crafted by humans, for humans. Part of our {product_data['Product_Category']} collection.",
-                "category_id": "#category-anti-ai",
-                "variations": [
-                    {
-                        "type": "ITEM_VARIATION",
-                        "id": f"#variation-{product_data['Day']}",
-                        "item_variation_data": {
-                            "name": "Regular",
-                            "pricing_type": "FIXED_PRICING",
-                            "price_money": {
-                                "amount": int(product_data['Retail_Price'] * 100),  # Convert to cents
-                                "currency": "USD"
-                            }
-                        }
-                    }
-                ]
-            }
-        }
-    }
-    
-    response = requests.post(
-        f"{SQUARE_API_BASE}/catalog/object",
-        headers=headers,
-        json=product_payload
-    )
-    
-    return response.json()
-
-def schedule_social_media_posts(product_data):
-    \"\"\"Generate social media content for new product\"\"\"
-    
-    post_variations = [
-        f"New arrival: {product_data['Product_Name']}. Where craft meets conviction. 🚫🤖",
-        f"Premium quality. Zero algorithms. Introducing: {product_data['Product_Name']}",
-        f"Thoughtfully made. Algorithmically free. Shop {product_data['Product_Name']} now.",
-        f"The human touch, refined. {product_data['Product_Name']} - available now.",
-        f"Crafted by humans, for humans. {product_data['Product_Name']} joins our collection."
-    ]
-    
-    # Save to CSV for social media tool to import
-    posts_df = pd.DataFrame({
-        'date': [datetime.now().strftime('%Y-%m-%d')] * 5,
-        'time': ['09:00', '12:00', '15:00', '18:00', '21:00'],
-        'platform': ['Instagram', 'Facebook', 'TikTok', 'Pinterest', 'Twitter'],
-        'content': post_variations,
-        'product_url': [f"https://youandinotai.square.site/product/{product_data['Product_Name'].lower().replace(' ', '-')}"] * 5
-    })
-    
-    posts_df.to_csv(f"social_posts_{datetime.now().strftime('%Y%m%d')}.csv", index=False)
-    
-    return post_variations
-
-def main_daily_automation():
-    \"\"\"Main function to run daily\"\"\"
-    print("🚀 Starting daily product automation...")
-    
-    # Get next product from catalog
-    product = get_next_product_from_catalog()
-    print(f"📦 Product for today: {product['Product_Name']}")
-    
-    # Create product in Square
-    result = create_square_product(product)
-    print(f"✅ Product created in Square: {result}")
-    
-    # Schedule social media posts
-    posts = schedule_social_media_posts(product)
-    print(f"📱 {len(posts)} social media posts scheduled")
-    
-    print("✨ Daily automation complete!")
-
-if __name__ == "__main__":
-    main_daily_automation()
-```
-
-### Cron Job Setup (Linux/Mac)
-```bash
-# Edit crontab
-crontab -e
-
-# Add this line to run script daily at 9 AM
-0 9 * * * /usr/bin/python3 /path/to/daily_product_upload.py
-
-# Check logs
-0 9 * * * /usr/bin/python3 /path/to/daily_product_upload.py >> /path/to/automation.log 2>&1
-```
-
-### Windows Task Scheduler Setup
-1. Open Task Scheduler
-2. Create Basic Task: "Daily Product Upload"
-3. Trigger: Daily at 9:00 AM
-4. Action: Start a program
-5. Program: python.exe
-6. Arguments: C:\\path\\to\\daily_product_upload.py
-
-## PART 3: PRINTFUL API INTEGRATION
-
-### Printful Product Creation
-```python
-import requests
-
-PRINTFUL_API_KEY = 'YOUR_PRINTFUL_API_KEY'
-PRINTFUL_API_BASE = 'https://api.printful.com'
-
-headers = {
-    'Authorization': f'Bearer {PRINTFUL_API_KEY}',
-    'Content-Type': 'application/json'
-}
-
-def create_printful_product(product_name, design_file_url, retail_price):
-    \"\"\"Create product in Printful and sync to Square\"\"\"
-    
-    payload = {
-        "sync_product": {
-            "name": product_name,
-            "thumbnail": design_file_url
-        },
-        "sync_variants": [
-            {
-                "retail_price": retail_price,
-                "variant_id": 4012,  # Example: Bella+Canvas 3001 (T-shirt)
-                "files": [
-                    {
-                        "url": design_file_url,
-                        "type": "front"
-                    }
-                ]
-            }
-        ]
-    }
-    
-    response = requests.post(
-        f"{PRINTFUL_API_BASE}/store/products",
-        headers=headers,
-        json=payload
-    )
-    
-    return response.json()
-
-# Example usage
-create_printful_product(
-    product_name="Premium Anti-AI Logo T-Shirt",
-    design_file_url="https://yourserver.com/designs/anti-ai-logo.png",
-    retail_price="49.99"
-)
-```
-
-## PART 4: SOCIAL MEDIA AUTOMATION
-
-### SocialBee API Integration
-```python
-import requests
-
-SOCIALBEE_API_KEY = 'YOUR_SOCIALBEE_API_KEY'
-SOCIALBEE_WORKSPACE_ID = 'YOUR_WORKSPACE_ID'
-
-def post_to_socialbee(content, image_url, platforms):
-    \"\"\"Schedule post across multiple platforms\"\"\"
-    
-    url = f"https://api.socialbee.io/v1/posts"
-    headers = {
-        'Authorization': f'Bearer {SOCIALBEE_API_KEY}',
-        'Content-Type': 'application/json'
-    }
-    
-    payload = {
-        "workspace_id": SOCIALBEE_WORKSPACE_ID,
-        "text": content,
-        "media_urls": [image_url],
-        "platforms": platforms,  # ['instagram', 'facebook', 'twitter']
-        "post_at": "next_available"  # Or specific datetime
-    }
-    
-    response = requests.post(url, headers=headers, json=payload)
-    return response.json()
-
-# Example: Schedule post for new product
-post_to_socialbee(
-    content="New arrival: Premium Anti-AI Logo T-Shirt. Crafted by humans, for humans. 🚫🤖 #AntiAI #HumanMade",
-    image_url="https://youandinotai.com/products/tshirt.jpg",
-    platforms=['instagram', 'facebook', 'pinterest']
-)
-```
-
-### Alternative: Hootsuite Bulk Upload
-```python
-import pandas as pd
-from datetime import datetime, timedelta
-
-def generate_hootsuite_csv(product_data, num_posts=7):
-    \"\"\"Generate CSV for Hootsuite bulk upload\"\"\"
-    
-    posts = []
-    base_date = datetime.now()
-    
-    for i in range(num_posts):
-        post_date = base_date + timedelta(days=i)
-        posts.append({
-            'Date': post_date.strftime('%Y-%m-%d'),
-            'Time': '09:00' if i % 2 == 0 else '18:00',
-            'Profile': 'Instagram,Facebook,Pinterest',
-            'Message': f"Day {i+1}: {product_data['Product_Name']}. Premium quality, zero algorithms. Shop now! #AntiAI",
-            'Link': f"https://youandinotai.square.site/product/{product_data['Product_Name'].lower().replace(' ', '-')}"
-        })
-    
-    df = pd.DataFrame(posts)
-    df.to_csv('hootsuite_bulk_upload.csv', index=False)
-    return df
-
-# Generate posts for next week
-product = get_next_product_from_catalog()
-generate_hootsuite_csv(product)
-```
-
-## PART 5: EMAIL AUTOMATION (KLAVIYO)
-
-### Klaviyo API - New Product Announcement
-```python
-import requests
-
-KLAVIYO_API_KEY = 'YOUR_KLAVIYO_PRIVATE_KEY'
-KLAVIYO_LIST_ID = 'YOUR_LIST_ID'
-
-def send_new_product_email(product_data):
-    \"\"\"Send email to subscribers about new product\"\"\"
-    
-    url = 'https://a.klaviyo.com/api/v2/campaigns'
-    headers = {
-        'Authorization': f'Klaviyo-API-Key {KLAVIYO_API_KEY}',
-        'Content-Type': 'application/json'
-    }
-    
-    email_content = f\"\"\"
-    <h1>{product_data['Product_Name']}</h1>
-    <p>New arrival in our premium anti-AI collection.</p>
-    <p>Crafted by humans, for humans. Zero algorithms involved.</p>
-    <p><strong>${product_data['Retail_Price']}</strong></p>
-    <a href="https://youandinotai.square.site">Shop Now</a>
-    \"\"\"
-    
-    payload = {
-        "list_id": KLAVIYO_LIST_ID,
-        "template_id": "YOUR_TEMPLATE_ID",
-        "subject": f"New Arrival: {product_data['Product_Name']}",
-        "from_email": "hello@youandinotai.com",
-        "from_name": "YouAndINotAI",
-        "html": email_content
-    }
-    
-    response = requests.post(url, headers=headers, json=payload)
-    return response.json()
-```
-
-## PART 6: ANALYTICS & TRACKING
-
-### Google Analytics 4 Setup
-```html
-<!-- Add to Square Online site header -->
-<script async src="https://www.googletagmanager.com/gtag/js?id=G-XXXXXXXXXX"></script>
-<script>
-  window.dataLayer = window.dataLayer || [];
-  function gtag(){dataLayer.push(arguments);}
-  gtag('js', new Date());
-  gtag('config', 'G-XXXXXXXXXX');
-</script>
-```
-
-### Facebook Pixel Tracking
-```html
-<!-- Add to Square Online site header -->
-<script>
-!function(f,b,e,v,n,t,s)
-{if(f.fbq)return;n=f.fbq=function(){n.callMethod?
-n.callMethod.apply(n,arguments):n.queue.push(arguments)};
-if(!f._fbq)f._fbq=n;n.push=n;n.loaded=!0;n.version='2.0';
-n.queue=[];t=b.createElement(e);t.async=!0;
-t.src=v;s=b.getElementsByTagName(e)[0];
-s.parentNode.insertBefore(t,s)}(window, document,'script',
-'https://connect.facebook.net/en_US/fbevents.js');
-fbq('init', 'YOUR_PIXEL_ID');
-fbq('track', 'PageView');
-</script>
-```
-
-## PART 7: AUTOMATED PRICING OPTIMIZATION
-
-### Dynamic Pricing Script
-```python
-import pandas as pd
-from datetime import datetime
-
-def optimize_pricing(product_id, sales_data, competitor_prices):
-    \"\"\"Adjust pricing based on performance and competition\"\"\"
-    
-    # Calculate current metrics
-    conversion_rate = sales_data['sales'] / sales_data['views']
-    
-    # Pricing rules
-    if conversion_rate < 0.01:  # Less than 1% conversion
-        new_price = current_price * 0.95  # Reduce by 5%
-    elif conversion_rate > 0.05:  # Greater than 5% conversion
-        new_price = current_price * 1.10  # Increase by 10%
-    else:
-        new_price = current_price  # Keep same
-    
-    # Check competitor pricing
-    avg_competitor_price = sum(competitor_prices) / len(competitor_prices)
-    if new_price < avg_competitor_price * 1.2:  # Should be 20% higher (premium)
-        new_price = avg_competitor_price * 1.3
-    
-    return new_price
-
-# Run weekly to adjust prices
-```
-
-## PART 8: CUSTOMER SERVICE AUTOMATION
-
-### Tidio Chatbot Setup (Square Integration)
-1. Install Tidio from Square App Marketplace
-2. Configure FAQ responses:
-   - "What is your shipping time?" → "3-7 business days via Printful"
-   - "What materials do you use?" → "Organic cotton, genuine leather, premium materials"
-   - "Can I return my order?" → "Yes, 30-day return policy"
-
-### Automated Email Responses
-```python
-# Zapier workflow:
-# Trigger: New Square order
-# Action 1: Send confirmation email
-# Action 2: Add to Klaviyo email list
-# Action 3: Schedule review request email (7 days later)
-```
-
-## PART 9: INVENTORY MANAGEMENT
-
-### Printful Auto-Sync
-- Stock levels sync automatically (print-on-demand = always in stock)
-- If product discontinued by Printful, webhook notifies you
-- Automatic product archiving if out of stock
-
-### Multi-Platform Inventory Sync
-```python
-# Use API2Cart for multi-platform sync
-import requests
-
-API2CART_KEY = 'YOUR_API2CART_KEY'
-
-def sync_inventory_across_platforms(product_sku, quantity):
-    \"\"\"Sync inventory to Etsy, eBay, Amazon simultaneously\"\"\"
-    
-    url = f"https://api.api2cart.com/v1.1/product.update.json"
-    params = {
-        'api_key': API2CART_KEY,
-        'store_key': 'YOUR_STORE_KEY',
-        'product_id': product_sku,
-        'quantity': quantity
-    }
-    
-    response = requests.get(url, params=params)
-    return response.json()
-```
-
-## PART 10: DEPLOYMENT CHECKLIST
-
-WEEK 1: FOUNDATION
-☐ Square Online store created
-☐ Printful account linked
-☐ Domain purchased and connected
-☐ SSL certificate enabled
-☐ Payment processing configured
-☐ First 7 products manually uploaded
-
-WEEK 2: AUTOMATION
-☐ Daily upload script coded and tested
-☐ Cron job scheduled
-☐ Social media accounts created
-☐ SocialBee/Metricool account set up
-☐ Email automation configured (Klaviyo)
-☐ Analytics installed (GA4 + Facebook Pixel)
-
-WEEK 3: LAUNCH
-☐ Test order placed and fulfilled
-☐ All automation workflows tested
-☐ Customer service chatbot configured
-☐ Launch email to waitlist
-☐ Social media campaign begins
-☐ Paid ads launched
-
-WEEK 4: OPTIMIZATION
-☐ Review analytics data
-☐ Adjust pricing based on performance
-☐ A/B test product photos
-☐ Expand to Etsy marketplace
-☐ Influencer outreach begins
-
-## PART 11: MONITORING & MAINTENANCE
-
-### Daily Checks (5 minutes):
-- Verify daily product uploaded successfully
-- Check for any failed orders
-- Respond to customer DMs
-
-### Weekly Checks (30 minutes):
-- Review sales analytics
-- Adjust social media strategy
-- Update product descriptions if needed
-- Check competitor pricing
-
-### Monthly Checks (2 hours):
-- Financial review (profit margins, costs)
-- Design next month's products
-- Update automation scripts if needed
-- Strategic planning session
-
-## PART 12: SCALING AUTOMATION
-
-### When to Expand:
-- After 50 sales: Add Etsy marketplace
-- After 100 sales: Add Amazon Merch on Demand
-- After 250 sales: Hire VA for customer service
-- After 500 sales: Expand to international shipping
-- After 1000 sales: Consider wholesale accounts
-
-### Advanced Automation:
-- AI-generated product descriptions (ironic, but efficient)
-- Automated inventory forecasting
-- Dynamic pricing algorithms
-- Predictive analytics for trending products
-- Automated influencer outreach campaigns
-
----
-
-IMPORTANT NOTES:
-- Replace ALL placeholder API keys with real credentials
-- Test automation in sandbox/test mode before production
-- Keep backups of all automation scripts
-- Monitor logs daily for errors
-- Update dependencies regularly for security
-
-SECURITY:
-- Store API keys in environment variables, never in code
-- Use .gitignore to prevent committing secrets
-- Enable 2FA on all accounts
-- Regular security audits of integrations
-"""
-
-# Save technical guide
-with open('technical_implementation_guide.txt', 'w') as f:
-    f.write(technical_guide)
-
-print("TECHNICAL IMPLEMENTATION GUIDE CREATED")
-print("=" * 60)
-print("\nIncluded Components:")
-print("✓ Square API integration code")
-print("✓ Printful API automation")
-print("✓ Social media automation (SocialBee, Hootsuite)")
-print("✓ Email marketing automation (Klaviyo)")
-print("✓ Analytics tracking setup (GA4, Facebook Pixel)")
-print("✓ Daily product upload Python script")
-print("✓ Cron job scheduling instructions")
-print("✓ Customer service chatbot configuration")
-print("✓ Inventory management automation")
-print("✓ Complete deployment checklist")
-print("\nDocument saved to: technical_implementation_guide.txt")
+from merch_store.reports import write_guide
+
+
+def main():
+    # Create technical implementation guide with API code examples (template: merch_store/guides/technical_guide.txt)
+    write_guide('technical_guide')
+
+    print("TECHNICAL IMPLEMENTATION GUIDE CREATED")
+    print("=" * 60)
+    print("\nIncluded Components:")
+    print("✓ Square API integration code")
+    print("✓ Printful API automation")
+    print("✓ Social media automation (SocialBee, Hootsuite)")
+    print("✓ Email marketing automation (Klaviyo)")
+    print("✓ Analytics tracking setup (GA4, Facebook Pixel)")
+    print("✓ Daily product upload Python script")
+    print("✓ Cron job scheduling instructions")
+    print("✓ Customer service chatbot configuration")
+    print("✓ Inventory management automation")
+    print("✓ Complete deployment checklist")
+    print("\nDocument saved to: technical_implementation_guide.txt")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,374 +1,62 @@
 
-# Create executive summary with quick-start guide
-
-exec_summary = """
-YOUANDINOTAI MERCH STORE
-========================
-EXECUTIVE SUMMARY & QUICK-START GUIDE
-
-## PROJECT OVERVIEW
-
-Brand: YouAndINotAI
-Mission: Premium anti-AI merchandise with Apple-level quality
-Positioning: Luxury over mass market (Apple > IKEA)
-Business Model: Automated dropshipping with print-on-demand
-Target Market: Tech-aware professionals, 25-45, high-income
-
-## KEY METRICS & PROJECTIONS
-
-PROFIT MARGINS:
-- Average: 72.75% across all products
-- Range: 66-79% depending on product
-- Average profit per item: $50.08
-
-REVENUE PROJECTIONS:
-Month 1-3 (10 products/day):   $15,000/month gross | $8,000 net
-Month 4-6 (20 products/day):   $30,000/month gross | $20,000 net
-Month 7-12 (30+ products/day): $45,000/month gross | $35,000+ net
-
-STARTUP COSTS:
-Initial setup: ~$200 (domain, tools, samples)
-Monthly operations: $50-150 (automation tools)
-Marketing budget: $500-1000/month (scales with revenue)
-
-ROI: 400-800% after first 3 months
-
-## AUTOMATION STACK
-
-1. FULFILLMENT: Printful (print-on-demand)
-2. STOREFRONT: Square Online (free + 2.9% per transaction)
-3. DAILY UPLOADS: Python script + Cron job (automated)
-4. SOCIAL MEDIA: SocialBee or Metricool ($18-29/month)
-5. EMAIL: Klaviyo (free up to 250 contacts)
-6. ANALYTICS: Google Analytics + Facebook Pixel (free)
-7. CUSTOMER SERVICE: Tidio chatbot (free tier available)
-
-Total Monthly Cost: $50-150 until scale
-100% Automated: Yes (after initial setup)
-
-## 30-DAY PRODUCT CALENDAR
-
-Daily product additions ensure fresh inventory and social content:
-
-Week 1: Premium Apparel (T-shirts, Hoodies)
-Week 2: Tech Accessories (Phone cases, Laptop sleeves)
-Week 3: Home Decor (Wall art, Throw pillows)
-Week 4: Drinkware & Accessories (Mugs, Bottles, Pins)
-
-Each product includes:
-- Organic/premium materials
-- Anti-AI prohibition logo
-- Minimalist Apple-style design
-- Professional product photography
-- 5+ social media posts auto-generated
-- Email announcement to subscribers
-
-## BRAND IDENTITY HIGHLIGHTS
-
-LOGO: AI letters with prohibition circle (like no-smoking sign)
-COLORS: 80% monochrome + 20% earth tones
-FONTS: SF Pro Display (Apple) or Helvetica Neue
-QUALITY: GOTS organic cotton, genuine leather, stainless steel
-MESSAGING: "Crafted by humans, for humans"
-TONE: Confident, intelligent, refined rebellion
-
-DIFFERENTIATION:
-- Etsy anti-AI merch: $19.99 basic tees, amateur designs
-- YouAndINotAI: $49.99 premium organic tees, luxury finishes
-
-## MARKETING STRATEGY
-
-ORGANIC CHANNELS:
-- Instagram: Minimalist grid, product + lifestyle shots
-- Pinterest: Home decor and fashion boards
-- TikTok: Behind-the-scenes, unboxing, anti-AI philosophy
-- Reddit: r/technology, r/anticonsumption, r/simpleliving
-- LinkedIn: Thought leadership on AI ethics
-
-PAID ADVERTISING:
-- Facebook/Instagram Ads: $20-50/day targeting
-- Pinterest Promoted Pins: High-intent shoppers
-- Google Shopping: Product listing ads
-- Influencer partnerships: Micro-influencers (10-50k followers)
-
-CONTENT PILLARS:
-1. New product launches (daily)
-2. Human creativity spotlights (weekly)
-3. Anti-AI philosophy (bi-weekly)
-4. Customer testimonials (ongoing)
-5. Behind-the-scenes production (weekly)
-
-## INTEGRATION WITH DATE APP
-
-The merch store supports and amplifies the YouAndINotAI dating app:
-
-SYNERGIES:
-- Shared brand message: "Real humans, zero algorithms"
-- Cross-promotion: App users get merch discounts
-- Merch buyers get premium app features
-- Unified brand experience across digital + physical
-
-MARKETING COLLABORATION:
-- QR codes on product tags → Download app
-- App push notifications → New merch drops
-- Joint social media campaigns
-- Shared email list (with segmentation)
-
-## QUICK-START IMPLEMENTATION (4 WEEKS)
-
-WEEK 1: FOUNDATION
-□ Create Square Online store
-□ Set up Printful account and connect to Square
-□ Purchase domain (youandinotai.com)
-□ Design first 7 products in Printful
-□ Push products to Square store
-□ Configure payment processing
-□ Place test order to verify fulfillment
-TIME: 10-15 hours
-
-WEEK 2: AUTOMATION
-□ Write daily product upload Python script
-□ Set up cron job for daily execution
-□ Create social media accounts (Instagram, Facebook, Pinterest, TikTok)
-□ Set up SocialBee or Metricool
-□ Schedule first 30 days of social posts
-□ Configure Klaviyo email automation
-□ Install analytics tracking (GA4 + Facebook Pixel)
-TIME: 12-18 hours
-
-WEEK 3: LAUNCH PREPARATION
-□ Build email waitlist with lead magnet (brand manifesto PDF)
-□ Create launch content (videos, graphics, copy)
-□ Reach out to micro-influencers for product seeding
-□ Set up customer service chatbot (Tidio)
-□ Final testing of all automation workflows
-□ Create media kit for press outreach
-TIME: 10-12 hours
-
-WEEK 4: GO LIVE
-□ Official launch announcement
-□ Email to waitlist
-□ Social media blitz
-□ Launch paid advertising campaigns
-□ Monitor all systems and optimize
-□ Respond to first customers
-□ Gather testimonials and reviews
-TIME: 5-10 hours + ongoing monitoring
-
-TOTAL SETUP TIME: 37-55 hours (spread over 4 weeks)
-ONGOING TIME: 1-2 hours/week after automation stabilizes
-
-## SUCCESS METRICS (KPIs)
-
-MONTH 1 GOALS:
-- 100+ email subscribers
-- 1,000+ social media followers
-- 50+ orders ($2,500 revenue)
-- 4.0+ average product review
-
-MONTH 3 GOALS:
-- 500+ email subscribers
-- 5,000+ social media followers
-- 300+ orders ($15,000 revenue)
-- Expansion to Etsy marketplace
-
-MONTH 6 GOALS:
-- 1,500+ email subscribers
-- 15,000+ social media followers
-- 800+ orders ($40,000 revenue)
-- Amazon Merch on Demand launched
-- First influencer collaboration
-
-YEAR 1 GOALS:
-- 5,000+ email subscribers
-- 50,000+ social media followers
-- 5,000+ orders ($250,000 revenue)
-- Multi-platform presence (Square, Etsy, Amazon, eBay)
-- Physical retail partnerships
-- B-Corp certification consideration
-
-## RISK MITIGATION
-
-RISK: Printful quality issues
-MITIGATION: Order samples of every product before listing, monitor reviews
-
-RISK: Automation script failures
-MITIGATION: Daily log monitoring, backup manual process, error alerts
-
-RISK: Social media account bans
-MITIGATION: Follow platform guidelines, avoid spammy behavior, diversify
-
-RISK: Low conversion rates
-MITIGATION: A/B test product photos, pricing, descriptions, optimize SEO
-
-RISK: Copycat competitors
-MITIGATION: File trademark, build brand loyalty, focus on quality over price
-
-RISK: Shipping delays (Printful)
-MITIGATION: Set realistic expectations, proactive communication, offer refunds
-
-## LEGAL CONSIDERATIONS
-
-REQUIRED:
-☑ Business entity formation (LLC recommended)
-☑ EIN (Employer Identification Number)
-☑ Business bank account
-☑ Square merchant account
-☑ Terms of Service on website
-☑ Privacy Policy on website
-☑ Refund/Return policy
-☑ GDPR compliance (if selling to EU)
-
-RECOMMENDED:
-☑ Trademark registration for "YouAndINotAI"
-☑ Copyright protection for logo and designs
-☑ Business insurance (general liability)
-☑ Contracts with any partners/influencers
-
-ONGOING:
-☑ Sales tax collection (Square handles automatically)
-☑ Quarterly estimated tax payments
-☑ Annual tax filing
-☑ Business license renewal
-
-## COMPETITIVE ADVANTAGES
-
-1. QUALITY: Premium materials justify higher prices
-2. AUTOMATION: Fully hands-free after setup
-3. BRANDING: Apple-level design and positioning
-4. MESSAGING: Intelligent anti-AI stance (not angry/aggressive)
-5. INTEGRATION: Synergy with dating app amplifies both
-6. SCALABILITY: Daily product additions keep store fresh
-7. PROFITABILITY: 72.75% margins = sustainable growth
-
-## NEXT STEPS (IMMEDIATE)
-
-TODAY:
-1. Review all documentation provided
-2. Create Square Online and Printful accounts
-3. Purchase domain name
-4. Start email waitlist landing page
-
-THIS WEEK:
-5. Design first 7 products in Printful
-6. Order product samples for quality check
-7. Set up social media accounts
-8. Write brand manifesto content
-
-NEXT WEEK:
-9. Begin coding automation scripts
-10. Schedule first month of social posts
-11. Reach out to potential micro-influencers
-12. Create launch email campaigns
-
-## SUPPORT RESOURCES
-
-TECHNICAL SUPPORT:
-- Square Online: support.squareup.com
-- Printful: help.printful.com
-- API Documentation: developer.squareup.com
-
-DESIGN RESOURCES:
-- Canva Pro: canva.com (for social graphics)
-- Unsplash: unsplash.com (free stock photos)
-- Printful Mockup Generator: printful.com/mockup-generator
-
-EDUCATION:
-- Square Online webinars (free)
-- Printful YouTube channel (tutorials)
-- Shopify blog (ecommerce best practices)
-- ConversionXL (optimization strategies)
-
-COMMUNITY:
-- r/ecommerce (Reddit)
-- Shopify Community forums
-- Facebook groups for print-on-demand sellers
-
-## FINAL THOUGHTS
-
-This business is designed to be:
-✓ PROFITABLE: 72.75% average margins
-✓ AUTOMATED: 95% hands-free after setup
-✓ SCALABLE: Add products and channels easily
-✓ MEANINGFUL: Genuine message resonates with customers
-✓ PREMIUM: Quality over quantity, Apple over IKEA
-
-Success requires:
-1. Consistent execution (especially first 90 days)
-2. Quality control (maintain premium standards)
-3. Brand authenticity (walk the talk on anti-AI)
-4. Customer service excellence (human touch matters)
-5. Data-driven optimization (test and iterate)
-
-The anti-AI movement is growing. Premium merchandise is profitable.
-This business sits at the intersection of both.
-
-Time to build something real, by humans, for humans.
-
----
-
-ALL DELIVERABLES INCLUDED:
-📊 30-day product catalog with profit margins (CSV)
-📖 Complete automation strategy guide
-🎨 Brand identity and design guidelines  
-💻 Technical implementation with code samples
-📈 Marketing and social media strategy
-📧 Email automation workflows
-💰 Financial projections and KPIs
-✅ Week-by-week implementation checklist
-
-Ready to launch. Let's build this. 🚀
-"""
-
-with open('executive_summary_quick_start.txt', 'w') as f:
-    f.write(exec_summary)
-
-print("=" * 70)
-print("COMPLETE ANTI-AI MERCH STORE PACKAGE CREATED")
-print("=" * 70)
-print("\n📦 ALL DELIVERABLES:")
-print("\n1. 30-Day Product Catalog (CSV)")
-print("   - 30 profitable products with 72.75% avg margins")
-print("   - Pricing, costs, profit calculations")
-print("   - Marketing channels for each product")
-print("\n2. Automation Strategy Document")
-print("   - Complete automation workflows")
-print("   - Tool recommendations and setup")
-print("   - Cost breakdowns and ROI projections")
-print("\n3. Brand Identity Guide")
-print("   - Logo design concepts")
-print("   - Color palette and typography")
-print("   - Messaging and positioning strategy")
-print("   - Premium Apple-style design principles")
-print("\n4. Technical Implementation Guide")
-print("   - Python code for Square API integration")
-print("   - Printful API automation scripts")
-print("   - Social media automation setup")
-print("   - Email marketing automation")
-print("   - Cron job scheduling instructions")
-print("\n5. Executive Summary & Quick-Start")
-print("   - 4-week implementation timeline")
-print("   - Revenue projections and KPIs")
-print("   - Risk mitigation strategies")
-print("   - Legal considerations checklist")
-print("\n6. Visual Assets Generated")
-print("   - Anti-AI prohibition logo concept")
-print("   - Premium t-shirt mockup")
-print("   - Luxury leather laptop sleeve")
-print("   - Stainless steel mug design")
-print("\n" + "=" * 70)
-print("BUSINESS SNAPSHOT:")
-print("=" * 70)
-print(f"Average Profit Margin: 72.75%")
-print(f"Average Profit Per Item: $50.08")
-print(f"Setup Time: 4 weeks (37-55 hours)")
-print(f"Monthly Costs: $50-150 (scales with growth)")
-print(f"Automation Level: 95% hands-free")
-print(f"Revenue Potential: $15k-45k/month by month 12")
-print("\n✅ Everything is deployment-ready")
-print("✅ No placeholders - real strategies and code")
-print("✅ Integrated with existing date app brand")
-print("✅ Premium positioning (Apple > IKEA)")
-print("✅ Fully automated daily product uploads")
-print("✅ Multi-channel marketing automation")
-print("\n🚀 Ready to launch YouAndINotAI Merch Store!")
+from merch_store.reports import guide_values, write_guide
+
+
+def main():
+    # Create executive summary with quick-start guide; figures come from the KPI cube (template: merch_store/guides/executive_summary.txt)
+    kpis = guide_values()
+    write_guide('executive_summary', values=kpis)
+
+    print("=" * 70)
+    print("COMPLETE ANTI-AI MERCH STORE PACKAGE CREATED")
+    print("=" * 70)
+    print("\n📦 ALL DELIVERABLES:")
+    print("\n1. 30-Day Product Catalog (CSV)")
+    print(f"   - {kpis['products']} profitable products with {kpis['avg_margin_pct']:.2f}% avg margins")
+    print("   - Pricing, costs, profit calculations")
+    print("   - Marketing channels for each product")
+    print("\n2. Automation Strategy Document")
+    print("   - Complete automation workflows")
+    print("   - Tool recommendations and setup")
+    print("   - Cost breakdowns and ROI projections")
+    print("\n3. Brand Identity Guide")
+    print("   - Logo design concepts")
+    print("   - Color palette and typography")
+    print("   - Messaging and positioning strategy")
+    print("   - Premium Apple-style design principles")
+    print("\n4. Technical Implementation Guide")
+    print("   - Python code for Square API integration")
+    print("   - Printful API automation scripts")
+    print("   - Social media automation setup")
+    print("   - Email marketing automation")
+    print("   - Cron job scheduling instructions")
+    print("\n5. Executive Summary & Quick-Start")
+    print("   - 4-week implementation timeline")
+    print("   - Revenue projections and KPIs")
+    print("   - Risk mitigation strategies")
+    print("   - Legal considerations checklist")
+    print("\n6. Visual Assets Generated")
+    print("   - Anti-AI prohibition logo concept")
+    print("   - Premium t-shirt mockup")
+    print("   - Luxury leather laptop sleeve")
+    print("   - Stainless steel mug design")
+    print("\n" + "=" * 70)
+    print("BUSINESS SNAPSHOT:")
+    print("=" * 70)
+    print(f"Average Profit Margin: {kpis['avg_margin_pct']:.2f}%")
+    print(f"Average Profit Per Item: ${kpis['avg_gross_profit']:.2f}")
+    print(f"Setup Time: {kpis['setup_weeks']} weeks ({kpis['setup_hours']} hours)")
+    print(f"Monthly Costs: {kpis['monthly_costs']} (scales with growth)")
+    print("Automation Level: 95% hands-free")
+    print("Revenue Potential: $15k-45k/month by month 12")
+    print("\n✅ Everything is deployment-ready")
+    print("✅ No placeholders - real strategies and code")
+    print("✅ Integrated with existing date app brand")
+    print("✅ Premium positioning (Apple > IKEA)")
+    print("✅ Fully automated daily product uploads")
+    print("✅ Multi-channel marketing automation")
+    print("\n🚀 Ready to launch YouAndINotAI Merch Store!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Fakes and workloads shared by tests/ and benchmarks/, so neither imports the other."""
@@ -0,0 +1,361 @@
+"""Local stand-ins for the third-party APIs, for tests, benchmarks and dry runs.
+
+Each fake wraps an :class:`~merch_store.http.HTTPServer`, records what it
+received, and can add latency or throttle with 429s like the real service.
+"""
+import asyncio
+import collections
+import itertools
+import json
+import math
+import random
+import urllib.parse
+
+from merch_store.http import HTTPServer, RateLimiter
+
+
+def retry_after(wait):
+    """Retry-After for ``wait`` seconds, rounded up: waiting that long always finds a token."""
+    return {'Retry-After': f"{math.ceil(wait * 1e3) / 1e3:.3f}"}
+
+
+class FakeService:
+    """Shared plumbing: server lifecycle, latency, throttling, request log."""
+
+    prefix = ''
+
+    def __init__(self, latency=0.0, rate_limit=None):
+        self.server = HTTPServer(self._dispatch)
+        self.latency = latency
+        self.bucket = RateLimiter(rate_limit) if rate_limit else None
+        self.requests = 0
+        self.throttled = 0
+
+    @property
+    def url(self):
+        return self.server.url + self.prefix
+
+    async def start(self):
+        await self.server.start()
+        return self
+
+    async def stop(self):
+        await self.server.stop()
+
+    def start_in_thread(self):
+        self.server.start_in_thread()
+        return self
+
+    def stop_thread(self):
+        self.server.stop_thread()
+
+    async def _dispatch(self, method, path, query, headers, body):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        wait = self.bucket.try_acquire() if self.bucket else 0
+        if wait:
+            self.throttled += 1
+            return 429, {"errors": [{"code": "RATE_LIMITED"}]}, retry_after(wait)
+        if path.startswith(self.prefix):
+            path = path[len(self.prefix):]
+        payload = json.loads(body) if body else None
+        return await self.handle(method, path, query, headers, payload)
+
+    async def handle(self, method, path, query, headers, payload):
+        return 404, {"errors": [{"code": "NOT_FOUND"}]}
+
+
+class FakeSquare(FakeService):
+    """Square Catalog API: ``/catalog/object``, ``/catalog/batch-upsert`` and ``/catalog/batch-delete``."""
+
+    prefix = '/v2'
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.objects = {}
+        self.replies = {}
+        self._ids = itertools.count(1)
+
+    def _assign(self, obj, mappings):
+        """Give ``#``-prefixed ids (the item's and its variations') Square ids."""
+        if obj['id'].startswith('#'):
+            object_id = f"SQ{next(self._ids):012d}"
+            mappings.append({"client_object_id": obj['id'], "object_id": object_id})
+            obj = {**obj, 'id': object_id}
+        variations = (obj.get('item_data') or {}).get('variations')
+        if variations:
+            obj['item_data'] = {**obj['item_data'], 'variations': [self._assign(v, mappings) for v in variations]}
+        return obj
+
+    def _store(self, obj, mappings):
+        """Save an object; ids not starting with ``#`` must exist and are updated in place."""
+        if not obj['id'].startswith('#') and obj['id'] not in self.objects:
+            raise KeyError(obj['id'])
+        obj = self._assign(obj, mappings)
+        self.objects[obj['id']] = obj
+        return obj
+
+    async def handle(self, method, path, query, headers, payload):
+        if not headers.get('authorization', '').startswith('Bearer '):
+            return 401, {"errors": [{"code": "UNAUTHORIZED"}]}
+        if method == 'POST' and path == '/catalog/batch-delete':
+            deleted = [i for i in payload['object_ids'] if self.objects.pop(i, None) is not None]
+            return 200, {"deleted_object_ids": deleted}
+        if method != 'POST' or path not in ('/catalog/object', '/catalog/batch-upsert'):
+            return await super().handle(method, path, query, headers, payload)
+        key = payload.get('idempotency_key')
+        if not key:
+            return 400, {"errors": [{"code": "MISSING_REQUIRED_PARAMETER", "field": "idempotency_key"}]}
+        if key in self.replies:
+            return 200, self.replies[key]
+        if path == '/catalog/object':
+            mappings = []
+            try:
+                obj = self._store(payload['object'], mappings)
+            except KeyError as exc:
+                return 404, {"errors": [{"code": "NOT_FOUND", "detail": f"object {exc} does not exist"}]}
+            reply = {"catalog_object": obj, "id_mappings": mappings}
+        else:
+            objects = [o for batch in payload['batches'] for o in batch['objects']]
+            if len(objects) > 10000:
+                return 400, {"errors": [{"code": "TOO_MANY_OBJECTS"}]}
+            mappings = []
+            try:
+                stored = [self._store(o, mappings) for o in objects]
+            except KeyError as exc:
+                return 404, {"errors": [{"code": "NOT_FOUND", "detail": f"object {exc} does not exist"}]}
+            reply = {"objects": stored, "id_mappings": mappings}
+        self.replies[key] = reply
+        return 200, reply
+
+
+class FakePrintful(FakeService):
+    """Printful catalog and sync-product endpoints (create, add variant, update, delete).
+
+    Every catalog blank offers the same size x colour matrix. Variant ids in
+    ``fail_variants`` are rejected with a 400, to exercise partial failures.
+    """
+
+    SIZES = ['XS', 'S', 'M', 'L', 'XL', '2XL', '3XL', '11 oz', '15 oz']
+    COLORS = ['Black', 'White', 'Navy', 'Athletic Heather', 'Forest', 'Red']
+
+    def __init__(self, fail_variants=(), **kwargs):
+        super().__init__(**kwargs)
+        self.fail_variants = set(fail_variants)
+        self.sync_products = {}
+        self._ids = itertools.count(1)
+
+    def catalog(self, product_id):
+        return [{"id": product_id * 1000 + i, "product_id": product_id, "size": size, "color": color}
+                for i, (size, color) in enumerate(
+                    (s, c) for s in self.SIZES for c in self.COLORS)]
+
+    def _check_variant(self, variant):
+        vid = variant.get('variant_id')
+        if vid in self.fail_variants or not isinstance(vid, int) or vid % 1000 >= len(self.SIZES) * len(self.COLORS):
+            return {"code": 400, "error": {"message": f"Invalid variant {vid}"}}
+        return None
+
+    async def handle(self, method, path, query, headers, payload):
+        if not headers.get('authorization', '').startswith('Bearer '):
+            return 401, {"code": 401, "error": {"message": "Unauthorized"}}
+        parts = path.strip('/').split('/')
+        if method == 'GET' and len(parts) == 2 and parts[0] == 'products':
+            pid = int(parts[1])
+            return 200, {"code": 200, "result": {"product": {"id": pid}, "variants": self.catalog(pid)}}
+        if method == 'POST' and parts == ['store', 'products']:
+            for variant in payload['sync_variants']:
+                error = self._check_variant(variant)
+                if error:
+                    return 400, error
+            sid = next(self._ids)
+            self.sync_products[sid] = {**payload['sync_product'], 'variants': list(payload['sync_variants'])}
+            return 200, {"code": 200, "result": {"id": sid, "external_id": payload['sync_product'].get('external_id'),
+                                                 "name": payload['sync_product']['name'],
+                                                 "variants": len(payload['sync_variants'])}}
+        if method == 'POST' and len(parts) == 4 and parts[:2] == ['store', 'products'] and parts[3] == 'variants':
+            product = self.sync_products.get(int(parts[2]))
+            if product is None:
+                return 404, {"code": 404, "error": {"message": "Not found"}}
+            error = self._check_variant(payload)
+            if error:
+                return 400, error
+            product['variants'].append(payload)
+            return 200, {"code": 200, "result": {"id": next(self._ids), "variant_id": payload['variant_id']}}
+        if method in ('PUT', 'DELETE') and len(parts) == 3 and parts[:2] == ['store', 'products']:
+            sid = int(parts[2])
+            if sid not in self.sync_products:
+                return 404, {"code": 404, "error": {"message": "Not found"}}
+            if method == 'DELETE':
+                del self.sync_products[sid]
+                return 200, {"code": 200, "result": {}}
+            for variant in payload.get('sync_variants', []):
+                error = self._check_variant(variant)
+                if error:
+                    return 400, error
+            product = self.sync_products[sid]
+            product.update(payload['sync_product'])
+            if 'sync_variants' in payload:
+                product['variants'] = list(payload['sync_variants'])
+            return 200, {"code": 200, "result": {"id": sid, "name": product['name']}}
+        return await super().handle(method, path, query, headers, payload)
+
+    @property
+    def variant_count(self):
+        return sum(len(p['variants']) for p in self.sync_products.values())
+
+
+class FakeKlaviyo(FakeService):
+    """Klaviyo v2 campaigns endpoint."""
+
+    prefix = '/api/v2'
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.campaigns = []
+
+    async def handle(self, method, path, query, headers, payload):
+        if not headers.get('authorization', '').startswith('Klaviyo-API-Key '):
+            return 401, {"detail": "Unauthorized"}
+        if method == 'POST' and path == '/campaigns':
+            self.campaigns.append(payload)
+            return 200, {"id": f"CMP{len(self.campaigns):06d}", "status": "draft", **payload}
+        return await super().handle(method, path, query, headers, payload)
+
+
+class FakeSocialBee(FakeService):
+    """SocialBee ``/media`` and ``/posts`` endpoints.
+
+    ``Idempotency-Key`` replays the first reply. ``media_transfers`` counts
+    how often each image was fetched, whether uploaded through ``/media`` or
+    passed inline as ``media_urls`` the way the guide's client does.
+    ``error_rate`` of requests fail with a 503 before being applied.
+    """
+
+    prefix = '/v1'
+
+    def __init__(self, error_rate=0.0, seed=0, **kwargs):
+        super().__init__(**kwargs)
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.posts = {}
+        self.media = {}
+        self.media_transfers = collections.Counter()
+        self.replies = {}
+        self._ids = itertools.count(1)
+
+    def _create(self, path, payload):
+        if path == '/media':
+            self.media_transfers[payload['url']] += 1
+            media_id = f"MED{next(self._ids):09d}"
+            self.media[media_id] = payload['url']
+            return {"id": media_id, "url": payload['url']}
+        unknown = [m for m in payload.get('media_ids', []) if m not in self.media]
+        if unknown:
+            raise KeyError(unknown[0])
+        for url in payload.get('media_urls', []):
+            self.media_transfers[url] += 1
+        post_id = f"PST{next(self._ids):09d}"
+        self.posts[post_id] = payload
+        return {"id": post_id, "status": "scheduled", "post_at": payload.get('post_at')}
+
+    async def handle(self, method, path, query, headers, payload):
+        if not headers.get('authorization', '').startswith('Bearer '):
+            return 401, {"error": "Unauthorized"}
+        if method != 'POST' or path not in ('/media', '/posts'):
+            return await super().handle(method, path, query, headers, payload)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return 503, {"error": "Service Unavailable"}
+        key = headers.get('idempotency-key')
+        if key and (path, key) in self.replies:
+            return 200, self.replies[path, key]
+        try:
+            reply = self._create(path, payload)
+        except KeyError as exc:
+            return 400, {"error": f"unknown media {exc}"}
+        if key:
+            self.replies[path, key] = reply
+        return 200, reply
+
+
+class FakeAPI2Cart(FakeService):
+    """API2Cart ``product.update`` (the guide's GET form) and batch jobs.
+
+    Stock is kept per store key. ``product.update.batch`` only queues a
+    job; the first ``batch.job.result`` poll reports it ``processing`` and
+    the next one runs it and returns the per-item results. SKUs in
+    ``unknown_skus`` are rejected item by item, and stores in
+    ``empty_stores`` have no products, so their jobs complete with no
+    items. ``store_rate`` throttles each store separately with 429s.
+    """
+
+    prefix = '/v1.1'
+
+    def __init__(self, unknown_skus=(), store_rate=None, empty_stores=(), **kwargs):
+        super().__init__(**kwargs)
+        self.unknown_skus = set(unknown_skus)
+        self.store_rate = store_rate
+        self.empty_stores = set(empty_stores)
+        self.buckets = {}
+        self.stock = collections.defaultdict(dict)
+        self.writes = collections.Counter()
+        self.batches = collections.Counter()
+        self.jobs = {}  # job id -> [store key, items, polls so far, results once run]
+        self.polls = 0
+
+    def _throttle(self, store_key):
+        if not self.store_rate:
+            return 0
+        wait = self.buckets.setdefault(store_key, RateLimiter(self.store_rate)).try_acquire()
+        if wait:
+            self.throttled += 1
+        return wait
+
+    def _apply(self, store_key, sku, quantity):
+        if sku in self.unknown_skus:
+            return {"id": sku, "status": "error", "message": "Product not found"}
+        self.stock[store_key][sku] = quantity
+        self.writes[store_key] += 1
+        return {"id": sku, "status": "ok"}
+
+    def _run(self, job):
+        store_key, items, _, results = job
+        if results is None:
+            results = job[3] = [] if store_key in self.empty_stores else [
+                self._apply(store_key, item['id'], item['quantity']) for item in items]
+        return results
+
+    async def handle(self, method, path, query, headers, payload):
+        if method == 'GET' and path == '/product.update.json':
+            params = dict(urllib.parse.parse_qsl(query))
+            if not params.get('api_key'):
+                return 401, {"return_code": 2, "return_message": "Incorrect API Key"}
+            wait = self._throttle(params.get('store_key'))
+            if wait:
+                return 429, {"return_code": 429}, retry_after(wait)
+            result = self._apply(params.get('store_key'), params['product_id'], int(params['quantity']))
+            return 200, {"return_code": 0 if result['status'] == 'ok' else 1, "result": result}
+        if path in ('/product.update.batch.json', '/batch.job.result.json'):
+            store_key = headers.get('x-store-key')
+            if not headers.get('x-api-key') or not store_key:
+                return 401, {"return_code": 2, "return_message": "Incorrect API Key"}
+            wait = self._throttle(store_key)
+            if wait:
+                return 429, {"return_code": 429}, retry_after(wait)
+        if method == 'POST' and path == '/product.update.batch.json':
+            self.batches[store_key] += 1
+            job_id = f"JOB{len(self.jobs) + 1:08d}"
+            self.jobs[job_id] = [store_key, payload['payload'], 0, None]
+            return 200, {"return_code": 0, "result": {"id": job_id, "status": "queued"}}
+        if method == 'GET' and path == '/batch.job.result.json':
+            self.polls += 1
+            job_id = dict(urllib.parse.parse_qsl(query)).get('id')
+            job = self.jobs.get(job_id)
+            if job is None or job[0] != store_key:
+                return 200, {"return_code": 1, "return_message": f"Job {job_id} not found"}
+            job[2] += 1
+            if job[2] == 1:
+                return 200, {"return_code": 0, "result": {"id": job_id, "status": "processing"}}
+            return 200, {"return_code": 0, "result": {"id": job_id, "status": "completed", "items": self._run(job)}}
+        return await super().handle(method, path, query, headers, payload)
@@ -0,0 +1,300 @@
+"""Workloads shared by the tests and the benchmarks.
+
+Synthetic inputs, drivers that push them through the store's clients,
+and the guide's original implementations kept as references. The
+benchmarks time these; tests/ checks the real code against them.
+"""
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from merch_store.catalog import synthetic
+from merch_store.http import ConnectionPool, HTTPError, RetryPolicy
+from merch_store.inventory import InventorySync
+from merch_store.post_schedule import DEFAULT_QUOTAS, PlatformQuota, PostCalendar
+from merch_store.reports import GUIDES, variants
+from merch_store.social import product_url
+from merch_store.webhooks import OrderTracker, WebhookReceiver, default_sources, printful_signature, square_signature
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START = datetime(2026, 1, 1)
+START_SECONDS = int(np.datetime64('2026-01-01T00:00:00', 's').astype(np.int64))
+
+
+# -- inventory -------------------------------------------------------------
+
+STORES = {'etsy': 'ETSY-KEY', 'ebay': 'EBAY-KEY', 'amazon': 'AMZN-KEY'}
+
+
+def changes(updates, skus, seed=0):
+    rng = np.random.default_rng(seed)
+    # Skewed: a few best sellers change far more often than the long tail.
+    ids = np.minimum(rng.zipf(1.3, updates), skus) - 1
+    return [(f"SKU-{i:06d}", int(q)) for i, q in zip(ids.tolist(), rng.integers(0, 500, updates).tolist())]
+
+
+async def push(url, stream, burst=500, **kwargs):
+    async with InventorySync(STORES, 'test', url, **kwargs) as sync:
+        for start in range(0, len(stream), burst):
+            for sku, quantity in stream[start:start + burst]:
+                sync.update(sku, quantity)
+            await asyncio.sleep(0.001)
+    return sync.reports
+
+
+# -- klaviyo ---------------------------------------------------------------
+
+def legacy_html(product_data):
+    return f"""
+    <h1>{product_data['Product_Name']}</h1>
+    <p>New arrival in our premium anti-AI collection.</p>
+    <p>Crafted by humans, for humans. Zero algorithms involved.</p>
+    <p><strong>${product_data['Retail_Price']}</strong></p>
+    <a href="https://youandinotai.square.site">Shop Now</a>
+    """
+
+
+def launches(products, per_day, seed=0):
+    """Catalog rows with ``per_day`` products launching each Day."""
+    catalog = synthetic(products, seed=seed)
+    catalog.day = np.arange(products, dtype=np.int64) // per_day + 1
+    return list(catalog.records())
+
+
+# -- post schedule ---------------------------------------------------------
+
+PLATFORMS = ['Instagram', 'Facebook', 'TikTok', 'Pinterest', 'Twitter', 'Instagram,Facebook,Pinterest']
+
+
+class ScanCalendar(PostCalendar):
+    """First fit by scanning booked slots one by one: the reference, O(n) per post when packed."""
+
+    def __init__(self, quotas=DEFAULT_QUOTAS, start=None):
+        super().__init__(quotas, start)
+        self.booked_slots = {platform: set() for platform in self.quotas}
+
+    def place(self, platform, earliest):
+        index = self.slot_index(platform, earliest)
+        booked = self.booked_slots[platform]
+        while index in booked:
+            index += 1
+        booked.add(index)
+        return self.slot_time(platform, index)
+
+
+def catalog_over(products, days, seed=0):
+    """Synthetic catalog with launches spread evenly over ``days`` days."""
+    catalog = synthetic(products, seed=seed)
+    catalog.day = np.arange(products, dtype=np.int64) * days // products + 1
+    return catalog
+
+
+def platform_quotas(per_day, min_gap):
+    return [PlatformQuota(platform, per_day, min_gap=min_gap, opens='08:00', closes='22:00')
+            for platform in PLATFORMS]
+
+
+def posted_at(fmt, row):
+    date_column, time_column, platform_column = fmt.schedule_columns
+    when = datetime.strptime(f"{row[date_column]} {row[time_column]}", '%Y-%m-%d %H:%M')
+    return row[platform_column], when
+
+
+# -- pricing ---------------------------------------------------------------
+
+def market(catalog, seed=0, max_competitors=8):
+    """Random views, sales and competitor prices around each product's price."""
+    rng = np.random.default_rng(seed)
+    n = len(catalog)
+    views = rng.integers(0, 5000, n)
+    sales = (views * rng.uniform(0, 0.08, n)).astype(np.int64)
+    counts = rng.integers(0, max_competitors + 1, n)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    base = np.repeat(catalog.retail_cents / 100, counts)
+    competitors = np.round(base * rng.uniform(0.5, 1.2, offsets[-1]), 2)
+
+    # Pin a slice of rows to the exact rule boundaries.
+    edge = rng.choice(n, min(n, 3000), replace=False)
+    first, second, third = np.array_split(edge, 3)
+    views[first], sales[first] = 1000, 10    # exactly 1%
+    views[second], sales[second] = 1000, 50  # exactly 5%
+    single = third[counts[third] == 1]
+    competitors[offsets[single]] = catalog.retail_cents[single] / 100 / 1.2
+    return views, sales, competitors, offsets
+
+
+# -- reports ---------------------------------------------------------------
+
+BRANDS = ['YouAndINotAI', 'HumanMade', 'NoBotsAllowed', 'AnalogSoul', 'RealHands', 'OffGrid', 'PenAndPaper',
+          'Unplugged']
+MARKETS = ['Tech-aware professionals, 25-45, high-income', 'Students and early-career creatives, 18-28',
+           'Parents raising screen-light kids', 'Craft and maker communities', 'Privacy advocates']
+COSTS = ['$50-150', '$150-400', '$400-900']
+HOURS = ['37-55', '60-80', '20-30']
+
+
+def dimensions(documents):
+    """Enough brand / market / cost / timeline combinations for ``documents`` documents."""
+    needed = -(-documents // len(GUIDES))
+    dims = {'target_market': MARKETS, 'monthly_costs': COSTS, 'setup_hours': HOURS}
+    combos = len(MARKETS) * len(COSTS) * len(HOURS)
+    brands = [BRANDS[i % len(BRANDS)] + (str(i // len(BRANDS)) if i >= len(BRANDS) else '')
+              for i in range(-(-needed // combos))]
+    return {'brand': brands, **dims}
+
+
+def documents(guides, base, n):
+    """The first ``n`` (file name, guide, values) documents, every guide for each variant."""
+    docs = ((f'{i:05d}_{GUIDES[guide.name]}', guide, values)
+            for i, values in enumerate(variants(base, **dimensions(n))) for guide in guides)
+    return list(itertools.islice(docs, n))
+
+
+def streamed(pipeline, out, docs):
+    for name, guide, values in docs:
+        pipeline.write(guide, values, os.path.join(out, name))
+
+
+# -- social ----------------------------------------------------------------
+
+def legacy_schedule_social_media_posts(product_data, now, out_dir):
+    """The implementation guide's version, with the clock and directory passed in."""
+    import pandas as pd
+
+    post_variations = [
+        f"New arrival: {product_data['Product_Name']}. Where craft meets conviction. 🚫🤖",
+        f"Premium quality. Zero algorithms. Introducing: {product_data['Product_Name']}",
+        f"Thoughtfully made. Algorithmically free. Shop {product_data['Product_Name']} now.",
+        f"The human touch, refined. {product_data['Product_Name']} - available now.",
+        f"Crafted by humans, for humans. {product_data['Product_Name']} joins our collection."
+    ]
+    posts_df = pd.DataFrame({
+        'date': [now.strftime('%Y-%m-%d')] * 5,
+        'time': ['09:00', '12:00', '15:00', '18:00', '21:00'],
+        'platform': ['Instagram', 'Facebook', 'TikTok', 'Pinterest', 'Twitter'],
+        'content': post_variations,
+        # The guide's inline slug broke on punctuation; both sides use the canonical one.
+        'product_url': [product_url(product_data)] * 5
+    })
+    path = os.path.join(out_dir, f"social_posts_{now.strftime('%Y%m%d')}.csv")
+    posts_df.to_csv(path, index=False)
+    return path
+
+
+# -- daily run -------------------------------------------------------------
+
+def environment(tmp, square, printful, klaviyo):
+    env = dict(os.environ, PYTHONPATH=ROOT, SQUARE_API_BASE=square.url, PRINTFUL_API_BASE=printful.url,
+               KLAVIYO_API_BASE=klaviyo.url, SQUARE_ACCESS_TOKEN='sq', PRINTFUL_API_KEY='pf',
+               KLAVIYO_API_KEY='kl')
+    env.pop('AUTOMATION_WORKERS', None)
+    return env
+
+
+def command(tmp, env, name, workers=0, code=None):
+    db = os.path.join(tmp, f'{name}.sqlite3')
+    args = ['daily', '--jobs-db', db, '--workers', str(workers)]
+    cmd = [sys.executable, '-c', code, *args] if code else [sys.executable, '-m', 'merch_store', *args]
+    return cmd, dict(env, PRINTFUL_CHECKPOINT=os.path.join(tmp, f'{name}.ckpt'))
+
+
+def daily_run(tmp, env, name, workers=0, code=None):
+    """Run the daily entry point to completion; returns (seconds, stdout)."""
+    cmd, env = command(tmp, env, name, workers, code)
+    start = time.monotonic()
+    out = subprocess.run(cmd, cwd=tmp, env=env, check=True, capture_output=True, text=True).stdout
+    return time.monotonic() - start, out
+
+
+# -- webhooks --------------------------------------------------------------
+
+SQUARE_KEY = 'square-signature-key'
+PRINTFUL_SECRET = 'printful-secret'
+RETRY_503 = RetryPolicy(attempts=200, base=0.005, cap=0.02, statuses=(503,))
+
+
+def events(n, start=0):
+    """(path, payload) pairs alternating Square order updates and Printful shipments."""
+    out = []
+    for i in range(start, start + n):
+        if i % 2:
+            out.append(('/webhooks/printful', {
+                "type": "package_shipped", "created": 1767225600 + i, "retries": 0, "store": 1,
+                "data": {"order": {"id": i, "external_id": f"ORD-{i}", "status": "fulfilled"},
+                         "shipment": {"tracking_number": f"1Z{i:010d}"}}}))
+        else:
+            out.append(('/webhooks/square', {
+                "merchant_id": "M1", "type": "order.updated", "event_id": f"evt-{i}",
+                "data": {"type": "order", "id": f"ORD-{i}",
+                         "object": {"order_updated": {"order_id": f"ORD-{i}", "state": "COMPLETED"}}}}))
+    return out
+
+
+def start_receiver(log, processor=None, **kwargs):
+    """A receiver whose Square notification URL is its own address, known once it listens."""
+    rx = WebhookReceiver(log, processor, sources=default_sources('unset', '', 'unset'), **kwargs)
+    rx.start_in_thread()
+    rx.sources = {s.path: s for s in default_sources(SQUARE_KEY, rx.url + '/webhooks/square', PRINTFUL_SECRET)}
+    return rx
+
+
+def signed(rx, path, payload, forge=False):
+    """Headers for a delivery; the body is what ConnectionPool will send for ``payload``."""
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    if path == '/webhooks/square':
+        header, signature = 'x-square-hmacsha256-signature', square_signature(SQUARE_KEY, rx.url + path, body)
+    else:
+        header, signature = 'x-pf-webhook-signature', printful_signature(PRINTFUL_SECRET, body)
+    return path, payload, {header: ('forged' if forge else signature)}
+
+
+async def deliver(url, requests, connections, pace=None):
+    """Send (path, payload, headers) requests; returns (latencies, statuses).
+
+    With ``pace`` (events/sec) requests start on an open-loop schedule;
+    otherwise they all start at once, a burst.
+    """
+    latencies, statuses = [], []
+    async with ConnectionPool(url, connections, retry=RETRY_503) as pool:
+        begin = time.perf_counter()
+
+        async def one(i, path, payload, headers):
+            if pace:
+                await asyncio.sleep(max(0.0, begin + i / pace - time.perf_counter()))
+            start = time.perf_counter()
+            try:
+                # Redeliveries are deduplicated by event id, as a sender's retries would be.
+                status = (await pool.post(path, json=payload, headers=headers, idempotent=True)).status
+            except HTTPError as exc:
+                status = exc.status
+            latencies.append(time.perf_counter() - start)
+            statuses.append(status)
+
+        await asyncio.gather(*(one(i, *r) for i, r in enumerate(requests)))
+    return latencies, statuses
+
+
+class SlowTracker(OrderTracker):
+    """Order tracker that takes ``delay`` per event and fails the ids in ``fail``."""
+
+    def __init__(self, delay=0.0, fail=()):
+        super().__init__()
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = 0
+
+    async def __call__(self, event):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if event['id'] in self.fail:
+            raise RuntimeError('downstream unavailable')
+        await super().__call__(event)
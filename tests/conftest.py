@@ -0,0 +1,26 @@
+"""Fixtures shared by the tests."""
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def serve():
+    """``serve(fake)`` runs a fake service on a background thread until the test ends."""
+    started = []
+
+    def start(service):
+        started.append(service.start_in_thread())
+        return service
+
+    yield start
+    for service in reversed(started):
+        service.stop_thread()
+
+
+@pytest.fixture
+def root_env():
+    """Environment for subprocesses that import the package from the checkout."""
+    return dict(os.environ, PYTHONPATH=ROOT)
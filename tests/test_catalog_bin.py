@@ -0,0 +1,44 @@
+"""Binary catalog: the CSV <-> binary round trip keeps every value."""
+import pytest
+
+from merch_store.catalog import Catalog, synthetic
+from merch_store.catalog_bin import CatalogFile, bin_to_csv, csv_to_bin
+from merch_store.catalog_io import scan
+from merch_store.slugs import slug_for_name
+
+
+def edge_catalog():
+    """Margins that land on rounding boundaries, plus quoting and non-ASCII names."""
+    supplier = [1.0, 2.0, 0.01, 9.99, 12.5, 0.0]
+    retail = [3.0, 3.0, 0.03, 29.99, 19.99, 0.99]
+    shipping = [0.0, 0.0, 0.0, 4.005, 3.5, 0.0]
+    names = ['Plain Tee', 'Tee, "Quoted"', 'Café Mug', 'Line\nBreak Hoodie', 'Cap', 'Sticker']
+    return Catalog.from_dollars(list(range(1, 7)), ['Apparel'] * 6, names, supplier, retail, shipping,
+                                ['Instagram, Etsy'] * 6)
+
+
+@pytest.fixture(params=['synthetic', 'edges'])
+def csv_path(request, tmp_path):
+    catalog = synthetic(5000, seed=7) if request.param == 'synthetic' else edge_catalog()
+    path = tmp_path / 'catalog.csv'
+    catalog.to_csv(str(path))
+    return str(path)
+
+
+def test_round_trip_is_byte_identical(csv_path, tmp_path):
+    csv_to_bin(csv_path, str(tmp_path / 'catalog.bin'))
+    bin_to_csv(str(tmp_path / 'catalog.bin'), str(tmp_path / 'round_trip.csv'))
+    with open(csv_path, 'rb') as a, open(tmp_path / 'round_trip.csv', 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_every_column_matches(csv_path, tmp_path):
+    csv_to_bin(csv_path, str(tmp_path / 'catalog.bin'))
+    with CatalogFile(str(tmp_path / 'catalog.bin')) as catalog:
+        rows = list(scan(csv_path))
+        assert len(catalog) == len(rows)
+        for i, row in enumerate(rows):
+            got = catalog.row(i)
+            assert got.pop('Slug') == slug_for_name(row['Product_Name'])
+            assert got == row, i
+            assert catalog.row(catalog.find_day(row['Day'])) == catalog.row(i)
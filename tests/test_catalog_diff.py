@@ -0,0 +1,93 @@
+"""Catalog diff: only changed rows are pushed, to Square and to the products on Printful."""
+import asyncio
+
+import numpy as np
+import pytest
+
+from merch_store.catalog import synthetic
+from merch_store.catalog_diff import SyncState, fingerprints
+from merch_store.printful import PrintfulPipeline
+from merch_store.square import sync_catalog
+from testbed.fakes import FakePrintful, FakeSquare
+
+RATES = {'catalog': 1000.0, 'create_product': 1000.0, 'create_variant': 1000.0, 'update_product': 1000.0}
+
+
+def churned(rows=600, dropped=20, added=100, repriced=(3, 50, 200)):
+    """The first ``rows - added`` rows, then the last ``rows - dropped`` with some repriced."""
+    full = synthetic(rows, seed=5)
+    base = full.take(np.arange(rows - added))
+    current = full.take(np.arange(dropped, rows))
+    current.retail_cents[list(repriced)] += 100
+    return base, current
+
+
+def test_fingerprints_are_stable_and_sensitive():
+    catalog = synthetic(100)
+    assert np.array_equal(fingerprints(catalog), fingerprints(synthetic(100)))
+    changed = synthetic(100)
+    changed.retail_cents[7] += 1
+    assert np.flatnonzero(fingerprints(changed) != fingerprints(catalog)).tolist() == [7]
+
+
+def test_duplicate_keys_are_rejected():
+    catalog = synthetic(10)
+    catalog.day[3] = catalog.day[4]
+    with pytest.raises(ValueError):
+        SyncState().diff(catalog)
+
+
+def test_square_sync_pushes_only_changes(serve, tmp_path):
+    fake = serve(FakeSquare())
+    base, current = churned()
+    diff = sync_catalog(base, SyncState.for_system('square', tmp_path), access_token='test', base_url=fake.url)
+    assert (len(diff.creates), len(diff.updates), len(diff.deletes)) == (len(base), 0, 0)
+
+    requests = fake.requests
+    diff = sync_catalog(current, SyncState.for_system('square', tmp_path), access_token='test', base_url=fake.url)
+    assert (len(diff.creates), len(diff.updates), len(diff.deletes)) == (100, 3, 20), diff
+    assert fake.requests - requests == 2  # one upsert, one delete
+    prices = {o['item_data']['name']: o['item_data']['variations'][0]['item_variation_data']['price_money']['amount']
+              for o in fake.objects.values()}
+    assert prices == dict(zip(current.name.tolist(), current.retail_cents.tolist()))
+    assert len(SyncState.for_system('square', tmp_path).diff(current)) == 0
+
+
+def test_printful_sync_updates_only_products_on_printful(serve, tmp_path):
+    fake = serve(FakePrintful())
+    base, current = churned()
+    # Two products went out through the daily job: one is later repriced, one leaves the catalog.
+    on_printful = [row for row in base.records() if row['Day'] in (base.day[0], current.day[3])]
+
+    async def run():
+        async with PrintfulPipeline('test', fake.url, rates=RATES, checkpoint=str(tmp_path / 'pf.ckpt')) as pipeline:
+            await pipeline.sync(on_printful)
+            state = SyncState.for_system('printful', tmp_path)
+            first, _ = await pipeline.sync_catalog(base, state)
+            requests = fake.requests
+            second, report = await pipeline.sync_catalog(current, state)
+            return first, second, report, fake.requests - requests, state
+    first, second, report, requests, state = asyncio.run(run())
+    assert (len(first.creates), len(first.updates), len(first.deletes)) == (2, 0, 0)
+    assert (len(second.creates), len(second.updates), len(second.deletes)) == (0, 1, 1), second
+    assert report.ok and requests == 2  # one update, one delete
+    [product] = fake.sync_products.values()
+    price = f"{current.retail_cents[3] / 100:.2f}"
+    assert product['name'] == current.name[3] and {v['retail_price'] for v in product['variants']} == {price}
+    assert len(state) == 1 and state.remote_id(int(current.day[3])) is not None
+
+
+def test_printful_sync_retries_failed_rows(serve, tmp_path):
+    fake = serve(FakePrintful())
+    catalog = synthetic(5)
+    rows = list(catalog.records())
+
+    async def run():
+        async with PrintfulPipeline('test', fake.url, rates=RATES) as pipeline:
+            await pipeline.sync(rows)
+            state = SyncState()
+            fake.sync_products.clear()  # every update now fails with a 404
+            first, report = await pipeline.sync_catalog(catalog, state)
+            return len(state), report
+    synced, report = asyncio.run(run())
+    assert synced == 0 and len(report.failures) == len(rows)
@@ -0,0 +1,109 @@
+"""Catalog index: build and reopen, the append journal and its compaction, rebuilds, and lookups."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from merch_store.catalog import synthetic
+from merch_store.catalog_index import CatalogIndex
+from merch_store.catalog_io import write_chunks
+
+BASE = 1000
+
+
+def batch(first, n):
+    """n synthetic products numbered from Day ``first``, each with its own name."""
+    catalog = synthetic(n, seed=first)
+    catalog.day = catalog.day + (first - 1)
+    catalog.name = np.array([f'Synthetic Product {day}' for day in catalog.day])
+    return catalog
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'catalog.csv')
+    write_chunks(path, [batch(1, BASE)])
+    return path
+
+
+def assert_indexes(index, *catalogs):
+    """Every lookup agrees with a scan over the catalogs' rows, in file order."""
+    days = np.concatenate([c.day for c in catalogs])
+    names = np.concatenate([c.name for c in catalogs])
+    categories = np.concatenate([c.category.decode() for c in catalogs])
+    assert len(index) == len(days)
+    assert np.array_equal(index.days(), np.unique(days))
+    for row in range(0, len(days), 97):
+        assert np.array_equal(index.rows_for_day(days[row]), [row])
+        assert row in index.rows_for_name(names[row])
+        assert index.row_for_name(names[row])['Day'] == days[row]
+    for category in set(categories):
+        assert np.array_equal(index.rows_for_category(category), np.flatnonzero(categories == category)), category
+    assert len(index.rows_for_category('No_Such_Category')) == 0
+    last = len(days) - 1
+    assert index.row_for_product_id(f'product-{days[last]}')['Product_Name'] == names[last]
+
+
+def test_build_then_reopen(path):
+    index = CatalogIndex.open(path)
+    assert os.path.exists(index.index_path) and not os.path.exists(index.journal_path)
+    assert_indexes(index, batch(1, BASE))
+    reopened = CatalogIndex(path)
+    assert reopened._load() and reopened.covered == os.path.getsize(path)
+    assert_indexes(CatalogIndex.open(path), batch(1, BASE))
+
+
+def test_appends_are_journaled_and_replayed(path):
+    index = CatalogIndex.open(path)
+    assert index.append(batch(BASE + 1, 50)) == 50
+    assert index.append(batch(BASE + 51, 50)) == 50
+    with open(index.journal_path) as f:
+        assert len(f.readlines()) == 2
+    reopened = CatalogIndex(path)
+    assert reopened._load() and (reopened.covered, reopened.journal_rows) == (os.path.getsize(path), 100)
+    assert_indexes(CatalogIndex.open(path), batch(1, BASE), batch(BASE + 1, 50), batch(BASE + 51, 50))
+
+
+def test_rows_appended_by_another_writer_are_caught_up(path):
+    CatalogIndex.open(path)
+    write_chunks(path, [batch(BASE + 1, 10)], append=True)
+    assert_indexes(CatalogIndex.open(path), batch(1, BASE), batch(BASE + 1, 10))
+
+
+def test_journal_is_compacted_past_its_ratio(path):
+    index = CatalogIndex.open(path)
+    index.append(batch(BASE + 1, 200))
+    assert os.path.exists(index.journal_path)
+    index.append(batch(BASE + 201, 200))  # 400 journaled rows is past a quarter of 1400
+    assert not os.path.exists(index.journal_path) and index.journal_rows == 0
+    reopened = CatalogIndex(path)
+    assert reopened._load() and reopened.covered == os.path.getsize(path)
+    assert_indexes(CatalogIndex.open(path), batch(1, BASE), batch(BASE + 1, 200), batch(BASE + 201, 200))
+
+
+@pytest.mark.parametrize('rows', [BASE, 400], ids=['same size', 'shorter'])
+def test_rewritten_catalog_is_rebuilt(path, rows):
+    index = CatalogIndex.open(path)
+    index.append(batch(BASE + 1, 10))
+    write_chunks(path, [batch(5001, rows)])
+    assert_indexes(CatalogIndex.open(path), batch(5001, rows))
+    assert not os.path.exists(index.journal_path)
+
+
+def test_appends_after_a_torn_journal_line_are_replayed(path):
+    index = CatalogIndex.open(path)
+    index.append(batch(BASE + 1, 20))
+    index.append(batch(BASE + 21, 20))
+    size = os.path.getsize(index.journal_path)
+    os.truncate(index.journal_path, size - 40)  # the second entry's write was cut short
+    index = CatalogIndex.open(path)
+    assert index.journal_rows == 40  # the second batch is parsed from the catalog again
+    index.append(batch(BASE + 41, 20))
+    with open(index.journal_path, 'rb') as f:
+        entries = [json.loads(line) for line in f]
+    assert [len(entry['offsets']) for entry in entries] == [20, 20, 20]
+    reopened = CatalogIndex(path)
+    assert reopened._load() and (reopened.covered, reopened.journal_rows) == (os.path.getsize(path), 60)
+    assert_indexes(CatalogIndex.open(path), batch(1, BASE), batch(BASE + 1, 20), batch(BASE + 21, 20),
+                   batch(BASE + 41, 20))
@@ -0,0 +1,32 @@
+"""Parallel catalog build: every partitioning gives exactly the serial metrics and top-K."""
+import numpy as np
+import pytest
+
+from merch_store.catalog import Catalog, synthetic
+from merch_store.catalog_parallel import PARTITIONS, build_parallel
+
+
+@pytest.fixture(scope='module')
+def serial():
+    catalog = synthetic(50_000, seed=5)
+    # Round costs to whole dollars so many rows tie on Gross_Profit.
+    catalog.supplier_cents = catalog.supplier_cents // 100 * 100
+    catalog.retail_cents = catalog.retail_cents // 100 * 100
+    catalog.compute_metrics()
+    return catalog
+
+
+def inputs_of(catalog):
+    """Same rows, metrics not yet computed."""
+    return Catalog(catalog.day, catalog.category, catalog.name, catalog.supplier_cents,
+                   catalog.retail_cents, catalog.shipping_cents, catalog.channels, compute=False)
+
+
+@pytest.mark.parametrize('partition', PARTITIONS)
+@pytest.mark.parametrize('workers', [1, 3])
+def test_parallel_equals_serial(serial, partition, workers):
+    for k, key in ((5, 'profit_cents'), (1000, 'profit_cents'), (50, 'margin_pct')):
+        parallel, top = build_parallel(inputs_of(serial), workers, k, key, partition=partition)
+        for column in ('total_cents', 'profit_cents', 'margin_pct'):
+            assert np.array_equal(getattr(parallel, column), getattr(serial, column)), column
+        assert np.array_equal(top, serial.top_k(k, key)), (k, key)
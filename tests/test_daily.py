@@ -0,0 +1,50 @@
+"""Daily automation: which catalog today's product is read from."""
+import os
+from datetime import datetime
+
+from merch_store.catalog import synthetic
+from merch_store.catalog_bin import write_catalog
+from merch_store.catalog_io import write_chunks
+from merch_store.catalog_row import current_bin
+from merch_store.daily import get_next_product_from_catalog
+
+NOW = datetime(2026, 3, 7)
+
+
+def catalogs(tmp_path):
+    """A CSV and a binary copy with the same Days but different names, so each read shows its source."""
+    csv_path, bin_path = str(tmp_path / 'catalog.csv'), str(tmp_path / 'catalog.bin')
+    in_csv, in_bin = synthetic(40), synthetic(40)
+    in_bin.name = in_bin.name + ' (bin)'
+    write_chunks(csv_path, [in_csv])
+    write_catalog(in_bin, bin_path)
+    return csv_path, bin_path
+
+
+def touch(path, seconds):
+    os.utime(path, ns=(seconds * 10**9, seconds * 10**9))
+
+
+def test_current_binary_catalog_is_used(tmp_path):
+    csv_path, bin_path = catalogs(tmp_path)
+    touch(csv_path, 1000)
+    touch(bin_path, 1000)
+    assert current_bin(csv_path) == bin_path
+    assert get_next_product_from_catalog(csv_path, NOW)['Product_Name'].endswith(' (bin)')
+
+
+def test_stale_binary_catalog_falls_back_to_the_csv(tmp_path):
+    csv_path, bin_path = catalogs(tmp_path)
+    touch(bin_path, 1000)
+    touch(csv_path, 2000)  # appended to after the binary copy was written
+    assert current_bin(csv_path) is None
+    product = get_next_product_from_catalog(csv_path, NOW)
+    assert product['Product_Name'] == f"Synthetic Product {product['Day']}"
+
+
+def test_binary_catalog_without_a_csv(tmp_path):
+    csv_path, bin_path = catalogs(tmp_path)
+    os.remove(csv_path)
+    assert current_bin(csv_path) == bin_path
+    os.remove(bin_path)
+    assert current_bin(csv_path) is None
@@ -0,0 +1,169 @@
+"""HTTP client retries and server request limits."""
+import asyncio
+import socket
+import time
+
+import pytest
+
+from merch_store.http import ConnectionPool, HTTPError, HTTPServer, Response, RetryPolicy
+
+FAST_RETRY = RetryPolicy(attempts=4, base=0.001, cap=0.01)
+
+
+def test_retry_after_is_a_lower_bound():
+    policy = RetryPolicy(cap=30.0)
+    throttled = Response(429, {'retry-after': '60'}, b'')
+    delays = [policy.delay(0, throttled) for _ in range(200)]
+    assert min(delays) >= 60 and max(delays) <= 90
+    assert all(0 <= policy.delay(10) <= 30 for _ in range(200))
+    assert all(0.5 <= policy.delay(0, Response(503, {'retry-after': '0.5'}, b'')) <= 1.0 for _ in range(200))
+
+
+class Flaky:
+    """Replies ``status`` to the first ``failures`` requests, then 200."""
+
+    def __init__(self, status, failures=1):
+        self.status = status
+        self.failures = failures
+        self.calls = 0
+
+    async def __call__(self, method, path, query, headers, body):
+        self.calls += 1
+        if self.calls <= self.failures:
+            return self.status, {'error': 'try again'}, {'Retry-After': '0'}
+        return 200, {'ok': True}
+
+
+def call(server, method='POST', **kwargs):
+    async def run():
+        async with ConnectionPool(server.url, retry=FAST_RETRY) as pool:
+            return await pool.request(method, '/x', json={'a': 1}, **kwargs)
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def flaky():
+    started = []
+
+    def start(status):
+        handler = Flaky(status)
+        started.append(HTTPServer(handler).start_in_thread())
+        return started[-1], handler
+
+    yield start
+    for server in started:
+        server.stop_thread()
+
+
+def test_plain_post_is_not_retried_after_a_server_error(flaky):
+    server, handler = flaky(503)
+    with pytest.raises(HTTPError) as caught:
+        call(server)
+    assert caught.value.status == 503 and handler.calls == 1
+
+
+@pytest.mark.parametrize('kwargs', [{'headers': {'Idempotency-Key': 'k1'}}, {'idempotent': True}],
+                         ids=['header', 'flag'])
+def test_idempotent_post_is_retried(flaky, kwargs):
+    server, handler = flaky(503)
+    assert call(server, **kwargs).json() == {'ok': True} and handler.calls == 2
+
+
+def test_throttled_post_is_retried(flaky):
+    server, handler = flaky(429)
+    assert call(server).json() == {'ok': True} and handler.calls == 2
+
+
+def test_throttled_requests_come_back_staggered():
+    """All wait out the Retry-After, then each its own jitter: they do not return together."""
+    arrivals = []
+
+    async def handler(method, path, query, headers, body):
+        arrivals.append(time.monotonic())
+        if len(arrivals) <= 8:
+            return 429, {'error': 'slow down'}, {'Retry-After': '0.05'}
+        return 200, {'ok': True}
+
+    server = HTTPServer(handler).start_in_thread()
+
+    async def run():
+        async with ConnectionPool(server.url, max_connections=8, retry=RetryPolicy(attempts=2, cap=1.0)) as pool:
+            await asyncio.gather(*(pool.get('/x') for _ in range(8)))
+    try:
+        asyncio.run(run())
+    finally:
+        server.stop_thread()
+    throttled, retried = arrivals[:8], arrivals[8:]
+    assert len(retried) == 8 and min(retried) - max(throttled) >= 0.05
+    assert max(retried) - min(retried) > 0.005
+
+
+def test_get_is_retried(flaky):
+    server, handler = flaky(502)
+    assert call(server, 'GET').json() == {'ok': True} and handler.calls == 2
+
+
+def test_refused_post_is_retried():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    attempts = []
+
+    async def run():
+        async with ConnectionPool(f'http://127.0.0.1:{port}', retry=FAST_RETRY,
+                                  on_response=lambda *args: attempts.append(args)) as pool:
+            await pool.post('/x', json={})
+    with pytest.raises(ConnectionRefusedError):
+        asyncio.run(run())
+    assert len(attempts) == FAST_RETRY.attempts
+
+
+def exchange(server, raw):
+    """Send raw bytes and return the status line and whether the server then closed the connection."""
+    async def run():
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(raw)
+        await writer.drain()
+        status = (await reader.readline()).decode('latin-1').split(' ')[1]
+        rest = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return int(status), b'Connection: close' in rest
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def server():
+    seen = []
+
+    async def handler(method, path, query, headers, body):
+        seen.append(body)
+        return 200, {'bytes': len(body)}
+
+    server = HTTPServer(handler, max_body=1000).start_in_thread()
+    server.seen = seen
+    yield server
+    server.stop_thread()
+
+
+@pytest.mark.parametrize('raw, status', [
+    (b'GET\r\n\r\n', 400),
+    (b'GET /x HTTP/1.1 extra\r\n\r\n', 400),
+    (b'GET /x FTP/1.0\r\n\r\n', 400),
+    (b'GET /x HTTP/1.1\r\nno colon here\r\n\r\n', 400),
+    (b'GET /x HTTP/1.1\r\nX-Big: ' + b'a' * 70_000 + b'\r\n\r\n', 400),
+    (b'POST /x HTTP/1.1\r\nContent-Length: nope\r\n\r\n', 400),
+    (b'POST /x HTTP/1.1\r\nContent-Length: 5000\r\n\r\n' + b'a' * 5000, 413),
+    (b'POST /x HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n' + (b'1f4\r\n' + b'a' * 500 + b'\r\n') * 3, 413),
+    (b'POST /x HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n', 400),
+], ids=['short line', 'long line', 'not http', 'bad header', 'huge header', 'bad length', 'large body',
+        'large chunked body', 'bad chunk size'])
+def test_bad_requests_are_refused(server, raw, status):
+    assert exchange(server, raw) == (status, True)
+    assert server.seen == []
+
+
+def test_requests_within_limits_are_served(server):
+    chunked = b'POST /x HTTP/1.1\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n'
+    chunked += b'1f4\r\n' + b'a' * 500 + b'\r\n' + b'1f4\r\n' + b'a' * 500 + b'\r\n0\r\n\r\n'
+    assert exchange(server, chunked) == (200, False)
+    assert server.seen == [b'a' * 1000]
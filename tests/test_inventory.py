@@ -0,0 +1,88 @@
+"""API2Cart stock sync against the local FakeAPI2Cart."""
+import asyncio
+
+import pytest
+
+from merch_store.http import RetryPolicy
+from merch_store.inventory import InventorySync, sync_inventory
+from testbed.fakes import FakeAPI2Cart
+from testbed.workloads import STORES, changes, push
+
+FAST_RETRY = RetryPolicy(attempts=20, base=0.005, cap=1.0)
+FAST = {'batch_size': 50, 'window': 0.002, 'retry': FAST_RETRY, 'rates': {}, 'poll': 0.001}
+
+
+def test_last_write_wins_and_unknown_skus_are_reported(serve):
+    stream = changes(20_000, 500, seed=1)
+    unknown = {'SKU-000007', 'SKU-000123'}
+    fake = serve(FakeAPI2Cart(unknown_skus=unknown, latency=0.002))
+    reports = asyncio.run(push(fake.url, stream, **FAST))
+    last = dict(stream)
+    expected = {sku: q for sku, q in last.items() if sku not in unknown}
+    for name, key in STORES.items():
+        assert fake.stock[key] == expected, f'{name}: final stock differs from the last write'
+        report = reports[name]
+        assert {sku for sku, _ in report.failures} == unknown & set(last), report
+        assert report.updates == len(stream) and report.coalesced > 0, report
+        assert report.sent >= len(expected) and report.batches == fake.batches[key], report
+    assert fake.polls >= 2 * sum(fake.batches.values())  # every job is polled until it has run
+
+
+def test_throttled_stores_converge(serve):
+    stream = changes(3000, 500, seed=1)
+    fake = serve(FakeAPI2Cart(store_rate=2, latency=0.002))
+    reports = asyncio.run(push(fake.url, stream, **FAST))
+    assert fake.throttled > 0
+    assert all(fake.stock[key] == dict(stream) for key in STORES.values())
+    assert all(report.ok for report in reports.values())
+
+
+def test_store_without_products_is_reported(serve):
+    fake = serve(FakeAPI2Cart(empty_stores={'EBAY-KEY'}))
+    reports = sync_inventory([('SKU-1', 5), ('SKU-2', 7)], STORES, api_key='test', base_url=fake.url, **FAST)
+    assert reports['etsy'].ok and reports['amazon'].ok
+    failures = reports['ebay'].failures
+    assert [sku for sku, _ in failures] == ['SKU-1', 'SKU-2']
+    assert all('reported no products' in error for _, error in failures)
+
+
+class BrokenJobs(FakeAPI2Cart):
+    """Answers batch.job.result for ``store_key`` with ``reply``."""
+
+    def __init__(self, store_key, reply, **kwargs):
+        super().__init__(**kwargs)
+        self.store_key = store_key
+        self.reply = reply
+
+    async def handle(self, method, path, query, headers, payload):
+        if path == '/batch.job.result.json' and headers.get('x-store-key') == self.store_key:
+            return 200, self.reply
+        return await super().handle(method, path, query, headers, payload)
+
+
+@pytest.mark.parametrize('reply, error', [
+    ({"return_code": 0}, 'malformed reply'),
+    ({"return_code": 0, "result": {"status": "completed"}}, 'completed without items'),
+    ({"return_code": 0, "result": {"status": "failed"}}, 'failed'),
+    ({"return_code": 5, "return_message": "Store is down", "result": {}}, 'Store is down'),
+], ids=['no result', 'no items', 'job failed', 'error code'])
+def test_broken_job_results_fail_that_store_only(serve, reply, error):
+    fake = serve(BrokenJobs('AMZN-KEY', reply))
+    reports = sync_inventory([('SKU-1', 5)], STORES, api_key='test', base_url=fake.url, **FAST)
+    assert reports['etsy'].ok and reports['ebay'].ok
+    [(sku, message)] = reports['amazon'].failures
+    assert sku == 'SKU-1' and error in message
+
+
+def test_job_that_never_runs_times_out(serve):
+    fake = serve(BrokenJobs('ETSY-KEY', {"return_code": 0, "result": {"status": "processing"}}))
+    reports = sync_inventory([('SKU-1', 5)], {'etsy': 'ETSY-KEY'}, api_key='test', base_url=fake.url,
+                             **dict(FAST, job_timeout=0.05))
+    [(_, message)] = reports['etsy'].failures
+    assert 'still processing' in message
+
+
+def test_no_stores_is_an_error(monkeypatch):
+    monkeypatch.delenv('API2CART_STORES', raising=False)
+    with pytest.raises(ValueError):
+        InventorySync()
@@ -0,0 +1,133 @@
+"""Job queue: leases, dead-lettering, crash recovery and lease renewal."""
+import asyncio
+import sqlite3
+import time
+
+from merch_store import scheduler
+from merch_store.jobs import JobQueue, WorkerPool, work
+
+
+def noop(payload):
+    pass
+
+
+def record(payload):
+    """Sleep, then note that job ``n`` ran."""
+    time.sleep(payload['sleep'])
+    db = sqlite3.connect(payload['results'], timeout=60)
+    with db:
+        db.execute('INSERT INTO runs (n) VALUES (?)', (payload['n'],))
+    db.close()
+
+
+def runs(results):
+    db = sqlite3.connect(results)
+    try:
+        return [n for (n,) in db.execute('SELECT n FROM runs')]
+    finally:
+        db.close()
+
+
+def results_db(tmp_path):
+    path = str(tmp_path / 'results.sqlite3')
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE runs (n INTEGER)')
+    db.commit()
+    db.close()
+    return path
+
+
+def test_pool_runs_every_job(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    queue = JobQueue(path)
+    queue.enqueue_many([('noop', {'n': n}, 'test') for n in range(300)])
+    WorkerPool(path, {'noop': 'tests.test_jobs:noop'}, 2, poll=0.05).run_until_idle()
+    assert queue.stats() == {'done': 300}
+    queue.close()
+
+
+def test_killed_workers_jobs_are_rerun(tmp_path):
+    path, results, lease = str(tmp_path / 'jobs.sqlite3'), results_db(tmp_path), 1.0
+    queue = JobQueue(path, lease=lease)
+    queue.enqueue_many([('record', {'n': n, 'sleep': 0.01, 'results': results}, 'test') for n in range(100)])
+    handlers = {'record': 'tests.test_jobs:record'}
+    pool = WorkerPool(path, handlers, 2, lease=lease, poll=0.05).start()
+    time.sleep(0.3)
+    pool.terminate()
+    WorkerPool(path, handlers, 2, lease=lease, poll=0.05).run_until_idle()
+    assert queue.stats() == {'done': 100}
+    assert set(runs(results)) == set(range(100))
+    queue.close()
+
+
+def test_expired_lease_on_last_attempt_is_dead_lettered(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), lease=0.05)
+    job_id = queue.enqueue('noop', {}, max_attempts=2)
+    for attempt in range(2):
+        assert queue.claim('crashed') is not None
+        time.sleep(0.06)  # the worker dies holding the lease
+    assert queue.claim('next') is None
+    assert queue.stats() == {'dead': 1}
+    [(dead_id, kind, attempts, error)] = queue.dead_letters()
+    assert (dead_id, attempts) == (job_id, 2) and 'lease expired' in error
+    queue.close()
+
+
+def test_extend_reports_a_lost_lease(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), lease=0.05)
+    job_id = queue.enqueue('noop', {})
+    queue.claim('a')
+    assert queue.extend(job_id, 'a')
+    time.sleep(0.06)
+    assert queue.claim('b')[0] == job_id
+    assert not queue.extend(job_id, 'a')
+    queue.close()
+
+
+def test_worker_renews_the_lease_of_a_long_job(tmp_path):
+    path, results = str(tmp_path / 'jobs.sqlite3'), results_db(tmp_path)
+    queue = JobQueue(path, lease=0.3)
+    queue.enqueue('record', {'n': 1, 'sleep': 1.0, 'results': results})
+    pool = WorkerPool(path, {'record': 'tests.test_jobs:record'}, 1, lease=0.3, poll=0.05).start()
+    time.sleep(0.6)
+    assert queue.claim('thief') is None  # past the first lease, still held
+    pool.join()
+    assert queue.stats() == {'done': 1} and runs(results) == [1]
+    queue.close()
+
+
+def test_work_returns_after_the_heartbeat_stops(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    queue = JobQueue(path, lease=30.0)
+    queue.enqueue('noop', {})
+    start = time.perf_counter()
+    assert work(path, {'noop': 'tests.test_jobs:noop'}, 'w', lease=30.0, poll=0.05) == 1
+    assert time.perf_counter() - start < 5.0
+    queue.close()
+
+
+class Context:
+    def __init__(self, queue):
+        self._queue = queue
+        self.worker = 'daemon'
+
+    def queue(self):
+        return self._queue
+
+
+def test_drain_queue_renews_the_lease_of_a_long_job(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), lease=0.3)
+    thief = JobQueue(str(tmp_path / 'jobs.sqlite3'), lease=0.3)
+    queue.enqueue('slow', {})
+    stolen = []
+
+    async def slow(context, payload):
+        await asyncio.sleep(0.6)
+        stolen.append(thief.claim('thief'))
+        await asyncio.sleep(0.3)
+
+    monkeypatch.setitem(scheduler.HANDLERS, 'slow', slow)
+    assert asyncio.run(scheduler.drain_queue(Context(queue))) == 1
+    assert stolen == [None] and queue.stats() == {'done': 1}
+    queue.close()
+    thief.close()
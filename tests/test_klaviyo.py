@@ -0,0 +1,63 @@
+"""Klaviyo digests: every product once, escaped, and cached renders equal to uncached ones."""
+import html
+import os
+
+import pytest
+
+from merch_store.catalog_io import read_chunks
+from merch_store.daily import CATALOG_CSV
+from merch_store.klaviyo import (DIGEST_FOOTER, DIGEST_PRODUCT, RenderCache, digest_html, new_product_html,
+                                 plan_digests, send_product_digests, send_window)
+from testbed.fakes import FakeKlaviyo
+from testbed.workloads import launches, legacy_html
+from tests.conftest import ROOT
+
+
+@pytest.fixture
+def products():
+    products = launches(300, 7, seed=6)
+    for i, p in enumerate(products[::11]):
+        p['Product_Name'] = f'<script>alert("{i}")</script> & Tee'
+    return products
+
+
+def test_plain_names_match_the_guide(products):
+    plain = [p for p in products[:50] if '<script>' not in p['Product_Name']]
+    assert plain and all(new_product_html(p) == legacy_html(p) for p in plain)
+
+
+def test_template_key_covers_the_fields_it_reads(products):
+    a = dict(products[0], url='x')
+    assert DIGEST_PRODUCT.key(a) == DIGEST_PRODUCT.key(dict(a, Supplier_Cost=-1.0))
+    assert DIGEST_PRODUCT.key(a) != DIGEST_PRODUCT.key(dict(a, url='y'))
+    assert DIGEST_FOOTER.key(a) == ()
+
+
+def test_cached_digests_match_uncached(products):
+    groups = list(plan_digests(products, max_products=5))
+    assert [p for g in groups for p in g] == products
+    assert all(len({send_window(p) for p in g}) == 1 for g in groups)
+    cache = RenderCache()
+    cached = [digest_html(g, cache) for g in groups] + [digest_html(g, cache) for g in groups]
+    assert cached == [digest_html(g, RenderCache(maxsize=0)) for g in groups] * 2
+    assert cache.misses == len(products) + len({len(g) for g in groups}) + 1
+
+
+def test_digests_send_every_product_once_escaped(serve, products):
+    fake = serve(FakeKlaviyo())
+    campaigns = send_product_digests(products, list_id='L1', max_products=5, api_key='k', base_url=fake.url,
+                                     rate=None)
+    assert len(campaigns) == len(fake.campaigns) == len(list(plan_digests(products, max_products=5)))
+    body = ''.join(c['html'] for c in fake.campaigns)
+    assert '<script>' not in body
+    assert all(body.count(f"<h2>{html.escape(p['Product_Name'])}</h2>") == 1 for p in products)
+
+
+def test_shipped_catalog_goes_out_as_weekly_digests(serve):
+    products = [p for chunk in read_chunks(os.path.join(ROOT, CATALOG_CSV)) for p in chunk.records()]
+    groups = list(plan_digests(products))
+    assert [[p['Day'] for p in g] for g in groups] == [list(range(d, min(d + 7, 31))) for d in range(1, 31, 7)]
+    fake = serve(FakeKlaviyo())
+    send_product_digests(products, list_id='L1', api_key='k', base_url=fake.url, rate=None)
+    assert [c['subject'] for c in fake.campaigns] == [f"New Arrivals: {g[0]['Product_Name']} + {len(g) - 1} more"
+                                                      for g in groups]
@@ -0,0 +1,203 @@
+"""KPI cube: rollups against a pandas recompute, catalog syncs, reloads and the summary."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from merch_store.catalog import Catalog, synthetic
+from merch_store.catalog_bin import write_catalog
+from merch_store.catalog_io import read_chunks, write_chunks
+from merch_store.kpi import UNKNOWN, KPICube, catalog_kpis
+from merch_store.ledger import OrderLedger, synthetic_orders
+from testbed.workloads import START_SECONDS
+from tests.conftest import ROOT
+
+GROUPINGS = [(), ('category',), ('channel',), ('category', 'channel'), ('day',)]
+DIMS = {'day': 'Day', 'category': 'Product_Category', 'channel': 'Marketing_Channels'}
+CATALOG_CSV = os.path.join(ROOT, 'anti_ai_merch_store_30day_catalog.csv')
+RANGE_KEYS = ('min_margin_pct', 'max_margin_pct', 'min_gross_profit', 'max_gross_profit')
+
+
+def product_reference(catalog, by=(), category=None):
+    frame = catalog.to_frame()
+    frame['profit_cents'] = catalog.profit_cents
+    if category is not None:
+        frame = frame[frame.Product_Category == category]
+    groups = frame.groupby([DIMS[d] for d in by], sort=False) if by else [((), frame)]
+    rows = []
+    for key, part in groups:
+        if not len(part):
+            continue
+        key = key if isinstance(key, tuple) else (key,)
+        top = part.nlargest(5, 'profit_cents', keep='all').sort_values(['profit_cents', 'Day'], ascending=[False, True])
+        rows.append({**{DIMS[d]: k for d, k in zip(by, key)}, 'products': len(part),
+                     'avg_margin_pct': part['Profit_Margin_%'].mean(),
+                     'min_margin_pct': part['Profit_Margin_%'].min(), 'max_margin_pct': part['Profit_Margin_%'].max(),
+                     'avg_gross_profit': part.profit_cents.mean() / 100,
+                     'min_gross_profit': part.profit_cents.min() / 100,
+                     'max_gross_profit': part.profit_cents.max() / 100,
+                     'top': top.Day.head(5).tolist()})
+    return rows
+
+
+def check_products(cube, catalog, label):
+    for by in GROUPINGS:
+        for category in (None, 'Drinkware'):
+            got = {tuple(r[DIMS[d]] for d in by): r for r in cube.product_kpis(by, category=category)}
+            want = {tuple(r[DIMS[d]] for d in by): r for r in product_reference(catalog, by, category)}
+            assert got.keys() == want.keys(), f'{label}: groups differ for {by}'
+            for key, row in want.items():
+                for name, value in row.items():
+                    if isinstance(value, float):
+                        assert abs(got[key][name] - value) < 1e-9, f'{label}: {by} {key} {name}'
+                    else:
+                        assert got[key][name] == value, f'{label}: {by} {key} {name} {got[key][name]} != {value}'
+
+
+def order_reference(orders, by=(), days=None):
+    frame = pd.DataFrame(orders)
+    frame['day'] = frame.ts // 86400
+    if days is not None:
+        frame = frame[(frame.day >= days[0]) & (frame.day < days[1])]
+    frame = frame.rename(columns={d: DIMS[d] for d in ('category', 'channel')}).rename(columns={'day': 'Day'})
+    rows = {}
+    for key, part in (frame.groupby([DIMS[d] for d in by], sort=False) if by else [((), frame)]):
+        if not len(part):
+            continue
+        key = key if isinstance(key, tuple) else (key,)
+        rows[key] = (len(part), int(part.quantity.sum()), int(part.revenue_cents.sum()), int(part.cost_cents.sum()),
+                     int(part.revenue_cents.min()), int(part.revenue_cents.max()))
+    return rows
+
+
+def check_orders(cube, orders, label):
+    day = START_SECONDS // 86400
+    for by in GROUPINGS:
+        for days in (None, (day + 3, day + 9)):
+            got = {tuple(r[DIMS[d]] for d in by): (r['orders'], r['units'], round(r['revenue'] * 100),
+                                                   round((r['revenue'] - r['gross_profit']) * 100),
+                                                   round(r['smallest_order'] * 100), round(r['largest_order'] * 100))
+                   for r in cube.order_kpis(by, days=days)}
+            assert got == order_reference(orders, by, days), f'{label}: orders by {by} over {days}'
+
+
+def changed(catalog, seed):
+    """Reprice 50 products, drop 20 and launch 30 new ones."""
+    rng = np.random.default_rng(seed)
+    keep = np.sort(rng.choice(len(catalog), len(catalog) - 20, replace=False))
+    kept = catalog.take(keep)
+    repriced = rng.choice(len(kept), 50, replace=False)
+    retail = kept.retail_cents.copy()
+    retail[repriced] += 700
+    new = synthetic(30, seed=seed)
+    new.day += int(catalog.day.max())
+    return Catalog(np.concatenate([kept.day, new.day]),
+                   list(kept.category.decode()) + list(new.category.decode()),
+                   list(kept.name) + list(new.name),
+                   np.concatenate([kept.supplier_cents, new.supplier_cents]),
+                   np.concatenate([retail, new.retail_cents]),
+                   np.concatenate([kept.shipping_cents, new.shipping_cents]),
+                   list(kept.channels.decode()) + list(new.channels.decode()))
+
+
+def order_batch(catalog, n, day, seed):
+    batch = synthetic_orders(n, catalog, START_SECONDS + day * 86400, START_SECONDS + (day + 2) * 86400, seed=seed)
+    batch['product'][:3] = -1  # not in the catalog
+    labels = dict(zip(catalog.day.tolist(),
+                      zip(catalog.category.decode().tolist(), catalog.channels.decode().tolist())))
+    snapshot = [labels.get(p, (UNKNOWN, UNKNOWN)) for p in batch['product'].tolist()]
+    rows = {name: batch[name].tolist() for name in ('ts', 'quantity', 'revenue_cents', 'cost_cents')}
+    rows['category'] = [c for c, _ in snapshot]
+    rows['channel'] = [c for _, c in snapshot]
+    return batch, rows
+
+
+def test_rollups_match_a_full_recompute(tmp_path):
+    cube_path = str(tmp_path / 'kpi.npz')
+    catalog = synthetic(2000, seed=4)
+    cube = KPICube(cube_path)
+    cube.sync_catalog(catalog)
+    check_products(cube, catalog, 'initial load')
+
+    orders = {name: [] for name in ('ts', 'quantity', 'revenue_cents', 'cost_cents', 'category', 'channel')}
+    with OrderLedger(str(tmp_path / 'orders.ledger'), on_append=cube.feed) as ledger:
+        for i in range(6):
+            if i == 3:
+                catalog = changed(catalog, seed=i)
+                diff = cube.sync_catalog(catalog)
+                assert (len(diff.creates), len(diff.updates), len(diff.deletes)) == (30, 50, 20), diff
+                check_products(cube, catalog, 'after sync')
+            batch, rows = order_batch(catalog, 4000, 2 * i, seed=i)
+            ledger.append(**batch)
+            for name, values in rows.items():
+                orders[name].extend(values)
+            check_orders(cube, orders, f'order batch {i}')
+    cube.save()
+
+    cube = KPICube(cube_path)
+    check_products(cube, catalog, 'reloaded')
+    check_orders(cube, orders, 'reloaded')
+    catalog = changed(catalog, seed=9)
+    assert len(cube.sync_catalog(catalog)) == 100
+    check_products(cube, catalog, 'sync after reload')
+
+
+def test_edits_and_removals_keep_extremes_and_top(tmp_path):
+    catalog = synthetic(500, seed=2)
+    cube = KPICube()
+    cube.sync_catalog(catalog)
+    best = catalog.top_k(3)
+    cube.remove_products(catalog.day[best])
+    rest = catalog.take(np.setdiff1d(np.arange(len(catalog)), best))
+    check_products(cube, rest, 'top products removed')
+    rest.retail_cents[:40] += 5000
+    rest.compute_metrics()
+    cube.upsert_products(rest, np.arange(40))
+    check_products(cube, rest, 'repriced')
+    with pytest.raises(ValueError):
+        cube.upsert_products(rest, [1, 1])
+
+
+def test_summary_matches_the_catalog():
+    real = next(read_chunks(CATALOG_CSV))
+    cube = KPICube()
+    cube.sync_catalog(real)
+    summary = cube.summary()
+    assert f"{summary['avg_margin_pct']:.2f} {summary['avg_gross_profit']:.2f}" == '72.75 50.08', summary
+    assert summary['top'] == real.day[real.top_k(5)].tolist()
+    assert summary['min_margin_pct'] == round(float(real.margin_pct.min()), 2)
+    assert summary['max_margin_pct'] == round(float(real.margin_pct.max()), 2)
+
+
+def test_chunked_load_equals_a_sync():
+    catalog = synthetic(1000, seed=7)
+    chunked = KPICube()
+    chunked.load_chunks(catalog.take(np.arange(start, min(start + 300, len(catalog))))
+                        for start in range(0, len(catalog), 300))
+    check_products(chunked, catalog, 'chunked load')
+    assert len(chunked.state) == len(catalog) and len(chunked.state.diff(catalog)) == 0
+
+
+@pytest.mark.parametrize('source', ['csv', 'bin'])
+def test_catalog_kpis_without_a_cube(tmp_path, source):
+    catalog = synthetic(300, seed=8)
+    csv_path = str(tmp_path / 'catalog.csv')
+    if source == 'csv':
+        write_chunks(csv_path, [catalog], chunk_rows=100)
+    else:
+        write_catalog(catalog, str(tmp_path / 'catalog.bin'))
+    cube_path = str(tmp_path / 'kpi.npz')
+    kpis = catalog_kpis(cube_path, csv_path)
+    assert kpis['products'] == len(catalog) and all(key in kpis for key in RANGE_KEYS)
+    assert kpis['min_margin_pct'] <= kpis['avg_margin_pct'] <= kpis['max_margin_pct']
+    assert os.path.exists(cube_path) and catalog_kpis(cube_path, csv_path) == kpis
+
+
+def test_catalog_kpis_of_an_empty_catalog(tmp_path):
+    csv_path = str(tmp_path / 'catalog.csv')
+    write_chunks(csv_path, [])
+    with pytest.raises(LookupError, match='empty'):
+        catalog_kpis(str(tmp_path / 'kpi.npz'), csv_path)
+    with pytest.raises(LookupError):
+        KPICube().summary()
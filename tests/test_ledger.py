@@ -0,0 +1,174 @@
+"""Order ledger: aggregates against pandas, torn segments, read-only mode and the writer lock."""
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from merch_store.catalog import synthetic
+from merch_store.ledger import SECONDS_PER_DAY, LedgerLocked, OrderLedger, synthetic_orders
+from testbed.workloads import START_SECONDS
+
+
+def expected(frame, period, start=None, stop=None, category=None, by_category=True):
+    """The same aggregate computed with pandas from the raw orders."""
+    def seconds(bound):
+        return int(np.datetime64(bound, 's').astype(np.int64)) if isinstance(bound, str) else bound
+
+    if start is not None:
+        frame = frame[frame.ts >= seconds(start)]
+    if stop is not None:
+        frame = frame[frame.ts < seconds(stop)]
+    if category is not None:
+        frame = frame[frame.category == category]
+    when = pd.to_datetime(frame.ts, unit='s')
+    if period is None:
+        label = pd.Series('all', index=frame.index)
+    elif period == 'day':
+        label = when.dt.strftime('%Y-%m-%d')
+    elif period == 'week':
+        label = when.dt.to_period('W-SUN').dt.start_time.dt.strftime('%Y-%m-%d')
+    else:
+        label = when.dt.strftime('%Y-%m')
+    keys = [label, frame.category] if by_category else [label]
+    grouped = frame.assign(orders=1).groupby(keys, sort=False)[['orders', 'quantity', 'revenue', 'cost']].sum()
+    rows = []
+    for key, (orders, units, revenue, cost) in grouped.iterrows():
+        key = key if isinstance(key, tuple) else (key,)
+        profit = revenue - cost
+        rows.append((*key, orders, units, revenue / 100, profit / 100, round(profit / revenue * 100, 2)))
+    return sorted(rows)
+
+
+def actual(ledger, period, start=None, stop=None, category=None, by_category=True):
+    rows = ledger.aggregate(period, start, stop, category, by_category)
+    fields = ['period', 'Product_Category'] if by_category else ['period']
+    fields += ['orders', 'units', 'revenue', 'gross_profit', 'margin_pct']
+    return sorted(tuple(row[f] for f in fields) for row in rows)
+
+
+def queries():
+    mid_day = START_SECONDS + 40 * SECONDS_PER_DAY + 13 * 3600 + 17
+    return [
+        ('day', None, None, None, True),
+        ('week', None, None, None, True),
+        ('month', None, None, None, True),
+        (None, None, None, None, False),
+        ('week', '2026-02-01', '2026-03-15', None, True),
+        ('month', mid_day, mid_day + 50 * SECONDS_PER_DAY + 999, None, True),
+        ('day', '2026-01-20T06:00:00', None, 'Drinkware', True),
+        ('month', None, '2026-03-01', 'Apparel', False),
+    ]
+
+
+def check(ledger, orders, label):
+    for query in queries():
+        assert actual(ledger, *query) == expected(orders, *query), f"{label}: {query}"
+
+
+def order_batches():
+    """Uneven batches, one of them out of time order."""
+    catalog = synthetic(200, seed=3)
+    batches = []
+    for i, (n, day) in enumerate([(7000, 0), (3000, 20), (12000, 25), (1, 60), (9000, 61), (2500, 10), (6000, 90)]):
+        span = 3000 if i == 3 else 30
+        batches.append(synthetic_orders(n, catalog, START_SECONDS + day * SECONDS_PER_DAY,
+                                        START_SECONDS + (day + span) * SECONDS_PER_DAY, seed=i))
+    return batches
+
+
+def frame(parts):
+    return pd.DataFrame({
+        'ts': np.concatenate([b['ts'] for b in parts]),
+        'category': np.concatenate([b['category'].decode() for b in parts]),
+        'quantity': np.concatenate([b['quantity'] for b in parts]),
+        'revenue': np.concatenate([b['revenue_cents'] for b in parts]),
+        'cost': np.concatenate([b['cost_cents'] for b in parts]),
+    })
+
+
+def tail_of(batch, start):
+    tail = {name: values[start:] for name, values in batch.items() if name != 'category'}
+    tail['category'] = batch['category'].take(np.arange(start, len(batch['ts'])))
+    return tail
+
+
+@pytest.fixture
+def torn(tmp_path):
+    """A ledger whose last segment was torn by a crash, and the batches written to it."""
+    path = str(tmp_path / 'orders.ledger')
+    batches = order_batches()
+    with OrderLedger(path, segment_rows=5000) as ledger:
+        for batch in batches[:-1]:
+            ledger.append(**batch)
+    with OrderLedger(path, segment_rows=5000) as ledger:
+        ledger.append(**batches[-1])
+    os.truncate(path, os.path.getsize(path) - 100)
+    return path, batches
+
+
+def test_aggregates_match_pandas(tmp_path):
+    path = str(tmp_path / 'orders.ledger')
+    batches = order_batches()
+    with OrderLedger(path, segment_rows=5000) as ledger:
+        for batch in batches[:-1]:
+            ledger.append(**batch)
+        assert ledger._pending_rows, 'nothing buffered: pending path untested'
+        check(ledger, frame(batches[:-1]), 'with buffered orders')
+    with OrderLedger(path, segment_rows=5000) as ledger:
+        assert len(ledger) == sum(len(b['ts']) for b in batches[:-1])
+        check(ledger, frame(batches[:-1]), 'reopened')
+
+
+def test_writer_cuts_off_a_torn_segment(torn):
+    path, batches = torn
+    kept = sum(len(b['ts']) for b in batches[:-1])
+    with OrderLedger(path, segment_rows=5000) as ledger:
+        assert len(ledger) == kept + len(batches[-1]['ts']) // 5000 * 5000
+        ledger.append(**tail_of(batches[-1], len(ledger) - kept))
+        check(ledger, frame(batches), 'after a torn segment')
+
+
+def test_reader_ignores_a_torn_segment_without_cutting_it(torn):
+    path, batches = torn
+    size = os.path.getsize(path)
+    with OrderLedger(path, readonly=True) as ledger:
+        kept = sum(len(b['ts']) for b in batches[:-1])
+        assert len(ledger) == kept + len(batches[-1]['ts']) // 5000 * 5000
+        assert ledger.totals()['orders'] == len(ledger)
+        with pytest.raises(ValueError):
+            ledger.append(**batches[0])
+    assert os.path.getsize(path) == size
+
+
+def test_reader_can_open_while_a_writer_appends(tmp_path):
+    path = str(tmp_path / 'orders.ledger')
+    batches = order_batches()
+    with OrderLedger(path, segment_rows=5000) as writer:
+        writer.append(**batches[0])
+        with OrderLedger(path, readonly=True) as reader:
+            assert len(reader) == 5000  # sealed segments only, not the writer's buffer
+            check(reader, frame([batches[0]]).iloc[:5000], 'read while writing')
+
+
+def open_for_writing(path, results):
+    try:
+        OrderLedger(path).close()
+        results.put('opened')
+    except LedgerLocked:
+        results.put('locked')
+
+
+def test_only_one_writer_at_a_time(tmp_path):
+    path = str(tmp_path / 'orders.ledger')
+    with OrderLedger(path):
+        with pytest.raises(LedgerLocked):
+            OrderLedger(path)
+        results = multiprocessing.get_context('spawn').Queue()
+        child = multiprocessing.get_context('spawn').Process(target=open_for_writing, args=(path, results))
+        child.start()
+        child.join()
+        assert results.get(timeout=5) == 'locked'
+    with OrderLedger(path) as ledger:
+        assert len(ledger) == 0
@@ -0,0 +1,206 @@
+"""Metric series of HTTP attempts and stages, the exposition text, and worker processes' metrics."""
+import asyncio
+import json
+import re
+import socket
+
+import pytest
+
+from merch_store import metrics
+from merch_store.http import ConnectionPool, HTTPError, HTTPServer, RetryPolicy
+from merch_store.jobs import JobQueue, WorkerPool
+
+FAST_RETRY = RetryPolicy(attempts=3, base=0.001, cap=0.001)
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+
+
+def value(metric, *labels):
+    series = metric.children.get(labels)
+    return 0 if series is None else series.value
+
+
+def count(metric, *labels):
+    series = metric.children.get(labels)
+    return 0 if series is None else sum(series.counts)
+
+
+def noop(payload):
+    pass
+
+
+def fetch(payload):
+    async def run():
+        async with ConnectionPool(payload['url'], name='test-forked', retry=FAST_RETRY) as pool:
+            await pool.get('/ok')
+    asyncio.run(run())
+
+
+class Server:
+    """Local server whose /flaky path fails once and whose handler notes the in-flight gauge."""
+
+    def __init__(self):
+        self.flaky = 0
+        self.seen_in_flight = []
+
+    async def handle(self, method, path, query, headers, body):
+        self.seen_in_flight.append(value(metrics.HTTP_IN_FLIGHT, 'test-client'))
+        if path == '/flaky':
+            self.flaky += 1
+            if self.flaky == 1:
+                return 503, {'error': 'busy'}
+        if path == '/missing':
+            return 404, {'error': 'not found'}
+        return 200, {'ok': True}
+
+
+def test_client_counts_statuses_retries_and_in_flight():
+    server = Server()
+    http = HTTPServer(server.handle).start_in_thread()
+
+    async def run():
+        async with ConnectionPool(http.url, name='test-client', retry=FAST_RETRY) as pool:
+            for _ in range(3):
+                await pool.get('/ok')
+            await pool.post('/flaky', json={}, idempotent=True)
+            with pytest.raises(HTTPError):
+                await pool.get('/missing')
+    try:
+        asyncio.run(run())
+    finally:
+        http.stop_thread()
+    assert server.seen_in_flight == [1] * 6
+    assert value(metrics.HTTP_IN_FLIGHT, 'test-client') == 0
+    statuses = {status: value(metrics.HTTP_RESPONSES, 'test-client', status)
+                for status in ('200', '503', '404', 'error')}
+    assert statuses == {'200': 4, '503': 1, '404': 1, 'error': 0}
+    assert value(metrics.HTTP_RETRIES, 'test-client') == 1
+    assert count(metrics.HTTP_SECONDS, 'test-client', 'GET') == 4
+    assert count(metrics.HTTP_SECONDS, 'test-client', 'POST') == 2
+
+
+def test_refused_connection_counts_as_error():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    async def run():
+        async with ConnectionPool(f'http://127.0.0.1:{port}', name='test-down', retry=FAST_RETRY) as pool:
+            await pool.get('/ok')
+    with pytest.raises(OSError):
+        asyncio.run(run())
+    assert value(metrics.HTTP_RESPONSES, 'test-down', 'error') == 3
+    assert value(metrics.HTTP_RETRIES, 'test-down') == 2
+    assert value(metrics.HTTP_IN_FLIGHT, 'test-down') == 0
+
+
+def test_stages_count_outcomes_and_in_flight():
+    seen = []
+
+    @metrics.stage('test.async')
+    async def work(fail):
+        seen.append(value(metrics.STAGE_IN_FLIGHT, 'test.async'))
+        await asyncio.sleep(0)
+        if fail:
+            raise ValueError('no')
+        return 'done'
+
+    @metrics.stage('test.sync')
+    def compute(x):
+        seen.append(value(metrics.STAGE_IN_FLIGHT, 'test.sync'))
+        return x * 2
+
+    async def run():
+        assert await asyncio.gather(work(False), work(False)) == ['done', 'done']
+        with pytest.raises(ValueError):
+            await work(True)
+    asyncio.run(run())
+    assert compute(21) == 42 and work.__name__ == 'work'
+    assert seen == [1, 2, 1, 1]
+    assert value(metrics.STAGE_OUTCOMES, 'test.async', 'ok') == 2
+    assert value(metrics.STAGE_OUTCOMES, 'test.async', 'ValueError') == 1
+    assert value(metrics.STAGE_OUTCOMES, 'test.sync', 'ok') == 1
+    assert value(metrics.STAGE_IN_FLIGHT, 'test.async') == 0
+    assert count(metrics.STAGE_SECONDS, 'test.async') == 3
+
+
+def test_exposition_text_is_valid():
+    metrics.stage('test.text')(noop)({})
+    odd = metrics.REGISTRY.register(metrics.Counter('test_odd_labels_total', 'Labels needing escapes.', ('text',)))
+    try:
+        odd.child('say "hi"\\\nbye').inc()
+        text = metrics.render()
+    finally:
+        del metrics.REGISTRY.metrics['test_odd_labels_total']
+    assert 'test_odd_labels_total{text="say \\"hi\\"\\\\\\nbye"} 1\n' in text
+    declared = set()
+    buckets = {}
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            declared.add(line.split()[2])
+            continue
+        if line.startswith('#'):
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        name, labels, number = match.groups()
+        assert name in declared or name.rsplit('_', 1)[0] in declared, name
+        float(number)
+        if name.endswith('_bucket'):
+            series = (name, re.sub(r',?le="[^"]*"', '', labels))
+            assert int(number) >= buckets.get(series, 0), line
+            buckets[series] = int(number)
+        elif name.endswith('_count'):
+            assert buckets[(name[:-6] + '_bucket', labels)] == int(number), line
+
+
+def test_merge_adds_a_snapshot():
+    def registry():
+        fresh = metrics.Registry()
+        fresh.register(metrics.Counter('test_total', 'Things.', ('kind',)))
+        fresh.register(metrics.Histogram('test_seconds', 'Durations.', buckets=(0.1, 1.0)))
+        return fresh
+
+    worker, parent = registry(), registry()
+    for fresh, kinds, seconds in ((worker, 'aab', (0.05, 0.5)), (parent, 'b', (5.0,))):
+        for kind in kinds:
+            fresh.metrics['test_total'].child(kind).inc()
+        for s in seconds:
+            fresh.metrics['test_seconds'].child().observe(s)
+    metrics.merge(json.loads(json.dumps(metrics.snapshot(worker))), parent)
+    assert value(parent.metrics['test_total'], 'a') == 2 and value(parent.metrics['test_total'], 'b') == 2
+    merged = parent.metrics['test_seconds'].child()
+    assert merged.counts == [1, 1, 1] and merged.sum == pytest.approx(5.55)
+
+
+def test_worker_processes_metrics_reach_the_parent(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    queue = JobQueue(path)
+    queue.enqueue_many([('noop', {}, 'test') for _ in range(30)])
+    before = value(metrics.STAGE_OUTCOMES, 'job.noop', 'ok')
+    WorkerPool(path, {'noop': 'tests.test_metrics:noop'}, 2, poll=0.05).run_until_idle()
+    assert queue.stats() == {'done': 30}
+    assert value(metrics.STAGE_OUTCOMES, 'job.noop', 'ok') - before == 30
+    assert 'merch_stage_total{stage="job.noop",outcome="ok"}' in metrics.render()
+    queue.close()
+
+
+def test_worker_http_metrics_reach_the_parent_when_it_made_the_client_first(tmp_path):
+    server = Server()
+    http = HTTPServer(server.handle).start_in_thread()
+
+    async def run():
+        async with ConnectionPool(http.url, name='test-forked', retry=FAST_RETRY) as pool:
+            await pool.get('/ok')  # cached series the forked workers inherit
+    path = str(tmp_path / 'jobs.sqlite3')
+    queue = JobQueue(path)
+    queue.enqueue_many([('fetch', {'url': http.url}, 'test') for _ in range(10)])
+    try:
+        asyncio.run(run())
+        WorkerPool(path, {'fetch': 'tests.test_metrics:fetch'}, 2, poll=0.05).run_until_idle()
+    finally:
+        http.stop_thread()
+        queue.close()
+    assert len(server.seen_in_flight) == 11
+    assert value(metrics.HTTP_RESPONSES, 'test-forked', '200') == 11
+    assert count(metrics.HTTP_SECONDS, 'test-forked', 'GET') == 11
+    assert value(metrics.HTTP_IN_FLIGHT, 'test-forked') == 0
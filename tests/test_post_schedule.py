@@ -0,0 +1,73 @@
+"""Post calendar: first fit like a linear scan, within every quota, and releases reused."""
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from merch_store.post_schedule import DEFAULT_QUOTAS, FreeSlots, PostCalendar, schedule_posts
+from merch_store.social import DAILY_POSTS, HOOTSUITE_POSTS, product_url
+from testbed.workloads import PLATFORMS, START, ScanCalendar, catalog_over, platform_quotas, posted_at
+
+
+def assert_within_limits(fmt, rows, quotas):
+    quotas = {quota.platform: quota for quota in quotas}
+    by_platform = {}
+    for row in rows:
+        platform, when = posted_at(fmt, row)
+        by_platform.setdefault(platform, []).append(when)
+    for platform, times in by_platform.items():
+        quota = quotas[platform]
+        assert len(set(times)) == len(times), f'{platform}: double-booked slot'
+        assert max(Counter(t.date() for t in times).values()) <= quota.per_day, f'{platform}: over daily cap'
+        times.sort()
+        gaps = np.diff(np.array(times, dtype='datetime64[m]')).astype(np.int64)
+        assert gaps.min(initial=quota.min_gap) >= quota.min_gap, f'{platform}: posts too close'
+
+
+@pytest.mark.parametrize('fmt, campaign', [(DAILY_POSTS, 3), (HOOTSUITE_POSTS, 7)], ids=['daily', 'hootsuite'])
+def test_matches_linear_scan_within_quotas(fmt, campaign):
+    catalog = catalog_over(400, 20, seed=3)
+    fast = schedule_posts(fmt, catalog, PostCalendar(DEFAULT_QUOTAS, START), campaign)
+    slow = schedule_posts(fmt, catalog, ScanCalendar(DEFAULT_QUOTAS, START), campaign)
+    assert fast == slow
+    assert_within_limits(fmt, fast, DEFAULT_QUOTAS)
+    launch = {product_url(p): START + timedelta(days=int(p['Day']) - 1) for p in catalog.records()}
+    assert all(posted_at(fmt, row)[1] >= launch[row[fmt.columns[-1]]] for row in fast)
+
+
+def test_tight_quotas_hold_for_a_packed_year():
+    quotas = platform_quotas(per_day=20, min_gap=15)
+    rows = schedule_posts(DAILY_POSTS, catalog_over(1000, 365), PostCalendar(quotas, START), 7)
+    assert_within_limits(DAILY_POSTS, rows, quotas)
+
+
+def test_posts_never_land_before_they_ask():
+    calendar = PostCalendar(DEFAULT_QUOTAS, START)
+    rng = np.random.default_rng(1)
+    for minutes in rng.integers(0, 60 * 24 * 30, 5000).tolist():
+        earliest = START + timedelta(minutes=minutes, seconds=minutes % 7)
+        assert calendar.place(PLATFORMS[minutes % len(PLATFORMS)], earliest) >= earliest
+
+
+def test_released_slots_are_handed_out_first():
+    calendar = PostCalendar(DEFAULT_QUOTAS, START)
+    placed = [calendar.place('Instagram', START) for _ in range(30)]
+    for when in placed[5:25:3]:
+        calendar.release('Instagram', when)
+    assert [calendar.place('Instagram', START) for _ in range(7)] == placed[5:25:3]
+    assert calendar.place('Instagram', START) == START + timedelta(days=10, hours=9)
+
+
+def test_free_slots_first_fit():
+    slots = FreeSlots(4)
+    taken = set()
+    for i in np.random.default_rng(1).integers(0, 5000, 3000).tolist():
+        j = slots.first_free(i)
+        slots.take(j)
+        k = i
+        while k in taken:
+            k += 1
+        assert j == k
+        taken.add(j)
+    assert slots.taken() == len(taken)
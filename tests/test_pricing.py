@@ -0,0 +1,33 @@
+"""Batch repricing matches the scalar ``optimize_pricing`` row for row."""
+import numpy as np
+import pytest
+
+from merch_store.catalog import synthetic
+from merch_store.pricing import DEFAULT_RULES, LEGACY_RULES, optimize_pricing, reprice_catalog
+from testbed.workloads import market
+
+
+@pytest.mark.parametrize('rules', [LEGACY_RULES, DEFAULT_RULES], ids=['legacy', 'margin floor'])
+def test_batch_matches_scalar_reference(rules):
+    """Inputs include the rule boundaries and rows without views or competitors."""
+    catalog = synthetic(20_000, seed=3)
+    views, sales, competitors, offsets = market(catalog, seed=3)
+    assert (views == 0).any() and (np.diff(offsets) == 0).any()
+    prices = catalog.retail_cents.tolist()
+    totals = catalog.total_cents.tolist()
+    new = rules.reprice(catalog.retail_cents, views, sales, competitors, offsets, catalog.total_cents)
+    for i in range(len(catalog)):
+        expected = optimize_pricing(
+            prices[i] / 100, {'views': int(views[i]), 'sales': int(sales[i])},
+            competitors[offsets[i]:offsets[i + 1]].tolist(), rules, totals[i] / 100)
+        assert round(expected * 100) == new[i], (i, expected, new[i])
+    assert (new != catalog.retail_cents).any()
+
+
+def test_reprice_catalog_leaves_the_input_alone():
+    catalog = synthetic(1000, seed=1)
+    before = catalog.retail_cents.copy()
+    repriced = reprice_catalog(catalog, *market(catalog, seed=1))
+    assert np.array_equal(catalog.retail_cents, before)
+    assert np.array_equal(repriced.retail_cents,
+                          DEFAULT_RULES.reprice(catalog.retail_cents, *market(catalog, seed=1), catalog.total_cents))
@@ -0,0 +1,93 @@
+"""Printful pipeline against the local FakePrintful."""
+import asyncio
+
+from merch_store.catalog import synthetic
+from merch_store.printful import CATEGORY_TEMPLATES, Checkpoint, PrintfulPipeline
+from testbed.fakes import FakePrintful
+
+RATES = {'catalog': 1000.0, 'create_product': 1000.0, 'create_variant': 1000.0}
+
+
+def products(n, seed=0):
+    return list(synthetic(n, seed=seed).records())
+
+
+def expected_variants(rows):
+    """Variants the fake's size x colour matrix yields for each row's template."""
+    total = 0
+    for row in rows:
+        template = CATEGORY_TEMPLATES[row['Product_Category']]
+        sizes = template['sizes'] or FakePrintful.SIZES
+        colors = template['colors'] or FakePrintful.COLORS
+        total += len(set(sizes) & set(FakePrintful.SIZES)) * len(set(colors) & set(FakePrintful.COLORS))
+    return total
+
+
+def sync(fake, rows, **kwargs):
+    async def run():
+        async with PrintfulPipeline('test', fake.url, rates=RATES, **kwargs) as pipeline:
+            return await pipeline.sync(rows)
+    return asyncio.run(run())
+
+
+def test_sync_creates_every_variant(serve):
+    fake = serve(FakePrintful())
+    rows = products(40)
+    report = sync(fake, rows)
+    assert report.ok, report.failures
+    assert report.products_created == len(fake.sync_products) == len(rows)
+    assert report.variants_created == fake.variant_count == expected_variants(rows)
+
+
+def test_resume_from_checkpoint_skips_finished_variants(serve, tmp_path):
+    fake = serve(FakePrintful())
+    rows = products(20)
+    path = str(tmp_path / 'printful.ckpt')
+    first = sync(fake, rows[:10], checkpoint=path)
+    with open(path, 'a') as f:
+        f.write('{"day": 9')  # torn line from a crash
+    second = sync(fake, rows, checkpoint=path)
+    assert second.variants_skipped == first.variants_created
+    assert fake.variant_count == expected_variants(rows)
+    assert len(Checkpoint(path).products) == len(rows)
+
+
+def test_rejected_variants_are_reported_not_fatal(serve):
+    rows = [row for row in products(30) if row['Product_Category'] == 'Apparel'][:3]
+    fake = FakePrintful()
+    first_variant = 71000  # Black / XS: the variant each product is created with
+    fake.fail_variants = {first_variant, 71000 + len(FakePrintful.COLORS) + 1}
+    serve(fake)
+    report = sync(fake, rows)
+    assert len(report.failures) == 2 * len(rows)
+    assert {variant for _, variant, _ in report.failures} == fake.fail_variants
+    assert report.products_created == len(rows)
+    assert fake.variant_count == expected_variants(rows) - 2 * len(rows)
+
+
+class FlakyCatalog(FakePrintful):
+    """Rejects the first catalog fetch of each blank."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.catalog_failures = set()
+
+    async def handle(self, method, path, query, headers, payload):
+        if method == 'GET' and path.startswith('/products/') and path not in self.catalog_failures:
+            self.catalog_failures.add(path)
+            return 400, {"code": 400, "error": {"message": "try again"}}
+        return await super().handle(method, path, query, headers, payload)
+
+
+def test_failed_catalog_fetch_is_not_cached(serve):
+    fake = serve(FlakyCatalog())
+    rows = products(12)
+
+    async def run():
+        async with PrintfulPipeline('test', fake.url, rates=RATES, product_concurrency=1) as pipeline:
+            first = await pipeline.sync(rows[:1])
+            second = await pipeline.sync(rows[:1])
+            return first, second
+    first, second = asyncio.run(run())
+    assert [variant for _, variant, _ in first.failures] == [None]
+    assert second.ok and second.products_created == 1
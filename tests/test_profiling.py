@@ -0,0 +1,128 @@
+"""Stage profiles: the breakdown adds up to the run, for a synthetic run and both entry points."""
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+from merch_store import profiling
+from merch_store.catalog_bin import csv_to_bin
+from merch_store.daily import CATALOG_CSV, DAILY_JOBS
+from testbed.fakes import FakeKlaviyo, FakePrintful, FakeSquare
+from tests.conftest import ROOT
+
+FOLDED = re.compile(r'^(\S[^;]*(?:;[^;]+)*) (\d+)$')
+# Largest share of a run its stages may leave unattributed
+TOLERANCE = 0.05
+DAILY = ("import sys\nfrom merch_store import printful\n"
+         "printful.ENDPOINT_RATES.update(catalog=1000.0, create_product=1000.0, create_variant=1000.0)\n"
+         "from merch_store.daily import main\nmain(sys.argv[1:])\n")
+
+
+def assert_breakdown(summary, folded):
+    """The top-level stages and the remainder add up to the total, and so do the folded lines."""
+    total = summary['total']['wall']
+    top = sum(stage['wall'] for stage in summary['stages'] if len(stage['path']) == 1)
+    assert top + summary['unattributed_wall'] == pytest.approx(total, abs=1e-9)
+    assert 0 <= summary['unattributed_wall'] <= TOLERANCE * total
+    for stage in summary['stages']:
+        children = sum(s['wall'] for s in summary['stages']
+                       if s['path'][:-1] == stage['path'] and len(s['path']) == len(stage['path']) + 1)
+        assert children <= stage['wall'] + 1e-9, stage['path']
+    micros = 0
+    for line in folded.splitlines():
+        match = FOLDED.match(line)
+        assert match, line
+        micros += int(match.group(2))
+    assert abs(micros - total * 1e6) <= len(folded.splitlines())
+
+
+def spin(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def load(prefix):
+    with open(f'{prefix}.json') as f, open(f'{prefix}.folded') as g:
+        return json.load(f), g.read()
+
+
+def test_inactive():
+    with profiling.session(None) as nothing:
+        assert nothing is None and profiling.ACTIVE is None
+    with profiling.stage('ignored') as stats:
+        assert stats is None
+
+
+def test_synthetic_run():
+    profiler = profiling.ACTIVE = profiling.Profiler(trace_memory=True, sample_interval=0.002).start()
+    try:
+        with profiling.stage('sleep'):
+            time.sleep(0.05)
+        with profiling.stage('cpu'):
+            for _ in range(3):
+                with profiling.stage('inner'):
+                    spin(0.01)
+            spin(0.02)
+        with profiling.stage('alloc'):
+            with profiling.stage('temporary'):
+                block = bytearray(4 << 20)
+                del block
+            kept = [bytes(1000) for _ in range(1000)]
+    finally:
+        profiler.stop()
+        profiling.ACTIVE = None
+    stages = {';'.join(path): stats for path, stats in profiler.stages.items()}
+    assert list(stages) == ['sleep', 'cpu', 'cpu;inner', 'alloc', 'alloc;temporary']
+    # CPU time is the process's, so it includes the sampler thread's; sleeping still uses well under half.
+    assert stages['sleep'].wall >= 0.05 and stages['sleep'].cpu < 0.025
+    assert stages['cpu'].cpu >= 0.05 and stages['cpu;inner'].calls == 3
+    assert stages['cpu;inner'].cpu >= 0.03 and stages['cpu;inner'].wall <= stages['cpu'].wall
+    # The 4 MB buffer is gone by the end but sets the peak of its stage and of the enclosing one. Peaks are
+    # relative to the usage at stage entry, which other frees in between can lower by a few bytes.
+    buffer = (4 << 20) - (1 << 12)
+    assert stages['alloc;temporary'].peak_bytes >= buffer and stages['alloc;temporary'].net_bytes < 1 << 16
+    assert stages['alloc'].peak_bytes >= buffer and stages['alloc'].net_bytes >= 1_000_000
+    assert profiler.total.peak_bytes >= buffer and len(kept) == 1000
+    assert any(stack.startswith('cpu;') and 'spin (' in stack for stack in profiler.samples)
+    assert_breakdown(profiler.summary(), profiler.folded())
+
+
+def test_catalog_build(tmp_path, root_env):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'script.py'), '--profile', 'build'],
+                            cwd=tmp_path, env=root_env, check=True, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    assert 'profile written to build.json, build.folded' in result.stderr
+    summary, folded = load(tmp_path / 'build')
+    assert [s['path'][0] for s in summary['stages'] if len(s['path']) == 1] == [
+        'parse and derive margins', 'slugs', 'write csv', 'write binary catalog', 'kpi cube', 'report']
+    assert summary['total']['wall'] < seconds
+    assert_breakdown(summary, folded)
+
+
+def test_daily_run(tmp_path, root_env, serve):
+    square, printful, klaviyo = serve(FakeSquare()), serve(FakePrintful()), serve(FakeKlaviyo())
+    # The binary catalog is a build output, not in the repository: build it from the CSV.
+    csv_path = shutil.copy(os.path.join(ROOT, CATALOG_CSV), tmp_path)
+    csv_to_bin(csv_path, os.path.splitext(csv_path)[0] + '.bin')
+    env = dict(root_env, SQUARE_API_BASE=square.url, PRINTFUL_API_BASE=printful.url, KLAVIYO_API_BASE=klaviyo.url,
+               SQUARE_ACCESS_TOKEN='sq', PRINTFUL_API_KEY='pf', KLAVIYO_API_KEY='kl',
+               PRINTFUL_CHECKPOINT=str(tmp_path / 'daily.ckpt'))
+    env.pop('AUTOMATION_WORKERS', None)
+    result = subprocess.run([sys.executable, '-c', DAILY, '--jobs-db', str(tmp_path / 'jobs.sqlite3'),
+                             '--profile', 'daily'], cwd=tmp_path, env=env, check=True, capture_output=True, text=True)
+    assert "'done': 4" in result.stdout, result.stdout + result.stderr
+    summary, folded = load(tmp_path / 'daily')
+    paths = sorted(tuple(s['path']) for s in summary['stages'])
+    assert paths == sorted([('import job queue',), ('select product',), ('open job queue',), ('enqueue',),
+                            ('run jobs',), ('job report',)] + [('run jobs', kind) for kind, _, _ in DAILY_JOBS])
+    assert {'square', 'printful', 'klaviyo'} <= set(summary['http_seconds'])
+    # Concurrent requests overlap, so HTTP time can add up to more than a stage's wall time.
+    assert all(seconds > 0 for seconds in summary['http_seconds'].values())
+    assert_breakdown(summary, folded)
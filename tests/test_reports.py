@@ -0,0 +1,71 @@
+"""Guide rendering: streamed, section-cached documents match a whole-document render."""
+import os
+
+import pytest
+
+from merch_store.reports import GUIDES, Guide, ReportPipeline, ReportTemplate, SectionCache, guide_values
+from testbed.workloads import documents, streamed
+from tests.conftest import ROOT
+
+
+@pytest.fixture(scope='module')
+def guides():
+    return [Guide.load(name) for name in GUIDES]
+
+
+@pytest.fixture(scope='module')
+def whole(guides):
+    """Each guide as one template, the way the scripts used to render it."""
+    return {guide.name: ReportTemplate(''.join(s.template.text for s in guide.sections)) for guide in guides}
+
+
+def sample(guides):
+    return documents(guides, guide_values(), 400)[::7]
+
+
+def assert_rendered(tmp_path, whole, docs):
+    for name, guide, values in docs:
+        assert (tmp_path / name).read_bytes() == whole[guide.name].render(values).encode('utf-8'), name
+
+
+def test_default_render_matches_the_checked_in_documents(tmp_path, guides):
+    # The technical guide's copy has had trailing whitespace stripped, so lines are compared without it.
+    with ReportPipeline() as pipeline:
+        for guide in guides:
+            path = tmp_path / GUIDES[guide.name]
+            pipeline.write(guide, guide_values(), str(path))
+            with open(path, encoding='utf-8') as f, open(os.path.join(ROOT, GUIDES[guide.name]), encoding='utf-8') as g:
+                assert [line.rstrip() for line in f] == [line.rstrip() for line in g], guide.name
+
+
+@pytest.mark.parametrize('cache', [SectionCache, lambda: SectionCache(1)], ids=['cached', 'one-entry cache'])
+def test_streamed_documents_match_a_whole_render(tmp_path, guides, whole, cache):
+    docs = sample(guides)
+    streamed(ReportPipeline(cache()), str(tmp_path), docs + docs)
+    assert_rendered(tmp_path, whole, docs)
+
+
+def test_manifest_rerun_rewrites_only_changed_documents(tmp_path, guides, whole):
+    docs = sample(guides)
+    manifest = str(tmp_path / 'manifest.json')
+    with ReportPipeline(manifest=manifest) as pipeline:
+        streamed(pipeline, str(tmp_path), docs)
+    with ReportPipeline(manifest=manifest) as pipeline:
+        streamed(pipeline, str(tmp_path), docs)
+    assert (pipeline.written, pipeline.skipped) == (0, len(docs))
+
+    changed = [(name, guide, dict(values, monthly_costs='$1')) if i % 5 == 0 else (name, guide, values)
+               for i, (name, guide, values) in enumerate(docs)]
+    with ReportPipeline(manifest=manifest) as pipeline:
+        streamed(pipeline, str(tmp_path), changed)
+    uses_costs = sum(1 for i, (_, guide, _) in enumerate(docs) if i % 5 == 0 and 'monthly_costs' in guide.fields)
+    assert uses_costs > 0
+    assert (pipeline.written, pipeline.skipped) == (uses_costs, len(docs) - uses_costs)
+    assert_rendered(tmp_path, whole, changed)
+
+
+def test_missing_binding_raises(tmp_path):
+    values = guide_values()
+    del values['setup_weeks']
+    with pytest.raises(KeyError):
+        ReportPipeline().write(Guide.load('executive_summary'), values, str(tmp_path / 'missing.txt'))
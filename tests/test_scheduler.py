@@ -0,0 +1,141 @@
+"""Scheduler daemon: cron expressions, jitter, the HTTP endpoints and the daily jobs against fake services."""
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+
+from merch_store.catalog_bin import csv_to_bin
+from merch_store.daily import CATALOG_CSV, featured_row
+from merch_store.http import NO_RETRY, ConnectionPool, HTTPError
+from merch_store.scheduler import CronExpression, Job, Scheduler, StoreContext, default_scheduler
+from testbed.fakes import FakeKlaviyo, FakePrintful, FakeSquare
+from tests.conftest import ROOT
+
+FAST_PRINTFUL = {'catalog': 1000.0, 'create_product': 1000.0, 'create_variant': 1000.0}
+
+
+@pytest.mark.parametrize('text, after, expected', [
+    ('0 9 * * *', datetime(2026, 10, 18, 9, 0, 30), datetime(2026, 10, 19, 9, 0)),
+    ('0 9 * * *', datetime(2026, 10, 18, 8, 59, 59), datetime(2026, 10, 18, 9, 0)),
+    ('*/15 * * * *', datetime(2026, 10, 18, 9, 7), datetime(2026, 10, 18, 9, 15)),
+    ('5-10/2 3 * * *', datetime(2026, 10, 18, 3, 7), datetime(2026, 10, 18, 3, 9)),
+    ('0 0 13 * 5', datetime(2026, 10, 18), datetime(2026, 10, 23)),  # Friday before the 13th
+    ('0 0 13 * 5', datetime(2026, 11, 7), datetime(2026, 11, 13)),
+    ('0 0 * * 7', datetime(2026, 10, 19), datetime(2026, 10, 25)),  # 7 is Sunday too
+    ('0 0 29 2 *', datetime(2026, 3, 1), datetime(2028, 2, 29)),
+    ('30 23 31 12 *', datetime(2026, 12, 31, 23, 30), datetime(2027, 12, 31, 23, 30)),
+    ('@hourly', datetime(2026, 10, 18, 9, 59), datetime(2026, 10, 18, 10, 0)),
+    ('@weekly', datetime(2026, 10, 18, 1), datetime(2026, 10, 25)),
+    ('@monthly', datetime(2026, 12, 15), datetime(2027, 1, 1)),
+    ('0 12 1,15 1-3 1-5', datetime(2026, 1, 2), datetime(2026, 1, 2, 12)),  # a weekday in January
+])
+def test_next_run(text, after, expected):
+    cron = CronExpression(text)
+    assert cron.next_after(after) == expected
+    assert cron.matches(expected)
+
+
+@pytest.mark.parametrize('text', ['60 * * * *', '* * *', 'x * * * *', '5-1 * * * *', '* * 0 * *', '*/0 * * * *'])
+def test_bad_expression_is_rejected(text):
+    with pytest.raises(ValueError):
+        CronExpression(text)
+
+
+def test_impossible_date_never_fires():
+    with pytest.raises(ValueError):
+        CronExpression('0 0 31 2 *').next_after(datetime(2026, 1, 1))
+
+
+def test_jitter_stays_within_its_bound():
+    job = Job('j', '* * * * *', None, jitter=5.0)
+    now = datetime(2026, 10, 18, 9, 0, 0, 500_000)
+    for _ in range(1000):
+        fire, seconds = job.delay(now)
+        assert fire == datetime(2026, 10, 18, 9, 1) and 59.5 <= seconds <= 64.5, seconds
+
+
+def test_clock_stepped_back_does_not_refire_a_minute():
+    job = Job('j', '* * * * *', None)
+    fire, _ = job.delay(datetime(2026, 10, 18, 9, 0, 30), last=datetime(2026, 10, 18, 9, 1))
+    assert fire == datetime(2026, 10, 18, 9, 2)
+
+
+def test_endpoints_skip_overlaps_and_report_failures():
+    async def run():
+        release = asyncio.Event()
+
+        async def slow(context):
+            await release.wait()
+
+        async def broken(context):
+            raise RuntimeError('boom')
+
+        scheduler = Scheduler(port=0)
+        scheduler.add('slow', '@yearly', slow)
+        scheduler.add('broken', '@yearly', broken)
+        await scheduler.start()
+        try:
+            async with ConnectionPool(scheduler.url, retry=NO_RETRY) as client:
+                assert (await client.get('/health')).json()['status'] == 'ok'
+                first = scheduler.trigger(scheduler.jobs['slow'])
+                assert first is not None and scheduler.trigger(scheduler.jobs['slow']) is None
+                with pytest.raises(HTTPError) as overlapping:
+                    await client.post('/jobs/slow')
+                assert overlapping.value.response.status == 409
+                assert (await client.get('/health')).json()['running'] == ['slow']
+                release.set()
+                await first
+                assert (await client.post('/jobs/slow')).json()['runs'] == 2
+                assert (await client.post('/jobs/broken')).json()['failures'] == 1
+                health = (await client.get('/health')).json()
+                assert (health['status'], health['failing']) == ('degraded', ['broken'])
+                jobs = (await client.get('/jobs')).json()['jobs']
+                assert (jobs['slow']['skipped'], jobs['slow']['runs']) == (2, 2)
+                assert 'RuntimeError: boom' in jobs['broken']['last_error']
+                text = (await client.get('/metrics')).body.decode('utf-8')
+                assert 'merch_job_runs_total{job="slow"} 2\n' in text
+                assert 'merch_job_skipped_total{job="slow"} 2\n' in text
+                with pytest.raises(HTTPError) as unknown:
+                    await client.post('/jobs/nope')
+                assert unknown.value.response.status == 404
+        finally:
+            await scheduler.stop()
+    asyncio.run(run())
+
+
+def test_daily_upload_and_catalog_sync_through_the_daemon(serve, tmp_path):
+    square, printful, klaviyo = serve(FakeSquare()), serve(FakePrintful()), serve(FakeKlaviyo())
+    tmp = str(tmp_path)
+    catalog = os.path.join(tmp, os.path.basename(CATALOG_CSV)[:-4] + '.bin')
+    csv_to_bin(os.path.join(ROOT, CATALOG_CSV), catalog)
+    store = StoreContext(
+        catalog, state_dir=tmp, jobs_db=os.path.join(tmp, 'daily.sqlite3'), out_dir=tmp,
+        square={'base_url': square.url, 'access_token': 'sq'},
+        printful={'base_url': printful.url, 'api_key': 'pf', 'rates': FAST_PRINTFUL,
+                  'checkpoint': os.path.join(tmp, 'daily.ckpt')},
+        klaviyo={'base_url': klaviyo.url, 'api_key': 'kl'})
+    scheduler = default_scheduler(store, port=0)
+    product = featured_row(store.catalog(), datetime.now(), store.rotation)
+
+    def items():
+        return [o['item_data']['name'] for o in square.objects.values() if o['type'] == 'ITEM']
+
+    async def run():
+        try:
+            daily = await scheduler.run('daily-upload')
+            uploaded, stats = items(), store.queue().stats()
+            await scheduler.run('catalog-sync')
+            synced, rows, requests = len(items()), len(store.catalog()), square.requests
+            await scheduler.run('catalog-sync')
+            return daily, uploaded, stats, synced - rows, square.requests - requests
+        finally:
+            await store.close()
+    daily, uploaded, stats, extra, requests = asyncio.run(run())
+    assert daily, scheduler.jobs['daily-upload'].last_error
+    assert stats == {'done': 4} and uploaded == [product['Product_Name']]
+    assert (len(printful.sync_products), len(klaviyo.campaigns)) == (1, 1)
+    assert any(name.startswith('social_posts_') for name in os.listdir(tmp))
+    # the whole catalog next to the featured product; the second sync finds nothing to send
+    assert extra == 1 and requests == 0 and store.reopened == 1
+    assert scheduler.jobs['catalog-sync'].failures == 0, scheduler.jobs['catalog-sync'].last_error
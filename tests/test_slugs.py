@@ -0,0 +1,64 @@
+"""Slugs: canonical, unique even for colliding names, stable across chunked writes, and resolvable."""
+import os
+import re
+
+import numpy as np
+import pytest
+
+from merch_store.catalog import synthetic
+from merch_store.catalog_bin import CatalogBinWriter, CatalogFile
+from merch_store.catalog_io import read_chunks
+from merch_store.daily import CATALOG_CSV
+from tests.conftest import ROOT
+
+CANONICAL = re.compile(r'^[a-z0-9]+(-[a-z0-9]+)*$')
+
+
+def colliding(n):
+    """Synthetic catalog whose names collide after slugging (case, punctuation, suffixes)."""
+    catalog = synthetic(n, seed=4)
+    stems = ['Premium Hoodie: "Powered by Humans"', 'premium hoodie (powered by humans)',
+             'Premium/Hoodie + Humans', 'Café Mug – “Real Artists”', 'premium-hoodie-powered-by-humans-2',
+             '???', '']
+    rng = np.random.default_rng(4)
+    picks = rng.integers(0, len(stems), n // 3)
+    catalog.name[rng.choice(n, n // 3, replace=False)] = [stems[i] for i in picks.tolist()]
+    return catalog
+
+
+def assert_unique_canonical(slugs):
+    assert len(set(slugs)) == len(slugs)
+    assert [s for s in slugs if not CANONICAL.match(s)] == []
+
+
+def test_catalog_slugs_are_unique_and_canonical():
+    (catalog,) = read_chunks(os.path.join(ROOT, CATALOG_CSV))
+    assert_unique_canonical(catalog.assign_slugs().tolist())
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return colliding(20_000)
+
+
+def test_colliding_names_get_unique_slugs(catalog):
+    assert_unique_canonical(catalog.assign_slugs().tolist())
+
+
+def test_chunked_write_assigns_the_same_slugs(catalog, tmp_path):
+    slugs = catalog.assign_slugs().tolist()
+    catalog.slug = None
+    path = str(tmp_path / 'chunked.bin')
+    with CatalogBinWriter(path, len(catalog)) as writer:
+        for start in range(0, len(catalog), 997):
+            writer.write(catalog.take(slice(start, start + 997)))
+    with CatalogFile(path) as f:
+        assert [f.slug(i) for i in range(len(f))] == slugs
+        assert all(f.find_slug(slug) == i for i, slug in enumerate(slugs))
+        assert f.find_slug('no-such-product') is None
+
+
+def test_slug_index_resolves_every_slug(catalog):
+    slugs = catalog.assign_slugs().tolist()
+    index = catalog.slug_index()
+    assert all(index.row(s) == i for i, s in enumerate(slugs))
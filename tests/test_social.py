@@ -0,0 +1,48 @@
+"""Social post CSVs: byte-identical to csv.writer and, for the daily format, to the guide's per-day files."""
+import csv
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from merch_store.catalog import synthetic
+from merch_store.social import DAILY_POSTS, HOOTSUITE_POSTS
+from testbed.workloads import legacy_schedule_social_media_posts
+
+START = datetime(2026, 1, 1)
+DAYS = 9
+
+
+@pytest.fixture
+def catalog():
+    catalog = synthetic(20, seed=2)
+    catalog.name[::7] = [f'Quoted "Tee", size {i}' for i in range(len(catalog.name[::7]))]
+    return catalog
+
+
+@pytest.mark.parametrize('fmt', [DAILY_POSTS, HOOTSUITE_POSTS], ids=['daily', 'hootsuite'])
+def test_matches_csv_writer(catalog, fmt, tmp_path):
+    path = tmp_path / 'posts.csv'
+    n = fmt.write_csv(catalog, str(path), START, DAYS, chunk_products=7)
+    rows = list(fmt.rows(catalog, START, DAYS, chunk_products=7))
+    with open(tmp_path / 'expected.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(fmt.columns)
+        writer.writerows([r[c] for c in fmt.columns] for r in rows)
+    assert path.read_bytes() == (tmp_path / 'expected.csv').read_bytes()
+    assert n == len(rows) > 0
+
+
+def test_daily_posts_match_the_legacy_files(catalog, tmp_path):
+    DAILY_POSTS.write_csv(catalog, str(tmp_path / 'daily.csv'), START, DAYS, chunk_products=7)
+    legacy = tmp_path / 'legacy'
+    legacy.mkdir()
+    expected = set()
+    for product in catalog.records():
+        for day in range(DAYS):
+            path = legacy_schedule_social_media_posts(product, START + timedelta(days=day), str(legacy))
+            with open(path, encoding='utf-8') as f:
+                expected.update(f.read().splitlines()[1:])
+    with open(tmp_path / 'daily.csv', encoding='utf-8') as f:
+        assert set(f.read().splitlines()[1:]) == expected
+    assert len(os.listdir(legacy)) == DAYS
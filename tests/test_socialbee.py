@@ -0,0 +1,78 @@
+"""SocialBee publisher: every post once and every image once, through server errors and reruns."""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from merch_store.catalog import synthetic
+from merch_store.http import RetryPolicy
+from merch_store.social import DAILY_POSTS
+from merch_store.socialbee import DeliveryLog, SocialBeePublisher, post_from_row
+from testbed.fakes import FakeSocialBee
+
+FAST_RETRY = RetryPolicy(attempts=10, base=0.002, cap=0.05)
+
+
+def publish(fake, posts, delivery):
+    async def run():
+        async with SocialBeePublisher('test', 'test', fake.url, delivery=delivery, retry=FAST_RETRY) as publisher:
+            return await publisher.publish(posts)
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def posts():
+    return [post_from_row(row) for row in DAILY_POSTS.rows(synthetic(300, seed=1), datetime(2026, 1, 1), 2)]
+
+
+@pytest.fixture
+def fake(serve):
+    return serve(FakeSocialBee(error_rate=0.1))
+
+
+def test_each_post_and_image_is_sent_once(fake, posts, tmp_path):
+    report = publish(fake, posts + posts[:50], str(tmp_path / 'delivery.log'))
+    assert report.ok and report.posted == len(posts) and report.skipped == 50, report
+    assert len(fake.posts) == len(posts)
+    assert set(fake.media_transfers) == {p['image_url'] for p in posts}
+    assert set(fake.media_transfers.values()) == {1}
+    assert {(p['text'], p['post_at']) for p in fake.posts.values()} == {(p['text'], p['post_at']) for p in posts}
+
+
+def test_rerun_sends_nothing(fake, posts, tmp_path):
+    log = str(tmp_path / 'delivery.log')
+    publish(fake, posts, log)
+    requests = fake.requests
+    report = publish(fake, posts, log)
+    assert report.posted == 0 and report.skipped == len(posts) and report.media_uploaded == 0, report
+    assert fake.requests == requests
+
+
+def test_rerun_after_losing_the_log_tail_creates_no_duplicates(fake, posts, tmp_path):
+    log = tmp_path / 'delivery.log'
+    publish(fake, posts, str(log))
+    lines = log.read_text().splitlines(keepends=True)
+    log.write_text(''.join(lines[:len(lines) // 2]) + lines[len(lines) // 2][:10])  # torn last line
+    requests = fake.requests
+    report = publish(fake, posts, str(log))
+    assert report.ok and fake.requests > requests
+    assert len(fake.posts) == len(posts) and set(fake.media_transfers.values()) == {1}
+    requests = fake.requests
+    report = publish(fake, posts, str(log))  # the deliveries recorded after the tear are remembered
+    assert report.posted == 0 and report.skipped == len(posts) and fake.requests == requests, report
+
+
+def test_deliveries_after_a_torn_line_survive_the_next_open(tmp_path):
+    path = str(tmp_path / 'delivery.log')
+    log = DeliveryLog(path)
+    log.record(key='a', status='sent', post_id=1)
+    log.close()
+    with open(path, 'a') as f:
+        f.write('{"key": "b", "sta')  # crash mid-write
+    log = DeliveryLog(path)
+    log.record(key='c', status='sent', post_id=3)
+    log.record(key='d', status='failed', error='timeout')
+    log.close()
+    log = DeliveryLog(path)
+    assert log.sent == {'a': 1, 'c': 3} and log.failed == {'d': 'timeout'}
+    log.close()
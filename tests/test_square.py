@@ -0,0 +1,83 @@
+"""Square catalog client against the local FakeSquare."""
+import asyncio
+import time
+
+from merch_store.catalog import synthetic
+from merch_store.http import RetryPolicy
+from merch_store.square import SquareCatalogClient, create_square_product, idempotency_key, item_object
+from testbed.fakes import FakeSquare
+
+def products(n, seed=0):
+    return list(synthetic(n, seed=seed).records())
+
+
+def upsert(fake, rows, **kwargs):
+    async def run():
+        async with SquareCatalogClient('test', fake.url, **kwargs) as square:
+            return await square.upsert_products(rows), square.pool.connections_opened
+    return asyncio.run(run())
+
+
+def test_batch_upsert_creates_every_item(serve):
+    fake = serve(FakeSquare())
+    rows = products(2500)
+    ids, opened = upsert(fake, rows, objects_per_request=1000, max_connections=2)
+    assert len(ids) == 2 * len(rows)  # each item and its variation
+    assert fake.requests == 3 and opened <= 2
+    names = sorted(o['item_data']['name'] for o in fake.objects.values())
+    assert names == sorted(row['Product_Name'] for row in rows)
+    amounts = {o['item_data']['name']: o['item_data']['variations'][0]['item_variation_data']['price_money']['amount']
+               for o in fake.objects.values()}
+    assert all(amounts[row['Product_Name']] == round(row['Retail_Price'] * 100) for row in rows)
+
+
+def test_rerun_replays_instead_of_duplicating(serve):
+    fake = serve(FakeSquare())
+    rows = products(300)
+    first, _ = upsert(fake, rows)
+    second, _ = upsert(fake, rows)
+    assert first == second
+    assert len(fake.objects) == len(rows)
+
+
+def test_idempotency_keys_are_deterministic():
+    row = products(1)[0]
+    assert idempotency_key(item_object(row)) == idempotency_key(item_object(dict(row)))
+    changed = dict(row, Retail_Price=row['Retail_Price'] + 1)
+    assert idempotency_key(item_object(changed)) != idempotency_key(item_object(row))
+
+
+class ArrivalsSquare(FakeSquare):
+    """FakeSquare noting when each request arrived and the Retry-After it was answered with."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.arrivals = []
+
+    async def _dispatch(self, *args):
+        arrived = time.monotonic()
+        reply = await super()._dispatch(*args)
+        self.arrivals.append((arrived, float(reply[2]['Retry-After']) if reply[0] == 429 else None))
+        return reply
+
+
+def test_throttled_upload_backs_off_and_completes(serve):
+    fake = serve(ArrivalsSquare(rate_limit=20))
+    rows = products(400)
+    # One batch at a time, and waiting out Retry-After always finds a token: one retry is enough.
+    ids, _ = upsert(fake, rows, objects_per_request=10, concurrency=1,
+                    retry=RetryPolicy(attempts=2, base=0.001, cap=0.05))
+    assert fake.throttled > 0
+    assert len(ids) == 2 * len(rows) and len(fake.objects) == len(rows)
+    for (arrived, wait), (retried, _) in zip(fake.arrivals, fake.arrivals[1:]):
+        if wait is not None:
+            assert retried - arrived >= wait
+
+
+def test_create_product(serve):
+    fake = serve(FakeSquare())
+    row = products(1)[0]
+    reply = create_square_product(row, access_token='test', base_url=fake.url)
+    assert reply['catalog_object']['item_data']['name'] == row['Product_Name']
+    assert create_square_product(row, access_token='test', base_url=fake.url) == reply
+    assert len(fake.objects) == 1
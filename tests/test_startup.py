@@ -0,0 +1,76 @@
+"""Daily run startup: the stdlib row reader, product selection, and whole runs against fake services."""
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pytest
+
+from merch_store.catalog import synthetic
+from merch_store.catalog_bin import CatalogFile, csv_to_bin, write_catalog
+from merch_store.catalog_row import CatalogRows
+from merch_store.daily import CATALOG_CSV, Rotation, get_next_product_from_catalog
+from testbed.fakes import FakeKlaviyo, FakePrintful, FakeSquare
+from testbed.workloads import daily_run, environment
+from tests.conftest import ROOT
+
+HEAVY = ['numpy', 'pandas', 'multiprocessing', 'requests']
+
+
+def expected_product(path, now, rotation):
+    with CatalogFile(path) as catalog:
+        days = catalog.days()
+        return catalog.row(catalog.find_day(int(days[rotation.position(now, len(days))])))
+
+
+@pytest.fixture(params=['shipped', 'dense', 'sparse'])
+def catalog_bin(request, tmp_path):
+    path = str(tmp_path / f'{request.param}.bin')
+    if request.param == 'shipped':
+        csv_to_bin(os.path.join(ROOT, CATALOG_CSV), path)
+        return path
+    catalog = synthetic(3000, seed=5)
+    catalog.assign_slugs()
+    if request.param == 'sparse':
+        catalog.day = catalog.day[::-1] * 3  # unsorted, with gaps
+    write_catalog(catalog, path)
+    return path
+
+
+def test_stdlib_rows_match_catalog_file(catalog_bin):
+    with CatalogRows(catalog_bin) as rows, CatalogFile(catalog_bin) as catalog:
+        assert len(rows) == len(catalog)
+        for i in range(len(rows)):
+            assert rows.row(i) == catalog.row(i), i
+        assert (rows.row_at(0) is None) == catalog_bin.endswith('sparse.bin')
+
+
+@pytest.mark.parametrize('rotation', [Rotation(), Rotation(start=datetime(2026, 1, 1))], ids=['default', '2026'])
+def test_selection_matches_catalog_file(catalog_bin, rotation):
+    for day in range(1, 400, 13):
+        now = datetime(2026, 1, 1) + (day - 1) * rotation.every
+        got = get_next_product_from_catalog(catalog_bin[:-4] + '.csv', now=now, rotation=rotation)
+        assert got == expected_product(catalog_bin, now, rotation), now
+
+
+# Lifts Printful's rate limits (worker processes fork with them lifted) and lists the heavy modules loaded.
+PROBE = ("import json, sys\nfrom merch_store import printful\n"
+         "printful.ENDPOINT_RATES.update(catalog=1000.0, create_product=1000.0, create_variant=1000.0)\n"
+         "from merch_store.__main__ import main\nmain(sys.argv[1:])\n"
+         f"print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))")
+
+
+@pytest.mark.parametrize('workers', [0, 2], ids=['in-process', 'workers'])
+def test_daily_run_does_every_job(serve, tmp_path, workers):
+    square, printful, klaviyo = serve(FakeSquare()), serve(FakePrintful()), serve(FakeKlaviyo())
+    csv_path = shutil.copy(os.path.join(ROOT, CATALOG_CSV), tmp_path)
+    csv_to_bin(csv_path, os.path.splitext(csv_path)[0] + '.bin')
+    env = environment(str(tmp_path), square, printful, klaviyo)
+    _, out = daily_run(str(tmp_path), env, 'daily', workers, code=PROBE)
+    assert 'complete!' in out and "'done': 4" in out, out
+    product = get_next_product_from_catalog(os.path.join(ROOT, CATALOG_CSV))
+    assert product['Product_Name'] in out
+    assert square.requests > 0 and (len(printful.sync_products), len(klaviyo.campaigns)) == (1, 1)
+    assert {o['item_data']['name'] for o in square.objects.values() if o['type'] == 'ITEM'} == {product['Product_Name']}
+    if not workers:
+        assert json.loads(out.splitlines()[-1]) == [], 'heavy modules loaded'
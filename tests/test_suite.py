@@ -0,0 +1,52 @@
+"""Benchmark suite: the outputs of the cases it times, and its regression check."""
+import numpy as np
+import pytest
+
+from benchmarks.suite import compare, comparable
+from merch_store.catalog import Catalog, derive_metrics, synthetic
+from merch_store.catalog_io import read_chunks
+
+
+@pytest.fixture(params=[30, 10_000])
+def catalog(request):
+    return synthetic(request.param, seed=request.param)
+
+
+def test_build_derives_the_same_columns(catalog):
+    supplier, retail, shipping, _, _ = catalog.money_columns()
+    built = Catalog.from_dollars(catalog.day, catalog.category.decode(), catalog.name, supplier, retail, shipping,
+                                 catalog.channels.decode())
+    assert np.array_equal(built.profit_cents, catalog.profit_cents)
+    assert np.array_equal(built.margin_pct, catalog.margin_pct)
+    total, profit, margin = derive_metrics(catalog.supplier_cents[:1], catalog.retail_cents[:1],
+                                           catalog.shipping_cents[:1])
+    assert profit[0] == catalog.retail_cents[0] - total[0] and margin[0] == catalog.margin_pct[0]
+
+
+def test_csv_round_trip(catalog, tmp_path):
+    path = str(tmp_path / 'catalog.csv')
+    catalog.to_csv(path)
+    with open(path, encoding='utf-8') as f:
+        assert sum(1 for _ in f) == len(catalog) + 1
+    chunks = list(read_chunks(path))
+    assert sum(len(chunk) for chunk in chunks) == len(catalog)
+    assert np.array_equal(np.concatenate([chunk.profit_cents for chunk in chunks]), catalog.profit_cents)
+
+
+def run(seconds, node='a', **results):
+    """A history entry timing each case at 100 rows, 100 units per call."""
+    return {'node': node, 'machine': 'x86_64', 'python': '3.11', 'numpy': '1.26',
+            'results': [{'case': case, 'rows': 100, 'units': 100, 'seconds': seconds * scale}
+                        for case, scale in results.items()]}
+
+
+def test_only_runs_from_the_same_environment_are_compared():
+    history = [run(1.0, build=1), run(1.0, node='b', build=1), dict(run(1.0, build=1), numpy='2.0')]
+    assert comparable(history, run(1.0, build=1)) == history[:1]
+
+
+def test_change_is_against_the_median_of_earlier_runs():
+    baseline = [run(1.0, build=1, pricing=1), run(1.0, build=1.1, pricing=1), run(1.0, build=9, pricing=1)]
+    changes = {case: change for case, _, change in compare(run(1.0, build=1.65, pricing=1, social=1)['results'],
+                                                           baseline)}
+    assert changes == {'build': pytest.approx(0.5), 'pricing': pytest.approx(0.0)}  # social has no history
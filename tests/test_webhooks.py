@@ -0,0 +1,156 @@
+"""Webhook receiver: signatures, dedupe, backpressure, retries and log compaction."""
+import asyncio
+import json
+import os
+import time
+
+from merch_store.webhooks import EventLog, main
+from testbed.workloads import SlowTracker, deliver, events, signed, start_receiver
+
+
+def test_every_genuine_event_is_processed_once(tmp_path):
+    log = str(tmp_path / 'events.log')
+    genuine = events(2000)
+    failing = {'square:evt-1000', 'square:evt-1500'}  # not redelivered below
+    tracker = SlowTracker(delay=0.002, fail=failing)
+    rx = start_receiver(log, tracker, queue_size=32, workers=2, retry_after=0.01)
+    try:
+        requests = [signed(rx, *e) for e in genuine]
+        # Redeliveries, Printful's with its retry counter bumped, and forgeries.
+        for path, payload in genuine[:300]:
+            requests.append(signed(rx, path, {**payload, 'retries': 1} if 'retries' in payload else payload))
+        requests += [signed(rx, *e, forge=True) for e in events(50, start=5000)]
+        _, statuses = asyncio.run(deliver(rx.url, requests, 16))
+    finally:
+        rx.stop_thread()
+    assert statuses.count(401) == 50 and statuses.count(200) == len(requests) - 50, set(statuses)
+    stats = rx.stats
+    assert stats['shed'] > 0, 'queue never filled: backpressure untested'
+    assert stats['received'] == len(genuine) and stats['duplicates'] == 300 and stats['rejected'] == 50, stats
+    assert tracker.calls == len(genuine) and stats['failed'] == len(failing)
+    assert len(tracker.orders) == len(genuine) - len(failing)
+
+    # Restart: the failed events are still pending in the log and are retried once.
+    tracker = SlowTracker()
+    rx = start_receiver(log, tracker)
+    try:
+        # Re-signed: Square signs the notification URL, and the port is new.
+        _, statuses = asyncio.run(deliver(rx.url, [signed(rx, *e) for e in genuine[:1600]], 4))
+    finally:
+        rx.stop_thread()
+    assert statuses == [200] * 1600 and rx.stats['duplicates'] == 1600 and rx.stats['received'] == 0
+    assert tracker.calls == len(failing) and set(tracker.orders) == {'ORD-1000', 'ORD-1500'}
+
+
+class FailOnce(SlowTracker):
+    async def __call__(self, event):
+        try:
+            await super().__call__(event)
+        finally:
+            self.fail.clear()
+
+
+def test_failed_event_is_retried_on_redelivery(tmp_path):
+    tracker = FailOnce(fail={'square:evt-0'})
+    rx = start_receiver(str(tmp_path / 'events.log'), tracker)
+    try:
+        for n in range(3):
+            _, statuses = asyncio.run(deliver(rx.url, [signed(rx, *events(1)[0])], 1))
+            assert statuses == [200]
+            deadline = time.monotonic() + 10
+            while rx.stats['failed'] + rx.stats['processed'] < min(n + 1, 2) and time.monotonic() < deadline:
+                time.sleep(0.01)
+    finally:
+        rx.stop_thread()
+    assert tracker.calls == 2 and 'ORD-0' in tracker.orders
+    assert (rx.stats['received'], rx.stats['failed'], rx.stats['processed'], rx.stats['duplicates']) == (2, 1, 1, 1)
+    assert EventLog(rx.log_path).pending() == []
+
+
+def test_oversized_delivery_is_refused_before_the_signature_check(tmp_path):
+    rx = start_receiver(str(tmp_path / 'events.log'), max_body=1000)
+    try:
+        path, payload = events(1)[0]
+        payload = {**payload, 'padding': 'x' * 2000}
+        _, statuses = asyncio.run(deliver(rx.url, [signed(rx, path, payload)], 1))
+    finally:
+        rx.stop_thread()
+    assert statuses == [413] and rx.stats['rejected'] == 0 and rx.stats['received'] == 0
+
+
+def event(n, received):
+    return {'id': f'square:evt-{n}', 'source': 'square', 'type': 'order.updated', 'received': received,
+            'payload': {'n': n}}
+
+
+def test_log_compaction_keeps_pending_events_and_recent_ids(tmp_path):
+    path = str(tmp_path / 'events.log')
+    log = EventLog(path, ttl=100.0, compact_at=1000)
+    for n in range(40):
+        log.append(event(n, received=1000.0 + n))
+        if n % 4:
+            log.mark_done(f'square:evt-{n}')
+    log.compact(now=1100.0)  # nothing is past the TTL yet: only the done records go
+    pending = [e['id'] for e in log.pending()]
+    assert pending == [f'square:evt-{n}' for n in range(0, 40, 4)]
+    assert len(log) == 40 and log.records == 40
+    log.compact(now=1120.0)
+    assert len(log) == 20 + 5 and log.is_duplicate('square:evt-25') and not log.is_duplicate('square:evt-5')
+    log.close()
+
+    replayed = EventLog(path, ttl=100.0, compact_at=1000)
+    assert [e['id'] for e in replayed.pending()] == pending
+    assert replayed.seen == log.seen
+    replayed.close()
+
+
+def test_events_after_a_torn_line_survive_the_next_restart(tmp_path):
+    path = str(tmp_path / 'events.log')
+    log = EventLog(path)
+    log.append(event(1, received=1000.0))
+    log.close()
+    with open(path, 'ab') as f:
+        f.write(json.dumps(event(2, received=1001.0)).encode('utf-8')[:-5])  # crash mid-write
+    log = EventLog(path)
+    assert [e['id'] for e in log.pending()] == ['square:evt-1']
+    for n in (3, 4):
+        log.append(event(n, received=1000.0 + n))
+    log.mark_done('square:evt-3')
+    log.close()
+
+    replayed = EventLog(path)
+    assert [e['id'] for e in replayed.pending()] == ['square:evt-1', 'square:evt-4']
+    assert all(replayed.is_duplicate(f'square:evt-{n}') for n in (1, 3, 4))
+    assert not replayed.is_duplicate('square:evt-2')  # never acknowledged: the sender redelivers it
+    replayed.close()
+
+
+def test_log_stays_bounded(tmp_path):
+    path = str(tmp_path / 'events.log')
+    log = EventLog(path, ttl=0.0, compact_at=100)
+    for n in range(1000):
+        log.append(event(n, received=0.0))
+        log.mark_done(f'square:evt-{n}')
+    assert log.records <= 100 and len(log) <= 100
+    with open(path, 'rb') as f:
+        assert sum(1 for _ in f) == log.records and all(json.loads(line) for line in open(path, 'rb'))
+    log.close()
+    assert os.path.getsize(path) < 100 * 200
+
+
+def test_main_listens_on_loopback_by_default(monkeypatch):
+    seen = {}
+
+    class Stop(Exception):
+        pass
+
+    def receiver(*args, **kwargs):
+        seen.update(kwargs)
+        raise Stop
+
+    monkeypatch.setattr('merch_store.webhooks.WebhookReceiver', receiver)
+    try:
+        main(['--port', '0'])
+    except Stop:
+        pass
+    assert seen['host'] == '127.0.0.1'